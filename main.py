@@ -1,11 +1,16 @@
+import os
 import json
 import argparse
 
-from src.infraProperties import InfraProperties
+from src.base import _jsonable
+from src.InfraProperties import InfraProperties
 from src.networkGraph import NetworkGraph
 from src.appProperties import AppProperties
 from src.serviceGraph import ServiceGraph
-from src.greedy import GreedyFirstFit
+from src.cli import BATCH_ORDERS, build_strategy
+from src.profiling import capture
+from src.queueing import QueueingEvaluator
+from src.topologyStore import PropertiesCache
 from mappingUnitTest import MappingUnitTest
 
 
@@ -16,12 +21,64 @@ if __name__ == '__main__':
 
     parser = argparse.ArgumentParser(description='Demo placement runner')
     parser.add_argument('--start-host', type=int, default=None, help='Optional infra node id to start placement from')
+    parser.add_argument('--infra', default=infra_properties_path, help='Infra .properties file')
+    parser.add_argument('--batch', default=None, help='JSONL file with one application per line: place them all on one shared infrastructure')
+    parser.add_argument('--order', default='fifo', choices=BATCH_ORDERS, help='Batch placement order: fifo, or largest first by CPU, RAM, bandwidth or component count')
+    parser.add_argument('--strategy', default='greedy', choices=['greedy', 'exact', 'consolidate', 'hierarchical'], help='Placement strategy (hierarchical: greedy within regions chosen first, for very large infrastructures)')
+    parser.add_argument('--fit', default='first', choices=['first', 'best', 'worst'], help='Host choice of --strategy greedy: first fit from --start-host, least or most CPU left over')
+    parser.add_argument('--split', action='store_true', help='Let greedy/consolidate spread a service link that fits no single path over several paths (min-cost flow)')
+    parser.add_argument('--partition', action='store_true', help='Let greedy group components linked by the most bandwidth (multilevel Kernighan-Lin) and place each group on one host')
+    parser.add_argument('--regions', default='cluster', choices=['cluster', 'tier'], help='Regions of --strategy hierarchical: latency clusters of --region-size nodes, or hosts.tier')
+    parser.add_argument('--region-size', type=int, default=256, help='Nodes per latency cluster of --strategy hierarchical')
+    parser.add_argument('--max-utilisation', type=float, default=None, help='Only use hosts whose M/M/1 utilisation stays below this, other applications counting as fully busy (greedy, exact, hierarchical)')
+    parser.add_argument('--time-budget', type=float, default=10.0, help='Wall-clock budget in seconds for --strategy exact')
+    parser.add_argument('--multi-start', action='store_true', help='Run the strategy from every host (or --sample hosts) in a process pool and keep the best result')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --multi-start (default: CPU count)')
+    parser.add_argument('--sample', type=int, default=None, help='Number of randomly sampled start hosts for --multi-start')
+    parser.add_argument('--objective', default='latency', help='Objective for --multi-start: latency, bandwidth, active_hosts, energy, end_to_end')
+    parser.add_argument('--serve', action='store_true', help='Run a resident placement service (JSON lines on stdin/stdout or --socket)')
+    parser.add_argument('--socket', default=None, help='Unix socket path for --serve')
+    parser.add_argument('--cache-dir', default=None, help='Cache parsed .properties files in this directory (default: $EAEC_CACHE_DIR if set, otherwise no cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the .properties files as text, even with $EAEC_CACHE_DIR set')
+    parser.add_argument('--profile', action='store_true', help='Record per-phase timings and hot-path counters in meta["profile"] (greedy, consolidate)')
+    parser.add_argument('--cprofile', default=None, metavar='PATH', help='Run the placement under cProfile, write the stats to PATH and print the top functions')
+    parser.add_argument('--tracemalloc', action='store_true', help='Trace allocations during the placement and print the peak and top allocation sites')
     args = parser.parse_args()
-    # backwards-compatible CLI: parse the default properties file and print JSON
-    infra = InfraProperties.from_file()
+
+    cache_dir = None if args.no_cache else args.cache_dir or os.environ.get('EAEC_CACHE_DIR')
+    cache = PropertiesCache(cache_dir) if cache_dir else None
+
+    def load_network_graph(path):
+        if cache is None:
+            return NetworkGraph.from_infra_properties(InfraProperties.from_file(path))
+        return cache.network_graph(path)
+
+    strategy = build_strategy(args.strategy, time_budget=args.time_budget, profile=args.profile,
+                              multi_start=args.multi_start, objective=args.objective,
+                              workers=args.workers, sample=args.sample, fit=args.fit, split=args.split,
+                              partition=args.partition, regions=args.regions, region_size=args.region_size,
+                              max_utilisation=args.max_utilisation)
+
+    if args.serve:
+        from src.service import run_service
+
+        run_service(load_network_graph(args.infra), socket_path=args.socket, strategy=strategy)
+        raise SystemExit(0)
+
+    if args.batch:
+        from src.batch import BatchPlacer, load_apps_jsonl
+
+        net = load_network_graph(args.infra)
+        apps = load_apps_jsonl(args.batch)
+        with capture(args.cprofile, args.tracemalloc):
+            batch = BatchPlacer(strategy=strategy, order=args.order).place_all(apps, net, start_host=args.start_host)
+        print(json.dumps(batch.to_dict(), indent=2))
+        raise SystemExit(0)
+
+    # backwards-compatible CLI: parse the properties files once and print JSON
+    infra = cache.infra(args.infra) if cache is not None else InfraProperties.from_file(args.infra)
     print(infra.to_json(indent=2, ensure_ascii=False))
 
-    infra = InfraProperties.from_file(infra_properties_path)
     G = NetworkGraph.from_infra_dict(infra.to_dict())
     print("Summary:")
     G.print_summary()
@@ -35,7 +92,7 @@ if __name__ == '__main__':
     print(json.dumps(G.connectivity_info(), indent=2))
     G.draw()
 
-    app = AppProperties.from_file(app_properties_path)
+    app = cache.app(app_properties_path) if cache is not None else AppProperties.from_file(app_properties_path)
     print("\nApp Properties:")
     print(app.to_json(indent=2, ensure_ascii=False))
 
@@ -53,14 +110,11 @@ if __name__ == '__main__':
     service_G.draw()
 
     # Placement example
-    infra = InfraProperties.from_file(infra_properties_path)
     net = NetworkGraph.from_infra_dict(infra.to_dict())
-
-    app = AppProperties.from_file(app_properties_path   )
     svc = ServiceGraph.from_app_dict(app.to_dict())
 
-    strategy = GreedyFirstFit()
-    result = strategy.place(svc, net, start_host=args.start_host)
+    with capture(args.cprofile, args.tracemalloc):
+        result = strategy.place(svc, net, start_host=args.start_host)
 
     print('Placement status:', result.meta.get('status'))
     print('Path:')
@@ -80,6 +134,12 @@ if __name__ == '__main__':
         print('Final edge resources:')
         pretty = {f"{u}->{v}": info for (u, v), info in result.meta['edge_res'].items()}
         print(json.dumps(pretty, indent=2))
+    if 'profile' in result.meta:
+        print('Profile:')
+        print(json.dumps(result.meta['profile'], indent=2))
+    if result.meta.get('status') == 'ok':
+        print('Queueing estimate (M/M/1, null = saturated):')
+        print(json.dumps(_jsonable(QueueingEvaluator(svc, net).evaluate(result)), indent=2))
 
     G.draw()
     
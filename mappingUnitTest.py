@@ -1,7 +1,6 @@
 from src.base import PlacementResult
 from src.serviceGraph import *
 from src.networkGraph import *
-import copy
 
 class MappingUnitTest:
     @staticmethod
@@ -57,37 +56,45 @@ class MappingUnitTest:
     @staticmethod
     def validate_edge_routing_constraints(network_graph: NetworkGraph, service_graph: ServiceGraph, final_placement: PlacementResult):
         # Test 5: Validate edge routing constraints
-        path = final_placement.paths # Dict[Tuple[int, int], List[int]]
-        reconstructed = copy.deepcopy(network_graph)
+        path_sets = final_placement.path_sets() # Dict[Tuple[int, int], List[Tuple[List[int], bandwidth or None]]]
+        # bandwidth consumed so far per infra edge (instead of copying the whole graph)
+        consumed = {}
 
-        for (u, v), p in path.items():
+        for (u, v), weighted in path_sets.items():
             edge_data = service_graph.G.get_edge_data(u, v)
             if edge_data is None:
                 raise AssertionError(f"No edge data for service edge {u}->{v}")
-            bw_req = edge_data.get('bandwidth', 0)
             lat_limit = edge_data.get('latency', float('inf'))
+            if any(share is not None for _, share in weighted):
+                carried = sum(share for _, share in weighted)
+                assert carried == edge_data.get('bandwidth', 0), f"Split paths of edge {u}->{v} carry {carried}, expected {edge_data.get('bandwidth', 0)}"
 
-            # Validate path starts and ends correctly
-            src_host = final_placement.mapping[u]
-            dst_host = final_placement.mapping[v]
-            assert p[0] == src_host, f"Path for edge {u}->{v} does not start at source host {src_host}"
-            assert p[-1] == dst_host, f"Path for edge {u}->{v} does not end at destination host {dst_host}"
+            for p, share in weighted:
+                # a split service link reserves its share of bandwidth on each of its paths
+                bw_req = edge_data.get('bandwidth', 0) if share is None else share
 
-            # Validate path edges exist and accumulate latency
-            total_latency = 0
-            for i in range(len(p)-1):
-                if not reconstructed.G.has_edge(p[i], p[i+1]):
-                    raise AssertionError(f"Path for edge {u}->{v} contains invalid edge {p[i]}->{p[i+1]}")
-                edge_attr = reconstructed.G.get_edge_data(p[i], p[i+1])
-                total_latency += edge_attr.get('latency', 0)
-                assert total_latency <= lat_limit, f"Path for edge {u}->{v} exceeds latency limit: {total_latency} > {lat_limit}"
-                
-                assert "bandwidth" in edge_attr, f"Edge {p[i]}->{p[i+1]} missing bandwidth attribute"
-                # Consume bandwidth
-                if 'bandwidth' in edge_attr:
-                    if edge_attr['bandwidth'] < bw_req:
-                        raise AssertionError(f"Edge {p[i]}->{p[i+1]} cannot accommodate bandwidth {bw_req} for service edge {u}->{v}")
-                    edge_attr['bandwidth'] -= bw_req
+                # Validate path starts and ends correctly
+                src_host = final_placement.mapping[u]
+                dst_host = final_placement.mapping[v]
+                assert p[0] == src_host, f"Path for edge {u}->{v} does not start at source host {src_host}"
+                assert p[-1] == dst_host, f"Path for edge {u}->{v} does not end at destination host {dst_host}"
+
+                # Validate path edges exist and accumulate latency
+                total_latency = 0
+                for i in range(len(p)-1):
+                    if not network_graph.G.has_edge(p[i], p[i+1]):
+                        raise AssertionError(f"Path for edge {u}->{v} contains invalid edge {p[i]}->{p[i+1]}")
+                    edge_attr = network_graph.G.get_edge_data(p[i], p[i+1])
+                    total_latency += edge_attr.get('latency', 0)
+                    assert total_latency <= lat_limit, f"Path for edge {u}->{v} exceeds latency limit: {total_latency} > {lat_limit}"
+
+                    assert "bandwidth" in edge_attr, f"Edge {p[i]}->{p[i+1]} missing bandwidth attribute"
+                    # Consume bandwidth (a negative bandwidth means unlimited in the properties format)
+                    if 'bandwidth' in edge_attr and edge_attr['bandwidth'] >= 0:
+                        used = consumed.get((p[i], p[i+1]), 0)
+                        if edge_attr['bandwidth'] - used < bw_req:
+                            raise AssertionError(f"Edge {p[i]}->{p[i+1]} cannot accommodate bandwidth {bw_req} for service edge {u}->{v}")
+                        consumed[(p[i], p[i+1])] = used + bw_req
 
         print("Edge routing constraint tests passed.")
 
@@ -1,17 +1,14 @@
-import javaproperties
+from src.propertiesReader import TupleTable, read_properties
 
-import re
 import json
 
-# helper to parse a list of braced tuples like: {16,32000}, {8,16000}
-def parse_braced_tuples(s):
-    # find all occurrences of { ... }
-    items = re.findall(r"\{([^}]*)\}", s)
-    parsed = []
-    for it in items:
-        parts = [p.strip() for p in it.split(',') if p.strip()!='']
-        parsed.append(parts)
-    return parsed
+# braced-tuple keys: (columns, accepted field counts)
+HOST_COLUMNS = (('cpu', 'q'), ('ram', 'q'), ('power_idle', 'd'), ('power_peak', 'd'))
+LINK_COLUMNS = (('src', 'q'), ('dst', 'q'), ('bandwidth', 'q'), ('latency', 'q'), ('energy_per_bit', 'd'))
+TUPLE_KEYS = {
+    'hosts.configuration': (HOST_COLUMNS, (2, 4)),
+    'network.topology': (LINK_COLUMNS, (4, 5)),
+}
 
 
 class InfraProperties:
@@ -20,61 +17,81 @@ class InfraProperties:
     Usage:
       infra = InfraProperties.from_file('properties/Infra_8nodes.properties')
       print(infra.to_json())
+
+    `from_file` streams the file once: `hosts.configuration` and `network.topology`
+    go straight into typed columns (``host_table`` / ``link_table``), and malformed
+    tuples raise ``ValueError`` with their line number. The per-host and per-link
+    dicts (``hosts`` / ``links``) are only built when first accessed.
     """
 
-    def __init__(self, props: dict):
+    def __init__(self, props: dict, tables: dict = None):
         self.props = props
-        self.hosts = []
-        self.links = []
+        tables = tables or {}
+        self.host_table = tables.get('hosts.configuration') or self._table_from_props('hosts.configuration')
+        self.link_table = tables.get('network.topology') or self._table_from_props('network.topology')
+        self._hosts = None
+        self._links = None
         self.edges_nb = 0
         self.network_diameter = None
         self.hosts_nb = 0
+        self.hosts_tier = None
         self._parse_all()
 
     @classmethod
     def from_file(cls, file_path: str = 'properties/Infra_8nodes.properties'):
-        with open(file_path, 'rb') as f:
-            props = javaproperties.load(f)
-        return cls(props)
+        props, tables = read_properties(file_path, TUPLE_KEYS)
+        return cls(props, tables)
+
+    def _table_from_props(self, key):
+        columns, widths = TUPLE_KEYS[key]
+        return TupleTable.from_string(key, self.props.get(key, ''), columns, widths)
 
     def _parse_all(self):
         self.hosts_nb = int(self.props.get('hosts.nb', 0))
-        self._parse_hosts()
-        self._parse_topology()
         self.edges_nb = int(self.props.get('edges.nb', 0))
         self.network_diameter = int(self.props.get('network.diameter', 0)) if 'network.diameter' in self.props else None
-
-    def _parse_hosts(self):
-        hosts_config_raw = self.props.get('hosts.configuration', '')
-        hosts_parsed = parse_braced_tuples(hosts_config_raw)
-        hosts = []
-        for entry in hosts_parsed:
-            cpu = int(entry[0]) if len(entry) > 0 else None
-            ram = int(entry[1]) if len(entry) > 1 else None
-            hosts.append({'cpu': cpu, 'ram': ram})
-        self.hosts = hosts
-
-    def _parse_topology(self):
-        topology_raw = self.props.get('network.topology', '')
-        topology_parsed = parse_braced_tuples(topology_raw)
-        links = []
-        for entry in topology_parsed:
-            if len(entry) >= 4:
-                src = int(entry[0])
-                dst = int(entry[1])
-                bw = int(entry[2])
-                lat = int(entry[3])
-                links.append({'src': src, 'dst': dst, 'bandwidth': bw, 'latency': lat})
-        self.links = links
+        # optional tier name of every host, in host order (e.g. written by src.generator)
+        if self.props.get('hosts.tier'):
+            self.hosts_tier = [t.strip() for t in self.props['hosts.tier'].split(',')]
+
+    @property
+    def hosts(self):
+        if self._hosts is None:
+            hosts = []
+            for entry in self.host_table.rows():
+                host = {'cpu': entry[0], 'ram': entry[1]}
+                # optional power model: {CPU, RAM, idle W, peak W}
+                if len(entry) > 3:
+                    host['power_idle'] = entry[2]
+                    host['power_peak'] = entry[3]
+                hosts.append(host)
+            self._hosts = hosts
+        return self._hosts
+
+    @property
+    def links(self):
+        if self._links is None:
+            links = []
+            for entry in self.link_table.rows():
+                link = {'src': entry[0], 'dst': entry[1], 'bandwidth': entry[2], 'latency': entry[3]}
+                # optional transport energy in nJ per bit
+                if len(entry) > 4:
+                    link['energy_per_bit'] = entry[4]
+                links.append(link)
+            self._links = links
+        return self._links
 
     def to_dict(self):
-        return {
+        out = {
             'hosts.nb': self.hosts_nb,
             'hosts': self.hosts,
             'links': self.links,
             'edges.nb': self.edges_nb,
             'network.diameter': self.network_diameter,
         }
+        if self.hosts_tier is not None:
+            out['hosts.tier'] = self.hosts_tier
+        return out
 
     def to_json(self, **kwargs):
         return json.dumps(self.to_dict(), **kwargs)
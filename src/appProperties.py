@@ -1,9 +1,9 @@
-import javaproperties
-
 import re
 import json
 from typing import List, Dict, Any, Optional
 
+from src.propertiesReader import TupleTable, read_properties
+
 
 def parse_braced_tuples(s: str) -> List[List[str]]:
 	items = re.findall(r"\{([^}]*)\}", s)
@@ -14,6 +14,15 @@ def parse_braced_tuples(s: str) -> List[List[str]]:
 	return parsed
 
 
+# braced-tuple keys: (columns, accepted field counts)
+COMPONENT_COLUMNS = (('cpu', 'q'), ('ram', 'q'), ('lambda', 'q'), ('mu', 'q'))
+LINK_COLUMNS = (('id', 'q'), ('src', 'q'), ('dst', 'q'), ('bandwidth', 'q'), ('latency', 'q'))
+TUPLE_KEYS = {
+	'components.requirements': (COMPONENT_COLUMNS, (2, 3, 4)),
+	'links.description': (LINK_COLUMNS, (5,)),
+}
+
+
 class AppProperties:
 	"""Parser for the application .properties content.
 
@@ -25,10 +34,17 @@ class AppProperties:
 	  - links.nb
 	  - component.nbDZ (optional)
 	  - component.DZ (optional list)
+
+	`from_file` streams the file once, reading `components.requirements` and
+	`links.description` straight into typed columns (``component_table`` /
+	``link_table``); malformed tuples raise ``ValueError`` with their line number.
 	"""
 
-	def __init__(self, props: Dict[str, str]):
+	def __init__(self, props: Dict[str, str], tables: Dict[str, TupleTable] = None):
 		self.props = props
+		tables = tables or {}
+		self.component_table = tables.get('components.requirements') or self._table_from_props('components.requirements')
+		self.link_table = tables.get('links.description') or self._table_from_props('links.description')
 		self.application_nb: int = 0
 		self.components_count: int = 0
 
@@ -47,9 +63,12 @@ class AppProperties:
 
 	@classmethod
 	def from_file(cls, file_path: str = 'properties/Appli_4comps.properties'):
-		with open(file_path, 'rb') as f:
-			props = javaproperties.load(f)
-		return cls(props)
+		props, tables = read_properties(file_path, TUPLE_KEYS)
+		return cls(props, tables)
+
+	def _table_from_props(self, key: str) -> TupleTable:
+		columns, widths = TUPLE_KEYS[key]
+		return TupleTable.from_string(key, self.props.get(key, ''), columns, widths)
 
 	def _parse_all(self):
 		self.application_nb = int(self.props.get('application.nb', 0))
@@ -59,35 +78,16 @@ class AppProperties:
 		self._parse_constraints()
 
 	def _parse_components(self):
-		raw = self.props.get('components.requirements', '')
-		entries = parse_braced_tuples(raw)
+		names = ('cpu', 'ram', 'lambda', 'mu')
+		# missing trailing fields are None
 		comps: List[Dict[str, Any]] = []
-		for e in entries:
-			# Expect [CPU, RAM, lambda, mu]
-			comp = {
-				'cpu': int(e[0]) if len(e) > 0 else None,
-				'ram': int(e[1]) if len(e) > 1 else None,
-				'lambda': int(e[2]) if len(e) > 2 else None,
-				'mu': int(e[3]) if len(e) > 3 else None,
-			}
-			comps.append(comp)
+		for e in self.component_table.rows():
+			comps.append({name: (e[i] if i < len(e) else None) for i, name in enumerate(names)})
 		self.components = comps
 
 	def _parse_links(self):
-		raw = self.props.get('links.description', '')
-		entries = parse_braced_tuples(raw)
-		links: List[Dict[str, Any]] = []
-		for e in entries:
-			# Expect [id, src, dst, bandwidth, latency]
-			if len(e) >= 5:
-				link = {
-					'id': int(e[0]),
-					'src': int(e[1]),
-					'dst': int(e[2]),
-					'bandwidth': int(e[3]),
-					'latency': int(e[4]),
-				}
-				links.append(link)
+		names = ('id', 'src', 'dst', 'bandwidth', 'latency')
+		links = [dict(zip(names, e)) for e in self.link_table.rows()]
 		self.links = links
 		self.links_nb = int(self.props.get('links.nb', len(links)))
 
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import math
+from dataclasses import dataclass, field
 from typing import Dict, Any, Optional, Protocol, Tuple, List
 
 
@@ -13,3 +14,80 @@ class PlacementResult:
     # diagnostics (e.g., path info, resource usage)
     meta: Dict[str, Any] 
 
+    # service links split over several paths: (u,v) -> [{'path', 'bandwidth', 'latency'}, ...];
+    # ``paths`` then holds the one carrying the largest share
+    flows: Dict[Tuple[int, int], List[Dict[str, Any]]] = field(default_factory=dict)
+
+    def path_sets(self) -> Dict[Tuple[int, int], List[Tuple[List[int], Optional[float]]]]:
+        """Every routed service link as weighted paths: (path, bandwidth it carries).
+
+        A split link lists each of its paths; any other link has its single path
+        with bandwidth None, meaning the service link's whole bandwidth.
+        """
+        out = {key: [(path, None)] for key, path in self.paths.items()}
+        for key, flows in self.flows.items():
+            out[key] = [(f['path'], f['bandwidth']) for f in flows]
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready view: (u, v) keys become "u->v" strings, as printed by main.py."""
+        out = {
+            'mapping': _jsonable(self.mapping),
+            'paths': _jsonable(self.paths),
+            'meta': _jsonable(self.meta),
+        }
+        if self.flows:
+            out['flows'] = _jsonable(self.flows)
+        return out
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PlacementResult':
+        """Inverse of `to_dict`: "u->v" keys become (u, v) tuples and numeric string keys ints."""
+        return cls(
+            mapping=_from_jsonable(data.get('mapping', {})),
+            paths=_from_jsonable(data.get('paths', {})),
+            meta=_from_jsonable(data.get('meta', {})),
+            flows=_from_jsonable(data.get('flows', {})),
+        )
+
+
+class PlacementStrategy(Protocol):
+    def place(self, service_graph, network_graph, start_host: Optional[int] = None, ledger=None) -> PlacementResult:
+        """Map every component of ``service_graph`` onto ``network_graph`` and route its links.
+
+        Allocations go into ``ledger`` when given (and are left untouched on failure),
+        otherwise into a private one whose final state is reported in ``meta``.
+        """
+        ...
+
+
+def _jsonable(obj: Any) -> Any:
+    # inf/nan have no JSON spelling: they become null
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {(f"{k[0]}->{k[1]}" if isinstance(k, tuple) else k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if hasattr(obj, 'tolist'):
+        # numpy scalars and arrays
+        return _jsonable(obj.tolist())
+    return obj
+
+
+def _key_from_json(key: Any) -> Any:
+    if isinstance(key, str):
+        u, sep, v = key.partition('->')
+        try:
+            return (int(u), int(v)) if sep else int(key)
+        except ValueError:
+            return key
+    return key
+
+
+def _from_jsonable(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {_key_from_json(k): _from_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_from_jsonable(v) for v in obj]
+    return obj
@@ -0,0 +1,314 @@
+import argparse
+import csv
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Callable, List, Tuple
+
+import numpy as np
+
+from src.batch import BatchPlacer
+from src.generator import ComponentSpec, service_chain, service_dag, tiered_infra
+from src.networkGraph import NetworkGraph
+from src.objectives import total_path_latency
+from src.serviceGraph import ServiceGraph
+from src.validation import validate_placements
+
+
+def _greedy():
+    from src.greedy import GreedyPlacement
+    return GreedyPlacement()
+
+
+def _greedy_best():
+    from src.greedy import GreedyPlacement
+    return GreedyPlacement(fit='best')
+
+
+def _greedy_worst():
+    from src.greedy import GreedyPlacement
+    return GreedyPlacement(fit='worst')
+
+
+def _greedy_partition():
+    from src.greedy import GreedyPlacement
+    return GreedyPlacement(partition=True)
+
+
+def _hierarchical():
+    from src.hierarchy import HierarchicalPlacement
+    return HierarchicalPlacement()
+
+
+def _consolidate():
+    from src.consolidation import EnergyConsolidation
+    return EnergyConsolidation()
+
+
+def _exact():
+    from src.exact import BranchAndBound
+    return BranchAndBound(time_budget=1.0)
+
+
+STRATEGIES: Dict[str, Callable[[], Any]] = {
+    'greedy': _greedy,
+    'greedy-best': _greedy_best,
+    'greedy-worst': _greedy_worst,
+    'greedy-partition': _greedy_partition,
+    'hierarchical': _hierarchical,
+    'consolidate': _consolidate,
+    'exact': _exact,
+}
+
+# figures compared against the baseline: name -> (direction, relative tolerance, absolute floor)
+# direction +1: larger is worse, -1: smaller is worse
+CHECKS = {
+    'place_s': (+1, 0.5, 0.01),
+    'build_s': (+1, 0.5, 0.01),
+    'validate_s': (+1, 0.5, 0.01),
+    'peak_mem_mb': (+1, 0.2, 1.0),
+    'acceptance_ratio': (-1, 0.0, 0.01),
+    'validation_failures': (+1, 0.0, 0.0),
+    'mean_path_latency': (+1, 0.05, 1.0),
+}
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One point of the sweep: a tiered infra of ``hosts`` hosts loaded with
+    applications of ``components`` components until their CPU demand reaches
+    ``load`` x the infra's CPU capacity (at most ``max_apps`` apps)."""
+    hosts: int
+    components: int
+    load: float
+    shape: str = 'dag'
+    seed: int = 0
+    max_apps: int = 2000
+
+    @property
+    def key(self) -> str:
+        return f'h{self.hosts}-c{self.components}-l{self.load:g}-{self.shape}-s{self.seed}'
+
+    def build(self) -> Tuple[Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]:
+        """Generated infra dict and (app id, app dict) pairs."""
+        n_cloud = max(1, self.hosts // 200)
+        n_fog = max(2, self.hosts // 20)
+        infra = tiered_infra(max(1, self.hosts - n_fog - n_cloud), n_fog, n_cloud, seed=self.seed)
+        capacity = sum(h['cpu'] for h in infra['hosts'])
+        mean_cpu = float(np.mean([c for c, _ in ComponentSpec().profiles]))
+        n_apps = min(self.max_apps, max(1, math.ceil(self.load * capacity / (mean_cpu * self.components))))
+        make = service_chain if self.shape == 'chain' else service_dag
+        apps = [(f'app-{i}', make(self.components, seed=self.seed * 100003 + i)) for i in range(n_apps)]
+        return infra, apps
+
+
+def _peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def run_scenario(scenario: Scenario, strategy: str, repeat: int = 1, measure_memory: bool = True,
+                 validate: bool = True) -> Dict[str, Any]:
+    """Benchmark one strategy on one scenario.
+
+    Times are the best of ``repeat`` runs (validation, which checks all accepted apps
+    together with `validate_placements`, only runs in the first); peak memory is measured in
+    a separate run under ``tracemalloc`` so it does not slow down the timed runs.
+    """
+    infra, app_dicts = scenario.build()
+    factory = STRATEGIES[strategy]
+    # the whole topology's path index, built outside the timed placement (hierarchical works on subgraphs)
+    needs_index = getattr(factory(), 'needs_path_index', True)
+
+    def build():
+        net = NetworkGraph.from_infra_dict(infra)
+        apps = [(app_id, ServiceGraph.from_app_dict(app)) for app_id, app in app_dicts]
+        return net, apps
+
+    def place(net, apps):
+        return BatchPlacer(strategy=factory()).place_all(apps, net)
+
+    timings: Dict[str, List[float]] = {'build_s': [], 'index_s': [], 'place_s': [], 'validate_s': []}
+    for rep in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        net, apps = build()
+        t1 = time.perf_counter()
+        if needs_index:
+            net.path_index().build()
+        t2 = time.perf_counter()
+        batch = place(net, apps)
+        t3 = time.perf_counter()
+        if validate and rep == 0:
+            svcs = dict(apps)
+            report = validate_placements(net, [(res, svcs[app_id]) for app_id, res in batch.results
+                                               if res.meta.get('status') == 'ok'])
+            failures = len(report.violations)
+        t4 = time.perf_counter()
+        for name, value in zip(timings, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            if name != 'validate_s' or rep == 0:
+                timings[name].append(value)
+
+    record: Dict[str, Any] = {
+        'scenario': scenario.key,
+        **asdict(scenario),
+        'strategy': strategy,
+        'apps': batch.stats['apps'],
+        **{name: min(values) for name, values in timings.items()},
+    }
+    record['placements_per_s'] = record['apps'] / record['place_s'] if record['place_s'] > 0 else None
+    record['validation_failures'] = failures if validate else None
+    if not validate:
+        record['validate_s'] = None
+    if measure_memory:
+        def full_run():
+            n, a = build()
+            if needs_index:
+                n.path_index().build()
+            place(n, a)
+        record['peak_mem_mb'] = _peak_mb(full_run)
+
+    svcs = dict(apps)
+    accepted = [(res, svcs[app_id]) for app_id, res in batch.results if res.meta.get('status') == 'ok']
+    util = batch.stats['utilization']
+    record.update({
+        'accepted': batch.stats['accepted'],
+        'acceptance_ratio': batch.stats['acceptance_ratio'],
+        'mean_path_latency': float(np.mean([total_path_latency(r, s, net) for r, s in accepted])) if accepted else None,
+        'cpu_utilization': util.get('cpu'),
+        'active_hosts': util.get('active_hosts'),
+        'total_w': batch.stats['energy']['total_w'],
+    })
+    return record
+
+
+def run_suite(hosts: List[int], components: List[int], loads: List[float], strategies: List[str],
+              shape: str = 'dag', seed: int = 0, repeat: int = 1, measure_memory: bool = True,
+              validate: bool = True, max_apps: int = 2000, log=None) -> List[Dict[str, Any]]:
+    records = []
+    for h in hosts:
+        for c in components:
+            for load in loads:
+                scenario = Scenario(h, c, load, shape=shape, seed=seed, max_apps=max_apps)
+                for strategy in strategies:
+                    rec = run_scenario(scenario, strategy, repeat=repeat, measure_memory=measure_memory, validate=validate)
+                    records.append(rec)
+                    if log is not None:
+                        log(f"{scenario.key:<28} {strategy:<12} place {rec['place_s']:.3f}s "
+                            f"accept {rec['acceptance_ratio']:.2f} ({rec['apps']} apps)")
+    return records
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def write_json(records: List[Dict[str, Any]], path: str):
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'results': records}, f, indent=2)
+
+
+def write_csv(records: List[Dict[str, Any]], path: str):
+    fields: List[str] = []
+    for rec in records:
+        fields += [k for k in rec if k not in fields]
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        data = json.load(f)
+    return data['results'] if isinstance(data, dict) else data
+
+
+def compare(records: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            checks: Dict[str, Tuple[int, float, float]] = None) -> List[Dict[str, Any]]:
+    """Regressions of ``records`` against ``baseline``, matched on (scenario, strategy).
+
+    A figure regresses when it moves in the bad direction by more than both its
+    relative tolerance and its absolute floor (see `CHECKS`).
+    """
+    checks = checks or CHECKS
+    base = {(r['scenario'], r['strategy']): r for r in baseline}
+    regressions = []
+    for rec in records:
+        ref = base.get((rec['scenario'], rec['strategy']))
+        if ref is None:
+            continue
+        for name, (direction, rel, floor) in checks.items():
+            new, old = rec.get(name), ref.get(name)
+            if new is None or old is None:
+                continue
+            delta = (new - old) * direction
+            if delta > floor and delta > rel * abs(old):
+                regressions.append({'scenario': rec['scenario'], 'strategy': rec['strategy'], 'metric': name,
+                                    'baseline': old, 'current': new,
+                                    'change': (new - old) / old if old else None})
+    return regressions
+
+
+def _csv_list(cast):
+    return lambda s: [cast(x) for x in s.split(',') if x.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Placement scaling benchmark on generated scenarios')
+    parser.add_argument('--hosts', type=_csv_list(int), default=[100, 300, 1000], help='infra sizes (hosts)')
+    parser.add_argument('--components', type=_csv_list(int), default=[4, 8], help='components per app')
+    parser.add_argument('--loads', type=_csv_list(float), default=[0.25, 0.75], help='CPU demand / capacity')
+    parser.add_argument('--strategies', type=_csv_list(str), default=['greedy', 'consolidate'],
+                        help=f"comma-separated, from {sorted(STRATEGIES)}")
+    parser.add_argument('--shape', choices=['chain', 'dag'], default='dag')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per point (best is kept)')
+    parser.add_argument('--max-apps', type=int, default=2000)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--no-validate', action='store_true', help='skip validating the placements')
+    parser.add_argument('-o', '--output', default='benchmark.json')
+    parser.add_argument('--csv', default=None)
+    parser.add_argument('--baseline', default=None, help='results JSON to compare against')
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    unknown = set(args.strategies) - set(STRATEGIES)
+    if unknown:
+        parser.error(f"unknown strategies: {sorted(unknown)}")
+    records = run_suite(args.hosts, args.components, args.loads, args.strategies, shape=args.shape,
+                        seed=args.seed, repeat=args.repeat, measure_memory=not args.no_memory,
+                        validate=not args.no_validate, max_apps=args.max_apps,
+                        log=lambda msg: print(msg, file=sys.stderr))
+    write_json(records, args.output)
+    if args.csv:
+        write_csv(records, args.csv)
+    if args.baseline:
+        regressions = compare(records, load_results(args.baseline))
+        for r in regressions:
+            change = f"{r['change']:+.0%}" if r['change'] is not None else 'n/a'
+            print(f"REGRESSION {r['scenario']} {r['strategy']} {r['metric']}: "
+                  f"{r['baseline']:.4g} -> {r['current']:.4g} ({change})", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
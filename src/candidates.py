@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.compiled import CompiledService, CompiledTopology
+from src.pathIndex import PathIndex
+
+
+class CandidateIndex:
+    """Hosts each component of one application may ever use on one topology.
+
+    A host is a candidate for component ``c`` when
+    - its total CPU and RAM can hold ``c`` (static capacity, before any allocation),
+    - it is the host ``c`` is pinned to by ``component.DZ``, if ``c`` is pinned,
+    - it is within the latency limit of every service link between ``c`` and a
+      component whose candidates are down to a single host (the pinned ones, and
+      in turn any component they leave with one host).
+
+    Each row is a bitset over host indices (``np.packbits``, little bit order), so
+    an index costs ``n_components * n_hosts / 8`` bytes. Strategies intersect a row
+    with the ledger's residual capacity (`fitting`) instead of scanning every host.
+    Pins naming an unknown component or host are reported in ``invalid_pins``;
+    ``restricted[c]`` tells whether pins or latency narrowed ``c`` below static capacity.
+    """
+
+    def __init__(self, topo: CompiledTopology, svc: CompiledService, pins: Dict[int, int],
+                 index: Optional[PathIndex] = None):
+        self.topo = topo
+        self.n_hosts = topo.n_nodes
+        self.invalid_pins: List[Tuple[int, int]] = []
+        self.pins: Dict[int, int] = {}
+        for comp, host in pins.items():
+            if comp not in svc.index or host not in topo.index:
+                self.invalid_pins.append((comp, host))
+            else:
+                self.pins[svc.index[comp]] = topo.index[host]
+
+        n = svc.n_components
+        masks = (topo.host_cpu[None, :] >= svc.cpu[:, None]) & (topo.host_ram[None, :] >= svc.ram[:, None])
+        static_counts = masks.sum(axis=1)
+        for c, h in self.pins.items():
+            keep = masks[c, h]
+            masks[c] = False
+            masks[c, h] = keep
+        if index is not None and svc.n_edges:
+            self._propagate(masks, svc, index)
+        self.counts = masks.sum(axis=1)
+        # components whose candidates are narrower than static capacity alone (pins, latency)
+        self.restricted = self.counts < static_counts
+        self.bits = np.packbits(masks, axis=1, bitorder='little') if n else np.zeros((0, 0), dtype=np.uint8)
+
+    @staticmethod
+    def _propagate(masks: np.ndarray, svc: CompiledService, index: PathIndex):
+        """Filter the neighbours of single-host components by link latency, until nothing changes."""
+        adj: List[List[Tuple[int, int, bool]]] = [[] for _ in range(svc.n_components)]
+        for k in range(svc.n_edges):
+            a, b = int(svc.edge_src[k]), int(svc.edge_dst[k])
+            if a != b and np.isfinite(svc.edge_latency[k]):
+                adj[a].append((k, b, True))
+                adj[b].append((k, a, False))
+        counts = masks.sum(axis=1)
+        queue = [c for c in range(svc.n_components) if counts[c] == 1]
+        done = set()
+        while queue:
+            c = queue.pop()
+            if c in done:
+                continue
+            done.add(c)
+            if counts[c] != 1:
+                continue  # emptied by another single-host neighbour since it was queued: infeasible
+            h = int(np.flatnonzero(masks[c])[0])
+            for k, other, out in adj[c]:
+                # c is the source of link k when out: other must be reachable from h, else reach h
+                lat = index.distances_from(h) if out else index.distances_to(h)
+                before = counts[other]
+                masks[other] &= lat <= svc.edge_latency[k]
+                counts[other] = masks[other].sum()
+                if counts[other] == 1 and before != 1:
+                    queue.append(other)
+
+    # -------- queries ---------
+    def mask(self, c: int) -> np.ndarray:
+        """Boolean candidate mask of component index ``c`` over host indices."""
+        return np.unpackbits(self.bits[c], count=self.n_hosts, bitorder='little').view(bool)
+
+    def hosts(self, c: int) -> np.ndarray:
+        """Candidate host indices of ``c``, ascending."""
+        return np.flatnonzero(self.mask(c))
+
+    def infeasible(self) -> np.ndarray:
+        """Component indices without any candidate host."""
+        return np.flatnonzero(self.counts == 0)
+
+    def shared(self, cs) -> np.ndarray:
+        """Host indices that are candidates of every component index in ``cs``, ascending."""
+        bits = np.bitwise_and.reduce(self.bits[np.asarray(cs)], axis=0)
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_hosts, bitorder='little'))
+
+    def ordered(self, c: int, start: int = 0) -> np.ndarray:
+        """Candidate host indices of ``c`` in host order rotated to begin at host index ``start``."""
+        return _rotate(self.hosts(c), start)
+
+    def ordered_shared(self, cs, start: int = 0) -> np.ndarray:
+        """`shared` candidates of the components ``cs``, rotated like `ordered`."""
+        return _rotate(self.shared(cs), start)
+
+    def fitting(self, c: int, ledger, cpu: int, ram: int, start: int = 0) -> np.ndarray:
+        """Candidates of ``c`` with ``cpu``/``ram`` free in ``ledger``, in `ordered` order."""
+        hosts = self.ordered(c, start)
+        return hosts[ledger.fitting_hosts(cpu, ram, hosts)]
+
+
+def _rotate(hosts: np.ndarray, start: int) -> np.ndarray:
+    if start:
+        cut = np.searchsorted(hosts, start)
+        hosts = np.concatenate((hosts[cut:], hosts[:cut]))
+    return hosts
+
+
+def candidate_index(service_graph, network_graph) -> CandidateIndex:
+    """The `CandidateIndex` of an application on a network, built once per topology snapshot.
+
+    It is cached on the service graph and rebuilt when the network's snapshot changes
+    (e.g. after `NetworkGraph.set_link_latency`) or the service graph is invalidated.
+    """
+    topo = network_graph.compile()
+    cached = getattr(service_graph, '_candidates', None)
+    if cached is not None and cached.topo is topo:
+        return cached
+    pins = service_graph.locality_pins()
+    paths = network_graph.path_index() if pins else None
+    index = CandidateIndex(topo, service_graph.compile(), pins, paths)
+    service_graph._candidates = index
+    return index
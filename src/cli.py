@@ -0,0 +1,421 @@
+"""Headless command line: ``python -m src.cli {place,validate,inspect,bench} ...``.
+
+Every run writes one JSON document to stdout (or ``--output``), with the
+command's result and a ``timings`` block. Modules are imported inside the
+subcommands, so a run only pays for what it uses (matplotlib only with
+``--draw``, scipy only once a path index is built).
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+_T0 = time.perf_counter()
+
+STRATEGIES = ('greedy', 'consolidate', 'exact', 'hierarchical')
+# src.hostSelector.FIT_POLICIES, repeated so that argument parsing does not import numpy
+FIT_POLICIES = ('first', 'best', 'worst')
+# src.batch.ORDERS, repeated for the same reason
+BATCH_ORDERS = ('fifo', 'cpu_desc', 'ram_desc', 'bw_desc', 'size_desc')
+
+
+def process_age() -> Optional[float]:
+    """Seconds since the interpreter process started (Linux ``/proc``), or None."""
+    try:
+        with open('/proc/self/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class _Timings:
+    def __init__(self):
+        self.startup_s = process_age()
+        self.values: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def __call__(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.values[name] = self.values.get(name, 0.0) + time.perf_counter() - t0
+
+    def report(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {'startup_s': self.startup_s, 'cli_import_to_end_s': time.perf_counter() - _T0}
+        out.update(self.values)
+        return out
+
+
+def build_strategy(name: str = 'greedy', time_budget: float = 10.0, profile: bool = False, multi_start: bool = False,
+                   objective: str = 'latency', workers: int = None, sample: int = None, fit: str = 'first',
+                   split: bool = False, partition: bool = False, regions: str = 'cluster', region_size: int = 256,
+                   max_utilisation: float = None):
+    """Strategy object for a CLI strategy name (see `STRATEGIES`), optionally wrapped in `MultiStart`.
+
+    ``split`` routes greedy/consolidate links with a `SplittableRouter`, so a link's
+    bandwidth may be spread over several paths. ``partition`` makes greedy place
+    groups of chatty components as units (`src.partition`). ``hierarchical`` runs that
+    greedy within the ``regions`` ('cluster' or 'tier') chosen for each application
+    (`src.hierarchy`). ``max_utilisation`` keeps greedy/exact off hosts whose M/M/1
+    utilisation would reach it (`QueueingEvaluator.stable_hosts`).
+    """
+    router = None
+    if split:
+        from src.routing import SplittableRouter
+
+        router = SplittableRouter()
+    if name == 'exact':
+        from src.exact import BranchAndBound
+
+        strategy = BranchAndBound(time_budget=time_budget, max_utilisation=max_utilisation)
+    elif name == 'consolidate':
+        from src.consolidation import EnergyConsolidation
+
+        strategy = EnergyConsolidation(router=router, profile=profile)
+    elif name == 'greedy':
+        from src.greedy import GreedyPlacement
+
+        strategy = GreedyPlacement(router=router, profile=profile, fit=fit, partition=partition,
+                                  max_utilisation=max_utilisation)
+    elif name == 'hierarchical':
+        from src.greedy import GreedyPlacement
+        from src.hierarchy import HierarchicalPlacement
+
+        inner = GreedyPlacement(router=router, profile=profile, fit=fit, partition=partition, selector=False,
+                               max_utilisation=max_utilisation)
+        strategy = HierarchicalPlacement(inner, regions=regions, region_size=region_size, profile=profile)
+    else:
+        raise ValueError(f"Unknown strategy: {name} (expected one of {list(STRATEGIES)})")
+    if multi_start:
+        from src.multiStart import MultiStart
+
+        strategy = MultiStart(strategy, objective=objective, max_workers=workers, sample=sample)
+    return strategy
+
+
+# -------- input loading (each file is read once) ---------
+def _cache(args):
+    if args.no_cache:
+        return None
+    from src.topologyStore import PropertiesCache
+
+    return PropertiesCache(args.cache_dir)
+
+
+def load_network(path: str, cache=None):
+    if cache is not None:
+        return cache.network_graph(path)
+    from src.InfraProperties import InfraProperties
+    from src.networkGraph import NetworkGraph
+
+    return NetworkGraph.from_infra_properties(InfraProperties.from_file(path))
+
+
+def load_service(path: str, cache=None):
+    if cache is not None:
+        return cache.service_graph(path)
+    from src.appProperties import AppProperties
+    from src.serviceGraph import ServiceGraph
+
+    return ServiceGraph.from_app_dict(AppProperties.from_file(path).to_dict())
+
+
+def load_apps(args, cache=None):
+    """(app id, ServiceGraph) pairs from ``--batch`` (JSONL) or a single ``--app``."""
+    if args.batch:
+        from src.batch import load_apps_jsonl
+
+        return load_apps_jsonl(args.batch)
+    return [(os.path.splitext(os.path.basename(args.app))[0], load_service(args.app, cache))]
+
+
+def _add_inputs(p: argparse.ArgumentParser, app: bool = True):
+    p.add_argument('--infra', required=True, help='Infra .properties file')
+    if app:
+        group = p.add_mutually_exclusive_group(required=True)
+        group.add_argument('--app', help='Application .properties file')
+        group.add_argument('--batch', help='JSONL file with one application per line')
+    p.add_argument('--cache-dir', default=None, help='Parsed-properties cache directory (default: $EAEC_CACHE_DIR or ~/.cache/eaec)')
+    p.add_argument('--no-cache', action='store_true', help='Always parse the .properties files as text')
+
+
+def _add_draw(p: argparse.ArgumentParser, what: str):
+    p.add_argument('--draw', default=None, metavar='PATH', help=f'Save a drawing of {what} (PNG/SVG/PDF, no display needed)')
+    p.add_argument('--aggregate', action='store_true', help='Draw one node per tier/cluster even on small infras')
+    p.add_argument('--groups', default='tier', choices=['tier', 'cluster'], help='Grouping of the aggregated drawing')
+
+
+def _draw(args, net, cache, t: _Timings, **kwargs) -> Dict[str, Any]:
+    """Save ``net``'s drawing to ``args.draw``, with layouts cached next to the parsed-properties cache."""
+    import matplotlib
+
+    matplotlib.use('Agg')
+    from src.rendering import LayoutCache
+
+    layouts = LayoutCache(os.path.join(cache.cache_dir, 'layouts')) if cache is not None else None
+    with t('draw_s'):
+        summary = net.draw(path=args.draw, aggregate=args.aggregate or None, groups=args.groups, cache=layouts, **kwargs)
+    out: Dict[str, Any] = {'path': args.draw}
+    if summary:
+        out.update(summary)
+    return out
+
+
+# -------- commands ---------
+def cmd_place(args, t: _Timings) -> Dict[str, Any]:
+    cache = _cache(args)
+    with t('load_s'):
+        net = load_network(args.infra, cache)
+        apps = load_apps(args, cache)
+    strategy = build_strategy(args.strategy, time_budget=args.time_budget, profile=args.profile,
+                              multi_start=args.multi_start, objective=args.objective,
+                              workers=args.workers, sample=args.sample, fit=args.fit, split=args.split,
+                              partition=args.partition, regions=args.regions, region_size=args.region_size,
+                              max_utilisation=args.max_utilisation)
+    if getattr(strategy, 'needs_path_index', True):
+        with t('path_index_s'):
+            net.path_index().build()
+
+    from src.profiling import capture
+
+    doc: Dict[str, Any] = {'strategy': args.strategy}
+    with t('place_s'), capture(args.cprofile, args.tracemalloc):
+        if args.batch:
+            from src.batch import BatchPlacer
+
+            batch = BatchPlacer(strategy=strategy, order=args.order).place_all(apps, net, start_host=args.start_host)
+            results = batch.results
+            doc.update(batch.to_dict())
+        else:
+            results = [(apps[0][0], strategy.place(apps[0][1], net, start_host=args.start_host))]
+            doc['result'] = results[0][1].to_dict()
+    if args.validate:
+        from src.validation import validate_placements
+
+        svcs = dict(apps)
+        with t('validate_s'):
+            report = validate_placements(net, [(res, svcs[app_id]) for app_id, res in results
+                                               if res.meta.get('status') == 'ok'])
+        doc['validation'] = report.to_dict(limit=args.max_violations)
+    if args.draw:
+        svcs = dict(apps)
+        doc['drawing'] = _draw(args, net, cache, t, results=[res for _, res in results],
+                               placements=[(res, svcs[app_id]) for app_id, res in results])
+    doc['accepted'] = sum(res.meta.get('status') == 'ok' for _, res in results)
+    doc['apps'] = len(results)
+    doc['exit_code'] = 0 if doc['accepted'] == doc['apps'] and doc.get('validation', {}).get('ok', True) else 1
+    return doc
+
+
+def cmd_validate(args, t: _Timings) -> Dict[str, Any]:
+    from src.base import PlacementResult
+    from src.validation import validate_placements
+
+    cache = _cache(args)
+    with t('load_s'):
+        net = load_network(args.infra, cache)
+        apps = load_apps(args, cache)
+        with open(args.result, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    # accepts the output of `place` (single or batch), a BatchResult or a PlacementResult dict
+    if 'results' in data:
+        entries = [(str(e.get('id')), PlacementResult.from_dict(e)) for e in data['results']]
+    else:
+        entries = [(apps[0][0], PlacementResult.from_dict(data.get('result', data)))]
+    svcs = dict(apps)
+    missing = sorted({app_id for app_id, _ in entries} - set(svcs)) if args.batch else []
+    if missing:
+        raise ValueError(f"results for apps missing from {args.batch}: {missing[:10]}")
+    if not args.batch:
+        if len(entries) != 1:
+            raise ValueError("--app validates a single result; use --batch for batch results")
+        entries = [(apps[0][0], entries[0][1])]
+    placed = [(res, svcs[app_id]) for app_id, res in entries
+              if args.all or res.meta.get('status', 'ok') == 'ok']
+    with t('validate_s'):
+        report = validate_placements(net, placed)
+    doc = report.to_dict(limit=args.max_violations)
+    doc['exit_code'] = 0 if report.ok else 1
+    return doc
+
+
+def _stats(values) -> Dict[str, Any]:
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64)
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return {'count': int(values.size), 'unlimited': int(values.size)}
+    return {'count': int(values.size), 'min': float(finite.min()), 'max': float(finite.max()),
+            'mean': float(finite.mean()), 'total': float(finite.sum()), 'unlimited': int(values.size - finite.size)}
+
+
+def cmd_inspect(args, t: _Timings) -> Dict[str, Any]:
+    import numpy as np
+
+    cache = _cache(args)
+    doc: Dict[str, Any] = {}
+    with t('load_s'):
+        net = load_network(args.infra, cache)
+        apps = load_apps(args, cache) if (args.app or args.batch) else []
+    with t('compile_s'):
+        topo = net.compile()
+    loops = topo.edge_src == topo.indices
+    doc['network'] = {
+        'nodes': topo.n_nodes,
+        'links': topo.n_edges,
+        'self_loops': int(np.count_nonzero(loops)),
+        'metadata': {k: v for k, v in net.metadata.items() if k != 'hosts.tier'},
+        'cpu': _stats(topo.host_cpu),
+        'ram': _stats(topo.host_ram),
+        'out_degree': _stats(np.diff(topo.indptr) - np.bincount(topo.edge_src[loops], minlength=topo.n_nodes)),
+        'bandwidth': _stats(topo.edge_bandwidth[~loops]),
+        'latency': _stats(topo.edge_latency[~loops]),
+        'power_modelled_hosts': int(np.count_nonzero(topo.host_power_peak > 0)),
+    }
+    if args.connectivity:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        with t('connectivity_s'):
+            adj = csr_matrix((np.ones(topo.n_edges), topo.indices, topo.indptr), shape=(topo.n_nodes, topo.n_nodes))
+            n_strong, _ = connected_components(adj, directed=True, connection='strong')
+            n_weak, _ = connected_components(adj, directed=True, connection='weak')
+        doc['network']['strongly_connected_components'] = int(n_strong)
+        doc['network']['weakly_connected_components'] = int(n_weak)
+
+    doc['apps'] = []
+    for app_id, svc in apps:
+        c = svc.compile()
+        doc['apps'].append({
+            'id': app_id,
+            'components': c.n_components,
+            'links': c.n_edges,
+            'cpu': int(c.cpu.sum()),
+            'ram': int(c.ram.sum()),
+            'bandwidth': float(c.edge_bandwidth.sum()),
+            'pins': len(svc.locality_pins()),
+        })
+    if apps:
+        doc['demand'] = {
+            'cpu': sum(a['cpu'] for a in doc['apps']),
+            'ram': sum(a['ram'] for a in doc['apps']),
+            'cpu_ratio': sum(a['cpu'] for a in doc['apps']) / max(1, int(topo.host_cpu.sum())),
+        }
+
+    tiers = net.metadata.get('hosts.tier')
+    if tiers:
+        names, counts = np.unique(np.asarray(tiers), return_counts=True)
+        doc['network']['tiers'] = dict(zip(names.tolist(), counts.tolist()))
+    if args.draw:
+        doc['drawing'] = _draw(args, net, cache, t)
+    return doc
+
+
+def cmd_bench(args, t: _Timings) -> Dict[str, Any]:
+    from src import benchmark
+
+    args = benchmark.build_parser().parse_args(args.bench_args)
+    unknown = set(args.strategies) - set(benchmark.STRATEGIES)
+    if unknown:
+        raise ValueError(f"unknown strategies: {sorted(unknown)}")
+    with t('bench_s'):
+        records = benchmark.run_suite(args.hosts, args.components, args.loads, args.strategies, shape=args.shape,
+                                      seed=args.seed, repeat=args.repeat, measure_memory=not args.no_memory,
+                                      validate=not args.no_validate, max_apps=args.max_apps)
+    if args.csv:
+        benchmark.write_csv(records, args.csv)
+    doc: Dict[str, Any] = {'environment': benchmark.environment(), 'results': records}
+    if args.baseline:
+        doc['regressions'] = benchmark.compare(records, benchmark.load_results(args.baseline))
+        doc['exit_code'] = 1 if doc['regressions'] else 0
+    return doc
+
+
+COMMANDS = {'place': cmd_place, 'validate': cmd_validate, 'inspect': cmd_inspect, 'bench': cmd_bench}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description='Headless placement runner (JSON output)')
+    parser.add_argument('-o', '--output', default=None, help='Write the JSON document here instead of stdout')
+    parser.add_argument('--indent', type=int, default=None, help='Indent the JSON output')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('place', help='Place one application (--app) or a batch (--batch)')
+    _add_inputs(p)
+    p.add_argument('--strategy', default='greedy', choices=STRATEGIES)
+    p.add_argument('--order', default='fifo', choices=BATCH_ORDERS, help='Batch order (desc: largest first)')
+    p.add_argument('--start-host', type=int, default=None)
+    p.add_argument('--fit', default='first', choices=FIT_POLICIES, help='Host choice of --strategy greedy')
+    p.add_argument('--split', action='store_true', help='Spread a link that fits no single path over several (greedy, consolidate)')
+    p.add_argument('--partition', action='store_true', help='Place groups of components linked by the most bandwidth as units (greedy)')
+    p.add_argument('--regions', default='cluster', choices=('cluster', 'tier'), help='Regions of --strategy hierarchical: latency clusters or hosts.tier')
+    p.add_argument('--region-size', type=int, default=256, help='Nodes per latency cluster of --strategy hierarchical')
+    p.add_argument('--max-utilisation', type=float, default=None,
+                   help='Skip hosts whose M/M/1 utilisation would reach this (greedy, exact, hierarchical)')
+    p.add_argument('--time-budget', type=float, default=10.0, help='Seconds for --strategy exact')
+    p.add_argument('--multi-start', action='store_true')
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--sample', type=int, default=None)
+    p.add_argument('--objective', default='latency')
+    p.add_argument('--validate', action='store_true', help='Validate the accepted placements and add the report')
+    p.add_argument('--max-violations', type=int, default=100, help='Violations listed in the report (counts are exact)')
+    p.add_argument('--profile', action='store_true', help='Phase timings and counters in meta["profile"]')
+    p.add_argument('--cprofile', default=None, metavar='PATH', help='cProfile the placement (summary on stderr)')
+    p.add_argument('--tracemalloc', action='store_true', help='Trace allocations during the placement (summary on stderr)')
+    _add_draw(p, 'the infra with utilisation and routed paths')
+
+    p = sub.add_parser('validate', help='Validate a result written by `place` (exit status 1 on violations)')
+    _add_inputs(p)
+    p.add_argument('--result', required=True, help='JSON written by `place`, a BatchResult or a PlacementResult')
+    p.add_argument('--all', action='store_true', help='Also validate results whose status is not ok')
+    p.add_argument('--max-violations', type=int, default=100)
+
+    p = sub.add_parser('inspect', help='Summarise an infrastructure and, optionally, applications')
+    _add_inputs(p, app=False)
+    group = p.add_mutually_exclusive_group()
+    group.add_argument('--app', help='Application .properties file')
+    group.add_argument('--batch', help='JSONL file with one application per line')
+    p.add_argument('--connectivity', action='store_true', help='Count connected components')
+    _add_draw(p, 'the infra')
+
+    p = sub.add_parser('bench', help='Run the placement benchmark; arguments as for `python -m src.benchmark` '
+                                     '(the results go into the JSON document, not to its -o file)')
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    parser = build_parser()
+    # `bench` hands its arguments on to the benchmark's own parser
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != 'bench':
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.bench_args = extra
+    t = _Timings()
+    try:
+        doc = COMMANDS[args.command](args, t)
+    except (ValueError, OSError) as e:
+        doc = {'error': f"{type(e).__name__}: {e}", 'exit_code': 2}
+    exit_code = doc.pop('exit_code', 0)
+    doc = {'command': args.command, **doc, 'exit_code': exit_code, 'timings': t.report()}
+
+    from src.base import _jsonable
+
+    text = json.dumps(_jsonable(doc), indent=args.indent, default=str)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
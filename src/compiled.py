@@ -0,0 +1,321 @@
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+
+def _frozen(arr: np.ndarray) -> np.ndarray:
+    arr.setflags(write=False)
+    return arr
+
+
+def _as_number(value, default: float) -> float:
+    return float(value) if value is not None else default
+
+
+@dataclass(frozen=True)
+class CompiledTopology:
+    """Immutable array-backed snapshot of a NetworkGraph.
+
+    Nodes are addressed by a dense index 0..n-1 (``node_ids[i]`` gives the infra
+    node id, ``index[node_id]`` the reverse). Links are stored in CSR order:
+    the outgoing links of node ``i`` are positions ``indptr[i]:indptr[i+1]``,
+    their destinations are ``indices[...]`` and the per-link attributes live at
+    the same positions in the ``edge_*`` arrays.
+
+    A negative bandwidth in the properties file means "unlimited" and is
+    stored as ``inf``. Hosts and links marked ``down`` in the graph (see
+    `NetworkGraph.apply_changes`) keep their index with no CPU/RAM, and no
+    bandwidth and ``inf`` latency respectively. Hosts/links without a power
+    model get 0 W / 0 nJ per bit. Arrays are read-only; the lookup dicts must
+    be treated the same way.
+    """
+
+    node_ids: np.ndarray
+    index: Mapping[int, int]
+    host_cpu: np.ndarray
+    host_ram: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    edge_src: np.ndarray
+    edge_bandwidth: np.ndarray
+    edge_latency: np.ndarray
+    edge_pos: Mapping[Tuple[int, int], int]
+    host_power_idle: np.ndarray
+    host_power_peak: np.ndarray
+    edge_energy_per_bit: np.ndarray
+
+    @property
+    def n_nodes(self) -> int:
+        return int(self.node_ids.shape[0])
+
+    @property
+    def n_edges(self) -> int:
+        return int(self.indices.shape[0])
+
+    @classmethod
+    def from_graph(cls, G) -> 'CompiledTopology':
+        node_ids = np.fromiter(G.nodes(), dtype=np.int64, count=G.number_of_nodes())
+        index = {int(n): i for i, n in enumerate(node_ids)}
+        n = len(node_ids)
+
+        host_cpu = np.zeros(n, dtype=np.int64)
+        host_ram = np.zeros(n, dtype=np.int64)
+        p_idle = np.zeros(n, dtype=np.float64)
+        p_peak = np.zeros(n, dtype=np.float64)
+        for n_id, d in G.nodes(data=True):
+            i = index[n_id]
+            if not d.get('down'):
+                host_cpu[i] = int(d.get('cpu') or 0)
+                host_ram[i] = int(d.get('ram') or 0)
+            p_idle[i] = _as_number(d.get('power_idle'), 0.0)
+            p_peak[i] = _as_number(d.get('power_peak'), 0.0)
+
+        m = G.number_of_edges()
+        src = np.empty(m, dtype=np.int64)
+        dst = np.empty(m, dtype=np.int64)
+        bw = np.empty(m, dtype=np.float64)
+        lat = np.empty(m, dtype=np.float64)
+        epb = np.empty(m, dtype=np.float64)
+        for k, (u, v, d) in enumerate(G.edges(data=True)):
+            src[k] = index[u]
+            dst[k] = index[v]
+            bw[k] = _as_number(d.get('bandwidth'), 0.0)
+            lat[k] = _as_number(d.get('latency'), 0.0)
+            epb[k] = _as_number(d.get('energy_per_bit'), 0.0)
+            if d.get('down'):
+                bw[k], lat[k] = 0.0, np.inf
+        bw[bw < 0] = np.inf
+
+        # CSR order: sort by (src, dst) so each row is contiguous and searchable
+        order = np.lexsort((dst, src))
+        src, dst, bw, lat, epb = src[order], dst[order], bw[order], lat[order], epb[order]
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        edge_pos = {(int(a), int(b)): k for k, (a, b) in enumerate(zip(src.tolist(), dst.tolist()))}
+
+        return cls(
+            node_ids=_frozen(node_ids),
+            index=index,
+            host_cpu=_frozen(host_cpu),
+            host_ram=_frozen(host_ram),
+            indptr=_frozen(indptr),
+            indices=_frozen(dst),
+            edge_src=_frozen(src),
+            edge_bandwidth=_frozen(bw),
+            edge_latency=_frozen(lat),
+            edge_pos=edge_pos,
+            host_power_idle=_frozen(p_idle),
+            host_power_peak=_frozen(p_peak),
+            edge_energy_per_bit=_frozen(epb),
+        )
+
+    @classmethod
+    def from_tables(cls, host_table, link_table) -> Optional['CompiledTopology']:
+        """Compile straight from the parsed `TupleTable`s of an infra file, without a graph.
+
+        Gives the same snapshot as ``from_graph`` on the graph `NetworkGraph.from_infra_dict`
+        would build. Returns None when a link is listed twice (the graph merges
+        duplicate attributes, so callers should go through it instead).
+        """
+        n_hosts = len(host_table)
+        src_ids, dst_ids = link_table.column('src'), link_table.column('dst')
+        # nodes: hosts in file order, then link endpoints without a host line, by first appearance
+        ends = np.column_stack((src_ids, dst_ids)).ravel()
+        extra = ends[(ends < 0) | (ends >= n_hosts)]
+        _, first = np.unique(extra, return_index=True)
+        node_ids = np.concatenate((np.arange(n_hosts, dtype=np.int64), extra[np.sort(first)]))
+        n = len(node_ids)
+        index = {int(nid): i for i, nid in enumerate(node_ids.tolist())}
+
+        def pad(values, dtype):
+            out = np.zeros(n, dtype=dtype)
+            out[:n_hosts] = values
+            return out
+
+        has_power = host_table.width > 2
+        host_cpu = pad(host_table.column('cpu'), np.int64)
+        host_ram = pad(host_table.column('ram'), np.int64)
+        p_idle = pad(np.where(has_power, host_table.column('power_idle'), 0.0), np.float64)
+        p_peak = pad(np.where(has_power, host_table.column('power_peak'), 0.0), np.float64)
+
+        if extra.size:
+            lookup = np.vectorize(index.__getitem__, otypes=[np.int64])
+            src, dst = lookup(src_ids), lookup(dst_ids)
+        else:
+            src, dst = src_ids.astype(np.int64), dst_ids.astype(np.int64)
+        order = np.lexsort((dst, src))
+        src, dst = src[order], dst[order]
+        if src.size > 1 and np.any((src[1:] == src[:-1]) & (dst[1:] == dst[:-1])):
+            return None
+        bw = link_table.column('bandwidth')[order].astype(np.float64)
+        bw[bw < 0] = np.inf
+        lat = link_table.column('latency')[order].astype(np.float64)
+        epb = np.where(link_table.width[order] > 4, link_table.column('energy_per_bit')[order], 0.0)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        edge_pos = {(a, b): k for k, (a, b) in enumerate(zip(src.tolist(), dst.tolist()))}
+
+        return cls(
+            node_ids=_frozen(node_ids),
+            index=index,
+            host_cpu=_frozen(host_cpu),
+            host_ram=_frozen(host_ram),
+            indptr=_frozen(indptr),
+            indices=_frozen(dst),
+            edge_src=_frozen(src),
+            edge_bandwidth=_frozen(bw),
+            edge_latency=_frozen(lat),
+            edge_pos=edge_pos,
+            host_power_idle=_frozen(p_idle),
+            host_power_peak=_frozen(p_peak),
+            edge_energy_per_bit=_frozen(epb),
+        )
+
+    # -------- flat arrays (binary store) ---------
+    ARRAY_FIELDS = ('node_ids', 'host_cpu', 'host_ram', 'indptr', 'indices', 'edge_src', 'edge_bandwidth',
+                    'edge_latency', 'host_power_idle', 'host_power_peak', 'edge_energy_per_bit')
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray]) -> 'CompiledTopology':
+        """Snapshot over existing (e.g. memory-mapped, read-only) arrays; only the lookup dicts are built."""
+        fields = {name: arrays[name] for name in cls.ARRAY_FIELDS}
+        fields['index'] = {int(nid): i for i, nid in enumerate(fields['node_ids'].tolist())}
+        fields['edge_pos'] = {(a, b): k for k, (a, b) in enumerate(zip(fields['edge_src'].tolist(), fields['indices'].tolist()))}
+        return cls(**fields)
+
+    def subgraph(self, nodes: np.ndarray) -> Tuple['CompiledTopology', np.ndarray]:
+        """Snapshot induced by the node indices ``nodes``, and the CSR positions here of its links.
+
+        Nodes keep their relative order and infra ids, so a sub-snapshot's links are
+        already in CSR order and node ids (and paths over them) mean the same in both.
+        Only the rows of ``nodes`` are read: the cost follows the subgraph, not this topology.
+        """
+        nodes = np.unique(np.asarray(nodes, dtype=np.int64))
+        local = np.full(self.n_nodes, -1, dtype=np.int64)
+        local[nodes] = np.arange(nodes.size)
+        starts, counts = self.indptr[nodes], self.indptr[nodes + 1] - self.indptr[nodes]
+        rows = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        edges = rows[local[self.indices[rows]] >= 0]
+        src, dst = local[self.edge_src[edges]], local[self.indices[edges]]
+        indptr = np.zeros(nodes.size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=nodes.size), out=indptr[1:])
+        node_ids = self.node_ids[nodes]
+        sub = CompiledTopology(
+            node_ids=_frozen(node_ids),
+            index={int(nid): i for i, nid in enumerate(node_ids.tolist())},
+            host_cpu=_frozen(self.host_cpu[nodes]),
+            host_ram=_frozen(self.host_ram[nodes]),
+            indptr=_frozen(indptr),
+            indices=_frozen(dst),
+            edge_src=_frozen(src),
+            edge_bandwidth=_frozen(self.edge_bandwidth[edges]),
+            edge_latency=_frozen(self.edge_latency[edges]),
+            edge_pos={(a, b): k for k, (a, b) in enumerate(zip(src.tolist(), dst.tolist()))},
+            host_power_idle=_frozen(self.host_power_idle[nodes]),
+            host_power_peak=_frozen(self.host_power_peak[nodes]),
+            edge_energy_per_bit=_frozen(self.edge_energy_per_bit[edges]),
+        )
+        return sub, edges
+
+    # -------- lookups ---------
+    def neighbors(self, i: int) -> np.ndarray:
+        """Destination indices of the outgoing links of node index ``i``."""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def edge_id(self, u: int, v: int) -> Optional[int]:
+        """CSR position of the link between infra node ids ``u`` -> ``v``, or None."""
+        iu, iv = self.index.get(u), self.index.get(v)
+        if iu is None or iv is None:
+            return None
+        return self.edge_pos.get((iu, iv))
+
+    def path_edges(self, path: List[int]) -> Optional[np.ndarray]:
+        """CSR positions of the links along a path of infra node ids (None if a hop is missing)."""
+        out = np.empty(max(len(path) - 1, 0), dtype=np.int64)
+        for k in range(len(path) - 1):
+            e = self.edge_id(path[k], path[k + 1])
+            if e is None:
+                return None
+            out[k] = e
+        return out
+
+    def to_ids(self, idx) -> List[int]:
+        return [int(self.node_ids[i]) for i in idx]
+
+
+@dataclass(frozen=True)
+class CompiledService:
+    """Immutable array-backed snapshot of a ServiceGraph.
+
+    Components are addressed by a dense index (``comp_ids[i]`` / ``index``).
+    Service links keep the graph's edge order; ``edge_latency`` is the link's
+    latency limit (``inf`` when the link does not declare one).
+    """
+
+    comp_ids: np.ndarray
+    index: Mapping[int, int]
+    cpu: np.ndarray
+    ram: np.ndarray
+    lambd: np.ndarray
+    mu: np.ndarray
+    edge_src: np.ndarray
+    edge_dst: np.ndarray
+    edge_bandwidth: np.ndarray
+    edge_latency: np.ndarray
+    edge_keys: Tuple[Tuple[int, int], ...]
+
+    @property
+    def n_components(self) -> int:
+        return int(self.comp_ids.shape[0])
+
+    @property
+    def n_edges(self) -> int:
+        return int(self.edge_src.shape[0])
+
+    @classmethod
+    def from_graph(cls, G) -> 'CompiledService':
+        comp_ids = np.fromiter(G.nodes(), dtype=np.int64, count=G.number_of_nodes())
+        index = {int(c): i for i, c in enumerate(comp_ids)}
+        n = len(comp_ids)
+
+        cpu = np.zeros(n, dtype=np.int64)
+        ram = np.zeros(n, dtype=np.int64)
+        lambd = np.full(n, np.nan)
+        mu = np.full(n, np.nan)
+        for c, d in G.nodes(data=True):
+            i = index[c]
+            cpu[i] = int(d.get('cpu') or 0)
+            ram[i] = int(d.get('ram') or 0)
+            lambd[i] = _as_number(d.get('lambd'), np.nan)
+            mu[i] = _as_number(d.get('mu'), np.nan)
+
+        m = G.number_of_edges()
+        src = np.empty(m, dtype=np.int64)
+        dst = np.empty(m, dtype=np.int64)
+        bw = np.empty(m, dtype=np.float64)
+        lat = np.empty(m, dtype=np.float64)
+        keys: List[Tuple[int, int]] = []
+        for k, (u, v, d) in enumerate(G.edges(data=True)):
+            src[k] = index[u]
+            dst[k] = index[v]
+            bw[k] = _as_number(d.get('bandwidth'), 0.0)
+            lat[k] = float(d.get('latency') or np.inf)
+            keys.append((int(u), int(v)))
+
+        return cls(
+            comp_ids=_frozen(comp_ids),
+            index=index,
+            cpu=_frozen(cpu),
+            ram=_frozen(ram),
+            lambd=_frozen(lambd),
+            mu=_frozen(mu),
+            edge_src=_frozen(src),
+            edge_dst=_frozen(dst),
+            edge_bandwidth=_frozen(bw),
+            edge_latency=_frozen(lat),
+            edge_keys=tuple(keys),
+        )
@@ -0,0 +1,158 @@
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+from src.base import PlacementResult
+from src.candidates import candidate_index
+from src.energy import EnergyModel
+from src.ledger import ResourceLedger
+from src.profiling import Profiler, NULL_PROFILER
+from src.routing import ConstrainedRouter, split_flows
+
+
+class EnergyConsolidation:
+    """Energy-aware placement that packs components onto as few hosts as possible:
+    - Pinned components (`component.DZ`) first, then by decreasing CPU demand; each
+      component only considers its hosts in the shared `CandidateIndex`.
+    - Prefer hosts that are already active (in the ledger or for this app); among
+      them take the best fit (least CPU left over), closest to placed neighbours.
+    - Only open a new host when no active one fits, choosing the one that can absorb most
+      of the application's remaining CPU demand, then the lowest power for that load
+      (linear host model), then the closest to placed neighbours.
+    - Hosts whose latency to an already placed neighbour exceeds the link's limit are skipped.
+    - Route every service link with a `ConstrainedRouter` (bandwidth and latency limits),
+      or split it over several paths with a `SplittableRouter` passed as ``router``.
+    - The power report of the application is stored in ``meta['energy']``, and with
+      ``profile=True`` phase timings and counters in ``meta['profile']``.
+    """
+
+    def __init__(self, router=None, model: EnergyModel = None, profile: bool = False):
+        self.router = router if router is not None else ConstrainedRouter()
+        self.model = model if model is not None else EnergyModel()
+        self.profile = profile
+
+    def place(self, service_graph, network_graph, start_host: int = None, ledger: ResourceLedger = None) -> PlacementResult:
+        prof = Profiler() if self.profile else NULL_PROFILER
+        with prof.phase('snapshot'):
+            topo = network_graph.compile()
+            svc = service_graph.compile()
+        with prof.phase('path_index'):
+            index = network_graph.path_index()
+
+        def failed(reason: str, paths) -> PlacementResult:
+            ledger.rollback()
+            meta = {'status': 'failed', 'reason': reason}
+            if prof.enabled:
+                meta['profile'] = prof.report()
+            return PlacementResult(mapping=mapping, paths=paths, meta=meta)
+
+        own_ledger = ledger is None
+        if own_ledger:
+            ledger = ResourceLedger(topo)
+        elif not ledger.matches(topo):
+            raise ValueError("Ledger does not belong to this network graph")
+
+        with prof.phase('candidates'):
+            candidates = candidate_index(service_graph, network_graph)
+        pins = candidates.pins
+        order = sorted(range(svc.n_components), key=lambda c: (c not in pins, -svc.cpu[c], -svc.ram[c], c))
+
+        # neighbour links per component: (service link, other component, link leaves this component)
+        adj: List[List[Tuple[int, int, bool]]] = [[] for _ in range(svc.n_components)]
+        for k in range(svc.n_edges):
+            a, b = int(svc.edge_src[k]), int(svc.edge_dst[k])
+            adj[a].append((k, b, True))
+            adj[b].append((k, a, False))
+
+        dyn_per_cpu = np.divide(topo.host_power_peak - topo.host_power_idle, topo.host_cpu,
+                                out=np.zeros(topo.n_nodes), where=topo.host_cpu > 0)
+        remaining_cpu = int(svc.cpu.sum())
+
+        ledger.begin()
+        assign = np.full(svc.n_components, -1, dtype=np.int64)
+        mapping: Dict[int, int] = {}
+        if candidates.invalid_pins:
+            comp, host = candidates.invalid_pins[0]
+            return failed(f'invalid_locality_{comp}_{host}', {})
+        for c in order:
+            comp = int(svc.comp_ids[c])
+            with prof.phase('host_search'):
+                fits = ledger.fitting_hosts(svc.cpu[c], svc.ram[c]) & candidates.mask(c)
+                # latency to already placed neighbours, and the limit it must respect
+                near = np.zeros(topo.n_nodes)
+                for k, other, out in adj[c]:
+                    hp = assign[other]
+                    if hp < 0:
+                        continue
+                    lat = index.distances_to(hp) if out else index.distances_from(hp)
+                    fits &= lat <= svc.edge_latency[k]
+                    near += lat
+                cands = np.flatnonzero(fits)
+                prof.observe('candidate_hosts', cands.size)
+                prof.count('candidates_rejected', topo.n_nodes - cands.size)
+                if cands.size == 0:
+                    return failed(f'no_host_for_component_{comp}', {})
+
+                active = (ledger.cpu_used[cands] > 0) | (ledger.ram_used[cands] > 0)
+                if active.any():
+                    cands = cands[active]
+                    leftover = ledger.cpu_total[cands] - ledger.cpu_used[cands] - svc.cpu[c]
+                    host = int(cands[np.lexsort((near[cands], leftover))[0]])
+                else:
+                    # power of the host once it carries as much of the remaining demand as it can
+                    cover = np.minimum(ledger.cpu_total[cands] - ledger.cpu_used[cands], remaining_cpu)
+                    power = topo.host_power_idle[cands] + dyn_per_cpu[cands] * cover
+                    host = int(cands[np.lexsort((near[cands], power, -cover))[0]])
+                    prof.count('hosts_opened')
+            ledger.allocate_on_host(host, svc.cpu[c], svc.ram[c])
+            remaining_cpu -= int(svc.cpu[c])
+            assign[c] = host
+            mapping[comp] = int(topo.node_ids[host])
+        mapping = {int(cid): mapping[int(cid)] for cid in svc.comp_ids}
+
+        routing: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        flows: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        route_split = getattr(self.router, 'route_split', None)
+        for k, (u, v) in enumerate(svc.edge_keys):
+            bw_req, lat_limit = svc.edge_bandwidth[k], svc.edge_latency[k]
+            src_host, dst_host = int(assign[svc.edge_src[k]]), int(assign[svc.edge_dst[k]])
+            prof.count('route_calls')
+            with prof.phase('routing'):
+                route = self.router.route(topo, index, src_host, dst_host, bw_req, lat_limit, ledger.bw_free, profiler=prof)
+            if route is None and route_split is not None:
+                with prof.phase('routing'):
+                    split = route_split(topo, index, src_host, dst_host, bw_req, lat_limit, ledger.bw_free, profiler=prof)
+                if split is not None:
+                    for r, w in zip(split.routes, split.bandwidths):
+                        ledger.allocate_on_edges(r.edges, w)
+                    flows[(u, v)] = split_flows(topo, split)
+                    routing[(u, v)] = {
+                        'path': flows[(u, v)][0]['path'],
+                        'bandwidth': int(bw_req),
+                        'latency_limit': int(lat_limit) if np.isfinite(lat_limit) else 10**9,
+                        'latency': int(split.latency),
+                        'split': len(split.routes),
+                    }
+                    continue
+            if route is None:
+                return failed(f'constraints_{u}_{v}', {key: info['path'] for key, info in routing.items()})
+            prof.observe('path_hops', len(route.path) - 1)
+            ledger.allocate_on_edges(route.edges, bw_req)
+            routing[(u, v)] = {
+                'path': topo.to_ids(route.path),
+                'bandwidth': int(bw_req),
+                'latency_limit': int(lat_limit) if np.isfinite(lat_limit) else 10**9,
+                'latency': int(route.latency),
+            }
+        ledger.commit()
+
+        paths = {k: v['path'] for k, v in routing.items()}
+        result = PlacementResult(mapping=mapping, paths=paths, meta={'status': 'ok', 'routing': routing}, flows=flows)
+        with prof.phase('energy'):
+            result.meta['energy'] = self.model.evaluate(result, service_graph, network_graph)
+        if own_ledger:
+            result.meta['host_res'] = ledger.host_res()
+            result.meta['edge_res'] = ledger.edge_res()
+        if prof.enabled:
+            result.meta['profile'] = prof.report()
+        return result
@@ -0,0 +1,72 @@
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+from src.base import PlacementResult
+from src.ledger import ResourceLedger
+
+# link bandwidth is in Mbit/s and energy in nJ/bit: Mbit/s * nJ/bit = 1e-3 W
+TRANSPORT_W_PER_MBPS_NJ = 1e-3
+
+
+class EnergyModel:
+    """Power model for a placement.
+
+    - Hosts: linear in CPU utilisation, P = idle + (peak - idle) * cpu_used / cpu_total.
+      Hosts running nothing are assumed switched off (0 W) unless ``idle_hosts_on``.
+    - Links: every Mbit/s routed over a link costs its ``energy_per_bit`` (nJ/bit).
+    - Throughput is the arrival rate (``lambda``) of the entry components of every
+      placed application, so ``throughput_per_watt`` is requests/s per W.
+
+    Hosts and links without power fields contribute 0 W (see ``modelled_hosts``).
+    """
+
+    def __init__(self, idle_hosts_on: bool = False):
+        self.idle_hosts_on = idle_hosts_on
+
+    def power(self, topo, cpu_used: np.ndarray, bw_used: np.ndarray) -> Dict[str, Any]:
+        """Host and transport power for usage arrays aligned with a CompiledTopology."""
+        active = cpu_used > 0
+        on = np.ones_like(active) if self.idle_hosts_on else active
+        util = np.divide(cpu_used, topo.host_cpu, out=np.zeros(topo.n_nodes), where=topo.host_cpu > 0)
+        host_w = np.where(on, topo.host_power_idle + (topo.host_power_peak - topo.host_power_idle) * util, 0.0)
+        link_w = bw_used * topo.edge_energy_per_bit * TRANSPORT_W_PER_MBPS_NJ
+        return {
+            'host_w': float(host_w.sum()),
+            'transport_w': float(link_w.sum()),
+            'total_w': float(host_w.sum() + link_w.sum()),
+            'active_hosts': int(np.count_nonzero(active)),
+            'modelled_hosts': int(np.count_nonzero(topo.host_power_peak[on] > 0)),
+        }
+
+    def evaluate(self, result: PlacementResult, service_graph, network_graph) -> Dict[str, Any]:
+        """Power drawn by one placed application on an otherwise empty infrastructure."""
+        return self.evaluate_many([(result, service_graph)], network_graph)
+
+    def evaluate_many(self, placed: Iterable[Tuple[PlacementResult, Any]], network_graph,
+                      ledger: Optional[ResourceLedger] = None) -> Dict[str, Any]:
+        """Power of several placed applications (``(result, service_graph)`` pairs).
+
+        Usage is read from ``ledger`` when given, otherwise rebuilt from the results.
+        """
+        placed = [(r, s) for r, s in placed if r.meta.get('status') == 'ok']
+        if ledger is None:
+            ledger = ResourceLedger.for_network(network_graph)
+            for result, svc in placed:
+                ledger.apply(result, svc)
+        report = self.power(ledger.topo, ledger.cpu_used, ledger.bw_used)
+        throughput = sum(entry_throughput(svc) for _, svc in placed)
+        report['throughput'] = throughput
+        report['throughput_per_watt'] = throughput / report['total_w'] if report['total_w'] > 0 else None
+        return report
+
+
+def entry_throughput(service_graph) -> float:
+    """Requests/s entering an application: ``lambda`` of its components with no incoming link."""
+    G = service_graph.G
+    return float(sum(d.get('lambd') or 0 for n, d in G.nodes(data=True) if G.in_degree(n) == 0))
+
+
+def total_power(result: PlacementResult, service_graph, network_graph) -> float:
+    """Objective: watts drawn by the application alone (see `EnergyModel`)."""
+    return EnergyModel().evaluate(result, service_graph, network_graph)['total_w']
@@ -0,0 +1,307 @@
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from src.base import PlacementResult
+from src.candidates import CandidateIndex, candidate_index
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.queueing import QueueingEvaluator
+from src.routing import ConstrainedRouter, Route
+
+
+class BranchAndBound:
+    """Exact reference placement by depth-first branch-and-bound.
+
+    - Explores component -> host assignments, components ordered pins first and
+      then along service links so links get routed (and checked) early.
+    - A link is routed as soon as both endpoints are placed, with a
+      `ConstrainedRouter` (residual bandwidth and latency limit enforced); it takes
+      the cheapest feasible path given the links already routed. Routing is
+      sequential and greedy, in the order the search reaches the links: routes are
+      never revised, so an assignment is pruned when an earlier route took
+      bandwidth a later link needed, even if some joint routing would fit.
+    - Honours CPU/RAM, bandwidth, latency limits and `component.DZ` pins; a
+      component only branches over its hosts in the shared `CandidateIndex`.
+    - Prunes with: remaining CPU/RAM demand vs. total residual capacity, outgoing
+      bandwidth a host must carry for neighbours that cannot be co-located, and a
+      per-host lower bound on the cost of links to already placed neighbours.
+    - Stops at ``time_budget`` seconds and returns the best incumbent found.
+      ``meta['exact']['assignment_search_complete']`` tells whether every host
+      assignment was explored (or pruned) in time: the result is then optimal over
+      assignments under this sequential routing, not over all routings (and a
+      failure means no assignment fits that way).
+
+    - With ``max_utilisation`` set, a component only branches over hosts whose M/M/1
+      utilisation stays below it, other applications' reserved CPU counting as fully
+      busy (`QueueingEvaluator.stable_hosts`); the greedy incumbent is seeded under
+      the same filter.
+
+    Objectives: 'latency' (total path latency), 'bandwidth' (bandwidth x hops)
+    and 'active_hosts' (hosts switched on by this application).
+    """
+
+    OBJECTIVES = ('latency', 'bandwidth', 'active_hosts')
+
+    def __init__(self, time_budget: float = 10.0, objective: str = 'latency', seed_with_greedy: bool = True,
+                 max_utilisation: Optional[float] = None):
+        if objective not in self.OBJECTIVES:
+            raise ValueError(f"Unknown objective: {objective}")
+        self.time_budget = time_budget
+        self.objective = objective
+        self.seed_with_greedy = seed_with_greedy
+        self.max_utilisation = max_utilisation
+        self.router = ConstrainedRouter(cost='hops' if objective == 'bandwidth' else 'latency')
+
+    def place(self, service_graph, network_graph, start_host: int = None, ledger: ResourceLedger = None) -> PlacementResult:
+        t0 = time.perf_counter()
+        topo = network_graph.compile()
+        svc = service_graph.compile()
+        index = network_graph.path_index()
+
+        own_ledger = ledger is None
+        if own_ledger:
+            ledger = ResourceLedger(topo)
+        elif not ledger.matches(topo):
+            raise ValueError("Ledger does not belong to this network graph")
+
+        candidates = candidate_index(service_graph, network_graph)
+        if candidates.invalid_pins:
+            comp, host = candidates.invalid_pins[0]
+            return PlacementResult(mapping={}, paths={}, meta={'status': 'failed', 'reason': f'invalid_locality_{comp}_{host}'})
+        empty = candidates.infeasible()
+        if empty.size:
+            comp = int(svc.comp_ids[empty[0]])
+            return PlacementResult(mapping={}, paths={}, meta={'status': 'failed', 'reason': f'no_host_for_component_{comp}'})
+
+        queueing = QueueingEvaluator(service_graph, network_graph) if self.max_utilisation is not None else None
+        search = _Search(self, topo, svc, index, ledger, candidates, deadline=t0 + self.time_budget, queueing=queueing)
+        if self.seed_with_greedy:
+            search.seed(service_graph, network_graph, start_host)
+        search.run()
+
+        stats = {
+            'objective': self.objective,
+            'assignment_search_complete': not search.timed_out,
+            'timed_out': search.timed_out,
+            'cost': search.best_cost if search.best_assign is not None else None,
+            'nodes': search.nodes,
+            'elapsed_s': time.perf_counter() - t0,
+        }
+        if search.best_assign is None:
+            reason = 'timeout' if search.timed_out else 'infeasible'
+            return PlacementResult(mapping={}, paths={}, meta={'status': 'failed', 'reason': reason, 'exact': stats})
+
+        # re-apply the incumbent: it was feasible on this ledger state when found
+        ledger.begin()
+        for c, h in enumerate(search.best_assign):
+            ledger.allocate_on_host(int(h), svc.cpu[c], svc.ram[c])
+        mapping = {int(svc.comp_ids[c]): int(topo.node_ids[h]) for c, h in enumerate(search.best_assign)}
+        routing: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for k, (u, v) in enumerate(svc.edge_keys):
+            route = search.best_routes[k]
+            ledger.allocate_on_edges(route.edges, svc.edge_bandwidth[k])
+            lat_limit = svc.edge_latency[k]
+            routing[(u, v)] = {
+                'path': topo.to_ids(route.path),
+                'bandwidth': int(svc.edge_bandwidth[k]),
+                'latency_limit': int(lat_limit) if np.isfinite(lat_limit) else 10**9,
+                'latency': int(route.latency),
+            }
+        ledger.commit()
+
+        paths = {k: v['path'] for k, v in routing.items()}
+        meta = {'status': 'ok', 'routing': routing, 'exact': stats}
+        if own_ledger:
+            meta['host_res'] = ledger.host_res()
+            meta['edge_res'] = ledger.edge_res()
+        return PlacementResult(mapping=mapping, paths=paths, meta=meta)
+
+
+class _Search:
+    """Mutable state of one branch-and-bound run."""
+
+    def __init__(self, owner: BranchAndBound, topo, svc, index, ledger: ResourceLedger, candidates: CandidateIndex, deadline: float,
+                 queueing: Optional[QueueingEvaluator] = None):
+        self.owner, self.topo, self.svc, self.index, self.ledger = owner, topo, svc, index, ledger
+        self.candidates = candidates
+        self.queueing = queueing
+        self.background = ledger.cpu_used.astype(np.float64)
+        self.pins = candidates.pins
+        self.deadline = deadline
+        self.objective = owner.objective
+        self.router = owner.router
+        n = svc.n_components
+
+        # adjacency: component -> [(service link, other component, link leaves this component)]
+        self.adj: List[List[Tuple[int, int, bool]]] = [[] for _ in range(n)]
+        for k in range(svc.n_edges):
+            a, b = int(svc.edge_src[k]), int(svc.edge_dst[k])
+            self.adj[a].append((k, b, True))
+            if b != a:
+                self.adj[b].append((k, a, False))
+
+        self.order = self._order()
+        # remaining demand from each depth on, for capacity pruning
+        self.rem_cpu = np.append(np.cumsum(svc.cpu[self.order][::-1])[::-1], 0)
+        self.rem_ram = np.append(np.cumsum(svc.ram[self.order][::-1])[::-1], 0)
+
+        self.assign = np.full(n, -1, dtype=np.int64)
+        self.routes: Dict[int, Route] = {}
+        self.best_cost = np.inf
+        self.best_assign: Optional[np.ndarray] = None
+        self.best_routes: Optional[Dict[int, Route]] = None
+        self.nodes = 0
+        self.timed_out = False
+
+    def _order(self) -> List[int]:
+        """Pinned components first, then breadth-first along service links, larger demand first."""
+        svc = self.svc
+        n = svc.n_components
+        demand = svc.cpu / max(svc.cpu.max(initial=0), 1) + svc.ram / max(svc.ram.max(initial=0), 1)
+        seen = np.zeros(n, dtype=bool)
+        order: List[int] = []
+        roots = sorted(self.pins) + sorted(range(n), key=lambda c: (-len(self.adj[c]), -demand[c]))
+        for root in roots:
+            if seen[root]:
+                continue
+            seen[root] = True
+            queue = [root]
+            while queue:
+                c = queue.pop(0)
+                order.append(c)
+                nbrs = sorted({o for _, o, _ in self.adj[c] if not seen[o]}, key=lambda o: (o not in self.pins, -demand[o]))
+                for o in nbrs:
+                    seen[o] = True
+                    queue.append(o)
+        return order
+
+    def _route_cost(self, k: int, route: Route) -> float:
+        if self.objective == 'latency':
+            return route.latency
+        if self.objective == 'bandwidth':
+            return float(self.svc.edge_bandwidth[k]) * len(route.edges)
+        return 0.0
+
+    def _idle(self) -> np.ndarray:
+        return (self.ledger.cpu_used == 0) & (self.ledger.ram_used == 0)
+
+    # -------- incumbent from the greedy baseline ---------
+    def seed(self, service_graph, network_graph, start_host) -> None:
+        topo, svc = self.topo, self.svc
+        idle = self._idle()
+        with self.ledger.what_if():
+            res = GreedyPlacement(router=self.router, selector=False, max_utilisation=self.owner.max_utilisation).place(
+                service_graph, network_graph, start_host=start_host, ledger=self.ledger)
+        if res.meta.get('status') != 'ok':
+            return
+        assign = np.array([topo.index[res.mapping[int(cid)]] for cid in svc.comp_ids], dtype=np.int64)
+        if any(assign[c] != h for c, h in self.pins.items()):
+            return
+        routes: Dict[int, Route] = {}
+        cost = float(np.count_nonzero(idle[np.unique(assign)])) if self.objective == 'active_hosts' else 0.0
+        for k, key in enumerate(svc.edge_keys):
+            info = res.meta['routing'][key]
+            path = [topo.index[h] for h in info['path']]
+            route = Route(path=path, edges=topo.path_edges(info['path']), latency=float(info['latency']), cost=0.0)
+            routes[k] = route
+            cost += self._route_cost(k, route)
+        self.best_cost, self.best_assign, self.best_routes = cost, assign, routes
+
+    # -------- search ---------
+    def run(self) -> None:
+        self._dfs(0, 0.0)
+
+    def _lower_bounds(self, c: int, cands: np.ndarray) -> np.ndarray:
+        """Lower bound on the cost added by putting ``c`` on each candidate host (inf = infeasible)."""
+        svc, index = self.svc, self.index
+        inc = np.zeros(cands.shape[0])
+        if self.objective == 'active_hosts':
+            inc += self._idle()[cands]
+        for k, other, out in self.adj[c]:
+            hp = self.assign[other]
+            if hp < 0 or other == c:
+                continue
+            lat = index.distances_to(hp)[cands] if out else index.distances_from(hp)[cands]
+            inc[lat > svc.edge_latency[k]] = np.inf
+            if self.objective == 'latency':
+                inc += lat
+            elif self.objective == 'bandwidth':
+                inc += svc.edge_bandwidth[k] * (cands != hp)
+        return inc
+
+    def _egress_ok(self, c: int, h: int) -> bool:
+        """Traffic to unplaced neighbours that cannot share host ``h`` must fit on h's outgoing links."""
+        svc, ledger, topo = self.svc, self.ledger, self.topo
+        need = 0.0
+        for k, other, out in self.adj[c]:
+            if not out or self.assign[other] >= 0 or other == c:
+                continue
+            pinned = self.pins.get(other)
+            if (pinned is not None and pinned != h) or not ledger.can_host(h, svc.cpu[other], svc.ram[other]):
+                need += svc.edge_bandwidth[k]
+        if need == 0.0:
+            return True
+        lo, hi = topo.indptr[h], topo.indptr[h + 1]
+        links = topo.indices[lo:hi] != h
+        return float(ledger.bw_free[lo:hi][links].sum()) >= need
+
+    def _dfs(self, depth: int, cost: float) -> None:
+        self.nodes += 1
+        if time.perf_counter() > self.deadline:
+            self.timed_out = True
+            return
+        if depth == len(self.order):
+            if cost < self.best_cost:
+                self.best_cost = cost
+                self.best_assign = self.assign.copy()
+                self.best_routes = dict(self.routes)
+            return
+
+        svc, ledger = self.svc, self.ledger
+        if self.rem_cpu[depth] > (ledger.cpu_total - ledger.cpu_used).sum() or \
+                self.rem_ram[depth] > (ledger.ram_total - ledger.ram_used).sum():
+            return
+
+        c = self.order[depth]
+        cands = self.candidates.fitting(c, ledger, svc.cpu[c], svc.ram[c])
+        if self.queueing is not None:
+            cands = cands[self.queueing.stable_hosts(c, self.assign, self.owner.max_utilisation, self.background)[cands]]
+        if cands.size == 0:
+            return
+        inc = self._lower_bounds(c, cands)
+        ranked = np.argsort(inc, kind='stable')
+
+        for r in ranked:
+            if cost + inc[r] >= self.best_cost:
+                break
+            h = int(cands[r])
+            was_idle = ledger.cpu_used[h] == 0 and ledger.ram_used[h] == 0
+            ledger.begin()
+            ledger.allocate_on_host(h, svc.cpu[c], svc.ram[c])
+            self.assign[c] = h
+            added = 1.0 if (self.objective == 'active_hosts' and was_idle) else 0.0
+            routed: List[int] = []
+            ok = True
+            for k, other, out in self.adj[c]:
+                hp = self.assign[other]
+                if hp < 0 or k in self.routes:
+                    continue
+                src, dst = (h, hp) if out else (hp, h)
+                route = self.router.route(self.topo, self.index, src, int(dst), svc.edge_bandwidth[k], svc.edge_latency[k], ledger.bw_free)
+                if route is None:
+                    ok = False
+                    break
+                ledger.allocate_on_edges(route.edges, svc.edge_bandwidth[k])
+                self.routes[k] = route
+                routed.append(k)
+                added += self._route_cost(k, route)
+            if ok and cost + added < self.best_cost and self._egress_ok(c, h):
+                self._dfs(depth + 1, cost + added)
+            for k in routed:
+                del self.routes[k]
+            self.assign[c] = -1
+            ledger.rollback()
+            if self.timed_out:
+                return
@@ -0,0 +1,448 @@
+import argparse
+import json
+import math
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, shortest_path
+from scipy.spatial import cKDTree
+
+
+@dataclass
+class HostSpec:
+    """Host hardware of one tier: ``profiles`` are (CPU, RAM) pairs drawn with ``weights``.
+
+    ``power`` is an optional (idle W, peak W) per CPU core; when set, hosts carry the
+    optional power fields of the infra format.
+    """
+    profiles: Sequence[Tuple[int, int]] = ((4, 8000),)
+    weights: Optional[Sequence[float]] = None
+    power: Optional[Tuple[float, float]] = None
+
+
+@dataclass
+class LinkSpec:
+    """Links of one kind: bandwidth drawn from ``bandwidth`` (-1 = unlimited), latency
+    uniform in ``latency`` (inclusive), optional transport energy in nJ/bit."""
+    bandwidth: Sequence[int] = (1000,)
+    latency: Tuple[int, int] = (1, 10)
+    energy_per_bit: Optional[float] = None
+
+
+TIER_HOSTS = {
+    'cloud': HostSpec(profiles=((64, 256000), (128, 512000)), power=(6.0, 12.0)),
+    'fog': HostSpec(profiles=((8, 16000), (16, 32000)), power=(8.0, 18.0)),
+    'edge': HostSpec(profiles=((2, 4000), (4, 8000)), weights=(0.6, 0.4), power=(4.0, 10.0)),
+}
+TIER_LINKS = {
+    ('cloud', 'cloud'): LinkSpec(bandwidth=(-1,), latency=(1, 5), energy_per_bit=1.0),
+    ('fog', 'cloud'): LinkSpec(bandwidth=(1000, 10000), latency=(30, 80), energy_per_bit=5.0),
+    ('fog', 'fog'): LinkSpec(bandwidth=(1000,), latency=(5, 15), energy_per_bit=3.0),
+    ('edge', 'fog'): LinkSpec(bandwidth=(100, 500), latency=(5, 20), energy_per_bit=10.0),
+}
+
+
+# -------- helpers ---------
+def _hosts(rng: np.random.Generator, spec: HostSpec, n: int) -> List[Dict[str, Any]]:
+    profiles = np.asarray(spec.profiles, dtype=np.int64)
+    p = None if spec.weights is None else np.asarray(spec.weights, dtype=float) / np.sum(spec.weights)
+    picks = profiles[rng.choice(len(profiles), size=n, p=p)]
+    hosts = []
+    for cpu, ram in picks.tolist():
+        host = {'cpu': cpu, 'ram': ram}
+        if spec.power is not None:
+            host['power_idle'] = round(spec.power[0] * cpu, 3)
+            host['power_peak'] = round(spec.power[1] * cpu, 3)
+        hosts.append(host)
+    return hosts
+
+
+def _links(rng: np.random.Generator, spec: LinkSpec, src: np.ndarray, dst: np.ndarray,
+           latency: np.ndarray = None) -> List[Dict[str, Any]]:
+    """Bidirectional links (both directions, same attributes) for the pairs ``src[k] - dst[k]``."""
+    m = len(src)
+    bw = np.asarray(spec.bandwidth, dtype=np.int64)[rng.integers(0, len(spec.bandwidth), size=m)]
+    lat = latency if latency is not None else rng.integers(spec.latency[0], spec.latency[1] + 1, size=m)
+    links = []
+    for a, b, w, l in zip(src.tolist(), dst.tolist(), bw.tolist(), np.asarray(lat).tolist()):
+        for u, v in ((a, b), (b, a)):
+            link = {'src': u, 'dst': v, 'bandwidth': w, 'latency': int(l)}
+            if spec.energy_per_bit is not None:
+                link['energy_per_bit'] = spec.energy_per_bit
+            links.append(link)
+    return links
+
+
+def _uplinks(rng: np.random.Generator, n: int, n_parents: int, k: int) -> np.ndarray:
+    """``k`` distinct parents for each of ``n`` children: a random first parent, the
+    others spread evenly around it (O(n k) memory even for 10^5 children)."""
+    first = rng.integers(0, n_parents, size=(n, 1))
+    return (first + np.arange(k) * (n_parents // k)) % n_parents
+
+
+def hop_diameter(n: int, links: List[Dict[str, Any]], exact_limit: int = 2000, sweeps: int = 4) -> int:
+    """Greatest hop distance between two hosts, ignoring link direction.
+
+    Exact up to ``exact_limit`` hosts; above that, iterated double-sweep BFS from a
+    least-connected host gives a lower bound that is exact on trees and on the
+    generated tiered and fat-tree topologies.
+    """
+    if n <= 1:
+        return 0
+    src = np.fromiter((l['src'] for l in links), dtype=np.int64, count=len(links))
+    dst = np.fromiter((l['dst'] for l in links), dtype=np.int64, count=len(links))
+    keep = src != dst
+    A = coo_matrix((np.ones(int(keep.sum())), (src[keep], dst[keep])), shape=(n, n)).tocsr()
+    if n <= exact_limit:
+        d = shortest_path(A, directed=False, unweighted=True)
+        return int(d[np.isfinite(d)].max())
+    # sweeps start at a least-connected host, which tends to lie on the periphery
+    degree = np.diff(A.indptr) + np.bincount(A.indices, minlength=n)
+    best, start = 0, int(np.argmin(degree))
+    for _ in range(sweeps):
+        d = shortest_path(A, directed=False, unweighted=True, indices=[start])[0]
+        d[~np.isfinite(d)] = -1
+        far = int(np.argmax(d))
+        if d[far] <= best:
+            break
+        best, start = int(d[far]), far
+    return best
+
+
+def _infra(hosts: List[Dict[str, Any]], links: List[Dict[str, Any]], self_loops: bool,
+           tiers: List[str] = None) -> Dict[str, Any]:
+    n = len(hosts)
+    diameter = hop_diameter(n, links)
+    if self_loops:
+        links = links + [{'src': i, 'dst': i, 'bandwidth': -1, 'latency': 0} for i in range(n)]
+    infra = {
+        'hosts.nb': n,
+        'hosts': hosts,
+        'links': links,
+        'edges.nb': len(links),
+        'network.diameter': diameter,
+    }
+    if tiers is not None:
+        infra['tiers'] = tiers
+    return infra
+
+
+# -------- topologies ---------
+def tiered_infra(n_edge: int, n_fog: int, n_cloud: int, seed: int = 0, edge_uplinks: int = 1,
+                 fog_uplinks: int = 2, fog_degree: int = 2, hosts: Dict[str, HostSpec] = None,
+                 links: Dict[Tuple[str, str], LinkSpec] = None, self_loops: bool = True) -> Dict[str, Any]:
+    """Edge/fog/cloud hierarchy in the `InfraProperties.to_dict()` shape.
+
+    Hosts are numbered cloud first, then fog, then edge (``tiers`` lists the tier of
+    every host). Cloud hosts form a full mesh; each fog host joins a ring with
+    ``fog_degree`` neighbours and uplinks to ``fog_uplinks`` cloud hosts; each edge
+    host uplinks to ``edge_uplinks`` fog hosts.
+    """
+    rng = np.random.default_rng(seed)
+    hosts = {**TIER_HOSTS, **(hosts or {})}
+    specs = {**TIER_LINKS, **(links or {})}
+    cloud = np.arange(n_cloud)
+    fog = n_cloud + np.arange(n_fog)
+    edge = n_cloud + n_fog + np.arange(n_edge)
+
+    host_list = _hosts(rng, hosts['cloud'], n_cloud) + _hosts(rng, hosts['fog'], n_fog) + _hosts(rng, hosts['edge'], n_edge)
+    tiers = ['cloud'] * n_cloud + ['fog'] * n_fog + ['edge'] * n_edge
+
+    link_list: List[Dict[str, Any]] = []
+    a, b = np.triu_indices(n_cloud, k=1)
+    link_list += _links(rng, specs[('cloud', 'cloud')], cloud[a], cloud[b])
+    if n_fog > 1:
+        hops = range(1, max(1, fog_degree // 2) + 1)
+        ring = np.array(sorted({(min(i, (i + h) % n_fog), max(i, (i + h) % n_fog))
+                                for i in range(n_fog) for h in hops if (i + h) % n_fog != i}),
+                        dtype=np.int64).reshape(-1, 2)
+        link_list += _links(rng, specs[('fog', 'fog')], fog[ring[:, 0]], fog[ring[:, 1]])
+    if n_cloud and n_fog:
+        k = min(fog_uplinks, n_cloud)
+        link_list += _links(rng, specs[('fog', 'cloud')], np.repeat(fog, k), cloud[_uplinks(rng, n_fog, n_cloud, k).ravel()])
+    if n_fog and n_edge:
+        k = min(edge_uplinks, n_fog)
+        link_list += _links(rng, specs[('edge', 'fog')], np.repeat(edge, k), fog[_uplinks(rng, n_edge, n_fog, k).ravel()])
+    return _infra(host_list, link_list, self_loops, tiers)
+
+
+def fat_tree_infra(k: int, seed: int = 0, server: HostSpec = None, link: LinkSpec = None,
+                   self_loops: bool = True) -> Dict[str, Any]:
+    """k-ary fat-tree (k even): (k/2)^2 core, k pods of k/2 aggregation + k/2 edge switches,
+    and k/2 servers per edge switch (k^3/4 servers in total).
+
+    Switches are hosts with no CPU/RAM, so only servers can run components. Hosts
+    are numbered core, aggregation, edge switches, then servers (see ``tiers``).
+    """
+    if k < 2 or k % 2:
+        raise ValueError(f"fat-tree arity must be even and >= 2, got {k}")
+    rng = np.random.default_rng(seed)
+    half = k // 2
+    n_core, n_agg, n_sw, n_srv = half * half, k * half, k * half, k * half * half
+    core = np.arange(n_core)
+    agg = n_core + np.arange(n_agg)
+    sw = n_core + n_agg + np.arange(n_sw)
+    srv = n_core + n_agg + n_sw + np.arange(n_srv)
+    link = link or LinkSpec(bandwidth=(10000,), latency=(1, 2), energy_per_bit=2.0)
+
+    switch = {'cpu': 0, 'ram': 0}
+    hosts = [dict(switch) for _ in range(n_core + n_agg + n_sw)]
+    hosts += _hosts(rng, server or HostSpec(profiles=((16, 64000), (32, 128000)), power=(5.0, 12.0)), n_srv)
+    tiers = ['core'] * n_core + ['aggregation'] * n_agg + ['edge_switch'] * n_sw + ['server'] * n_srv
+
+    pod_agg = agg.reshape(k, half)
+    pod_sw = sw.reshape(k, half)
+    # aggregation switch j of every pod connects to core switches j*half .. j*half+half-1
+    core_src = np.repeat(pod_agg.ravel(), half)
+    core_dst = core.reshape(half, half)[np.tile(np.repeat(np.arange(half), half), k), np.tile(np.arange(half), k * half)]
+    pod_src = np.repeat(pod_agg, half, axis=1).ravel()
+    pod_dst = np.tile(pod_sw, (1, half)).ravel()
+    srv_src = np.repeat(sw, half)
+    link_list = _links(rng, link, core_src, core_dst) + _links(rng, link, pod_src, pod_dst) + _links(rng, link, srv_src, srv)
+    return _infra(hosts, link_list, self_loops, tiers)
+
+
+def random_geometric_infra(n: int, seed: int = 0, radius: float = None, host: HostSpec = None,
+                           link: LinkSpec = None, latency_per_unit: float = 100.0,
+                           self_loops: bool = True) -> Dict[str, Any]:
+    """Hosts at uniform random points of the unit square, linked when closer than ``radius``.
+
+    The default radius is just above the connectivity threshold sqrt(log n / (pi n)).
+    Link latency is ``latency_per_unit`` x distance (at least 1) and ``link.latency``
+    is ignored. Disconnected parts are joined to the largest one through their
+    closest pair of hosts, so the result is always connected.
+    """
+    rng = np.random.default_rng(seed)
+    if radius is None:
+        radius = 1.5 * math.sqrt(math.log(max(n, 2)) / (math.pi * max(n, 2)))
+    link = link or LinkSpec(bandwidth=(100, 1000), energy_per_bit=8.0)
+    pts = rng.random((n, 2))
+    tree = cKDTree(pts)
+    pairs = tree.query_pairs(radius, output_type='ndarray')
+    src, dst = pairs[:, 0], pairs[:, 1]
+
+    n_comp, labels = connected_components(coo_matrix((np.ones(len(src)), (src, dst)), shape=(n, n)), directed=False)
+    if n_comp > 1:
+        main = np.bincount(labels).argmax()
+        main_idx = np.flatnonzero(labels == main)
+        main_tree = cKDTree(pts[main_idx])
+        extra_src, extra_dst = [], []
+        for c in range(n_comp):
+            if c == main:
+                continue
+            members = np.flatnonzero(labels == c)
+            d, j = main_tree.query(pts[members])
+            best = int(np.argmin(d))
+            extra_src.append(members[best])
+            extra_dst.append(main_idx[j[best]])
+        src = np.concatenate((src, extra_src))
+        dst = np.concatenate((dst, extra_dst))
+
+    dist = np.linalg.norm(pts[src] - pts[dst], axis=1)
+    latency = np.maximum(1, np.rint(dist * latency_per_unit)).astype(np.int64)
+    hosts = _hosts(rng, host or HostSpec(profiles=((4, 8000), (8, 16000), (16, 32000))), n)
+    return _infra(hosts, _links(rng, link, src, dst, latency), self_loops)
+
+
+# -------- workloads ---------
+@dataclass
+class ComponentSpec:
+    """Component demands: (CPU, RAM) pairs, the entry arrival rate ``lambd`` and the
+    per-component utilisation range used to derive ``mu = lambda / rho``."""
+    profiles: Sequence[Tuple[int, int]] = ((1, 1000), (2, 2000), (2, 4000))
+    lambd: int = 400
+    rho: Tuple[float, float] = (0.3, 0.8)
+
+
+def _app(rng: np.random.Generator, n: int, src: np.ndarray, dst: np.ndarray, comp: ComponentSpec,
+         link: LinkSpec, pin_hosts: Sequence[int], n_pins: int) -> Dict[str, Any]:
+    profiles = np.asarray(comp.profiles, dtype=np.int64)
+    picks = profiles[rng.integers(0, len(profiles), size=n)]
+
+    # arrival rates: entry components receive lambda, every component splits its rate over its out-links
+    lambd = np.zeros(n)
+    indeg = np.bincount(dst, minlength=n)
+    outdeg = np.bincount(src, minlength=n)
+    lambd[indeg == 0] = comp.lambd
+    for a, b in sorted(zip(src.tolist(), dst.tolist())):
+        lambd[b] += lambd[a] / outdeg[a]
+    lambd = np.maximum(1, np.rint(lambd)).astype(np.int64)
+    rho = rng.uniform(comp.rho[0], comp.rho[1], size=n)
+    mu = np.ceil(lambd / rho).astype(np.int64)
+
+    components = [{'cpu': c, 'ram': r, 'lambda': l, 'mu': m}
+                  for (c, r), l, m in zip(picks.tolist(), lambd.tolist(), mu.tolist())]
+    bw = np.asarray(link.bandwidth, dtype=np.int64)[rng.integers(0, len(link.bandwidth), size=len(src))]
+    lat = rng.integers(link.latency[0], link.latency[1] + 1, size=len(src))
+    links = [{'id': k, 'src': a, 'dst': b, 'bandwidth': w, 'latency': l}
+             for k, (a, b, w, l) in enumerate(zip(src.tolist(), dst.tolist(), bw.tolist(), lat.tolist()))]
+
+    dz: List[int] = []
+    if n_pins and len(pin_hosts):
+        # pin entry components first, then sinks
+        order = list(np.flatnonzero(indeg == 0)) + list(np.flatnonzero(outdeg == 0))
+        chosen = list(dict.fromkeys(int(c) for c in order))[:n_pins]
+        for c in chosen:
+            dz += [c, int(pin_hosts[rng.integers(0, len(pin_hosts))])]
+    return {
+        'application.nb': 1,
+        'application.components': n,
+        'components': components,
+        'links': links,
+        'links.nb': len(links),
+        'component.nbDZ': len(dz) // 2 if dz else None,
+        'component.DZ': dz,
+    }
+
+
+def service_chain(n: int, seed: int = 0, comp: ComponentSpec = None, link: LinkSpec = None,
+                  pin_hosts: Sequence[int] = (), n_pins: int = 0) -> Dict[str, Any]:
+    """Linear chain 0 -> 1 -> ... -> n-1 in the `AppProperties.to_dict()` shape.
+
+    ``n_pins`` components (entry first, then sink) are pinned through
+    ``component.DZ`` to hosts drawn from ``pin_hosts``.
+    """
+    rng = np.random.default_rng(seed)
+    src = np.arange(n - 1, dtype=np.int64)
+    return _app(rng, n, src, src + 1, comp or ComponentSpec(), link or LinkSpec(bandwidth=(50, 100, 200), latency=(100, 300)),
+                pin_hosts, n_pins)
+
+
+def service_dag(n: int, seed: int = 0, extra_edge_prob: float = 0.2, comp: ComponentSpec = None,
+                link: LinkSpec = None, pin_hosts: Sequence[int] = (), n_pins: int = 0) -> Dict[str, Any]:
+    """Random DAG: a random spanning tree rooted at component 0 (every component
+    reachable from the entry) plus forward links with probability ``extra_edge_prob``."""
+    rng = np.random.default_rng(seed)
+    parents = [int(rng.integers(0, i)) for i in range(1, n)]
+    edges = {(p, i) for i, p in zip(range(1, n), parents)}
+    if n > 2 and extra_edge_prob > 0:
+        a, b = np.triu_indices(n, k=1)
+        mask = rng.random(len(a)) < extra_edge_prob
+        edges |= set(zip(a[mask].tolist(), b[mask].tolist()))
+    edges = sorted(edges)
+    src = np.array([e[0] for e in edges], dtype=np.int64)
+    dst = np.array([e[1] for e in edges], dtype=np.int64)
+    return _app(rng, n, src, dst, comp or ComponentSpec(), link or LinkSpec(bandwidth=(50, 100, 200), latency=(100, 300)),
+                pin_hosts, n_pins)
+
+
+# -------- writers ---------
+def _tuples(rows: List[str]) -> str:
+    return ', \\\n'.join(rows)
+
+
+def _num(x) -> str:
+    return str(int(x)) if float(x).is_integer() else repr(float(x))
+
+
+def write_infra_properties(infra: Dict[str, Any], path: str):
+    """Write an infra dict in the `.properties` layout of `properties/Infra_8nodes.properties`."""
+    hosts = []
+    for h in infra['hosts']:
+        fields = [h['cpu'], h['ram']] + ([h['power_idle'], h['power_peak']] if 'power_idle' in h else [])
+        hosts.append('{' + ','.join(_num(f) for f in fields) + '}')
+    links = []
+    for l in infra['links']:
+        fields = [l['src'], l['dst'], l['bandwidth'], l['latency']] + ([l['energy_per_bit']] if 'energy_per_bit' in l else [])
+        links.append('{' + ','.join(_num(f) for f in fields) + '}')
+    out = [
+        '# The number of hosts in the Fog/Edge infrastructure',
+        f"hosts.nb = {infra['hosts.nb']}",
+        '# Hosts:  {CPU, RAM[, idle W, peak W]} for each node',
+        'hosts.configuration = \\',
+        _tuples(hosts),
+        '',
+        '# Source Id, Sink Id, Bandwidth(Source Id-> Sink Id), Latency(Source Id-> Sink Id)[, energy nJ/bit]',
+        'network.topology = \\',
+        _tuples(links),
+        '# number of edges',
+        f"edges.nb = {infra['edges.nb']}",
+    ]
+    if infra.get('tiers') is not None:
+        out += ['# Tier of every host, in host order', f"hosts.tier = {','.join(infra['tiers'])}"]
+    if infra.get('network.diameter') is not None:
+        out += ['# Diameter is the greatest distance between any pair of vertices in the graph',
+                f"network.diameter = {infra['network.diameter']}"]
+    with open(path, 'w', encoding='latin-1') as f:
+        f.write('\n'.join(out) + '\n')
+
+
+def write_app_properties(app: Dict[str, Any], path: str):
+    """Write an app dict in the `.properties` layout of `properties/Appli_4comps.properties`."""
+    comps = ['{' + ','.join(str(c[k]) for k in ('cpu', 'ram', 'lambda', 'mu')) + '}' for c in app['components']]
+    links = ['{' + ','.join(str(l[k]) for k in ('id', 'src', 'dst', 'bandwidth', 'latency')) + '}' for l in app['links']]
+    out = [
+        '# Number of applications',
+        f"application.nb = {app['application.nb']}",
+        '',
+        '# Number of components/service for the all applications',
+        f"application.components = {app['application.components']}",
+        '',
+        '# component requirements: {CPU, RAM, lambda/flux, mu}',
+        'components.requirements = \\',
+        _tuples(comps),
+        '',
+        '# Each line corresponds to: id_link, source, destination, bandwidth, latency',
+        'links.description = \\',
+        _tuples(links),
+        '',
+        f"links.nb = {app['links.nb']}",
+    ]
+    if app.get('component.DZ'):
+        out += ['', '# Locality constraints: (component, host) pairs',
+                f"component.nbDZ = {app['component.nbDZ']}",
+                'component.DZ = {' + ', '.join(str(x) for x in app['component.DZ']) + '}']
+    with open(path, 'w', encoding='latin-1') as f:
+        f.write('\n'.join(out) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic infrastructures and applications')
+    parser.add_argument('--seed', type=int, default=0)
+    sub = parser.add_subparsers(dest='kind', required=True)
+
+    p = sub.add_parser('tiered', help='edge/fog/cloud hierarchy')
+    p.add_argument('--edge', type=int, default=1000)
+    p.add_argument('--fog', type=int, default=50)
+    p.add_argument('--cloud', type=int, default=4)
+    p.add_argument('--edge-uplinks', type=int, default=1)
+    p = sub.add_parser('fat-tree', help='k-ary fat-tree')
+    p.add_argument('-k', type=int, default=8)
+    p = sub.add_parser('geometric', help='random geometric graph in the unit square')
+    p.add_argument('-n', type=int, default=1000)
+    p.add_argument('--radius', type=float, default=None)
+    for name in ('chain', 'dag'):
+        p = sub.add_parser(name, help=f'service {name} application(s)')
+        p.add_argument('-n', type=int, default=8, help='components per application')
+        p.add_argument('--count', type=int, default=1, help='applications; more than one writes JSONL for --batch')
+        p.add_argument('--pins', type=int, default=0, help='components pinned through component.DZ')
+        p.add_argument('--pin-hosts', default='', help='comma-separated host ids to pin to (e.g. edge hosts)')
+        if name == 'dag':
+            p.add_argument('--extra-edge-prob', type=float, default=0.2)
+    for p in sub.choices.values():
+        p.add_argument('-o', '--output', required=True, help='.properties file (or .jsonl for --count > 1)')
+
+    args = parser.parse_args(argv)
+    if args.kind == 'tiered':
+        write_infra_properties(tiered_infra(args.edge, args.fog, args.cloud, seed=args.seed, edge_uplinks=args.edge_uplinks), args.output)
+    elif args.kind == 'fat-tree':
+        write_infra_properties(fat_tree_infra(args.k, seed=args.seed), args.output)
+    elif args.kind == 'geometric':
+        write_infra_properties(random_geometric_infra(args.n, seed=args.seed, radius=args.radius), args.output)
+    else:
+        pin_hosts = [int(h) for h in args.pin_hosts.split(',') if h.strip()]
+        make = service_chain if args.kind == 'chain' else service_dag
+        extra = {'extra_edge_prob': args.extra_edge_prob} if args.kind == 'dag' else {}
+        apps = [make(args.n, seed=args.seed + i, pin_hosts=pin_hosts, n_pins=args.pins, **extra) for i in range(args.count)]
+        if args.count == 1 and not args.output.endswith('.jsonl'):
+            write_app_properties(apps[0], args.output)
+        else:
+            with open(args.output, 'w') as f:
+                for i, app in enumerate(apps):
+                    f.write(json.dumps({'id': f'{args.kind}-{i}', 'app': app}) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,79 +1,207 @@
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
-import networkx as nx
+import numpy as np
 
 from src.base import PlacementResult
-from src.utils import host_resources_snapshot, edge_ressources_snapshot, can_host, allocate_on_host, edge_capacity_ok, allocate_on_edges
+from src.candidates import candidate_index
+from src.hostSelector import FIT_POLICIES, pick
+from src.ledger import ResourceLedger
+from src.partition import host_envelope, partition_components
+from src.profiling import Profiler, NULL_PROFILER
+from src.queueing import QueueingEvaluator
+from src.routing import ConstrainedRouter, split_flows
 
 
-class GreedyFirstFit:
-    """A simple baseline placement:
-    - Iterate components in order (0..n-1)
-    - For each, pick the first host with enough CPU/RAM
-    - After mapping all nodes, validate each service edge by finding a path that meets BW/latency
-      using shortest path (by latency) and checking capacities.
-    - Returns mapping and per-edge routing meta.
+class GreedyPlacement:
+    """Baseline placement: each component in order goes to a fitting host, then each
+    service link is routed between the hosts of its endpoints.
+
+    Hosts come from the shared `CandidateIndex` (capacity, `component.DZ` pins, latency
+    to pinned neighbours). Pass a shared `ResourceLedger` to place against the capacity
+    left by earlier placements; a failed placement leaves it as it found it.
+
+    - ``router``: routes service links (default `ConstrainedRouter`; `SplittableRouter` may split them).
+    - ``profile``: report per-phase timings and counters in ``meta['profile']``.
+    - ``fit``: 'first' (from ``start_host`` on), 'best' or 'worst' (least or most CPU left over).
+    - ``selector``: use the ledger's O(log n) `HostSelector` (None: for shared ledgers and large apps).
+    - ``partition``: place groups of chatty components together (`src.partition`).
+    - ``max_utilisation``: only hosts whose M/M/1 utilisation stays below it (`QueueingEvaluator`).
     """
 
-    def place(self, service_graph, network_graph, start_host: int = None) -> PlacementResult:
-        SG, NG = service_graph.G, network_graph.G
+    SELECTOR_MIN_COMPONENTS = 128
+
+    def __init__(self, router=None, profile: bool = False, fit: str = 'first', selector: Optional[bool] = None,
+                 partition: bool = False, max_utilisation: Optional[float] = None):
+        if fit not in FIT_POLICIES:
+            raise ValueError(f"Unknown fit policy: {fit} (expected one of {list(FIT_POLICIES)})")
+        self.router = router if router is not None else ConstrainedRouter()
+        self.profile = profile
+        self.fit = fit
+        self.selector = selector
+        self.partition = partition
+        self.max_utilisation = max_utilisation
+
+    def place(self, service_graph, network_graph, start_host: int = None, ledger: ResourceLedger = None) -> PlacementResult:
+        prof = Profiler() if self.profile else NULL_PROFILER
+        with prof.phase('snapshot'):
+            topo = network_graph.compile()
+            svc = service_graph.compile()
+
+        # Track host and edge resources; a private ledger is reported back in meta
+        with prof.phase('ledger'):
+            own_ledger = ledger is None
+            if own_ledger:
+                ledger = ResourceLedger(topo)
+            elif not ledger.matches(topo):
+                raise ValueError("Ledger does not belong to this network graph")
+            ledger.begin()
 
-        # Track host resources
-        res = host_resources_snapshot(network_graph)
-        # Track edge resources (bandwidth)
-        edge_res = edge_ressources_snapshot(network_graph)
+        def failed(reason: str, paths: Dict[Tuple[int, int], List[int]]) -> PlacementResult:
+            ledger.rollback()
+            meta = {'status': 'failed', 'reason': reason}
+            if prof.enabled:
+                meta['profile'] = prof.report()
+            return PlacementResult(mapping=mapping, paths=paths, meta=meta)
 
         # 1) Place components
         mapping: Dict[int, int] = {}
-        # Prepare host iteration order. If start_host is provided and exists
-        hosts_list = list(NG.nodes())
-        if start_host is not None and start_host in hosts_list:
-            # rotate so start_host is first
-            idx = hosts_list.index(start_host)
-            hosts_list = hosts_list[idx:] + hosts_list[:idx]
-
-        # Iterate components in order and place on first-fit host
-        for comp, d in SG.nodes(data=True):
-            cpu_req = int(d.get('cpu') or 0)
-            ram_req = int(d.get('ram') or 0)
-            placed = False
-            for host in hosts_list:
-                if can_host(res, host, cpu_req, ram_req):
-                    allocate_on_host(res, host, cpu_req, ram_req)
-                    mapping[comp] = host
-                    placed = True
-                    break
-            if not placed:
-                return PlacementResult(mapping=mapping, paths={}, meta={'status': 'failed', 'reason': f'no_host_for_component_{comp}'})
+        # Hosts each component may use at all: static capacity, locality pins and
+        # latency to pinned neighbours
+        with prof.phase('candidates'):
+            candidates = candidate_index(service_graph, network_graph)
+        if candidates.invalid_pins:
+            comp, host = candidates.invalid_pins[0]
+            return failed(f'invalid_locality_{comp}_{host}', {})
+        empty = candidates.infeasible()
+        if empty.size:
+            return failed(f'no_host_for_component_{int(svc.comp_ids[empty[0]])}', {})
+        # Host iteration order starts at start_host, if provided and it exists
+        start = topo.index.get(start_host, 0) if start_host is not None else 0
+
+        # Unrestricted components query the ledger's HostSelector (O(log n) per component),
+        # which pays off once its build is amortised over a shared ledger or a large app
+        use_selector = self.selector
+        if use_selector is None:
+            use_selector = not own_ledger or svc.n_components >= self.SELECTOR_MIN_COMPONENTS
+        queueing = QueueingEvaluator(service_graph, network_graph) if self.max_utilisation is not None else None
+        selector = ledger.host_selector() if use_selector and queueing is None else None
+        # queueing filter state: other applications' CPU, component index -> host index placed so far
+        background = ledger.cpu_used.astype(np.float64)
+        assign = np.full(svc.n_components, -1, dtype=np.int64)
+
+        # Placement units: single components in order, or groups of components that talk the most
+        if self.partition:
+            with prof.phase('partition'):
+                groups = partition_components(svc, *host_envelope(topo), pins=candidates.pins)
+                order = np.argsort(groups, kind='stable')
+                units = np.split(order, np.flatnonzero(np.diff(groups[order])) + 1)
+        else:
+            units = [np.array([c]) for c in range(svc.n_components)]
+
+        # Iterate units in order and place each on the host chosen by the fit policy
+        for unit in units:
+            group_host = -1
+            if unit.size > 1:
+                with prof.phase('host_search'):
+                    prof.count('groups')
+                    hosts_order = candidates.ordered_shared(unit, start)
+                    if queueing is not None:
+                        hosts_order = hosts_order[queueing.stable_hosts(unit, assign, self.max_utilisation, background)[hosts_order]]
+                    prof.observe('hosts_scanned', hosts_order.size)
+                    group_host = pick(self.fit, ledger, hosts_order, svc.cpu[unit].sum(), svc.ram[unit].sum())
+                if group_host < 0:
+                    # no host takes the whole group: its members are placed one by one
+                    prof.count('groups_split')
+            for c in unit.tolist():
+                comp = int(svc.comp_ids[c])
+                host = group_host
+                if host < 0:
+                    with prof.phase('host_search'):
+                        if selector is not None and not candidates.restricted[c]:
+                            prof.count('selector_queries')
+                            host = selector.select(self.fit, svc.cpu[c], svc.ram[c], start)
+                        else:
+                            hosts_order = candidates.ordered(c, start)
+                            if queueing is not None:
+                                hosts_order = hosts_order[queueing.stable_hosts(c, assign, self.max_utilisation, background)[hosts_order]]
+                            prof.count('hosts_pruned', topo.n_nodes - hosts_order.size)
+                            prof.observe('hosts_scanned', hosts_order.size)
+                            host = pick(self.fit, ledger, hosts_order, svc.cpu[c], svc.ram[c])
+                if host < 0:
+                    return failed(f'no_host_for_component_{comp}', {})
+                ledger.allocate_on_host(host, svc.cpu[c], svc.ram[c])
+                assign[c] = host
+                mapping[comp] = int(topo.node_ids[host])
+        mapping = {int(cid): mapping[int(cid)] for cid in svc.comp_ids}
 
         # 2) Route edges with constraints
-        # Build a latency-weighted graph for shortest paths
-        H = nx.DiGraph()
-        for u, v, d in NG.edges(data=True):
-            lat = float(d.get('latency') or 0.0)
-            H.add_edge(u, v, weight=lat)
+        # The topology's cached all-pairs index gives latency-shortest paths and lower bounds
+        with prof.phase('path_index'):
+            index = network_graph.path_index()
 
         routing: Dict[Tuple[int, int], Dict[str, Any]] = {}
-        for u, v, d in SG.edges(data=True):
-            src_host = mapping[u]
-            dst_host = mapping[v]
-            bw_req = int(d.get('bandwidth') or 0)
-            lat_limit = int(d.get('latency') or 10**9)  # large if not provided
+        flows: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        route_split = getattr(self.router, 'route_split', None)
+        for k, (u, v) in enumerate(svc.edge_keys):
+            src_host = topo.index[mapping[u]]
+            dst_host = topo.index[mapping[v]]
+            bw_req = svc.edge_bandwidth[k]
+            lat_limit = svc.edge_latency[k]
 
-            try:
-                path = nx.shortest_path(H, source=src_host, target=dst_host, weight='weight')
-            except nx.NetworkXNoPath:
-                return PlacementResult(mapping=mapping, paths={}, meta={'status': 'failed', 'reason': f'no_path_{u}_{v}'})
+            if src_host == dst_host:
+                # co-located: nothing crosses the infrastructure
+                prof.count('links_colocated')
+                routing[(u, v)] = {
+                    'path': [mapping[u]],
+                    'bandwidth': int(bw_req),
+                    'latency_limit': int(lat_limit) if np.isfinite(lat_limit) else 10**9,
+                    'latency': 0,
+                }
+                continue
+            if not np.isfinite(index.distance(src_host, dst_host)):
+                return failed(f'no_path_{u}_{v}', {})
 
-            if not edge_capacity_ok(edge_res, path, bw_req):
-                return PlacementResult(mapping=mapping, paths=paths, meta={'status': 'failed', 'reason': f'constraints_{u}_{v}'})
-            allocate_on_edges(edge_res, path, bw_req)
+            prof.count('route_calls')
+            with prof.phase('routing'):
+                route = self.router.route(topo, index, src_host, dst_host, bw_req, lat_limit, ledger.bw_free,
+                                          profiler=prof)
+            if route is None and route_split is not None:
+                with prof.phase('routing'):
+                    split = route_split(topo, index, src_host, dst_host, bw_req, lat_limit, ledger.bw_free, profiler=prof)
+                if split is not None:
+                    for r, w in zip(split.routes, split.bandwidths):
+                        ledger.allocate_on_edges(r.edges, w)
+                    flows[(u, v)] = split_flows(topo, split)
+                    routing[(u, v)] = {
+                        'path': flows[(u, v)][0]['path'],
+                        'bandwidth': int(bw_req),
+                        'latency_limit': int(lat_limit) if np.isfinite(lat_limit) else 10**9,
+                        'latency': int(split.latency),
+                        'split': len(split.routes),
+                    }
+                    continue
+            if route is None:
+                return failed(f'constraints_{u}_{v}', {key: info['path'] for key, info in routing.items()})
+            prof.observe('path_hops', len(route.path) - 1)
+            ledger.allocate_on_edges(route.edges, bw_req)
 
             routing[(u, v)] = {
-                'path': path,
-                'bandwidth': bw_req,
-                'latency_limit': lat_limit,
+                'path': topo.to_ids(route.path),
+                'bandwidth': int(bw_req),
+                'latency_limit': int(lat_limit) if np.isfinite(lat_limit) else 10**9,
+                'latency': int(route.latency),
             }
 
+        ledger.commit()
         paths = {k: v['path'] for k, v in routing.items()}
-        return PlacementResult(mapping=mapping, paths=paths, meta={'status': 'ok', 'routing': routing, 'host_res': res, 'edge_res': edge_res})
+        meta = {'status': 'ok', 'routing': routing}
+        if own_ledger:
+            meta['host_res'] = ledger.host_res()
+            meta['edge_res'] = ledger.edge_res()
+        if prof.enabled:
+            meta['profile'] = prof.report()
+        return PlacementResult(mapping=mapping, paths=paths, meta=meta, flows=flows)
+
+
+# the name this strategy had when it only did first fit
+GreedyFirstFit = GreedyPlacement
@@ -0,0 +1,324 @@
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.base import PlacementResult
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.profiling import Profiler, NULL_PROFILER
+
+
+class Regions:
+    """Static split of one topology snapshot into regions, and the links between them.
+
+    ``labels[i]`` is the region of node index ``i`` and ``members[r]`` the node
+    indices of region ``r``. Links whose ends lie in different regions are bundled
+    per ordered pair of regions: ``pairs[p]`` is the (from, to) regions of bundle
+    ``p``, ``pair_links[p]`` its CSR positions, ``pair_of[e]`` the bundle of link
+    ``e`` (-1 inside a region) and ``pair_latency[p]`` its fastest link. ``dist`` is
+    the region-level latency lower bound (crossing a region counts as free).
+
+    Subgraphs of region sets are built on demand and the last ``cache_size`` kept,
+    each with its own path index once a strategy routes on it.
+    """
+
+    def __init__(self, network_graph, labels: np.ndarray, names: Sequence[str], cache_size: int = 64):
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import dijkstra
+
+        topo = network_graph.compile()
+        self.network_graph = network_graph
+        self.topo = topo
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.names = list(names)
+        k = self.n_regions = len(self.names)
+        order = np.argsort(self.labels, kind='stable')
+        self.members = np.split(order, np.cumsum(np.bincount(self.labels, minlength=k))[:-1])
+
+        a, b = self.labels[topo.edge_src], self.labels[topo.indices]
+        cross = np.flatnonzero(a != b)
+        keys, bundle = np.unique(a[cross] * k + b[cross], return_inverse=True)
+        bundle = bundle.reshape(-1)
+        self.pairs = np.column_stack((keys // k, keys % k))
+        self.pair_of = np.full(topo.n_edges, -1, dtype=np.int64)
+        self.pair_of[cross] = bundle
+        self.pair_links = np.split(cross[np.argsort(bundle, kind='stable')],
+                                   np.cumsum(np.bincount(bundle, minlength=keys.size))[:-1])
+        self.pair_latency = np.full(keys.size, np.inf)
+        np.minimum.at(self.pair_latency, bundle, topo.edge_latency[cross])
+        # bundles touching each region, either direction: (other region, bundle)
+        self.adjacent: List[List[Tuple[int, int]]] = [[] for _ in range(k)]
+        for p, (u, v) in enumerate(self.pairs.tolist()):
+            self.adjacent[u].append((v, p))
+            self.adjacent[v].append((u, p))
+
+        usable = np.isfinite(self.pair_latency)
+        graph = csr_matrix((np.maximum(self.pair_latency[usable], 1e-6), (self.pairs[usable, 0], self.pairs[usable, 1])),
+                           shape=(k, k))
+        self.dist, self.pred = dijkstra(graph, return_predecessors=True)
+        self.cache_size = cache_size
+        self._subgraphs: 'OrderedDict[Tuple[int, ...], Tuple]' = OrderedDict()
+
+    @classmethod
+    def build(cls, network_graph, by: Union[str, Sequence] = 'cluster', size: int = 256,
+              cache_size: int = 64) -> 'Regions':
+        """Regions from ``hosts.tier`` (``by='tier'``), latency clusters of about ``size``
+        nodes (``'cluster'``) or a per-node sequence of names (see `src.rendering.host_groups`)."""
+        from src.rendering import host_groups
+
+        n = network_graph.compile().n_nodes
+        labels, names = host_groups(network_graph, by, max_groups=max(1, -(-n // size)))
+        return cls(network_graph, labels, names, cache_size)
+
+    def rebind(self) -> 'Regions':
+        """The same regions over the network's current snapshot (after `NetworkGraph.apply_changes`)."""
+        return Regions(self.network_graph, self.labels, self.names, self.cache_size)
+
+    def region_path(self, a: int, b: int) -> Optional[List[int]]:
+        """Regions on the lowest-latency region-level path from ``a`` to ``b``, or None."""
+        if not np.isfinite(self.dist[a, b]):
+            return None
+        path = [b]
+        while path[-1] != a:
+            path.append(int(self.pred[a, path[-1]]))
+        path.reverse()
+        return path
+
+    def subgraph(self, regions: Sequence[int]) -> Tuple[object, np.ndarray, np.ndarray]:
+        """`NetworkGraph.subgraph` of the hosts of ``regions``: (graph, node indices, CSR positions)."""
+        key = tuple(sorted(set(int(r) for r in regions)))
+        hit = self._subgraphs.get(key)
+        if hit is not None:
+            self._subgraphs.move_to_end(key)
+            return hit
+        hosts = np.sort(np.concatenate([self.members[r] for r in key]))
+        sub, edges = self.network_graph.subgraph(hosts)
+        self._subgraphs[key] = hit = (sub, hosts, edges)
+        if len(self._subgraphs) > self.cache_size:
+            self._subgraphs.popitem(last=False)
+        return hit
+
+
+class RegionSummary:
+    """Free capacity of every region and of every bundle of links between two regions.
+
+    Built from a `ResourceLedger` by `ResourceLedger.region_summary`, which then
+    reports each allocation, release and rollback: free CPU/RAM per region and free
+    bandwidth per bundle are adjusted in O(1) per host and per link touched. The
+    largest free host of a region and the widest free link of a bundle are only
+    recomputed when asked for after a change there, over that region or bundle alone.
+    """
+
+    def __init__(self, ledger: ResourceLedger, regions: Regions):
+        self.ledger = ledger
+        self.regions = regions
+        labels, k = regions.labels, regions.n_regions
+        self.cpu_free = np.bincount(labels, weights=ledger.cpu_total - ledger.cpu_used, minlength=k).astype(np.int64)
+        self.ram_free = np.bincount(labels, weights=ledger.ram_total - ledger.ram_used, minlength=k).astype(np.int64)
+        n_pairs = len(regions.pair_links)
+        cross = regions.pair_of >= 0
+        self.bw_free = np.zeros(n_pairs)
+        np.add.at(self.bw_free, regions.pair_of[cross], ledger.bw_free[cross])
+        self._largest = np.zeros((k, 2), dtype=np.int64)
+        self._widest = np.zeros(n_pairs)
+        self._stale_regions = set(range(k))
+        self._stale_pairs = set(range(n_pairs))
+
+    # -------- ledger updates ---------
+    def host_changed(self, host: int, cpu: int, ram: int) -> None:
+        r = self.regions.labels[host]
+        self.cpu_free[r] -= cpu
+        self.ram_free[r] -= ram
+        self._stale_regions.add(int(r))
+
+    def edges_changed(self, edges: np.ndarray, bandwidth: float) -> None:
+        pairs = self.regions.pair_of[edges]
+        pairs = pairs[pairs >= 0]
+        if pairs.size:
+            np.subtract.at(self.bw_free, pairs, bandwidth)
+            self._stale_pairs.update(pairs.tolist())
+
+    # -------- queries ---------
+    def largest_hosts(self) -> np.ndarray:
+        """Per region, the most free CPU and the most free RAM left on one of its hosts."""
+        ledger = self.ledger
+        for r in self._stale_regions:
+            m = self.regions.members[r]
+            if m.size:
+                self._largest[r] = ((ledger.cpu_total[m] - ledger.cpu_used[m]).max(),
+                                    (ledger.ram_total[m] - ledger.ram_used[m]).max())
+        self._stale_regions.clear()
+        return self._largest
+
+    def widest_links(self) -> np.ndarray:
+        """Per bundle, the most free bandwidth left on one of its links."""
+        for p in self._stale_pairs:
+            self._widest[p] = self.ledger.bw_free[self.regions.pair_links[p]].max()
+        self._stale_pairs.clear()
+        return self._widest
+
+
+class HierarchicalPlacement:
+    """Two-level placement for infrastructures too large to place on as a whole.
+
+    The topology is split once into `Regions`: latency clusters of about
+    ``region_size`` nodes (``regions='cluster'``), the infra's ``hosts.tier``
+    (``'tier'``) or an explicit per-node sequence. Each placement then
+    - at region level, starts from the regions of the pinned hosts (joined along
+      region-level shortest paths), else from the region of ``start_host``, else from
+      the region with the most free CPU, and grows the set one adjacent region at a
+      time, nearest bundle first, preferring bundles with a link wide enough for the
+      application's largest link. A set is tried once the `RegionSummary` says its
+      free CPU/RAM covers the application and every component fits its largest host;
+    - at host level, runs ``strategy`` (default `GreedyPlacement`) on the subgraph of
+      those regions against a `ResourceLedger.restrict` copy of their usage, and
+      applies the result to the ledger.
+    Up to ``tries`` region sets are tried. Node ids are shared with the subgraphs,
+    so results are valid on the whole network; ``meta['regions']`` names the regions
+    used. No path index of the whole topology is needed, and the cost of a decision
+    follows the size of the regions it uses.
+    """
+
+    # src.batch and src.cli build the whole topology's path index up front only for strategies that use it
+    needs_path_index = False
+
+    def __init__(self, strategy=None, regions: Union[str, Sequence] = 'cluster', region_size: int = 256,
+                 tries: int = 3, profile: bool = False):
+        # a region is small enough to scan, and a selector would be built for every ledger copy
+        self.strategy = strategy if strategy is not None else GreedyPlacement(profile=profile, selector=False)
+        self.by = regions
+        self.region_size = region_size
+        self.tries = tries
+        self.profile = profile
+        self._regions: Optional[Regions] = None
+
+    def __getstate__(self):
+        # regions hold their network graph and subgraph cache: rebuilt on the other side
+        state = self.__dict__.copy()
+        state['_regions'] = None
+        return state
+
+    def regions_of(self, network_graph) -> Regions:
+        """The `Regions` of ``network_graph``'s current snapshot, built once and kept across changes."""
+        topo = network_graph.compile()
+        regions = self._regions
+        if regions is None or regions.network_graph is not network_graph or regions.labels.size != topo.n_nodes:
+            regions = Regions.build(network_graph, self.by, self.region_size)
+        elif regions.topo is not topo:
+            regions = regions.rebind()
+        self._regions = regions
+        return regions
+
+    def place(self, service_graph, network_graph, start_host: int = None, ledger: ResourceLedger = None) -> PlacementResult:
+        prof = Profiler() if self.profile else NULL_PROFILER
+        with prof.phase('snapshot'):
+            topo = network_graph.compile()
+            svc = service_graph.compile()
+        own_ledger = ledger is None
+        if own_ledger:
+            ledger = ResourceLedger(topo)
+        elif not ledger.matches(topo):
+            raise ValueError("Ledger does not belong to this network graph")
+
+        def failed(reason: str) -> PlacementResult:
+            meta = {'status': 'failed', 'reason': reason}
+            if prof.enabled:
+                meta['profile'] = prof.report()
+            return PlacementResult(mapping={}, paths={}, meta=meta)
+
+        pins = service_graph.locality_pins()
+        for comp, host in pins.items():
+            if comp not in svc.index or host not in topo.index:
+                return failed(f'invalid_locality_{comp}_{host}')
+
+        with prof.phase('regions'):
+            regions = self.regions_of(network_graph)
+            summary = ledger.region_summary(regions)
+            if pins:
+                anchors = [int(regions.labels[topo.index[h]]) for h in pins.values()]
+            elif start_host is not None and start_host in topo.index:
+                anchors = [int(regions.labels[topo.index[start_host]])]
+            else:
+                anchors = [int(np.argmax(summary.cpu_free))]
+
+        reason = 'no_region_fits'
+        for chosen in self._region_sets(regions, summary, svc, anchors, prof):
+            prof.count('region_sets')
+            with prof.phase('subgraph'):
+                sub, hosts, edges = regions.subgraph(chosen)
+                sub_topo = sub.compile()
+                part = ledger.restrict(sub_topo, hosts, edges)
+            prof.observe('subgraph_hosts', sub_topo.n_nodes)
+            start = start_host if start_host in sub_topo.index else None
+            with prof.phase('host_level'):
+                result = self.strategy.place(service_graph, sub, start_host=start, ledger=part)
+            if result.meta.get('status') != 'ok':
+                reason = result.meta.get('reason', reason)
+                continue
+            with prof.phase('ledger'):
+                ledger.apply(result, service_graph)
+            meta = dict(result.meta)
+            meta['regions'] = [regions.names[r] for r in sorted(chosen)]
+            if own_ledger:
+                meta['host_res'] = ledger.host_res()
+                meta['edge_res'] = ledger.edge_res()
+            if prof.enabled:
+                meta['profile'] = prof.report()
+                if 'profile' in result.meta:
+                    meta['profile']['host_level'] = result.meta['profile']
+            return PlacementResult(mapping=result.mapping, paths=result.paths, meta=meta, flows=result.flows)
+        return failed(reason)
+
+    def _region_sets(self, regions: Regions, summary: RegionSummary, svc, anchors: List[int],
+                     prof=NULL_PROFILER) -> Iterator[Tuple[int, ...]]:
+        """Growing, connected sets of regions whose summaries can take the application."""
+        chosen: List[int] = [anchors[0]]
+        for a in anchors[1:]:
+            if a in chosen:
+                continue
+            path = regions.region_path(anchors[0], a)
+            if path is None:
+                return
+            chosen.extend(r for r in path if r not in chosen)
+        in_set = np.zeros(regions.n_regions, dtype=bool)
+        in_set[chosen] = True
+        need_cpu, need_ram = int(svc.cpu.sum()), int(svc.ram.sum())
+        need_bw = float(svc.edge_bandwidth.max()) if svc.n_edges else 0.0
+        tried = 0
+        while True:
+            if self._fits(summary, chosen, svc, need_cpu, need_ram):
+                yield tuple(chosen)
+                tried += 1
+                if tried >= self.tries:
+                    return
+            prof.count('regions_added')
+            nxt = self._nearest(regions, summary, chosen, in_set, need_bw)
+            if nxt < 0:
+                return
+            chosen.append(nxt)
+            in_set[nxt] = True
+
+    @staticmethod
+    def _fits(summary: RegionSummary, chosen: List[int], svc, need_cpu: int, need_ram: int) -> bool:
+        idx = np.asarray(chosen)
+        if summary.cpu_free[idx].sum() < need_cpu or summary.ram_free[idx].sum() < need_ram:
+            return False
+        largest = summary.largest_hosts()[idx]
+        fits = (largest[None, :, 0] >= svc.cpu[:, None]) & (largest[None, :, 1] >= svc.ram[:, None])
+        return bool(fits.any(axis=1).all())
+
+    @staticmethod
+    def _nearest(regions: Regions, summary: RegionSummary, chosen: List[int], in_set: np.ndarray,
+                 need_bw: float) -> int:
+        """Region adjacent to ``chosen`` over the fastest bundle with free bandwidth, or -1."""
+        widest = summary.widest_links()
+        best, best_key = -1, None
+        for r in chosen:
+            for other, p in regions.adjacent[r]:
+                if in_set[other] or widest[p] <= 0:
+                    continue
+                key = (widest[p] < need_bw, regions.pair_latency[p], -int(summary.cpu_free[other]), other)
+                if best_key is None or key < best_key:
+                    best, best_key = other, key
+        return best
@@ -0,0 +1,181 @@
+from bisect import bisect_left, insort
+from typing import Iterator, List
+
+import numpy as np
+
+# host selection policies understood by `HostSelector.select`
+FIT_POLICIES = ('first', 'best', 'worst')
+
+
+class _SortedKeys:
+    """Sorted multiset of ints kept in buckets of at most ``2 * load`` keys.
+
+    Lookups bisect the bucket maxima and then one bucket, and an insert or delete
+    only shifts one bucket, so both stay cheap at tens of thousands of keys.
+    """
+
+    def __init__(self, keys: List[int], load: int = 256):
+        self.load = load
+        self.buckets = [keys[i:i + load] for i in range(0, len(keys), load)]
+        self.maxes = [b[-1] for b in self.buckets]
+
+    def add(self, key: int) -> None:
+        if not self.buckets:
+            self.buckets, self.maxes = [[key]], [key]
+            return
+        b = min(bisect_left(self.maxes, key), len(self.maxes) - 1)
+        bucket = self.buckets[b]
+        insort(bucket, key)
+        self.maxes[b] = bucket[-1]
+        if len(bucket) > 2 * self.load:
+            self.buckets[b:b + 1] = [bucket[:self.load], bucket[self.load:]]
+            self.maxes[b:b + 1] = [bucket[self.load - 1], bucket[-1]]
+
+    def remove(self, key: int) -> None:
+        b = bisect_left(self.maxes, key)
+        bucket = self.buckets[b]
+        del bucket[bisect_left(bucket, key)]
+        if bucket:
+            self.maxes[b] = bucket[-1]
+        else:
+            del self.buckets[b], self.maxes[b]
+
+    def ascending_from(self, key: int) -> Iterator[int]:
+        """Keys ``>= key`` in increasing order."""
+        b = bisect_left(self.maxes, key)
+        if b == len(self.maxes):
+            return
+        bucket = self.buckets[b]
+        yield from bucket[bisect_left(bucket, key):]
+        for bucket in self.buckets[b + 1:]:
+            yield from bucket
+
+    def descending(self) -> Iterator[int]:
+        for bucket in reversed(self.buckets):
+            yield from reversed(bucket)
+
+
+class HostSelector:
+    """Residual-capacity index answering first/best/worst-fit host queries.
+
+    - First fit: a max segment tree over host indices holding free CPU and free
+      RAM; the descent skips every subtree that cannot hold the demand in either
+      dimension, so the leftmost fitting host (from a start index, wrapping
+      around) is found in O(log n) node visits unless CPU-rich and RAM-rich hosts
+      are disjoint.
+    - Best / worst fit: hosts sorted by free CPU in `_SortedKeys`; best fit is the
+      fitting host with the least CPU left over (ties: lowest index), worst fit
+      the one with the most (ties: highest index). Hosts without enough RAM are
+      stepped over.
+
+    The selector is owned by a `ResourceLedger` (see `ResourceLedger.host_selector`),
+    which calls `update` on every host allocation, release and rollback.
+    """
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        n = ledger.topo.n_nodes
+        self.n = n
+        self.size = 1
+        while self.size < max(n, 1):
+            self.size *= 2
+        self.cpu_free: List[int] = (ledger.cpu_total - ledger.cpu_used).tolist()
+        self.ram_free: List[int] = (ledger.ram_total - ledger.ram_used).tolist()
+
+        # segment tree: node 1 is the root, leaves start at ``size``; -1 pads unused leaves
+        self.tree_cpu = [-1] * (2 * self.size)
+        self.tree_ram = [-1] * (2 * self.size)
+        self.tree_cpu[self.size:self.size + n] = self.cpu_free
+        self.tree_ram[self.size:self.size + n] = self.ram_free
+        for i in range(self.size - 1, 0, -1):
+            self.tree_cpu[i] = max(self.tree_cpu[2 * i], self.tree_cpu[2 * i + 1])
+            self.tree_ram[i] = max(self.tree_ram[2 * i], self.tree_ram[2 * i + 1])
+
+        # hosts by free CPU: key = cpu_free * n + host, so equal free CPU orders by host index
+        self.keys = _SortedKeys(sorted(c * n + h for h, c in enumerate(self.cpu_free)))
+
+    def update(self, host: int) -> None:
+        """Re-read the free capacity of ``host`` from the ledger."""
+        cpu = int(self.ledger.cpu_total[host] - self.ledger.cpu_used[host])
+        ram = int(self.ledger.ram_total[host] - self.ledger.ram_used[host])
+        if cpu != self.cpu_free[host]:
+            self.keys.remove(self.cpu_free[host] * self.n + host)
+            self.keys.add(cpu * self.n + host)
+        self.cpu_free[host] = cpu
+        self.ram_free[host] = ram
+        tc, tr = self.tree_cpu, self.tree_ram
+        i = host + self.size
+        tc[i], tr[i] = cpu, ram
+        i //= 2
+        while i:
+            tc[i] = max(tc[2 * i], tc[2 * i + 1])
+            tr[i] = max(tr[2 * i], tr[2 * i + 1])
+            i //= 2
+
+    # -------- queries (host index, or -1 when nothing fits) ---------
+    def first_fit(self, cpu: int, ram: int, start: int = 0) -> int:
+        """Lowest host index ``>= start`` that fits, else the lowest one below ``start``."""
+        host = self._leftmost(cpu, ram, start)
+        if host < 0 and start > 0:
+            host = self._leftmost(cpu, ram, 0)
+        return host
+
+    def _leftmost(self, cpu: int, ram: int, lo: int) -> int:
+        tc, tr, size = self.tree_cpu, self.tree_ram, self.size
+        stack = [(1, 0, size)]
+        while stack:
+            node, nlo, nhi = stack.pop()
+            if nhi <= lo or tc[node] < cpu or tr[node] < ram:
+                continue
+            if node >= size:
+                return node - size
+            mid = (nlo + nhi) // 2
+            stack.append((2 * node + 1, mid, nhi))
+            stack.append((2 * node, nlo, mid))
+        return -1
+
+    def best_fit(self, cpu: int, ram: int) -> int:
+        n, ram_free = self.n, self.ram_free
+        for key in self.keys.ascending_from(int(cpu) * n):
+            if ram_free[key % n] >= ram:
+                return key % n
+        return -1
+
+    def worst_fit(self, cpu: int, ram: int) -> int:
+        n, ram_free = self.n, self.ram_free
+        floor = int(cpu) * n
+        for key in self.keys.descending():
+            if key < floor:
+                break
+            if ram_free[key % n] >= ram:
+                return key % n
+        return -1
+
+    def select(self, policy: str, cpu: int, ram: int, start: int = 0) -> int:
+        """Dispatch on a policy name from `FIT_POLICIES`."""
+        if policy == 'first':
+            return self.first_fit(cpu, ram, start)
+        if policy == 'best':
+            return self.best_fit(cpu, ram)
+        if policy == 'worst':
+            return self.worst_fit(cpu, ram)
+        raise ValueError(f"Unknown fit policy: {policy} (expected one of {list(FIT_POLICIES)})")
+
+
+def pick(policy: str, ledger, hosts: np.ndarray, cpu: int, ram: int) -> int:
+    """Apply a fit policy to an explicit candidate list (already in first-fit scan order).
+
+    Used for components whose candidates are restricted (pins, latency), where the
+    list is short and a vectorised pass beats the selector; returns -1 if none fits.
+    """
+    fits = hosts[ledger.fitting_hosts(cpu, ram, hosts)]
+    if fits.size == 0:
+        return -1
+    if policy == 'first':
+        return int(fits[0])
+    leftover = ledger.cpu_total[fits] - ledger.cpu_used[fits]
+    if policy == 'best':
+        return int(fits[np.lexsort((fits, leftover))[0]])
+    if policy == 'worst':
+        return int(fits[np.lexsort((-fits, -leftover))[0]])
+    raise ValueError(f"Unknown fit policy: {policy} (expected one of {list(FIT_POLICIES)})")
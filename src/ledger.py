@@ -0,0 +1,267 @@
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+from src.compiled import CompiledTopology
+
+
+class ResourceLedger:
+    """Residual host and link capacity shared by successive placements.
+
+    Usage is kept in arrays aligned with a CompiledTopology: hosts by node
+    index, links by CSR position. Strategies allocate into the ledger they are
+    given, so several applications can be packed onto one infrastructure and
+    later released again.
+
+    Changes can be grouped into (nested) transactions: `begin()` records a
+    savepoint in O(1), every allocate/release made after it is appended to an
+    undo log, and `rollback()` reverts exactly those changes while `commit()`
+    keeps them. This gives backtracking and what-if evaluation without copying
+    the usage arrays:
+
+        ledger.begin()
+        ...allocate...
+        if not ok:
+            ledger.rollback()
+        else:
+            ledger.commit()
+    """
+
+    def __init__(self, topo: CompiledTopology):
+        self.topo = topo
+        self.cpu_total = np.array(topo.host_cpu, dtype=np.int64)
+        self.ram_total = np.array(topo.host_ram, dtype=np.int64)
+        self.cpu_used = np.zeros(topo.n_nodes, dtype=np.int64)
+        self.ram_used = np.zeros(topo.n_nodes, dtype=np.int64)
+        self.bw_total = np.array(topo.edge_bandwidth, dtype=np.float64)
+        self.bw_used = np.zeros(topo.n_edges, dtype=np.float64)
+        # residual bandwidth, kept alongside bw_used so routers can read it directly
+        self.bw_free = self.bw_total.copy()
+        # undo log entries: ('host', host, cpu, ram) or ('edges', edges, bandwidth)
+        self._log: List[Tuple] = []
+        self._savepoints: List[int] = []
+        # src.hostSelector.HostSelector, built on first use and kept current from then on
+        self._selector = None
+        # src.hierarchy.RegionSummary, likewise
+        self._regions = None
+
+    @classmethod
+    def for_network(cls, network_graph) -> 'ResourceLedger':
+        return cls(network_graph.compile())
+
+    def matches(self, topo: CompiledTopology) -> bool:
+        return self.topo.n_nodes == topo.n_nodes and self.topo.n_edges == topo.n_edges
+
+    def update_capacity(self, topo: CompiledTopology, hosts: np.ndarray = None, edges: np.ndarray = None) -> None:
+        """Adopt the capacities of a changed snapshot of the same topology (`NetworkGraph.apply_changes`).
+
+        Usage is kept, so hosts or links that shrank can end up over capacity until
+        the allocations on them are moved (see `src.repair`). ``hosts`` / ``edges``
+        list what changed (default: everything).
+        """
+        if not self.matches(topo):
+            raise ValueError("Ledger does not belong to this network graph")
+        self.topo = topo
+        hosts = np.arange(topo.n_nodes) if hosts is None else np.asarray(hosts, dtype=np.int64)
+        edges = np.arange(topo.n_edges) if edges is None else np.asarray(edges, dtype=np.int64)
+        self.cpu_total[hosts] = topo.host_cpu[hosts]
+        self.ram_total[hosts] = topo.host_ram[hosts]
+        self.bw_total[edges] = topo.edge_bandwidth[edges]
+        self.bw_free[edges] = self.bw_total[edges] - self.bw_used[edges]
+        if self._selector is not None:
+            for h in hosts.tolist():
+                self._selector.update(h)
+        # totals and latencies changed: rebuilt on next use
+        self._regions = None
+
+    def restrict(self, topo: CompiledTopology, hosts: np.ndarray, edges: np.ndarray) -> 'ResourceLedger':
+        """Ledger over a subgraph snapshot holding this ledger's usage of its hosts and links.
+
+        ``hosts`` / ``edges`` are the subgraph's node indices and CSR positions here
+        (see `CompiledTopology.subgraph`). It is a copy: what is allocated into it
+        comes back with `apply`.
+        """
+        sub = ResourceLedger(topo)
+        sub.cpu_total[:] = self.cpu_total[hosts]
+        sub.ram_total[:] = self.ram_total[hosts]
+        sub.cpu_used[:] = self.cpu_used[hosts]
+        sub.ram_used[:] = self.ram_used[hosts]
+        sub.bw_total[:] = self.bw_total[edges]
+        sub.bw_used[:] = self.bw_used[edges]
+        sub.bw_free[:] = self.bw_free[edges]
+        return sub
+
+    # -------- transactions ---------
+    def begin(self) -> int:
+        """Open a savepoint; returns the nesting depth."""
+        self._savepoints.append(len(self._log))
+        return len(self._savepoints)
+
+    def commit(self) -> None:
+        """Keep the changes made since the matching `begin()`."""
+        self._savepoints.pop()
+        if not self._savepoints:
+            self._log.clear()
+
+    def rollback(self) -> None:
+        """Undo every change made since the matching `begin()`."""
+        mark = self._savepoints.pop()
+        log = self._log
+        while len(log) > mark:
+            entry = log.pop()
+            if entry[0] == 'host':
+                _, host, cpu, ram = entry
+                self.cpu_used[host] -= cpu
+                self.ram_used[host] -= ram
+                if self._selector is not None:
+                    self._selector.update(host)
+                if self._regions is not None:
+                    self._regions.host_changed(host, -cpu, -ram)
+            else:
+                _, edges, bw = entry
+                self.bw_used[edges] -= bw
+                self.bw_free[edges] += bw
+                if self._regions is not None:
+                    self._regions.edges_changed(edges, -bw)
+
+    @property
+    def in_transaction(self) -> bool:
+        return bool(self._savepoints)
+
+    @contextmanager
+    def transaction(self):
+        """Commit on normal exit, roll back if the block raises."""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    @contextmanager
+    def what_if(self):
+        """Run the block against the ledger and always roll its changes back."""
+        self.begin()
+        try:
+            yield self
+        finally:
+            self.rollback()
+
+    # -------- hosts ---------
+    def can_host(self, host: int, cpu: int, ram: int) -> bool:
+        return self.cpu_used[host] + cpu <= self.cpu_total[host] and self.ram_used[host] + ram <= self.ram_total[host]
+
+    def fitting_hosts(self, cpu: int, ram: int, order: np.ndarray = None) -> np.ndarray:
+        """Boolean mask of hosts (in ``order`` if given) with enough free CPU and RAM."""
+        if order is None:
+            return (self.cpu_used + cpu <= self.cpu_total) & (self.ram_used + ram <= self.ram_total)
+        return (self.cpu_used[order] + cpu <= self.cpu_total[order]) & (self.ram_used[order] + ram <= self.ram_total[order])
+
+    def host_selector(self):
+        """`HostSelector` over this ledger's free host capacity (first/best/worst-fit in O(log n)).
+
+        Built on the first call; afterwards every host allocation, release and
+        rollback updates it, so only ledgers that use it pay for the upkeep.
+        """
+        if self._selector is None:
+            from src.hostSelector import HostSelector
+
+            self._selector = HostSelector(self)
+        return self._selector
+
+    def region_summary(self, regions):
+        """`RegionSummary` of this ledger's free capacity per region of ``regions`` (`src.hierarchy.Regions`).
+
+        Kept current like the host selector; asking for other regions replaces it.
+        """
+        if self._regions is None or self._regions.regions is not regions:
+            from src.hierarchy import RegionSummary
+
+            self._regions = RegionSummary(self, regions)
+        return self._regions
+
+    def allocate_on_host(self, host: int, cpu: int, ram: int) -> None:
+        self.cpu_used[host] += cpu
+        self.ram_used[host] += ram
+        if self._selector is not None:
+            self._selector.update(host)
+        if self._regions is not None:
+            self._regions.host_changed(host, cpu, ram)
+        if self._savepoints:
+            self._log.append(('host', host, cpu, ram))
+
+    def release_on_host(self, host: int, cpu: int, ram: int) -> None:
+        self.allocate_on_host(host, -cpu, -ram)
+
+    # -------- links ---------
+    def edge_capacity_ok(self, edges: np.ndarray, bandwidth: float) -> bool:
+        return bool(np.all(self.bw_free[edges] >= bandwidth))
+
+    def allocate_on_edges(self, edges: np.ndarray, bandwidth: float) -> None:
+        self.bw_used[edges] += bandwidth
+        self.bw_free[edges] -= bandwidth
+        if self._regions is not None:
+            self._regions.edges_changed(edges, bandwidth)
+        if self._savepoints:
+            self._log.append(('edges', edges, bandwidth))
+
+    def release_on_edges(self, edges: np.ndarray, bandwidth: float) -> None:
+        self.allocate_on_edges(edges, -bandwidth)
+
+    def apply(self, result, service_graph) -> None:
+        """Allocate everything a PlacementResult holds, e.g. one computed on a copy of this ledger."""
+        topo, svc = self.topo, service_graph.compile()
+        for comp, host in result.mapping.items():
+            c = svc.index[comp]
+            self.allocate_on_host(topo.index[host], svc.cpu[c], svc.ram[c])
+        for key, info in result.meta.get('routing', {}).items():
+            for flow in result.flows.get(key, [info]):
+                self.allocate_on_edges(topo.path_edges(flow['path']), flow['bandwidth'])
+
+    def release(self, result, service_graph) -> None:
+        """Return everything a successful PlacementResult holds back to the ledger."""
+        topo, svc = self.topo, service_graph.compile()
+        for comp, host in result.mapping.items():
+            c = svc.index[comp]
+            self.release_on_host(topo.index[host], svc.cpu[c], svc.ram[c])
+        for key, info in result.meta.get('routing', {}).items():
+            for flow in result.flows.get(key, [info]):
+                self.release_on_edges(topo.path_edges(flow['path']), flow['bandwidth'])
+
+    # -------- reporting ---------
+    def utilization(self) -> Dict[str, Any]:
+        """Aggregate utilisation ratios; unlimited links are left out of the bandwidth figure."""
+        finite = np.isfinite(self.bw_total)
+        bw_total = self.bw_total[finite].sum()
+        return {
+            'cpu': float(self.cpu_used.sum() / self.cpu_total.sum()) if self.cpu_total.sum() else 0.0,
+            'ram': float(self.ram_used.sum() / self.ram_total.sum()) if self.ram_total.sum() else 0.0,
+            'bandwidth': float(self.bw_used[finite].sum() / bw_total) if bw_total else 0.0,
+            'active_hosts': int(np.count_nonzero(self.cpu_used + self.ram_used)),
+        }
+
+    def host_res(self) -> Dict[int, Dict[str, Any]]:
+        """Per-host usage: node id -> {cpu_total, ram_total, cpu_used, ram_used}."""
+        return {
+            int(n): {
+                'cpu_total': int(self.cpu_total[i]),
+                'ram_total': int(self.ram_total[i]),
+                'cpu_used': int(self.cpu_used[i]),
+                'ram_used': int(self.ram_used[i]),
+            }
+            for i, n in enumerate(self.topo.node_ids)
+        }
+
+    def edge_res(self) -> Dict[Tuple[int, int], Dict[str, Any]]:
+        """Per-link usage: (u, v) -> {bandwidth_total (-1 = unlimited), latency, bandwidth_used}."""
+        topo, ids = self.topo, self.topo.node_ids
+        return {
+            (int(ids[topo.edge_src[e]]), int(ids[topo.indices[e]])): {
+                'bandwidth_total': int(self.bw_total[e]) if np.isfinite(self.bw_total[e]) else -1,
+                'latency': int(topo.edge_latency[e]),
+                'bandwidth_used': int(self.bw_used[e]),
+            }
+            for e in range(topo.n_edges)
+        }
@@ -0,0 +1,112 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from src.base import PlacementResult
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.objectives import get_objective, score
+
+# per-worker state, set once by _init_worker so tasks only ship start hosts
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(strategy, service_graph, network_graph, ledger, objective):
+    if getattr(strategy, 'needs_path_index', True):
+        network_graph.path_index().build()
+    _WORKER.update(strategy=strategy, service_graph=service_graph, network_graph=network_graph,
+                   ledger=ledger, objective=objective)
+
+
+def _run_starts(starts: List[int]) -> Dict[str, Any]:
+    """Try every start host of one chunk; return the chunk's best result and timings."""
+    w = _WORKER
+    t0 = time.perf_counter()
+    best: Tuple[float, Optional[int], Optional[PlacementResult]] = (np.inf, None, None)
+    feasible = 0
+    for start in starts:
+        with w['ledger'].what_if():
+            res = w['strategy'].place(w['service_graph'], w['network_graph'], start_host=start, ledger=w['ledger'])
+        value = score(res, w['service_graph'], w['network_graph'], w['objective'])
+        if np.isfinite(value):
+            feasible += 1
+            if value < best[0]:
+                best = (value, start, res)
+    return {
+        'pid': os.getpid(),
+        'starts': len(starts),
+        'feasible': feasible,
+        'elapsed_s': time.perf_counter() - t0,
+        'best_score': best[0],
+        'best_start': best[1],
+        'best': best[2],
+    }
+
+
+class MultiStart:
+    """Run a strategy from many start hosts in parallel and keep the best result.
+
+    - Start hosts are every infra node, or a seeded random sample of ``sample`` nodes.
+    - They are split into one chunk per worker of a ``ProcessPoolExecutor``; each
+      worker receives the graphs and a copy of the ledger once, at start-up.
+    - Feasible results are scored with ``objective`` (a name from
+      `src.objectives.OBJECTIVES` or a callable, lower is better).
+    - The winning result is applied to the caller's ledger; per-worker timings
+      and scores are reported in ``meta['multistart']``.
+    """
+
+    def __init__(self, strategy=None, objective='latency', max_workers: Optional[int] = None,
+                 sample: Optional[int] = None, seed: int = 0):
+        self.strategy = strategy if strategy is not None else GreedyPlacement()
+        self.objective = objective
+        get_objective(objective)  # fail fast on unknown names
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.sample = sample
+        self.seed = seed
+
+    def start_hosts(self, network_graph) -> List[int]:
+        hosts = [int(n) for n in network_graph.compile().node_ids]
+        if self.sample is not None and self.sample < len(hosts):
+            hosts = sorted(random.Random(self.seed).sample(hosts, self.sample))
+        return hosts
+
+    def place(self, service_graph, network_graph, start_host: int = None, ledger: ResourceLedger = None) -> PlacementResult:
+        t0 = time.perf_counter()
+        own_ledger = ledger is None
+        if own_ledger:
+            ledger = ResourceLedger.for_network(network_graph)
+
+        starts = self.start_hosts(network_graph)
+        if start_host is not None and start_host not in starts:
+            starts.insert(0, start_host)
+        workers = max(1, min(self.max_workers, len(starts)))
+        chunks = [starts[i::workers] for i in range(workers)]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.strategy, service_graph, network_graph, ledger, self.objective)) as pool:
+            reports = list(pool.map(_run_starts, chunks))
+
+        winner = min(reports, key=lambda r: (r['best_score'], r['best_start'] if r['best_start'] is not None else 0))
+        stats = {
+            'objective': self.objective if isinstance(self.objective, str) else getattr(self.objective, '__name__', 'custom'),
+            'starts': len(starts),
+            'feasible': sum(r['feasible'] for r in reports),
+            'best_start': winner['best_start'],
+            'best_score': float(winner['best_score']) if winner['best'] is not None else None,
+            'workers': [{k: r[k] for k in ('pid', 'starts', 'feasible', 'elapsed_s', 'best_score')} for r in reports],
+            'elapsed_s': time.perf_counter() - t0,
+        }
+        if winner['best'] is None:
+            return PlacementResult(mapping={}, paths={}, meta={'status': 'failed', 'reason': 'no_feasible_start', 'multistart': stats})
+
+        result = winner['best']
+        ledger.apply(result, service_graph)
+        result.meta['multistart'] = stats
+        if own_ledger:
+            result.meta['host_res'] = ledger.host_res()
+            result.meta['edge_res'] = ledger.edge_res()
+        return result
@@ -1,7 +1,12 @@
+import dataclasses
 import json
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
 
 import networkx as nx
+import numpy as np
+
+from src.compiled import CompiledTopology
+from src.pathIndex import PathIndex
 
 
 class NetworkGraph:
@@ -10,16 +15,48 @@ class NetworkGraph:
 	Expected infra dict shape (from InfraProperties.to_dict()):
 	  {
 		'hosts.nb': int,
-		'hosts': [ {'cpu': int, 'ram': int}, ... ],
-		'links': [ {'src': int, 'dst': int, 'bandwidth': int, 'latency': int}, ... ],
+		'hosts': [ {'cpu': int, 'ram': int, ['power_idle': float, 'power_peak': float]}, ... ],
+		'links': [ {'src': int, 'dst': int, 'bandwidth': int, 'latency': int, ['energy_per_bit': float]}, ... ],
 		'edges.nb': int,
-		'network.diameter': int
+		'network.diameter': int,
+		['hosts.tier': [str, ...]]
 	  }
 	"""
 
 	def __init__(self):
-		self.G = nx.DiGraph()
+		self._G: Optional[nx.DiGraph] = nx.DiGraph()
 		self.metadata: Dict[str, Any] = {}
+		self._compiled: Optional[CompiledTopology] = None
+		self._path_index: Optional[PathIndex] = None
+		# lazy construction: parsed infra to build G from, and the mapped store backing it (if unmodified)
+		self._infra = None
+		self._bundle: Optional[str] = None
+		# topology changes made before G was built, replayed onto it (see apply_changes)
+		self._edits: List[Dict[str, Any]] = []
+		# capacity of removed hosts/links, restored when they come back
+		self._down_hosts: Dict[int, Tuple[int, int]] = {}
+		self._down_links: Dict[Tuple[int, int], Tuple[float, float]] = {}
+		# links removed on their own ('remove_link'), which a returning host does not bring back
+		self._removed_links: Set[Tuple[int, int]] = set()
+		# subgraphs (see subgraph): the graph and node ids G is induced from
+		self._parent: Optional[Tuple['NetworkGraph', List[int]]] = None
+
+	@property
+	def G(self) -> nx.DiGraph:
+		if self._G is None and self._parent is not None:
+			parent, ids = self._parent
+			self._G = parent.G.subgraph(ids).copy()
+		if self._G is None:
+			G = NetworkGraph.from_infra_dict(self._infra.to_dict()).G
+			for change in self._edits:
+				_edit_graph(G, change)
+			self._edits = []
+			self._G = G
+		return self._G
+
+	@G.setter
+	def G(self, value: nx.DiGraph):
+		self._G = value
 
 	@classmethod
 	def from_infra_dict(cls, infra: Dict[str, Any]):
@@ -27,11 +64,16 @@ class NetworkGraph:
 		obj.metadata['hosts.nb'] = infra.get('hosts.nb')
 		obj.metadata['edges.nb'] = infra.get('edges.nb')
 		obj.metadata['network.diameter'] = infra.get('network.diameter')
+		# generated dicts call it 'tiers'
+		obj.metadata['hosts.tier'] = infra.get('hosts.tier', infra.get('tiers'))
 
 		# nodes
 		hosts: List[Dict[str, Any]] = infra.get('hosts', [])
 		for node_id, host in enumerate(hosts):
 			obj.G.add_node(node_id, cpu=host.get('cpu'), ram=host.get('ram'))
+			if 'power_idle' in host:
+				obj.G.nodes[node_id]['power_idle'] = host['power_idle']
+				obj.G.nodes[node_id]['power_peak'] = host['power_peak']
 
 		# edges
 		links: List[Dict[str, Any]] = infra.get('links', [])
@@ -42,8 +84,191 @@ class NetworkGraph:
 				bandwidth=int(link.get('bandwidth', 0)),
 				latency=int(link.get('latency', 0)),
 			)
+			if 'energy_per_bit' in link:
+				obj.G.edges[int(link['src']), int(link['dst'])]['energy_per_bit'] = link['energy_per_bit']
+		return obj
+
+	@classmethod
+	def from_infra_properties(cls, infra, compiled: Optional[CompiledTopology] = None):
+		"""Build from a parsed `InfraProperties` without creating the networkx graph.
+
+		The compiled snapshot comes straight from the parsed columns (or ``compiled``),
+		which is all the placement strategies need; `G` is built on first access.
+		"""
+		obj = cls()
+		obj._G = None
+		obj._infra = infra
+		obj.metadata['hosts.nb'] = infra.hosts_nb
+		obj.metadata['edges.nb'] = infra.edges_nb
+		obj.metadata['network.diameter'] = infra.network_diameter
+		obj.metadata['hosts.tier'] = infra.hosts_tier
+		obj._compiled = compiled if compiled is not None else CompiledTopology.from_tables(infra.host_table, infra.link_table)
 		return obj
 
+	def __getstate__(self):
+		if self._bundle is not None:
+			# unmodified graph over a memory-mapped store: the receiver maps the same file
+			return {'_bundle': self._bundle}
+		# cached snapshots are derived data: rebuild them after copy/unpickle
+		state = self.__dict__.copy()
+		for key in ('_compiled', '_path_index'):
+			if key in state:
+				state[key] = None
+		return state
+
+	def __setstate__(self, state):
+		if set(state) == {'_bundle'}:
+			from src.topologyStore import open_network_graph
+			state = open_network_graph(state['_bundle']).__dict__
+		self.__dict__.update(state)
+
+	# -------- compiled snapshot ---------
+	def compile(self) -> CompiledTopology:
+		"""Return the array-backed snapshot used by the placement strategies.
+
+		The snapshot is built once and cached; call `invalidate()` after editing `G` directly.
+		"""
+		if self._compiled is None:
+			self._compiled = CompiledTopology.from_graph(self.G)
+		return self._compiled
+
+	def path_index(self) -> PathIndex:
+		"""Return the shortest latency index of this topology (`PathIndex`: rows computed on demand)."""
+		if self._path_index is None:
+			self._path_index = PathIndex(self.compile())
+		return self._path_index
+
+	def subgraph(self, nodes: Iterable[int]) -> Tuple['NetworkGraph', np.ndarray]:
+		"""Graph induced by the node indices ``nodes``, and the CSR positions here of its links.
+
+		For placing within part of a large infrastructure (see `src.hierarchy`): node
+		ids are kept, so placements on the subgraph are valid on this graph. Only the
+		compiled snapshot is built; its path index covers the subgraph alone, and `G`
+		is induced from this graph's on first access.
+		"""
+		sub = NetworkGraph()
+		sub._G = None
+		sub._compiled, edges = self.compile().subgraph(np.fromiter(nodes, dtype=np.int64))
+		sub._parent = (self, sub._compiled.node_ids.tolist())
+		sub.metadata = dict(self.metadata)
+		sub.metadata['hosts.nb'] = sub._compiled.n_nodes
+		sub.metadata['edges.nb'] = sub._compiled.n_edges
+		return sub, edges
+
+	def set_link_latency(self, u: int, v: int, latency: int):
+		"""Change the latency of link u -> v, updating the path index incrementally."""
+		if not self.G.has_edge(u, v):
+			raise KeyError(f"No link {u} -> {v}")
+		edge = self.compile().edge_id(u, v)
+		self.G.edges[u, v]['latency'] = int(latency)
+		# node/edge order is unchanged, so the next snapshot keeps the same indices
+		self._compiled = None
+		self._bundle = None
+		if self._path_index is not None:
+			self._path_index.update_latency(edge, latency)
+
+	def apply_changes(self, changes: Iterable[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+		"""Apply failures and capacity/latency changes in place, keeping node and link indices.
+
+		Each change is a dict:
+		  {'op': 'remove_host', 'host': id}                 host down: no CPU/RAM, its links down
+		  {'op': 'remove_link', 'src': u, 'dst': v}         link down: no bandwidth, infinite latency
+		  {'op': 'host', 'host': id, ['cpu'], ['ram']}      new capacity (brings a removed host back,
+		                                                    with its links except those removed by
+		                                                    'remove_link' or leading to a removed host)
+		  {'op': 'link', 'src': u, 'dst': v, ['bandwidth'], ['latency']}
+		                                                    new values (brings a removed link back);
+		                                                    bandwidth -1 means unlimited
+		Removed hosts and links stay in the snapshot, so ledgers and placement results
+		keep their indices. The snapshot is replaced by a copy with the new values and
+		the path index only recomputes what the changed latencies affect; `G` is
+		updated too (or on first access). Returns the changed host indices and CSR
+		link positions.
+		"""
+		changes = list(changes)
+		# changes mirrored on G: the given ones, plus a 'link' op for each link a returning host brings back
+		graph_changes: List[Dict[str, Any]] = []
+		topo = self.compile()
+		cpu, ram = topo.host_cpu.copy(), topo.host_ram.copy()
+		bw, lat = topo.edge_bandwidth.copy(), topo.edge_latency.copy()
+		hosts, edges = set(), set()
+
+		def link(change) -> Tuple[Tuple[int, int], int]:
+			u, v = int(change['src']), int(change['dst'])
+			e = topo.edge_id(u, v)
+			if e is None:
+				raise KeyError(f"No link {u} -> {v}")
+			return (u, v), e
+
+		def link_down(key: Tuple[int, int], e: int):
+			self._down_links.setdefault(key, (bw[e], lat[e]))
+			bw[e], lat[e] = 0.0, np.inf
+			edges.add(e)
+
+		for change in changes:
+			op = change.get('op')
+			graph_changes.append(change)
+			if op in ('remove_host', 'host'):
+				host = int(change['host'])
+				if host not in topo.index:
+					raise KeyError(f"No host {host}")
+				i = topo.index[host]
+				hosts.add(i)
+				incident = np.concatenate((np.arange(topo.indptr[i], topo.indptr[i + 1]), np.flatnonzero(topo.indices == i)))
+				incident = [(e, (int(topo.node_ids[topo.edge_src[e]]), int(topo.node_ids[topo.indices[e]])))
+							for e in np.unique(incident).tolist()]
+				if op == 'remove_host':
+					self._down_hosts.setdefault(host, (int(cpu[i]), int(ram[i])))
+					cpu[i] = ram[i] = 0
+					for e, key in incident:
+						link_down(key, e)
+				else:
+					came_back = host in self._down_hosts
+					cpu[i], ram[i] = self._down_hosts.pop(host, (cpu[i], ram[i]))
+					cpu[i] = int(change.get('cpu', cpu[i]))
+					ram[i] = int(change.get('ram', ram[i]))
+					for e, key in incident if came_back else ():
+						other = key[1] if key[0] == host else key[0]
+						if key in self._down_links and key not in self._removed_links and other not in self._down_hosts:
+							bw[e], lat[e] = self._down_links.pop(key)
+							edges.add(e)
+							graph_changes.append({'op': 'link', 'src': key[0], 'dst': key[1]})
+			elif op in ('remove_link', 'link'):
+				key, e = link(change)
+				if op == 'remove_link':
+					self._removed_links.add(key)
+					link_down(key, e)
+				else:
+					self._removed_links.discard(key)
+					edges.add(e)
+					bw[e], lat[e] = self._down_links.pop(key, (bw[e], lat[e]))
+					if 'bandwidth' in change:
+						bw[e] = np.inf if change['bandwidth'] < 0 else float(change['bandwidth'])
+					if 'latency' in change:
+						lat[e] = float(change['latency'])
+			else:
+				raise ValueError(f"Unknown topology change: {op}")
+
+		for arr in (cpu, ram, bw, lat):
+			arr.setflags(write=False)
+		self._compiled = dataclasses.replace(topo, host_cpu=cpu, host_ram=ram, edge_bandwidth=bw, edge_latency=lat)
+		self._bundle = None
+		edges = np.array(sorted(edges), dtype=np.int64)
+		if self._path_index is not None and edges.size:
+			self._path_index.update_latencies(edges, lat[edges])
+		if self._G is None:
+			self._edits.extend(graph_changes)
+		else:
+			for change in graph_changes:
+				_edit_graph(self._G, change)
+		return np.array(sorted(hosts), dtype=np.int64), edges
+
+	def invalidate(self):
+		"""Drop cached snapshots and the path index after `G` was modified."""
+		self._compiled = None
+		self._path_index = None
+		self._bundle = None
+
 	# -------- info helpers ---------
 	def summary(self) -> Dict[str, Any]:
 		return {
@@ -104,58 +329,47 @@ class NetworkGraph:
 		layout: str = 'spring',
 		show_edge_labels: bool = True,
 		show_node_info_labels: bool = True,
+		path: Optional[str] = None,
+		results=None,
+		ledger=None,
+		placements=None,
+		aggregate: Optional[bool] = None,
+		groups='tier',
+		cache=None,
 	):
-		try:
-			import matplotlib.pyplot as plt
-		except Exception as e:
-			raise RuntimeError("matplotlib is required for drawing. Install it or disable draw().") from e
-
-		if layout == 'spring':
-			pos = nx.spring_layout(self.G, seed=42)
-		elif layout == 'kamada_kawai':
-			pos = nx.kamada_kawai_layout(self.G)
-		elif layout == 'circular':
-			pos = nx.circular_layout(self.G)
-		else:
-			pos = nx.spring_layout(self.G, seed=42)
-
-		# choose which edges to draw 
-		edgelist = [(u, v) for u, v in self.G.edges() if u != v]
-
-		# If we want to show node info (CPU/RAM), we'll draw custom labels
-		with_labels_draw = False if show_node_info_labels else with_labels
-
-		# Compute node colors: map to 3 colors depending on CPU value
-		palette = ['#8fce00', '#ffd966', '#e06666']  # green, yellow, red
-		t1, t2 =  (4, 8)
-		node_colors = []
-		for _, data in self.G.nodes(data=True):
-			val = data.get('cpu', 0)
-			if val <= t1:
-				node_colors.append(palette[0])
-			elif val <= t2:
-				node_colors.append(palette[1])
-			else:
-				node_colors.append(palette[2])
-
-
-		# draw the nodes and edges
-		nx.draw(self.G, pos, with_labels=with_labels_draw, node_color=node_colors, node_size=1000, arrows=True, edgelist=edgelist)
+		"""Draw the graph and show it, or save it to ``path`` (format from the extension) without a display.
 
-		if show_node_info_labels:
-			labels_nodes = {
-				n: f"{n}\nCPU={d.get('cpu')}\nRAM={d.get('ram')}" for n, d in self.G.nodes(data=True)
-			}
-			nx.draw_networkx_labels(self.G, pos, labels=labels_nodes, font_size=8)
-		if show_edge_labels:
-			labels = {
-				(u, v): f"bw={d.get('bandwidth')}, lat={d.get('latency')}"
-				for u, v, d in self.G.edges(data=True)
-				if (u != v) and ((u, v) in edgelist)
-			}
-			nx.draw_networkx_edge_labels(self.G, pos, edge_labels=labels, font_size=8)
+		Layouts are cached per topology (see `src.rendering.LayoutCache`). Routed paths of
+		``results`` (PlacementResults) are overlaid, and nodes are coloured by CPU utilisation
+		when a ``ledger`` or ``placements`` ((result, service_graph) pairs) is given. Graphs
+		with more than `src.rendering.MAX_DETAILED_NODES` nodes, or ``aggregate=True``, are
+		drawn with one node per tier/cluster (``groups``, see `src.rendering.draw_aggregated`).
+		"""
+		from src import rendering
 
-		plt.tight_layout()
-		plt.show()
+		if aggregate or (aggregate is None and self.compile().n_nodes > rendering.MAX_DETAILED_NODES):
+			return rendering.draw_aggregated(self, path=path, groups=groups, layout=layout, results=results,
+											 ledger=ledger, placements=placements, cache=cache)
+		return rendering.draw_network(self, path=path, layout=layout, with_labels=with_labels,
+									  show_edge_labels=show_edge_labels, show_node_info_labels=show_node_info_labels,
+									  results=results, ledger=ledger, placements=placements, cache=cache)
 
 
+def _edit_graph(G: nx.DiGraph, change: Dict[str, Any]):
+	"""Mirror one `NetworkGraph.apply_changes` change on the networkx graph."""
+	op = change['op']
+	if op == 'remove_host':
+		host = int(change['host'])
+		G.nodes[host]['down'] = True
+		for u, v in list(G.out_edges(host)) + list(G.in_edges(host)):
+			G.edges[u, v]['down'] = True
+	elif op == 'host':
+		attrs = G.nodes[int(change['host'])]
+		attrs.pop('down', None)
+		attrs.update({k: int(change[k]) for k in ('cpu', 'ram') if k in change})
+	elif op == 'remove_link':
+		G.edges[int(change['src']), int(change['dst'])]['down'] = True
+	elif op == 'link':
+		attrs = G.edges[int(change['src']), int(change['dst'])]
+		attrs.pop('down', None)
+		attrs.update({k: int(change[k]) for k in ('bandwidth', 'latency') if k in change})
@@ -0,0 +1,58 @@
+from typing import Callable, Dict
+
+import numpy as np
+
+from src.base import PlacementResult
+from src.energy import total_power
+from src.queueing import end_to_end_latency
+
+
+# Placement objectives: lower is better. Each takes (result, service_graph, network_graph).
+
+def total_path_latency(result: PlacementResult, service_graph, network_graph) -> float:
+    """Sum of the latency of every routed service link (its slowest path when split)."""
+    topo = network_graph.compile()
+    total = 0.0
+    for paths in result.path_sets().values():
+        total += max(float(topo.edge_latency[topo.path_edges(path)].sum()) for path, _ in paths)
+    return total
+
+
+def bandwidth_consumed(result: PlacementResult, service_graph, network_graph) -> float:
+    """Bandwidth reserved across the infrastructure: link bandwidth x hops, summed."""
+    total = 0.0
+    for (u, v), paths in result.path_sets().items():
+        for path, bandwidth in paths:
+            if bandwidth is None:
+                bandwidth = service_graph.G.edges[u, v].get('bandwidth') or 0
+            total += float(bandwidth) * (len(path) - 1)
+    return total
+
+
+def active_hosts(result: PlacementResult, service_graph, network_graph) -> float:
+    """Number of distinct hosts the application runs on."""
+    return float(len(set(result.mapping.values())))
+
+
+OBJECTIVES: Dict[str, Callable[[PlacementResult, object, object], float]] = {
+    'latency': total_path_latency,
+    'bandwidth': bandwidth_consumed,
+    'active_hosts': active_hosts,
+    'energy': total_power,
+    'end_to_end': end_to_end_latency,
+}
+
+
+def get_objective(name_or_fn) -> Callable[[PlacementResult, object, object], float]:
+    if callable(name_or_fn):
+        return name_or_fn
+    if name_or_fn not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {name_or_fn} (expected one of {sorted(OBJECTIVES)})")
+    return OBJECTIVES[name_or_fn]
+
+
+def score(result: PlacementResult, service_graph, network_graph, objective='latency') -> float:
+    """Objective value of a result, ``inf`` when the placement failed."""
+    if result.meta.get('status') != 'ok':
+        return np.inf
+    return get_objective(objective)(result, service_graph, network_graph)
@@ -0,0 +1,213 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.compiled import CompiledService, CompiledTopology
+
+# one coarsening level: neighbour weights per node, (cpu, ram) per node, pinned host per node (-1: none)
+_Level = Tuple[List[Dict[int, float]], np.ndarray, np.ndarray]
+
+
+def host_envelope(topo: CompiledTopology, share: float = 0.5) -> Tuple[int, int]:
+    """CPU and RAM a component group may add up to, from the host capacities.
+
+    Per resource, the largest size such that hosts at least that big hold ``share``
+    of the infrastructure's total: a capacity-weighted quantile. Many small edge
+    hosts then do not shrink groups to their size, and a few large ones do not
+    blow groups up to a size only they can take.
+    """
+    return _weighted_quantile(topo.host_cpu, share), _weighted_quantile(topo.host_ram, share)
+
+
+def _weighted_quantile(capacity: np.ndarray, share: float) -> int:
+    sizes = np.sort(capacity[capacity > 0])[::-1]
+    if not sizes.size:
+        return 0
+    covered = np.cumsum(sizes)
+    return int(sizes[np.searchsorted(covered, share * covered[-1])])
+
+
+def partition_components(svc: CompiledService, cpu_cap: int, ram_cap: int, pins: Optional[Dict[int, int]] = None,
+                         passes: int = 4) -> np.ndarray:
+    """Group components that exchange the most bandwidth, each group within a (cpu, ram) envelope.
+
+    Multilevel Kernighan-Lin over the service graph, with link bandwidth (both
+    directions summed) as edge weight:
+    - coarsening: heavy-edge matching, heaviest links first, merging two nodes only
+      when their summed CPU/RAM stays within the envelope; repeated until nothing
+      merges. The coarsest nodes are the initial groups;
+    - uncoarsening: each level is refined by up to ``passes`` sweeps of single
+      moves to the neighbouring group with the largest positive gain (bandwidth
+      that stops crossing groups). A move the envelope blocks is tried as a swap
+      with a node of that group instead (the Kernighan-Lin exchange).
+    Components that do not fit the envelope on their own stay alone, and so do
+    pinned ones (``pins``: component index -> host index): a group would have to
+    go to the pin's host whole, spending its scarce capacity on unpinned members.
+
+    Returns the group of every component index, numbered by first component.
+    """
+    pins = pins or {}
+    n = svc.n_components
+    adj: List[Dict[int, float]] = [{} for _ in range(n)]
+    for k in range(svc.n_edges):
+        a, b = int(svc.edge_src[k]), int(svc.edge_dst[k])
+        w = float(svc.edge_bandwidth[k])
+        if a != b and w > 0:
+            adj[a][b] = adj[a].get(b, 0.0) + w
+            adj[b][a] = adj[b].get(a, 0.0) + w
+    weight = np.column_stack((svc.cpu, svc.ram)).astype(np.int64)
+    pin = np.full(n, -1, dtype=np.int64)
+    for c, h in pins.items():
+        pin[c] = h
+    cap = np.array([cpu_cap, ram_cap], dtype=np.int64)
+
+    levels: List[_Level] = [(adj, weight, pin)]
+    maps: List[np.ndarray] = []
+    while True:
+        coarse_of, level = _coarsen(*levels[-1], cap)
+        if level is None:
+            break
+        maps.append(coarse_of)
+        levels.append(level)
+
+    groups = np.arange(len(levels[-1][1]))
+    _refine(*levels[-1], groups, cap, passes)
+    for coarse_of, level in zip(reversed(maps), reversed(levels[:-1])):
+        groups = groups[coarse_of]
+        _refine(*level, groups, cap, passes)
+    _, first = np.unique(groups, return_index=True)
+    relabel = np.empty(groups.max() + 1 if n else 0, dtype=np.int64)
+    relabel[groups[np.sort(first)]] = np.arange(first.size)
+    return relabel[groups]
+
+
+def cut_bandwidth(svc: CompiledService, groups: np.ndarray) -> float:
+    """Bandwidth of the service links whose endpoints are in different groups."""
+    cut = groups[svc.edge_src] != groups[svc.edge_dst]
+    return float(svc.edge_bandwidth[cut].sum())
+
+
+def _coarsen(adj: List[Dict[int, float]], weight: np.ndarray, pin: np.ndarray,
+             cap: np.ndarray) -> Tuple[np.ndarray, Optional[_Level]]:
+    """One heavy-edge matching step; the level is None when no pair can merge."""
+    n = len(adj)
+    edges = sorted(((w, u, v) for u in range(n) for v, w in adj[u].items() if u < v), key=lambda e: (-e[0], e[1], e[2]))
+    mate = np.full(n, -1, dtype=np.int64)
+    for _, u, v in edges:
+        if mate[u] >= 0 or mate[v] >= 0:
+            continue
+        if np.any(weight[u] + weight[v] > cap) or pin[u] >= 0 or pin[v] >= 0:
+            continue
+        mate[u], mate[v] = v, u
+    if not (mate >= 0).any():
+        return np.arange(n), None
+
+    coarse_of = np.full(n, -1, dtype=np.int64)
+    m = 0
+    for u in range(n):
+        if coarse_of[u] < 0:
+            coarse_of[u] = m
+            if mate[u] >= 0:
+                coarse_of[mate[u]] = m
+            m += 1
+    c_weight = np.zeros((m, 2), dtype=np.int64)
+    np.add.at(c_weight, coarse_of, weight)
+    c_pin = np.full(m, -1, dtype=np.int64)
+    pinned = pin >= 0
+    c_pin[coarse_of[pinned]] = pin[pinned]
+    c_adj: List[Dict[int, float]] = [{} for _ in range(m)]
+    for u in range(n):
+        cu = coarse_of[u]
+        for v, w in adj[u].items():
+            cv = coarse_of[v]
+            if cu != cv:
+                c_adj[cu][cv] = c_adj[cu].get(cv, 0.0) + w
+    return coarse_of, (c_adj, c_weight, c_pin)
+
+
+def _refine(adj: List[Dict[int, float]], weight: np.ndarray, pin: np.ndarray, groups: np.ndarray,
+            cap: np.ndarray, passes: int) -> None:
+    """Kernighan-Lin / Fiduccia-Mattheyses refinement of ``groups`` in place."""
+    n = len(adj)
+    if not n:
+        return
+    cpu, ram, pins = weight[:, 0].tolist(), weight[:, 1].tolist(), pin.tolist()
+    cpu_cap, ram_cap = int(cap[0]), int(cap[1])
+    group = groups.tolist()
+    n_groups = max(group) + 1
+    load_cpu, load_ram = [0] * n_groups, [0] * n_groups
+    members: List[set] = [set() for _ in range(n_groups)]
+    for u, g in enumerate(group):
+        load_cpu[g] += cpu[u]
+        load_ram[g] += ram[u]
+        members[g].add(u)
+
+    def fits(g: int, add: int, remove: int = -1) -> bool:
+        out_cpu = cpu[remove] if remove >= 0 else 0
+        out_ram = ram[remove] if remove >= 0 else 0
+        return (load_cpu[g] + cpu[add] - out_cpu <= cpu_cap) and (load_ram[g] + ram[add] - out_ram <= ram_cap)
+
+    def unpinned(g: int, add: int, remove: int = -1) -> bool:
+        # pinned components neither move nor take company
+        return pins[add] < 0 and all(pins[v] < 0 for v in members[g] if v != remove)
+
+    def links(u: int) -> Dict[int, float]:
+        out: Dict[int, float] = {}
+        for v, w in adj[u].items():
+            out[group[v]] = out.get(group[v], 0.0) + w
+        return out
+
+    def move(u: int, g: int) -> None:
+        old = group[u]
+        load_cpu[old] -= cpu[u]
+        load_ram[old] -= ram[u]
+        load_cpu[g] += cpu[u]
+        load_ram[g] += ram[u]
+        members[old].discard(u)
+        members[g].add(u)
+        group[u] = g
+
+    def best_swap(u: int, own: int, g: int, gain_u: float) -> int:
+        best, best_gain = -1, 0.0
+        for v in sorted(members[g]):
+            conn = links(v)
+            gain = gain_u + conn.get(own, 0.0) - conn.get(g, 0.0) - 2.0 * adj[u].get(v, 0.0)
+            if gain <= best_gain or not (fits(g, u, v) and fits(own, v, u)):
+                continue
+            if not (unpinned(g, u, v) and unpinned(own, v, u)):
+                continue
+            best, best_gain = v, gain
+        return best
+
+    for _ in range(passes):
+        improved = False
+        for u in range(n):
+            if not adj[u]:
+                continue
+            own = group[u]
+            conn = links(u)
+            internal = conn.get(own, 0.0)
+            best, best_gain, blocked = -1, 0.0, []
+            for g, w in sorted(conn.items()):
+                gain = w - internal
+                if g == own or gain <= best_gain:
+                    continue
+                if not (fits(g, u) and unpinned(g, u)):
+                    blocked.append((gain, g))
+                    continue
+                best, best_gain = g, gain
+            if best >= 0:
+                move(u, best)
+                improved = True
+                continue
+            # Kernighan-Lin exchange: u and v trade groups when the envelope blocks a plain move
+            for gain, g in sorted(blocked, reverse=True):
+                v = best_swap(u, own, g, gain)
+                if v >= 0:
+                    move(u, g)
+                    move(v, own)
+                    improved = True
+                    break
+        if not improved:
+            break
+    groups[:] = group
@@ -0,0 +1,230 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.compiled import CompiledTopology
+
+# scipy marks "no predecessor" with this value
+NO_PRED = -9999
+
+
+class PathIndex:
+    """Shortest latency index over a CompiledTopology, computed on demand.
+
+    Up to ``DENSE_MAX_NODES`` nodes (or with ``dense=True``) it holds an ``n x n``
+    latency matrix ``dist`` and predecessor matrix ``pred`` (``pred[i, j]`` is the
+    node before ``j`` on the shortest ``i -> j`` path), so a path is rebuilt in
+    O(path length). Both are computed with Dijkstra from every source on first use
+    and kept current by `update_latency`: a cheaper link is folded in with one
+    vectorised relaxation, a more expensive one only recomputes the sources whose
+    shortest-path tree uses that link.
+
+    Above it the O(n^2) matrices are never built: `distances_from` / `distances_to`
+    run Dijkstra from one source (or towards one destination, on the reversed
+    graph) and keep the last ``cache_rows`` rows; a latency change drops them.
+    Strategies only ask for rows, so either way they pay for the hosts they use.
+
+    All arguments are dense node indices (see `CompiledTopology.index`).
+    """
+
+    DENSE_MAX_NODES = 4096
+
+    def __init__(self, topo: CompiledTopology, dense: Optional[bool] = None, cache_rows: int = 1024):
+        self.topo = topo
+        # per-link latency owned by the index; inf means the link is unusable
+        self.latency = np.array(topo.edge_latency, dtype=np.float64)
+        self.dense = topo.n_nodes <= self.DENSE_MAX_NODES if dense is None else dense
+        self.cache_rows = cache_rows
+        self._dist: Optional[np.ndarray] = None
+        self._pred: Optional[np.ndarray] = None
+        # source -> (distances, predecessors); destination -> distances
+        self._from: 'OrderedDict[int, Tuple[np.ndarray, np.ndarray]]' = OrderedDict()
+        self._to: 'OrderedDict[int, np.ndarray]' = OrderedDict()
+
+    def _csr(self, reverse: bool = False):
+        # scipy is imported on first use so that commands which never route skip its import cost
+        from scipy.sparse import csr_matrix
+
+        topo = self.topo
+        usable = np.isfinite(self.latency)
+        if reverse:
+            n = topo.n_nodes
+            return csr_matrix((self.latency[usable], (topo.indices[usable], topo.edge_src[usable])), shape=(n, n))
+        if usable.all():
+            data, indices, indptr = self.latency, topo.indices, topo.indptr
+        else:
+            data, indices = self.latency[usable], topo.indices[usable]
+            indptr = np.zeros(topo.n_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(topo.edge_src[usable], minlength=topo.n_nodes), out=indptr[1:])
+        return csr_matrix((data, indices, indptr), shape=(topo.n_nodes, topo.n_nodes))
+
+    def _solve(self, sources: Optional[np.ndarray], reverse: bool = False):
+        from scipy.sparse.csgraph import dijkstra
+
+        dist, pred = dijkstra(self._csr(reverse), indices=sources, return_predecessors=True)
+        return np.atleast_2d(dist), np.atleast_2d(pred)
+
+    # -------- dense matrices ---------
+    def build(self) -> 'PathIndex':
+        """Compute the dense matrices now, e.g. outside a timed loop (no-op above ``DENSE_MAX_NODES``)."""
+        if self.dense and self._dist is None:
+            self._dist, self._pred = self._solve(None)
+        return self
+
+    @property
+    def dist(self) -> np.ndarray:
+        """All-pairs latency matrix; builds the O(n^2) matrices even when not `dense`."""
+        if self._dist is None:
+            self._dist, self._pred = self._solve(None)
+        return self._dist
+
+    @dist.setter
+    def dist(self, value: np.ndarray) -> None:
+        self._dist = value
+
+    @property
+    def pred(self) -> np.ndarray:
+        if self._pred is None:
+            self._dist, self._pred = self._solve(None)
+        return self._pred
+
+    @pred.setter
+    def pred(self, value: np.ndarray) -> None:
+        self._pred = value
+
+    def _matrix(self) -> bool:
+        """Whether queries read the dense matrices (built here in dense mode)."""
+        if self.dense:
+            self.build()
+        return self._dist is not None
+
+    # -------- queries ---------
+    def _row(self, src: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self._matrix():
+            return self._dist[src], self._pred[src]
+        hit = self._from.get(src)
+        if hit is None:
+            dist, pred = self._solve(np.array([src]))
+            hit = self._from[src] = (dist[0], pred[0])
+            if len(self._from) > self.cache_rows:
+                self._from.popitem(last=False)
+        else:
+            self._from.move_to_end(src)
+        return hit
+
+    def distances_from(self, src: int) -> np.ndarray:
+        """Latency from ``src`` to every node (read-only view: do not modify)."""
+        return self._row(src)[0]
+
+    def distances_to(self, dst: int) -> np.ndarray:
+        """Latency from every node to ``dst`` (read-only view: do not modify)."""
+        if self._matrix():
+            return self._dist[:, dst]
+        hit = self._to.get(dst)
+        if hit is None:
+            hit = self._to[dst] = self._solve(np.array([dst]), reverse=True)[0][0]
+            if len(self._to) > self.cache_rows:
+                self._to.popitem(last=False)
+        else:
+            self._to.move_to_end(dst)
+        return hit
+
+    def distances(self, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        """Latency of every ``src[i] -> dst[i]`` pair (arrays of the same shape)."""
+        src, dst = np.asarray(src), np.asarray(dst)
+        if self._matrix():
+            return self._dist[src, dst]
+        out = np.empty(src.shape)
+        for s in np.unique(src).tolist():
+            at = src == s
+            out[at] = self.distances_from(s)[dst[at]]
+        return out
+
+    def distance(self, src: int, dst: int) -> float:
+        return float(self.distances_from(src)[dst])
+
+    def path(self, src: int, dst: int) -> Optional[List[int]]:
+        """Node indices of the latency-shortest ``src -> dst`` path, or None if unreachable."""
+        dist, row = self._row(src)
+        if not np.isfinite(dist[dst]):
+            return None
+        path = [dst]
+        while path[-1] != src:
+            path.append(int(row[path[-1]]))
+        path.reverse()
+        return path
+
+    def path_ids(self, u: int, v: int) -> Optional[List[int]]:
+        """Same as `path` but takes and returns infra node ids."""
+        p = self.path(self.topo.index[u], self.topo.index[v])
+        return None if p is None else self.topo.to_ids(p)
+
+    # -------- maintenance ---------
+    def update_latency(self, edge: int, latency: float) -> None:
+        """Set the latency of link ``edge`` (CSR position) and repair the matrices."""
+        old = self.latency[edge]
+        latency = float(latency)
+        if latency == old:
+            return
+        self.latency[edge] = latency
+        self._from.clear()
+        self._to.clear()
+        if self._dist is None:
+            return
+        a, b = int(self.topo.edge_src[edge]), int(self.topo.indices[edge])
+        if a == b:
+            return
+        if latency < old:
+            self._relax(a, b, latency)
+        else:
+            # only sources whose shortest-path tree enters b through this link can change
+            affected = np.flatnonzero(self.pred[:, b] == a)
+            if affected.size:
+                dist, pred = self._solve(affected)
+                self.dist[affected] = dist
+                self.pred[affected] = pred
+
+    def update_latencies(self, edges: np.ndarray, latencies: np.ndarray) -> None:
+        """`update_latency` for several links at once (e.g. every link of a failed host).
+
+        The sources whose trees use any link that got slower are recomputed in one
+        Dijkstra run; links that got faster are then relaxed one by one.
+        """
+        edges = np.asarray(edges, dtype=np.int64)
+        latencies = np.asarray(latencies, dtype=np.float64)
+        self._from.clear()
+        self._to.clear()
+        if self._dist is None:
+            self.latency[edges] = latencies
+            return
+        slower = latencies > self.latency[edges]
+        faster = latencies < self.latency[edges]
+        a, b = self.topo.edge_src[edges], self.topo.indices[edges]
+        tree = slower & (a != b)
+        # sources whose shortest-path tree enters some b through its slower link a -> b
+        affected = np.flatnonzero((self.pred[:, b[tree]] == a[tree]).any(axis=1))
+        self.latency[edges[slower]] = latencies[slower]
+        if affected.size:
+            dist, pred = self._solve(affected)
+            self.dist[affected] = dist
+            self.pred[affected] = pred
+        for k in np.flatnonzero(faster):
+            self.latency[edges[k]] = latencies[k]
+            if a[k] != b[k]:
+                self._relax(int(a[k]), int(b[k]), float(latencies[k]))
+
+    def _relax(self, a: int, b: int, w: float) -> None:
+        rows = np.flatnonzero(np.isfinite(self.dist[:, a]))
+        cols = np.flatnonzero(np.isfinite(self.dist[b, :]))
+        if rows.size == 0 or cols.size == 0:
+            return
+        cand = self.dist[rows, a][:, None] + w + self.dist[b, cols][None, :]
+        block = np.ix_(rows, cols)
+        improved = cand < self.dist[block]
+        if not improved.any():
+            return
+        via = np.broadcast_to(self.pred[b, cols], improved.shape).copy()
+        via[:, cols == b] = a
+        self.dist[block] = np.where(improved, cand, self.dist[block])
+        self.pred[block] = np.where(improved, via, self.pred[block])
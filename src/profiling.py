@@ -0,0 +1,155 @@
+import contextlib
+import cProfile
+import io
+import pstats
+import sys
+import time
+import tracemalloc
+from typing import Dict, Any, Iterable, Optional
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 't0')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        phases = self.profiler.phases
+        phases[self.name] = phases.get(self.name, 0.0) + time.perf_counter() - self.t0
+        return False
+
+
+class Profiler:
+    """Per-placement instrumentation: phase wall times, counters and value summaries.
+
+    - ``with prof.phase('routing'):`` adds the block's wall time to that phase.
+    - ``prof.count('label_searches')`` increments a counter.
+    - ``prof.observe('path_hops', 3)`` keeps count/total/min/max of a value.
+
+    Everything is plain dict updates, a few per component or service link, so it is
+    cheap enough to leave on. Strategies use `NULL_PROFILER` when profiling is off.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.values: Dict[str, Dict[str, float]] = {}
+
+    def phase(self, name: str) -> _Phase:
+        return _Phase(self, name)
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def observe(self, name: str, value: float):
+        v = self.values.get(name)
+        if v is None:
+            self.values[name] = {'count': 1, 'total': value, 'min': value, 'max': value}
+        else:
+            v['count'] += 1
+            v['total'] += value
+            v['min'] = min(v['min'], value)
+            v['max'] = max(v['max'], value)
+
+    def report(self) -> Dict[str, Any]:
+        """JSON-ready summary: ``total_s``, ``phases_s``, ``counters`` and ``values`` (with means)."""
+        values = {name: {**v, 'mean': v['total'] / v['count']} for name, v in self.values.items()}
+        return {
+            'total_s': time.perf_counter() - self.t0,
+            'phases_s': dict(self.phases),
+            'counters': dict(self.counters),
+            'values': values,
+        }
+
+
+class _NullProfiler:
+    """Profiler stand-in that records nothing."""
+
+    enabled = False
+    _phase = contextlib.nullcontext()
+
+    def phase(self, name: str):
+        return self._phase
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def observe(self, name: str, value: float):
+        pass
+
+    def report(self) -> Dict[str, Any]:
+        return {}
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def merge_reports(reports: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum several `Profiler.report()`s (e.g. every placement of a batch)."""
+    out: Dict[str, Any] = {'placements': 0, 'total_s': 0.0, 'phases_s': {}, 'counters': {}, 'values': {}}
+    for rep in reports:
+        if not rep:
+            continue
+        out['placements'] += 1
+        out['total_s'] += rep.get('total_s', 0.0)
+        for name, t in rep.get('phases_s', {}).items():
+            out['phases_s'][name] = out['phases_s'].get(name, 0.0) + t
+        for name, n in rep.get('counters', {}).items():
+            out['counters'][name] = out['counters'].get(name, 0) + n
+        for name, v in rep.get('values', {}).items():
+            acc = out['values'].get(name)
+            if acc is None:
+                out['values'][name] = {k: v[k] for k in ('count', 'total', 'min', 'max')}
+            else:
+                acc['count'] += v['count']
+                acc['total'] += v['total']
+                acc['min'] = min(acc['min'], v['min'])
+                acc['max'] = max(acc['max'], v['max'])
+    for v in out['values'].values():
+        v['mean'] = v['total'] / v['count']
+    return out
+
+
+@contextlib.contextmanager
+def capture(cprofile_path: Optional[str] = None, trace_memory: bool = False, top: int = 20, stream=None):
+    """Run the enclosed block under cProfile and/or tracemalloc and print a summary.
+
+    cProfile stats are dumped to ``cprofile_path`` (readable with ``pstats`` or
+    snakeviz) and the ``top`` functions by cumulative time are printed; with
+    ``trace_memory`` the peak traced memory and the ``top`` allocation sites are
+    printed. Output goes to ``stream`` (default stderr).
+    """
+    stream = stream or sys.stderr
+    prof = cProfile.Profile() if cprofile_path else None
+    if trace_memory:
+        tracemalloc.start()
+    if prof is not None:
+        prof.enable()
+    try:
+        yield
+    finally:
+        if prof is not None:
+            prof.disable()
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        if prof is not None:
+            prof.dump_stats(cprofile_path)
+            out = io.StringIO()
+            pstats.Stats(prof, stream=out).sort_stats('cumulative').print_stats(top)
+            print(f"cProfile stats written to {cprofile_path}", file=stream)
+            print(out.getvalue(), file=stream)
+        if trace_memory:
+            print(f"tracemalloc: current {current / 2 ** 20:.1f} MiB, peak {peak / 2 ** 20:.1f} MiB", file=stream)
+            for stat in snapshot.statistics('lineno')[:top]:
+                print(f"  {stat}", file=stream)
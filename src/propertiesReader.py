@@ -0,0 +1,242 @@
+from array import array
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import javaproperties
+import numpy as np
+
+
+class TupleTable:
+    """Columnar storage for one braced-tuple property such as ``{0,1,1000,100}, {1,0,1000,100}``.
+
+    Tuples are collected while the value streams in and flushed every
+    ``CHUNK_ROWS`` rows into typed arrays (``'q'`` = int64, ``'d'`` = float64),
+    one per column: a chunk whose rows share one width is converted column-wise
+    by numpy; any other chunk is converted row by row, which is also where
+    malformed tuples are reported with their line number. Rows may omit
+    trailing optional columns; ``widths`` lists the accepted field counts and
+    ``width`` records how many fields each row had.
+    """
+
+    CHUNK_ROWS = 8192
+
+    def __init__(self, key: str, columns: Tuple[Tuple[str, str], ...], widths: Iterable[int], source: str = '<string>'):
+        self.key = key
+        self.names = tuple(name for name, _ in columns)
+        self.types = tuple(code for _, code in columns)
+        self.widths = frozenset(widths)
+        self.source = source
+        self._columns = [array(code) for code in self.types]
+        self._fill = [0 if code == 'q' else float('nan') for code in self.types]
+        self._width = array('B')
+        self._line = array('q')
+        self._open: Optional[int] = None
+        self._buf: List[str] = []
+        self._pending: List[str] = []
+        self._pending_lines: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._width)
+
+    def _error(self, lineno: int, msg: str) -> ValueError:
+        return ValueError(f"{self.source}:{lineno}: {self.key}: {msg}")
+
+    def _flush(self):
+        rows, lines = self._pending, self._pending_lines
+        if not rows:
+            return
+        self._pending, self._pending_lines = [], []
+        n = rows[0].count(',') + 1
+        if n in self.widths and all(r.count(',') + 1 == n for r in rows):
+            flat = ','.join(rows).split(',')
+            try:
+                cols = [np.array(flat[i::n], dtype=np.int64 if code == 'q' else np.float64)
+                        for i, code in enumerate(self.types[:n])]
+            except ValueError:
+                cols = None  # re-parse row by row to report the offending line
+            if cols is not None:
+                for i, code in enumerate(self.types):
+                    if i < n:
+                        self._columns[i].frombytes(cols[i].tobytes())
+                    else:
+                        self._columns[i].extend([self._fill[i]] * len(rows))
+                self._width.extend([n] * len(rows))
+                self._line.extend(lines)
+                return
+        for inner, lineno in zip(rows, lines):
+            self._row(inner, lineno)
+
+    def _row(self, inner: str, lineno: int):
+        fields = inner.split(',')
+        if fields and fields[-1].strip() == '':
+            fields.pop()  # tolerate a trailing comma inside the braces
+        n = len(fields)
+        if n not in self.widths:
+            raise self._error(lineno, f"expected {' or '.join(map(str, sorted(self.widths)))} fields, got {n} in {{{inner.strip()}}}")
+        for i in range(len(self.types)):
+            if i < n:
+                try:
+                    value = int(fields[i]) if self.types[i] == 'q' else float(fields[i])
+                except ValueError:
+                    raise self._error(lineno, f"invalid {self.names[i]} {fields[i].strip()!r} in {{{inner.strip()}}}") from None
+            else:
+                value = self._fill[i]
+            self._columns[i].append(value)
+        self._width.append(n)
+        self._line.append(lineno)
+
+    def feed(self, text: str, lineno: int):
+        """Consume one physical line of the value (continuation backslash already removed)."""
+        pos = 0
+        while True:
+            if self._open is not None:
+                end = text.find('}', pos)
+                if end < 0:
+                    if '{' in text[pos:]:
+                        raise self._error(lineno, "'{' inside a tuple")
+                    self._buf.append(text[pos:])
+                    return
+                self._buf.append(text[pos:end])
+                inner = ''.join(self._buf)
+                if '{' in inner:
+                    raise self._error(lineno, "'{' inside a tuple")
+                self._pending.append(inner)
+                self._pending_lines.append(self._open)
+                if len(self._pending) >= self.CHUNK_ROWS:
+                    self._flush()
+                self._open, self._buf = None, []
+                pos = end + 1
+            start = text.find('{', pos)
+            gap = text[pos:] if start < 0 else text[pos:start]
+            if gap.strip(' \t\f,'):
+                raise self._error(lineno, f"unexpected text {gap.strip()!r}")
+            if start < 0:
+                return
+            self._open, pos = lineno, start + 1
+
+    def close(self):
+        if self._open is not None:
+            raise self._error(self._open, "unclosed '{'")
+        self._flush()
+
+    def column(self, name: str) -> np.ndarray:
+        """A column as a numpy array sharing the typed array's buffer."""
+        i = self.names.index(name)
+        return np.frombuffer(self._columns[i], dtype=np.int64 if self.types[i] == 'q' else np.float64)
+
+    @property
+    def width(self) -> np.ndarray:
+        return np.frombuffer(self._width, dtype=np.uint8)
+
+    @property
+    def lines(self) -> np.ndarray:
+        return np.frombuffer(self._line, dtype=np.int64)
+
+    def rows(self) -> List[List[Any]]:
+        """Rows as Python lists, truncated to the fields each row actually had."""
+        cols = [c.tolist() for c in self._columns]
+        return [[col[r] for col in cols[:w]] for r, w in enumerate(self._width)]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Columns plus ``width`` and ``lines`` as numpy arrays, keyed by name."""
+        out = {name: self.column(name) for name in self.names}
+        out['width'] = self.width
+        out['lines'] = self.lines
+        return out
+
+    @classmethod
+    def from_arrays(cls, key: str, columns, widths, arrays: Dict[str, np.ndarray], source: str = '<arrays>') -> 'TupleTable':
+        """A complete table over existing arrays (e.g. memory-mapped); nothing is copied."""
+        table = cls(key, columns, widths, source)
+        table._columns = [arrays[name] for name in table.names]
+        table._width = arrays['width']
+        table._line = arrays['lines']
+        return table
+
+    @classmethod
+    def from_string(cls, key: str, value: str, columns, widths, source: str = '<string>') -> 'TupleTable':
+        """Parse an already loaded property value (line numbers are relative to the value)."""
+        table = cls(key, columns, widths, source)
+        for lineno, line in enumerate(value.splitlines() or [''], start=1):
+            table.feed(line, lineno)
+        table.close()
+        return table
+
+
+def _split_key(line: str) -> Tuple[str, str]:
+    """Split a logical-line head into key and value start (java.util.Properties rules)."""
+    i, n = 0, len(line)
+    while i < n:
+        ch = line[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch in '=: \t\f':
+            break
+        i += 1
+    key = line[:i]
+    j = i
+    while j < n and line[j] in ' \t\f':
+        j += 1
+    if j < n and line[j] in '=:':
+        j += 1
+        while j < n and line[j] in ' \t\f':
+            j += 1
+    if '\\' in key:
+        key = javaproperties.unescape(key)
+    return key, line[j:]
+
+
+def _continues(line: str) -> bool:
+    """True when a physical line ends with an odd number of backslashes."""
+    k = len(line) - len(line.rstrip('\\'))
+    return k % 2 == 1
+
+
+def read_properties(path: str, tuple_columns: Dict[str, Tuple[Tuple[Tuple[str, str], ...], Iterable[int]]]) -> Tuple[Dict[str, str], Dict[str, TupleTable]]:
+    """Read a .properties file in a single streaming pass.
+
+    Keys listed in ``tuple_columns`` (key -> (columns, accepted widths)) are
+    parsed line by line into `TupleTable`s as they are read, so the joined
+    value is never materialised; malformed tuples raise ``ValueError`` with
+    the file and line number. Every other key is returned as a string, as
+    ``javaproperties.load`` would. Later duplicates of a key replace earlier ones.
+    """
+    scalars: Dict[str, str] = {}
+    tables: Dict[str, TupleTable] = {}
+    table: Optional[TupleTable] = None
+    key: Optional[str] = None
+    parts: List[str] = []
+    continuing = False
+    with open(path, 'r', encoding='latin-1', newline='') as f:
+        for lineno, raw in enumerate(f, start=1):
+            line = raw.rstrip('\r\n').lstrip(' \t\f')
+            if not continuing:
+                if not line or line[0] in '#!':
+                    continue
+                key, line = _split_key(line)
+                if key in tuple_columns:
+                    columns, widths = tuple_columns[key]
+                    table = tables[key] = TupleTable(key, columns, widths, source=path)
+                    scalars.pop(key, None)
+                else:
+                    table, parts = None, []
+            continuing = _continues(line)
+            if continuing:
+                line = line[:-1]
+            if table is not None:
+                table.feed(line, lineno)
+                if not continuing:
+                    table.close()
+            else:
+                parts.append(line)
+                if not continuing:
+                    value = ''.join(parts)
+                    scalars[key] = javaproperties.unescape(value) if '\\' in value else value
+                    tables.pop(key, None)
+    if continuing:
+        if table is not None:
+            table.close()
+        else:
+            value = ''.join(parts)
+            scalars[key] = javaproperties.unescape(value) if '\\' in value else value
+    return scalars, tables
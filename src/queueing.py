@@ -0,0 +1,166 @@
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from src.base import PlacementResult
+
+
+class QueueingEvaluator:
+    """Queueing estimate of component delays and end-to-end latency for a placement.
+
+    Each component is an M/M/1 queue with arrival rate ``lambda`` and service
+    rate ``mu`` (per second) at its requested CPU share:
+    - component utilisation  rho_i = lambda_i / mu_i
+    - host utilisation       rho_h = sum(rho_j * cpu_j) / cpu_h over components j on h,
+      i.e. co-located components compete for the host's cores
+    - sojourn time           T_i = 1 / (mu_i * (1 - max(rho_i, rho_h)))
+    A component is saturated (T_i = inf) when max(rho_i, rho_h) >= 1.
+
+    End-to-end latency of the service DAG is the longest path through it, adding
+    sojourn times (converted with ``time_scale``, default s -> ms) and the
+    network latency of each service link.
+
+    Arrays are vectorised over placements: ``assign`` may be one mapping (n,) or
+    K candidate mappings (K, n) of component index -> host index, so strategies can
+    score many candidates in one call.
+    """
+
+    def __init__(self, service_graph, network_graph, time_scale: float = 1000.0):
+        self.svc = service_graph.compile()
+        self.topo = network_graph.compile()
+        self.network_graph = network_graph
+        self.time_scale = time_scale
+        svc = self.svc
+        self.lambd = np.nan_to_num(svc.lambd, nan=0.0)
+        self.mu = np.nan_to_num(svc.mu, nan=np.inf)
+        self.rho = np.divide(self.lambd, self.mu, out=np.zeros_like(self.lambd), where=self.mu > 0)
+        self.work = self.rho * svc.cpu
+        self.levels = self._levels()
+
+    def _levels(self) -> Optional[List[np.ndarray]]:
+        """Service links grouped by the longest-path depth of their destination (None if cyclic)."""
+        svc = self.svc
+        n = svc.n_components
+        indeg = np.bincount(svc.edge_dst, minlength=n)
+        depth = np.zeros(n, dtype=np.int64)
+        out: List[List[int]] = [[] for _ in range(n)]
+        for k in range(svc.n_edges):
+            out[int(svc.edge_src[k])].append(k)
+        frontier = list(np.flatnonzero(indeg == 0))
+        seen = 0
+        while frontier:
+            c = frontier.pop()
+            seen += 1
+            for k in out[c]:
+                d = int(svc.edge_dst[k])
+                depth[d] = max(depth[d], depth[c] + 1)
+                indeg[d] -= 1
+                if indeg[d] == 0:
+                    frontier.append(d)
+        if seen < n:
+            return None
+        edge_depth = depth[svc.edge_dst]
+        return [np.flatnonzero(edge_depth == lvl) for lvl in range(1, int(depth.max(initial=0)) + 1)]
+
+    # -------- vectorised core ---------
+    def evaluate_assignments(self, assign: np.ndarray, link_latency: np.ndarray = None) -> Dict[str, np.ndarray]:
+        """Queueing figures for one (n,) or several (K, n) component -> host index assignments.
+
+        ``link_latency`` gives the network latency of each service link, shape (m,)
+        or (K, m); by default the shortest-path latency between the assigned hosts.
+        """
+        svc, topo = self.svc, self.topo
+        assign = np.atleast_2d(np.asarray(assign, dtype=np.int64))
+        K = assign.shape[0]
+        rows = np.repeat(np.arange(K), svc.n_components)
+
+        host_work = np.zeros((K, topo.n_nodes))
+        np.add.at(host_work, (rows, assign.ravel()), np.tile(self.work, K))
+        cpu_h = topo.host_cpu.astype(np.float64)
+        host_rho = np.divide(host_work, cpu_h, out=np.full_like(host_work, np.inf), where=cpu_h > 0)
+        host_rho[host_work == 0] = 0.0
+
+        contention = np.maximum(self.rho[None, :], np.take_along_axis(host_rho, assign, axis=1))
+        saturated = contention >= 1.0
+        with np.errstate(divide='ignore'):
+            sojourn = np.where(saturated, np.inf, self.time_scale / (self.mu[None, :] * (1.0 - contention)))
+
+        if link_latency is None:
+            link_latency = self.network_graph.path_index().distances(assign[:, svc.edge_src], assign[:, svc.edge_dst])
+        link_latency = np.broadcast_to(np.atleast_2d(link_latency), (K, svc.n_edges))
+
+        if self.levels is None:
+            end_to_end = np.full((K, svc.n_components), np.nan)
+        else:
+            end_to_end = sojourn.copy()
+            for edges in self.levels:
+                src, dst = svc.edge_src[edges], svc.edge_dst[edges]
+                cand = end_to_end[:, src] + link_latency[:, edges] + sojourn[:, dst]
+                np.maximum.at(end_to_end, (slice(None), dst), cand)
+
+        return {
+            'rho': np.broadcast_to(self.rho, (K, svc.n_components)),
+            'host_rho': host_rho,
+            'contention': contention,
+            'sojourn': sojourn,
+            'saturated': saturated,
+            'end_to_end': end_to_end,
+        }
+
+    def score(self, assign: np.ndarray, link_latency: np.ndarray = None) -> np.ndarray:
+        """Worst end-to-end latency per assignment (inf when a component saturates)."""
+        return self.evaluate_assignments(assign, link_latency)['end_to_end'].max(axis=1)
+
+    def stable_hosts(self, c, assign: np.ndarray, limit: float = 1.0, background: np.ndarray = None) -> np.ndarray:
+        """Mask of hosts where component ``c`` (or the components ``c`` placed together)
+        keeps max(rho_i, rho_h) below ``limit``, given a partial assignment (-1 = unplaced)
+        of the others.
+
+        ``background`` is per-host CPU already reserved by other applications; their
+        arrival rates are unknown, so it counts as fully busy. `GreedyPlacement` and
+        `BranchAndBound` pass the ledger's usage and their ``max_utilisation`` here.
+        """
+        topo = self.topo
+        cs = np.atleast_1d(c)
+        placed = assign >= 0
+        host_work = np.bincount(assign[placed], weights=self.work[placed], minlength=topo.n_nodes)
+        if background is not None:
+            host_work = host_work + background
+        load = np.divide(host_work + self.work[cs].sum(), topo.host_cpu, out=np.full(topo.n_nodes, np.inf),
+                         where=topo.host_cpu > 0)
+        return np.maximum(load, self.rho[cs].max()) < limit
+
+    # -------- PlacementResult view ---------
+    def evaluate(self, result: PlacementResult) -> Dict[str, Any]:
+        """JSON-ready report for a placement, using the latency of the routed paths."""
+        svc, topo = self.svc, self.topo
+        assign = np.array([topo.index[result.mapping[int(c)]] for c in svc.comp_ids], dtype=np.int64)
+        routing = result.meta.get('routing', {})
+        link_latency = np.array([
+            float(routing[key]['latency']) if key in routing and 'latency' in routing[key]
+            else float(topo.edge_latency[topo.path_edges(result.paths[key])].sum())
+            for key in svc.edge_keys
+        ])
+        q = self.evaluate_assignments(assign, link_latency)
+        ids = [int(c) for c in svc.comp_ids]
+        e2e = q['end_to_end'][0]
+        sinks = [i for i in range(svc.n_components) if i not in set(svc.edge_src.tolist())]
+        return {
+            'components': {
+                ids[i]: {
+                    'host': int(topo.node_ids[assign[i]]),
+                    'rho': float(q['rho'][0, i]),
+                    'host_rho': float(q['host_rho'][0, assign[i]]),
+                    'sojourn_ms': float(q['sojourn'][0, i]),
+                }
+                for i in range(svc.n_components)
+            },
+            'saturated': [ids[i] for i in np.flatnonzero(q['saturated'][0])],
+            'end_to_end_ms': {ids[i]: float(e2e[i]) for i in sinks},
+            'max_end_to_end_ms': float(np.max(e2e)) if e2e.size else 0.0,
+        }
+
+
+def end_to_end_latency(result: PlacementResult, service_graph, network_graph) -> float:
+    """Objective: worst end-to-end latency of the service DAG under the queueing model."""
+    return QueueingEvaluator(service_graph, network_graph).evaluate(result)['max_end_to_end_ms']
@@ -0,0 +1,648 @@
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from src.base import PlacementResult, _jsonable
+from src.candidates import candidate_index
+from src.ledger import ResourceLedger
+from src.routing import ConstrainedRouter
+
+LinkKey = Tuple[int, int]
+# one path of a routed service link: (infra node ids, CSR link positions, bandwidth, latency)
+_Path = Tuple[List[int], np.ndarray, float, float]
+
+# objectives understood by `Rebalancer.plan`
+REBALANCE_OBJECTIVES = ('active_hosts', 'latency', 'link_utilization')
+
+_EPS = 1e-9
+
+
+@dataclass
+class MigrationStep:
+    # 'migrate' (a component changes host, its links are re-routed) or 'reroute' (one link only)
+    kind: str
+    app_id: str
+    # component id and infra host ids before / after ('migrate' only)
+    component: Optional[int]
+    src: Optional[int]
+    dst: Optional[int]
+    # RAM copied by the migration (0 for 'reroute')
+    ram: int
+    # new paths of the service links the step touches: (u, v) -> [{path, bandwidth, latency}, ...]
+    links: Dict[LinkKey, List[Dict[str, Any]]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _jsonable({
+            'kind': self.kind,
+            'app_id': self.app_id,
+            'component': self.component,
+            'src': self.src,
+            'dst': self.dst,
+            'ram': self.ram,
+            'links': self.links,
+        })
+
+
+@dataclass
+class MigrationPlan:
+    objective: str
+    # active_hosts / latency / link_utilization before and after the plan
+    before: Dict[str, float]
+    after: Dict[str, float]
+    # to be executed in order; every prefix leaves a feasible state
+    steps: List[MigrationStep] = field(default_factory=list)
+    # app id -> placement once the plan is executed (changed apps only)
+    results: Dict[str, PlacementResult] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+    @property
+    def moves(self) -> int:
+        return len(self.steps)
+
+    @property
+    def migrated_ram(self) -> int:
+        return sum(step.ram for step in self.steps)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _jsonable({
+            'objective': self.objective,
+            'before': self.before,
+            'after': self.after,
+            'moves': self.moves,
+            'migrated_ram': self.migrated_ram,
+            'steps': [step.to_dict() for step in self.steps],
+            'elapsed_s': self.elapsed_s,
+        })
+
+
+class _AppState:
+    """Working copy of one placed app: host index per component and paths per service link."""
+
+    def __init__(self, service_graph, result: PlacementResult, topo, pins: Dict[int, int]):
+        svc = service_graph.compile()
+        self.service_graph = service_graph
+        self.svc = svc
+        # component index -> host index it is pinned to (`CandidateIndex.pins`)
+        self.pins = pins
+        self.assign = np.array([topo.index[result.mapping[int(c)]] for c in svc.comp_ids], dtype=np.int64)
+        path_sets = result.path_sets()
+        self.routes: List[List[_Path]] = []
+        for k, key in enumerate(svc.edge_keys):
+            paths = []
+            for path, share in path_sets.get(key, []):
+                edges = topo.path_edges(path)
+                bw = float(svc.edge_bandwidth[k] if share is None else share)
+                paths.append((list(path), edges, bw, float(topo.edge_latency[edges].sum())))
+            self.routes.append(paths)
+        # neighbour links per component: (service link, other component, link leaves this component)
+        self.adj: List[List[Tuple[int, int, bool]]] = [[] for _ in range(svc.n_components)]
+        for k in range(svc.n_edges):
+            a, b = int(svc.edge_src[k]), int(svc.edge_dst[k])
+            if a != b:
+                self.adj[a].append((k, b, True))
+                self.adj[b].append((k, a, False))
+
+
+class _Move(NamedTuple):
+    """An applied move, with what it replaced so that it can be undone."""
+    app_id: str
+    # migrated component index and host indices before / after (None for a re-route)
+    comp: Optional[int]
+    src: Optional[int]
+    dst: Optional[int]
+    # service link index -> paths before / after
+    old: Dict[int, List[_Path]]
+    new: Dict[int, List[_Path]]
+
+
+def _latency(paths: List[_Path]) -> float:
+    """Latency of a routed service link: its slowest path."""
+    return max((p[3] for p in paths), default=0.0)
+
+
+class Rebalancer:
+    """Plans bounded sequences of migrations that improve live placements.
+
+    Works on a network, its shared ledger and the placed applications (``apps``:
+    app id -> (service graph, result), e.g. `PlacementService.apps`). `plan` runs a
+    local search on working copies and returns a `MigrationPlan`; the ledger is
+    left as it was. `execute` then applies the plan to the ledger and ``apps``.
+
+    Objectives (lower is better):
+    - 'active_hosts': hosts carrying anything. A move drains one lightly loaded host:
+      each of its components goes to another active host (best fit, then closest to
+      its neighbours); hosts are tried by number of components, then RAM, so the
+      cheapest drain comes first.
+    - 'latency': summed latency of the tracked apps' service links. A move migrates one
+      component to the fitting host closest to its neighbours, or re-routes one link.
+      Each candidate has an upper bound on its gain (current latency minus the
+      shortest-path latency from the best candidate host), which only changes when
+      its app does; candidates are tried by decreasing bound until the bound falls
+      below the best gain found.
+    - 'link_utilization': peak used / total bandwidth over finite links, then the
+      sum of squared utilisations. Moves re-route a link off the busiest link or
+      migrate one of its endpoints; a move that leaves the peak as it is must be a
+      re-route that does not add latency.
+
+    Every move is make-before-break: the new host and paths are allocated while the
+    old ones are still held, so the state during and after each step fits the
+    infrastructure. Moves are scored from the hosts, links and service links they
+    touch (incremental evaluation) inside ledger transactions that are rolled back.
+    The search stops when no move improves the objective or the budget is spent:
+    ``max_moves`` steps, ``max_ram`` RAM migrated.
+    """
+
+    def __init__(self, network_graph, ledger: ResourceLedger, apps: Dict[str, Tuple[Any, PlacementResult]],
+                 router=None, tries: int = 4):
+        self.network_graph = network_graph
+        self.ledger = ledger
+        self.apps = apps
+        self.router = router if router is not None else ConstrainedRouter()
+        # target hosts tried per migrated component
+        self.tries = tries
+
+    # -------- planning ---------
+    def plan(self, objective: str = 'active_hosts', max_moves: Optional[int] = None,
+             max_ram: Optional[int] = None) -> MigrationPlan:
+        """Search for an ordered migration plan within the budget (None: unbounded)."""
+        if objective not in REBALANCE_OBJECTIVES:
+            raise ValueError(f"Unknown objective: {objective} (expected one of {list(REBALANCE_OBJECTIVES)})")
+        t0 = time.perf_counter()
+        self._load()
+        plan = MigrationPlan(objective=objective, before=self._metrics(), after={})
+        self._moves_left = max_moves if max_moves is not None else np.inf
+        self._ram_left = max_ram if max_ram is not None else np.inf
+        self.ledger.begin()
+        try:
+            search = {'active_hosts': self._drain_hosts, 'latency': self._shorten,
+                      'link_utilization': self._unload_links}[objective]
+            search(plan)
+            plan.after = self._metrics()
+            plan.results = {app_id: self._result(app_id) for app_id in sorted({s.app_id for s in plan.steps})}
+        finally:
+            self.ledger.rollback()
+        plan.elapsed_s = time.perf_counter() - t0
+        return plan
+
+    def execute(self, plan: MigrationPlan) -> None:
+        """Apply a plan's steps to the ledger in order and store the new results in ``apps``.
+
+        Raises ValueError, leaving everything untouched, when a step no longer fits
+        (the ledger or the apps changed since the plan was made).
+        """
+        self._load()
+        topo = self.topo
+        self.ledger.begin()
+        for n, step in enumerate(plan.steps):
+            if step.app_id not in self._state:
+                self.ledger.rollback()
+                raise ValueError(f"Stale migration plan: step {n} moves unknown app {step.app_id}")
+            st = self._state[step.app_id]
+            links = {st.svc.edge_keys.index(key): [(f['path'], topo.path_edges(f['path']), float(f['bandwidth']),
+                                                    float(f['latency'])) for f in flows]
+                     for key, flows in step.links.items()}
+            if step.kind == 'migrate':
+                c = st.svc.index[step.component]
+                record = None
+                if st.assign[c] == topo.index[step.src]:
+                    record = self._relocate(step.app_id, c, topo.index[step.dst], links)
+            else:
+                (k, paths), = links.items()
+                record = self._reroute(step.app_id, k, paths)
+            if record is None:
+                self.ledger.rollback()
+                raise ValueError(f"Stale migration plan: step {n} ({step.kind} in app {step.app_id}) no longer fits")
+        self.ledger.commit()
+        for app_id in {step.app_id for step in plan.steps}:
+            self.apps[app_id] = (self.apps[app_id][0], self._result(app_id))
+
+    # -------- working state ---------
+    def _load(self) -> None:
+        net, ledger = self.network_graph, self.ledger
+        self.topo = topo = net.compile()
+        if not ledger.matches(topo):
+            raise ValueError("Ledger does not belong to this network graph")
+        self.index = net.path_index()
+        self._route_split = getattr(self.router, 'route_split', None)
+        self._state: Dict[str, _AppState] = {}
+        self._on_host: Dict[int, Set[Tuple[str, int]]] = {}
+        self._on_link: Dict[int, Set[Tuple[str, int]]] = {}
+        for app_id, (service_graph, result) in self.apps.items():
+            pins = candidate_index(service_graph, net).pins
+            st = self._state[app_id] = _AppState(service_graph, result, topo, pins)
+            for c, h in enumerate(st.assign.tolist()):
+                self._on_host.setdefault(h, set()).add((app_id, c))
+            for k in range(st.svc.n_edges):
+                self._index_link(app_id, k, True)
+        # accepted objective state, updated per accepted move
+        self._active = (ledger.cpu_used + ledger.ram_used) > 0
+        self._finite = np.isfinite(ledger.bw_total) & (ledger.bw_total > 0)
+        self._util = np.divide(ledger.bw_used, ledger.bw_total, out=np.zeros(topo.n_edges), where=self._finite)
+        self._refresh_top()
+        self._total_latency = sum(_latency(paths) for st in self._state.values() for paths in st.routes)
+
+    def _index_link(self, app_id: str, k: int, add: bool) -> None:
+        for _, edges, _, _ in self._state[app_id].routes[k]:
+            for e in edges.tolist():
+                users = self._on_link.setdefault(e, set())
+                if add:
+                    users.add((app_id, k))
+                else:
+                    users.discard((app_id, k))
+
+    def _refresh_top(self, size: int = 64) -> None:
+        util = self._util
+        top = np.argpartition(-util, size)[:size] if util.size > size else np.arange(util.size)
+        self._top = top[np.argsort(-util[top], kind='stable')]
+        self._peak = float(util[self._top[0]]) if self._top.size else 0.0
+
+    def _metrics(self) -> Dict[str, float]:
+        ledger = self.ledger
+        util = np.divide(ledger.bw_used, ledger.bw_total, out=np.zeros(ledger.bw_total.size), where=self._finite)
+        return {
+            'active_hosts': float(np.count_nonzero(ledger.cpu_used + ledger.ram_used)),
+            'latency': float(sum(_latency(paths) for st in self._state.values() for paths in st.routes)),
+            'link_utilization': float(util.max()) if util.size else 0.0,
+        }
+
+    def _result(self, app_id: str) -> PlacementResult:
+        st, (_, result) = self._state[app_id], self.apps[app_id]
+        svc, topo = st.svc, self.topo
+        routing: Dict[LinkKey, Dict[str, Any]] = {}
+        flows: Dict[LinkKey, List[Dict[str, Any]]] = {}
+        for k, key in enumerate(svc.edge_keys):
+            lat_limit = svc.edge_latency[k]
+            info = {'bandwidth': int(svc.edge_bandwidth[k]),
+                    'latency_limit': int(lat_limit) if np.isfinite(lat_limit) else 10**9}
+            paths = sorted(st.routes[k], key=lambda p: -p[2])
+            if len(paths) > 1:
+                flows[key] = [{'path': p[0], 'bandwidth': int(p[2]), 'latency': int(p[3])} for p in paths]
+                routing[key] = {'path': paths[0][0], **info, 'latency': int(_latency(paths)), 'split': len(paths)}
+            else:
+                routing[key] = {'path': paths[0][0], **info, 'latency': int(paths[0][3])}
+        mapping = {int(cid): int(topo.node_ids[st.assign[c]]) for c, cid in enumerate(svc.comp_ids)}
+        paths = {key: info['path'] for key, info in routing.items()}
+        meta = {**result.meta, 'routing': routing}
+        return PlacementResult(mapping=mapping, paths=paths, meta=meta, flows=flows)
+
+    # -------- moves ---------
+    def _route_link(self, st: _AppState, k: int, residual: np.ndarray) -> Optional[List[_Path]]:
+        topo, index = self.topo, self.index
+        src, dst = int(st.assign[st.svc.edge_src[k]]), int(st.assign[st.svc.edge_dst[k]])
+        bw, lat_limit = st.svc.edge_bandwidth[k], st.svc.edge_latency[k]
+        route = self.router.route(topo, index, src, dst, bw, lat_limit, residual)
+        if route is not None:
+            return [(topo.to_ids(route.path), route.edges, float(bw), float(route.latency))]
+        split = self._route_split(topo, index, src, dst, bw, lat_limit, residual) if self._route_split else None
+        if split is None:
+            return None
+        return [(topo.to_ids(r.path), r.edges, float(w), float(r.latency)) for r, w in zip(split.routes, split.bandwidths)]
+
+    def _allocate_paths(self, paths: List[_Path], check: bool) -> bool:
+        for _, edges, bw, _ in paths:
+            if check and not self.ledger.edge_capacity_ok(edges, bw):
+                return False
+            self.ledger.allocate_on_edges(edges, bw)
+        return True
+
+    def _residual(self, avoid: Optional[int]) -> np.ndarray:
+        if avoid is None:
+            return self.ledger.bw_free
+        residual = self.ledger.bw_free.copy()
+        residual[avoid] = -1.0
+        return residual
+
+    def _relocate(self, app_id: str, c: int, host: int, links: Optional[Dict[int, List[_Path]]] = None,
+                  avoid: Optional[int] = None):
+        """Move component ``c`` to ``host``, make-before-break, within the caller's transaction.
+
+        Paths come from ``links`` (checked against residual capacity) or the router.
+        Returns the `_Move`, or None when it does not fit; the caller then rolls the
+        ledger back (the working state is left untouched).
+        """
+        st, ledger = self._state[app_id], self.ledger
+        old = int(st.assign[c])
+        cpu, ram = st.svc.cpu[c], st.svc.ram[c]
+        if host == old or not ledger.can_host(host, cpu, ram):
+            return None
+        ledger.allocate_on_host(host, cpu, ram)
+        keys = [k for k, _, _ in st.adj[c]]
+        st.assign[c] = host
+        new: Dict[int, List[_Path]] = {}
+        for k in keys:
+            paths = links[k] if links is not None else self._route_link(st, k, self._residual(avoid))
+            if paths is None or not self._allocate_paths(paths, check=links is not None):
+                st.assign[c] = old
+                return None
+            new[k] = paths
+        ledger.release_on_host(old, cpu, ram)
+        self._on_host[old].discard((app_id, c))
+        self._on_host.setdefault(host, set()).add((app_id, c))
+        return _Move(app_id, c, old, host, self._swap_routes(app_id, new), new)
+
+    def _reroute(self, app_id: str, k: int, paths: Optional[List[_Path]] = None, avoid: Optional[int] = None):
+        """Give service link ``k`` new paths, make-before-break; same contract as `_relocate`."""
+        st = self._state[app_id]
+        check = paths is not None
+        if paths is None:
+            paths = self._route_link(st, k, self._residual(avoid))
+        if paths is None or not self._allocate_paths(paths, check):
+            return None
+        return _Move(app_id, None, None, None, self._swap_routes(app_id, {k: paths}), {k: paths})
+
+    def _swap_routes(self, app_id: str, new: Dict[int, List[_Path]]) -> Dict[int, List[_Path]]:
+        st, old = self._state[app_id], {}
+        for k, paths in new.items():
+            for _, edges, bw, _ in st.routes[k]:
+                self.ledger.release_on_edges(edges, bw)
+            self._index_link(app_id, k, False)
+            old[k], st.routes[k] = st.routes[k], paths
+            self._index_link(app_id, k, True)
+        return old
+
+    def _undo(self, records) -> None:
+        """Restore the working state of moves whose ledger changes were rolled back."""
+        for move in reversed(records):
+            st = self._state[move.app_id]
+            if move.comp is not None:
+                self._on_host[move.dst].discard((move.app_id, move.comp))
+                self._on_host.setdefault(move.src, set()).add((move.app_id, move.comp))
+                st.assign[move.comp] = move.src
+            for k, paths in move.old.items():
+                self._index_link(move.app_id, k, False)
+                st.routes[k] = paths
+                self._index_link(move.app_id, k, True)
+
+    def _step(self, move: _Move) -> MigrationStep:
+        st, ids = self._state[move.app_id], self.topo.node_ids
+        links = {st.svc.edge_keys[k]: [{'path': p[0], 'bandwidth': int(p[2]), 'latency': int(p[3])} for p in paths]
+                 for k, paths in move.new.items()}
+        if move.comp is None:
+            return MigrationStep('reroute', move.app_id, None, None, None, 0, links)
+        return MigrationStep('migrate', move.app_id, int(st.svc.comp_ids[move.comp]), int(ids[move.src]),
+                             int(ids[move.dst]), int(st.svc.ram[move.comp]), links)
+
+    # -------- incremental scoring ---------
+    def _touched(self, records) -> Tuple[np.ndarray, np.ndarray, float]:
+        """Hosts and links changed by applied moves, and the change in summed link latency."""
+        hosts, edges, latency = [], [], 0.0
+        for move in records:
+            if move.comp is not None:
+                hosts += [move.src, move.dst]
+            for k, paths in move.old.items():
+                edges += [p[1] for p in paths] + [p[1] for p in move.new[k]]
+                latency += _latency(move.new[k]) - _latency(paths)
+        edges = np.unique(np.concatenate(edges)) if edges else np.empty(0, dtype=np.int64)
+        return np.unique(np.asarray(hosts, dtype=np.int64)), edges, latency
+
+    def _delta(self, objective: str, records) -> Tuple[float, float]:
+        """Change of the objective (primary, tie-break) caused by applied moves, from what they touched."""
+        hosts, edges, latency = self._touched(records)
+        if objective == 'active_hosts':
+            ledger = self.ledger
+            active = (ledger.cpu_used[hosts] + ledger.ram_used[hosts]) > 0
+            return float(active.sum() - self._active[hosts].sum()), 0.0
+        if objective == 'latency':
+            return latency, 0.0
+        edges = edges[self._finite[edges]]
+        new = self.ledger.bw_used[edges] / self.ledger.bw_total[edges]
+        changed = set(edges.tolist())
+        rest = next((self._util[e] for e in self._top.tolist() if e not in changed), None)
+        if rest is None:
+            keep = self._finite.copy()
+            keep[edges] = False
+            rest = self._util[keep].max(initial=0.0)
+        peak = max(float(rest), float(new.max(initial=0.0)))
+        tie = float((new ** 2).sum() - (self._util[edges] ** 2).sum())
+        # evening out load without lowering the peak is not worth longer paths
+        return peak - self._peak, max(tie, 0.0) if latency > _EPS else tie
+
+    def _accept(self, plan: MigrationPlan, records) -> None:
+        hosts, edges, latency = self._touched(records)
+        ledger = self.ledger
+        self._active[hosts] = (ledger.cpu_used[hosts] + ledger.ram_used[hosts]) > 0
+        edges = edges[self._finite[edges]]
+        self._util[edges] = ledger.bw_used[edges] / ledger.bw_total[edges]
+        self._refresh_top()
+        self._total_latency += latency
+        for record in records:
+            step = self._step(record)
+            plan.steps.append(step)
+            self._moves_left -= 1
+            self._ram_left -= step.ram
+
+    def _trial(self, objective: str, move) -> Optional[Tuple[Tuple[float, float], Any]]:
+        """Score one move (a callable returning a `_Move` or None) and take it back."""
+        self.ledger.begin()
+        record = move()
+        if record is None:
+            self.ledger.rollback()
+            return None
+        delta = self._delta(objective, [record])
+        self.ledger.rollback()
+        self._undo([record])
+        return delta, move
+
+    @staticmethod
+    def _improves(delta: Tuple[float, float]) -> bool:
+        return delta[0] < -_EPS or (delta[0] <= _EPS and delta[1] < -_EPS)
+
+    def _take(self, plan: MigrationPlan, move):
+        """Redo the winning move of a trial for good (same ledger state, so same outcome)."""
+        self.ledger.begin()
+        record = move()
+        self.ledger.commit()
+        self._accept(plan, [record])
+        return record
+
+    def _targets(self, app_id: str, c: int, active_only: bool = False) -> np.ndarray:
+        """Fitting candidate hosts for component ``c`` within its links' latency limits, closest first."""
+        st, ledger, index = self._state[app_id], self.ledger, self.index
+        svc = st.svc
+        fits = ledger.fitting_hosts(svc.cpu[c], svc.ram[c]) & candidate_index(st.service_graph, self.network_graph).mask(c)
+        if active_only:
+            fits &= self._active
+        fits[st.assign[c]] = False
+        near = np.zeros(self.topo.n_nodes)
+        for k, other, out in st.adj[c]:
+            hp = st.assign[other]
+            lat = index.distances_to(hp) if out else index.distances_from(hp)
+            fits &= lat <= svc.edge_latency[k]
+            near += lat
+        hosts = np.flatnonzero(fits)
+        if active_only:
+            # pack: least CPU left over, then closest
+            leftover = ledger.cpu_total[hosts] - ledger.cpu_used[hosts] - svc.cpu[c]
+            hosts = hosts[np.lexsort((near[hosts], leftover))]
+        else:
+            hosts = hosts[np.argsort(near[hosts], kind='stable')]
+        return hosts[:self.tries]
+
+    def _movable(self, app_id: str, c: int) -> bool:
+        st = self._state[app_id]
+        return c not in st.pins and st.svc.ram[c] <= self._ram_left
+
+    # -------- searches ---------
+    def _drain_hosts(self, plan: MigrationPlan) -> None:
+        stuck: Set[int] = set()
+        while self._moves_left > 0:
+            ledger = self.ledger
+            order = []
+            for h in np.flatnonzero(self._active).tolist():
+                users = self._on_host.get(h, set())
+                if h in stuck or not users or len(users) > self._moves_left:
+                    continue
+                ram = sum(int(self._state[a].svc.ram[c]) for a, c in users)
+                if ram > self._ram_left or any(c in self._state[a].pins for a, c in users):
+                    continue
+                order.append((len(users), ram, int(ledger.cpu_used[h]), h))
+            drained = False
+            for _, _, _, h in sorted(order):
+                records = self._drain(h)
+                if records is not None:
+                    self._accept(plan, records)
+                    drained = True
+                    break
+                stuck.add(h)
+            if not drained:
+                break
+
+    def _drain(self, h: int):
+        """Move every component off host ``h`` onto other active hosts; kept on success."""
+        self.ledger.begin()
+        records = []
+        users = sorted(self._on_host[h], key=lambda u: (-int(self._state[u[0]].svc.cpu[u[1]]), u))
+        for app_id, c in users:
+            for host in self._targets(app_id, c, active_only=True).tolist():
+                self.ledger.begin()
+                record = self._relocate(app_id, c, host)
+                if record is None:
+                    self.ledger.rollback()
+                    continue
+                self.ledger.commit()
+                records.append(record)
+                break
+            else:
+                self.ledger.rollback()
+                self._undo(records)
+                return None
+        if self._delta('active_hosts', records)[0] >= 0:
+            # h still carries allocations of apps outside ``apps``
+            self.ledger.rollback()
+            self._undo(records)
+            return None
+        self.ledger.commit()
+        return records
+
+    def _bounds(self, app_id: str) -> List[Tuple[float, int, int]]:
+        """Upper bounds on the latency a move within ``app_id`` can save: (bound, component or -1, link or -1)."""
+        st, index = self._state[app_id], self.index
+        svc = st.svc
+        candidates = candidate_index(st.service_graph, self.network_graph)
+        out = []
+        for c in range(svc.n_components):
+            if not st.adj[c] or c in st.pins:
+                continue
+            near = np.zeros(self.topo.n_nodes)
+            fits = candidates.mask(c)
+            current = 0.0
+            for k, other, leaves in st.adj[c]:
+                hp = st.assign[other]
+                lat = index.distances_to(hp) if leaves else index.distances_from(hp)
+                fits &= lat <= svc.edge_latency[k]
+                near += lat
+                current += _latency(st.routes[k])
+            fits[st.assign[c]] = False
+            if fits.any():
+                out.append((current - float(near[fits].min()), c, -1))
+        for k in range(svc.n_edges):
+            src, dst = st.assign[svc.edge_src[k]], st.assign[svc.edge_dst[k]]
+            out.append((_latency(st.routes[k]) - index.distance(src, dst), -1, k))
+        return [b for b in out if b[0] > _EPS]
+
+    def _shorten(self, plan: MigrationPlan) -> None:
+        # Lazy greedy: a candidate's key is an upper bound on its gain until it is
+        # evaluated, then the measured gain, trusted until the next accepted move.
+        heap: List[Tuple[float, str, int, int, int, int]] = []
+        generation: Dict[str, int] = {}
+        chosen: Dict[Tuple[str, int, int], Any] = {}
+
+        def push_app(app_id: str) -> None:
+            # only the moved app's bounds depend on what changed; its older entries go stale
+            generation[app_id] = generation.get(app_id, -1) + 1
+            for bound, c, k in self._bounds(app_id):
+                heapq.heappush(heap, (-bound, app_id, c, k, generation[app_id], -1))
+
+        for app_id in sorted(self._state):
+            push_app(app_id)
+        accepted = 0
+        while heap and self._moves_left > 0:
+            key, app_id, c, k, gen, evaluated = heapq.heappop(heap)
+            if gen != generation[app_id]:
+                continue
+            if evaluated == accepted:
+                record = self._take(plan, chosen.pop((app_id, c, k)))
+                accepted += 1
+                push_app(record.app_id)
+                continue
+            if c >= 0:
+                if not self._movable(app_id, c):
+                    continue
+                moves = [lambda a=app_id, c=c, h=h: self._relocate(a, c, h) for h in self._targets(app_id, c).tolist()]
+            else:
+                moves = [lambda a=app_id, k=k: self._reroute(a, k)]
+            best = None
+            for move in moves:
+                tried = self._trial('latency', move)
+                if tried is not None and self._improves(tried[0]) and (best is None or tried[0] < best[0]):
+                    best = tried
+            if best is not None:
+                chosen[(app_id, c, k)] = best[1]
+                heapq.heappush(heap, (best[0][0], app_id, c, k, gen, accepted))
+
+    def _unload_links(self, plan: MigrationPlan) -> None:
+        # links no move could relieve are not tried again
+        stuck: Set[int] = set()
+        while self._moves_left > 0 and self._peak > 0:
+            # busiest links first; the first one some move can relieve is taken
+            best = None
+            for e in np.argsort(-self._util, kind='stable').tolist():
+                if self._util[e] <= 0:
+                    break
+                if e in stuck:
+                    continue
+                best = self._relieve(e)
+                if best is not None:
+                    break
+                stuck.add(e)
+            if best is None:
+                break
+            self._take(plan, best[1])
+
+    def _relieve(self, e: int):
+        """Best improving move off link ``e``: re-routing one of its service links, else
+        (re-routes move no RAM and cost one search each) migrating one of their endpoints.
+        Migrations must lower the peak: the tie-break alone does not pay for copying RAM."""
+        users = sorted(self._on_link.get(e, ()))
+        reroutes = [lambda a=app_id, k=k: self._reroute(a, k, avoid=e) for app_id, k in users]
+        migrations = []
+        for app_id, k in users:
+            st = self._state[app_id]
+            for c in (int(st.svc.edge_src[k]), int(st.svc.edge_dst[k])):
+                if self._movable(app_id, c):
+                    migrations += [lambda a=app_id, c=c, h=h: self._relocate(a, c, h, avoid=e)
+                                   for h in self._targets(app_id, c).tolist()]
+        for moves, peak_only in ((reroutes, False), (migrations, True)):
+            best = None
+            for move in moves:
+                tried = self._trial('link_utilization', move)
+                if tried is None or not self._improves(tried[0]) or (peak_only and tried[0][0] >= -_EPS):
+                    continue
+                if best is None or tried[0] < best[0]:
+                    best = tried
+            if best is not None:
+                return best
+        return None
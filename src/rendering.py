@@ -0,0 +1,360 @@
+import hashlib
+import os
+from collections import OrderedDict
+from itertools import chain
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple, Union
+
+import networkx as nx
+import numpy as np
+
+from src.base import PlacementResult
+
+# above this many nodes NetworkGraph.draw switches to the aggregated view
+MAX_DETAILED_NODES = 200
+# per-node / per-link text is only drawn below these sizes
+MAX_NODE_LABELS = 60
+MAX_EDGE_LABELS = 40
+
+CPU_PALETTE = ['#8fce00', '#ffd966', '#e06666']  # green, yellow, red
+PATH_COLOR = '#3d85c6'
+
+
+# -------- layout cache ---------
+def structure_hash(*arrays: np.ndarray, extra: str = '') -> str:
+    """Hex digest of a graph's structure (node ids and link endpoints), independent of attributes."""
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(str((a.dtype.str, a.shape)).encode())
+        h.update(a.tobytes())
+    h.update(extra.encode())
+    return h.hexdigest()
+
+
+def network_hash(network_graph) -> str:
+    topo = network_graph.compile()
+    return structure_hash(topo.node_ids, topo.edge_src, topo.indices)
+
+
+def service_hash(service_graph) -> str:
+    svc = service_graph.compile()
+    return structure_hash(svc.comp_ids, svc.edge_src, svc.edge_dst)
+
+
+class LayoutCache:
+    """Node positions keyed by structure hash and layout name.
+
+    Positions are kept in memory (least recently used first out) and, with
+    ``cache_dir``, also as ``{key}.layout.npz`` files so later runs on the same
+    topology skip the layout entirely. Editing link attributes keeps the key;
+    adding or removing nodes or links changes it.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 32):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory: 'OrderedDict[str, Tuple[np.ndarray, np.ndarray]]' = OrderedDict()
+
+    def _file(self, key: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, f'{key}.layout.npz') if self.cache_dir else None
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """``(node_ids, positions)`` stored under ``key``, or None."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        path = self._file(key)
+        if path and os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    entry = (data['nodes'], data['pos'])
+            except (OSError, ValueError, KeyError):
+                return None
+            self._remember(key, entry)
+            return entry
+        return None
+
+    def put(self, key: str, nodes: np.ndarray, pos: np.ndarray):
+        self._remember(key, (nodes, pos))
+        path = self._file(key)
+        if path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = path + '.tmp.npz'
+            np.savez(tmp, nodes=nodes, pos=pos)
+            os.replace(tmp, path)
+
+    def _remember(self, key: str, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def positions(self, key: str, G, layout: str = 'spring', seed: int = 42) -> Dict[Any, np.ndarray]:
+        """Positions of ``G``'s nodes for ``layout``, computed only on a cache miss."""
+        key = f'{key}.{layout}.{seed}'
+        entry = self.get(key)
+        if entry is None:
+            pos = compute_layout(G, layout, seed)
+            nodes = list(pos)
+            entry = (np.asarray(nodes), np.array([pos[n] for n in nodes], dtype=np.float64).reshape(-1, 2))
+            self.put(key, *entry)
+        return dict(zip(entry[0].tolist(), entry[1]))
+
+
+# shared by every draw() call of the process
+LAYOUTS = LayoutCache()
+
+
+def compute_layout(G, layout: str = 'spring', seed: int = 42) -> Dict[Any, np.ndarray]:
+    if layout == 'kamada_kawai':
+        return nx.kamada_kawai_layout(G)
+    if layout == 'circular':
+        return nx.circular_layout(G)
+    if layout == 'shell':
+        return nx.shell_layout(G)
+    return nx.spring_layout(G, seed=seed)
+
+
+# -------- utilisation and paths ---------
+def _as_results(results) -> List[PlacementResult]:
+    if results is None:
+        return []
+    if isinstance(results, PlacementResult):
+        return [results]
+    return [r[1] if isinstance(r, tuple) else r for r in results]
+
+
+def cpu_utilization(network_graph, ledger=None, placements: Iterable[Tuple[PlacementResult, Any]] = None) -> Optional[np.ndarray]:
+    """CPU utilisation per node index, from a `ResourceLedger` or from ``(result, service_graph)`` pairs."""
+    topo = network_graph.compile()
+    if ledger is None and placements is not None:
+        from src.ledger import ResourceLedger
+
+        ledger = ResourceLedger(topo)
+        for result, svc in placements:
+            if result.meta.get('status', 'ok') == 'ok':
+                ledger.apply(result, svc)
+    if ledger is None:
+        return None
+    return np.divide(ledger.cpu_used, topo.host_cpu, out=np.zeros(topo.n_nodes), where=topo.host_cpu > 0)
+
+
+def path_hops(network_graph, results) -> Tuple[np.ndarray, np.ndarray]:
+    """Node-index pairs ``(a, b)`` of every hop of the routed paths of ``results``."""
+    topo = network_graph.compile()
+    paths = [p for r in _as_results(results) for p in r.paths.values() if len(p) > 1]
+    if not paths:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    lengths = np.fromiter(map(len, paths), dtype=np.int64, count=len(paths))
+    ids = np.fromiter(chain.from_iterable(paths), dtype=np.int64, count=int(lengths.sum()))
+    order = np.argsort(topo.node_ids, kind='stable')
+    pos = np.minimum(np.searchsorted(topo.node_ids[order], ids), topo.n_nodes - 1)
+    idx = np.where(topo.node_ids[order][pos] == ids, order[pos], -1)
+    last = np.cumsum(lengths) - 1
+    hop = np.ones(ids.size, dtype=bool)
+    hop[last] = False
+    hop = np.flatnonzero(hop)
+    a, b = idx[hop], idx[hop + 1]
+    keep = (a >= 0) & (b >= 0)
+    return a[keep], b[keep]
+
+
+# -------- host groups ---------
+def host_groups(network_graph, groups: Union[str, Sequence] = 'tier', max_groups: int = 32) -> Tuple[np.ndarray, List[str]]:
+    """Group label (0..g-1) of every node index and the group names.
+
+    ``groups`` is ``'tier'`` (the infra's ``hosts.tier``, falling back to clusters when
+    it has none), ``'cluster'`` (at most ``max_groups`` latency clusters around
+    farthest-apart seeds), or an explicit per-node sequence of names.
+    """
+    topo = network_graph.compile()
+    n = topo.n_nodes
+    if isinstance(groups, str) and groups == 'tier':
+        tiers = network_graph.metadata.get('hosts.tier')
+        if tiers:
+            groups = [tiers[int(i)] if 0 <= int(i) < len(tiers) else 'other' for i in topo.node_ids]
+        else:
+            groups = 'cluster'
+    if isinstance(groups, str):
+        if groups != 'cluster':
+            raise ValueError(f"Unknown grouping: {groups} (expected 'tier', 'cluster' or a sequence)")
+        return _clusters(topo, max_groups)
+    if len(groups) != n:
+        raise ValueError(f"groups has {len(groups)} entries for {n} nodes")
+    names, labels = np.unique(np.asarray([str(g) for g in groups]), return_inverse=True)
+    return labels.astype(np.int64), names.tolist()
+
+
+def _clusters(topo, max_groups: int) -> Tuple[np.ndarray, List[str]]:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+
+    n = topo.n_nodes
+    k = max(1, min(max_groups, n))
+    # undirected, latency-weighted (hop counts tie too often on hub-and-spoke topologies)
+    weight = np.maximum(topo.edge_latency, 1e-6)
+    adj = csr_matrix((weight, topo.indices, topo.indptr), shape=(n, n))
+    adj = adj.maximum(adj.T)
+    # farthest-point seeds, starting from the node farthest from node 0
+    dist = dijkstra(adj, indices=0)
+    seeds: List[int] = []
+    while len(seeds) < k:
+        unreached = np.flatnonzero(~np.isfinite(dist))
+        nxt = int(unreached[0]) if unreached.size else int(np.argmax(dist))
+        if seeds and not unreached.size and dist[nxt] <= 0:
+            break
+        seeds.append(nxt)
+        d = dijkstra(adj, indices=nxt)
+        dist = d if len(seeds) == 1 else np.minimum(dist, d)
+    _, _, sources = dijkstra(adj, indices=seeds, min_only=True, return_predecessors=True)
+    label_of_seed = {s: i for i, s in enumerate(seeds)}
+    labels = np.fromiter((label_of_seed.get(int(s), 0) for s in sources), dtype=np.int64, count=n)
+    return labels, [f'cluster {i} (node {int(topo.node_ids[s])})' for i, s in enumerate(seeds)]
+
+
+# -------- drawing ---------
+def _figure(figsize):
+    try:
+        import matplotlib.pyplot as plt
+    except Exception as e:
+        raise RuntimeError("matplotlib is required for drawing. Install it or disable draw().") from e
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.set_axis_off()
+    return plt, fig, ax
+
+
+def _finish(plt, fig, path: Optional[str]):
+    fig.tight_layout()
+    if path is None:
+        plt.show()
+    else:
+        fig.savefig(path)
+    plt.close(fig)
+
+
+def _segments(ax, xy: np.ndarray, a: np.ndarray, b: np.ndarray, widths, color, alpha: float, zorder: int):
+    from matplotlib.collections import LineCollection
+
+    if a.size:
+        ax.add_collection(LineCollection(np.stack((xy[a], xy[b]), axis=1), linewidths=widths, colors=color,
+                                         alpha=alpha, zorder=zorder))
+
+
+def _path_overlay(ax, xy: np.ndarray, a: np.ndarray, b: np.ndarray, n: int):
+    """Routed hops as one line per distinct (a, b), thicker the more paths use it."""
+    if a.size == 0:
+        return
+    key = np.minimum(a, b) * n + np.maximum(a, b)
+    uniq, counts = np.unique(key, return_counts=True)
+    _segments(ax, xy, uniq // n, uniq % n, 1.5 + 2.0 * np.log2(counts), PATH_COLOR, 0.8, 3)
+
+
+def draw_network(network_graph, path: Optional[str] = None, layout: str = 'spring', with_labels: bool = True,
+                 show_edge_labels: bool = True, show_node_info_labels: bool = True, results=None,
+                 ledger=None, placements=None, cache: LayoutCache = None, figsize=(12, 9)):
+    """Every host and link, at cached positions; routed paths of ``results`` on top.
+
+    Nodes are coloured by CPU utilisation when ``ledger`` or ``placements`` is given,
+    otherwise by CPU capacity. Text labels are skipped on graphs too large to read them.
+    """
+    cache = cache or LAYOUTS
+    topo = network_graph.compile()
+    G = network_graph.G
+    pos = cache.positions(network_hash(network_graph), G, layout)
+    xy = np.array([pos[int(i)] for i in topo.node_ids], dtype=np.float64).reshape(-1, 2)
+
+    plt, fig, ax = _figure(figsize)
+    links = topo.edge_src != topo.indices
+    _segments(ax, xy, topo.edge_src[links], topo.indices[links], 1.0, '#999999', 0.6, 1)
+    _path_overlay(ax, xy, *path_hops(network_graph, results), topo.n_nodes)
+
+    util = cpu_utilization(network_graph, ledger, placements)
+    size = max(30, min(1000, 40000 // max(topo.n_nodes, 1)))
+    if util is not None:
+        sc = ax.scatter(xy[:, 0], xy[:, 1], c=util, cmap='RdYlGn_r', vmin=0, vmax=1, s=size, zorder=4, edgecolors='k')
+        fig.colorbar(sc, ax=ax, label='CPU utilisation')
+    else:
+        t1, t2 = (4, 8)
+        colors = np.where(topo.host_cpu <= t1, CPU_PALETTE[0], np.where(topo.host_cpu <= t2, CPU_PALETTE[1], CPU_PALETTE[2]))
+        ax.scatter(xy[:, 0], xy[:, 1], c=colors, s=size, zorder=4, edgecolors='k')
+
+    if topo.n_nodes <= MAX_NODE_LABELS and (with_labels or show_node_info_labels):
+        for i, nid in enumerate(topo.node_ids.tolist()):
+            text = f"{nid}\nCPU={topo.host_cpu[i]}\nRAM={topo.host_ram[i]}" if show_node_info_labels else str(nid)
+            ax.annotate(text, xy[i], ha='center', va='center', fontsize=8, zorder=5)
+    if show_edge_labels and int(links.sum()) <= MAX_EDGE_LABELS:
+        for e in np.flatnonzero(links):
+            a, b = topo.edge_src[e], topo.indices[e]
+            bw = topo.edge_bandwidth[e]
+            ax.annotate(f"bw={int(bw) if np.isfinite(bw) else -1}, lat={int(topo.edge_latency[e])}",
+                        (xy[a] + xy[b]) / 2, ha='center', fontsize=7, zorder=5)
+    ax.autoscale_view()
+    _finish(plt, fig, path)
+
+
+def draw_aggregated(network_graph, path: Optional[str] = None, groups: Union[str, Sequence] = 'tier',
+                    max_groups: int = 32, layout: str = 'spring', results=None, ledger=None, placements=None,
+                    cache: LayoutCache = None, figsize=(12, 9)) -> Dict[str, Any]:
+    """Large-graph view: one node per host group, one line per pair of linked groups.
+
+    Groups are tiers or clusters (see `host_groups`); their size follows the host
+    count and their colour the group's CPU utilisation (used / capacity) when
+    ``ledger`` or ``placements`` is given. Routed paths of ``results`` are mapped to
+    group-to-group hops and overlaid, thicker where more paths cross. Only the group
+    graph is laid out (and cached), so the cost grows with the number of groups and
+    routed hops, not with the size of the infrastructure. Returns the group summary.
+    """
+    cache = cache or LAYOUTS
+    topo = network_graph.compile()
+    labels, names = host_groups(network_graph, groups, max_groups)
+    g = len(names)
+
+    hosts = np.bincount(labels, minlength=g)
+    cpu_total = np.bincount(labels, weights=topo.host_cpu, minlength=g)
+    util = cpu_utilization(network_graph, ledger, placements)
+    group_util = None
+    if util is not None:
+        cpu_used = np.bincount(labels, weights=util * topo.host_cpu, minlength=g)
+        group_util = np.divide(cpu_used, cpu_total, out=np.zeros(g), where=cpu_total > 0)
+
+    a, b = labels[topo.edge_src], labels[topo.indices]
+    cross = a != b
+    key = np.minimum(a[cross], b[cross]) * g + np.maximum(a[cross], b[cross])
+    pairs, link_counts = np.unique(key, return_counts=True)
+    ga, gb = pairs // g, pairs % g
+
+    H = nx.Graph()
+    H.add_nodes_from(range(g))
+    H.add_edges_from(zip(ga.tolist(), gb.tolist()))
+    pos = cache.positions(structure_hash(labels, extra=network_hash(network_graph)), H, layout)
+    xy = np.array([pos[i] for i in range(g)], dtype=np.float64).reshape(-1, 2)
+
+    plt, fig, ax = _figure(figsize)
+    _segments(ax, xy, ga, gb, 0.5 + np.log2(link_counts + 1), '#999999', 0.6, 1)
+    pa, pb = path_hops(network_graph, results)
+    pa, pb = labels[pa], labels[pb]
+    moved = pa != pb
+    _path_overlay(ax, xy, pa[moved], pb[moved], g)
+
+    size = 200 + 1800 * np.sqrt(hosts / max(hosts.max(), 1))
+    if group_util is not None:
+        sc = ax.scatter(xy[:, 0], xy[:, 1], c=group_util, cmap='RdYlGn_r', vmin=0, vmax=1, s=size, zorder=4, edgecolors='k')
+        fig.colorbar(sc, ax=ax, label='CPU utilisation')
+    else:
+        ax.scatter(xy[:, 0], xy[:, 1], c='#a4c2f4', s=size, zorder=4, edgecolors='k')
+    if g <= MAX_NODE_LABELS:
+        for i, name in enumerate(names):
+            text = f"{name}\n{hosts[i]} hosts"
+            if group_util is not None:
+                text += f"\n{group_util[i]:.0%} CPU"
+            ax.annotate(text, xy[i], ha='center', va='center', fontsize=8, zorder=5)
+    ax.autoscale_view()
+    _finish(plt, fig, path)
+
+    return {
+        'groups': [{'name': name, 'hosts': int(hosts[i]), 'cpu': float(cpu_total[i]),
+                    'utilization': None if group_util is None else float(group_util[i])}
+                   for i, name in enumerate(names)],
+        'group_links': int(pairs.size),
+        'routed_hops': int(pa.size),
+    }
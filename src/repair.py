@@ -0,0 +1,275 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.base import PlacementResult, _jsonable
+from src.candidates import candidate_index
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.routing import ConstrainedRouter, split_flows
+
+LinkKey = Tuple[int, int]
+
+
+@dataclass
+class RepairReport:
+    # number of host indices / CSR links the changes touched
+    hosts_changed: int
+    links_changed: int
+    # app id -> components moved to another host
+    moved: Dict[str, List[int]] = field(default_factory=dict)
+    # app id -> service links given new paths
+    rerouted: Dict[str, List[LinkKey]] = field(default_factory=dict)
+    # apps placed again from scratch because the local repair failed
+    replaced: List[str] = field(default_factory=list)
+    # apps that could not be kept: released from the ledger and dropped
+    evicted: List[str] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _jsonable({
+            'hosts_changed': self.hosts_changed,
+            'links_changed': self.links_changed,
+            'moved': self.moved,
+            'rerouted': self.rerouted,
+            'replaced': self.replaced,
+            'evicted': self.evicted,
+            'elapsed_s': self.elapsed_s,
+        })
+
+
+class IncrementalRepair:
+    """Keeps live placements valid while the infrastructure changes under them.
+
+    Works on a network, its shared ledger and the placed applications (``apps``:
+    app id -> (service graph, result), e.g. `PlacementService.apps`, updated in
+    place). Reverse indexes map each host index to the (app, component) pairs on
+    it and each link position to the (app, service link) paths crossing it; apps
+    placed or released later are reported with `track` / `untrack`.
+
+    `apply` takes the changes of `NetworkGraph.apply_changes` and:
+    1. applies them to the network and the ledger;
+    2. looks up the allocations on the changed hosts and links only, and picks what
+       has to move: every component on a removed host and, on a shrunk host, the
+       largest unpinned ones until the rest fits; every path over a removed link or whose
+       latency now breaks its limit and, on a link left over capacity, the widest
+       ones until the rest fits;
+    3. for each affected app, in a ledger transaction: releases the displaced
+       components, the links touching them and the marked paths, puts each
+       component on the fitting candidate host closest to its placed neighbours
+       (`CandidateIndex`, link latency limits) and re-routes the released links;
+    4. if that fails, places the app again with ``strategy``, and evicts it when
+       that fails too.
+    Everything else keeps its host and paths, so the work grows with the affected
+    allocations rather than with the infrastructure.
+    """
+
+    def __init__(self, network_graph, ledger: ResourceLedger, apps: Dict[str, Tuple[Any, PlacementResult]],
+                 strategy=None, router=None):
+        self.network_graph = network_graph
+        self.ledger = ledger
+        self.apps = apps
+        self.strategy = strategy if strategy is not None else GreedyPlacement()
+        self.router = router if router is not None else ConstrainedRouter()
+        self._on_host: Dict[int, Set[Tuple[str, int]]] = {}
+        self._on_link: Dict[int, Dict[Tuple[str, LinkKey], float]] = {}
+        self._tracked: Dict[str, Tuple[List[int], List[int]]] = {}
+        for app_id in apps:
+            self.track(app_id)
+
+    # -------- reverse indexes ---------
+    def track(self, app_id: str) -> None:
+        """Index the allocations of a placed app (call after adding it to ``apps``)."""
+        service_graph, result = self.apps[app_id]
+        topo, svc = self.network_graph.compile(), service_graph.compile()
+        link_of = {key: k for k, key in enumerate(svc.edge_keys)}
+        hosts, links = [], []
+        for comp, host in result.mapping.items():
+            h = topo.index[host]
+            self._on_host.setdefault(h, set()).add((app_id, comp))
+            hosts.append(h)
+        for key, weighted in result.path_sets().items():
+            k = link_of[key]
+            for path, share in weighted:
+                bw = float(svc.edge_bandwidth[k] if share is None else share)
+                for e in topo.path_edges(path).tolist():
+                    users = self._on_link.setdefault(e, {})
+                    users[(app_id, key)] = users.get((app_id, key), 0.0) + bw
+                    links.append(e)
+        self._tracked[app_id] = (hosts, links)
+
+    def untrack(self, app_id: str) -> None:
+        """Forget an app's allocations (call before or after removing it from ``apps``)."""
+        hosts, links = self._tracked.pop(app_id, ([], []))
+        for h in hosts:
+            self._on_host[h] = {(a, c) for a, c in self._on_host[h] if a != app_id}
+        for e in set(links):
+            self._on_link[e] = {user: bw for user, bw in self._on_link[e].items() if user[0] != app_id}
+
+    # -------- repair ---------
+    def apply(self, changes: Iterable[Dict[str, Any]]) -> RepairReport:
+        """Apply topology changes (see `NetworkGraph.apply_changes`) and repair what they break."""
+        t0 = time.perf_counter()
+        net, ledger = self.network_graph, self.ledger
+        hosts, edges = net.apply_changes(changes)
+        topo = net.compile()
+        ledger.update_capacity(topo, hosts, edges)
+        index = net.path_index()
+        report = RepairReport(hosts_changed=int(hosts.size), links_changed=int(edges.size))
+
+        displaced: Dict[str, Set[int]] = {}
+        marked: Dict[str, Set[LinkKey]] = {}
+        for h in hosts.tolist():
+            over_cpu = ledger.cpu_used[h] - ledger.cpu_total[h]
+            over_ram = ledger.ram_used[h] - ledger.ram_total[h]
+            if over_cpu <= 0 and over_ram <= 0:
+                continue
+            # pinned components go last: they cannot leave this host
+            demand = {user: self._demand(*user) for user in self._on_host.get(h, ())}
+            for user in sorted(demand, key=lambda u: (self._pinned(*u), -demand[u][0], -demand[u][1], u)):
+                if over_cpu <= 0 and over_ram <= 0:
+                    break
+                displaced.setdefault(user[0], set()).add(user[1])
+                over_cpu -= demand[user][0]
+                over_ram -= demand[user][1]
+
+        for e in edges.tolist():
+            users = self._on_link.get(e, {})
+            if not users:
+                continue
+            if not np.isfinite(topo.edge_latency[e]):
+                for app_id, key in users:
+                    marked.setdefault(app_id, set()).add(key)
+                continue
+            for app_id, key in users:
+                if self._too_slow(app_id, key):
+                    marked.setdefault(app_id, set()).add(key)
+            # paths already leaving this link free their bandwidth first
+            overflow = ledger.bw_used[e] - ledger.bw_total[e]
+            overflow -= sum(bw for (app_id, key), bw in users.items() if key in marked.get(app_id, ()))
+            for user in sorted(users, key=lambda u: (-users[u], u)):
+                if overflow <= 0:
+                    break
+                if user[1] not in marked.get(user[0], ()):
+                    marked.setdefault(user[0], set()).add(user[1])
+                    overflow -= users[user]
+
+        for app_id in sorted(set(displaced) | set(marked)):
+            comps, keys = displaced.get(app_id, set()), marked.get(app_id, set())
+            fixed = self._repair_app(app_id, comps, keys, index, report)
+            if fixed is None:
+                fixed = self._replace_app(app_id)
+                if fixed is None:
+                    report.evicted.append(app_id)
+                    continue
+                report.replaced.append(app_id)
+            self.untrack(app_id)
+            self.apps[app_id] = (self.apps[app_id][0], fixed)
+            self.track(app_id)
+        report.elapsed_s = time.perf_counter() - t0
+        return report
+
+    def _demand(self, app_id: str, comp: int) -> Tuple[int, int]:
+        svc = self.apps[app_id][0].compile()
+        c = svc.index[comp]
+        return int(svc.cpu[c]), int(svc.ram[c])
+
+    def _pinned(self, app_id: str, comp: int) -> bool:
+        return comp in self.apps[app_id][0].locality_pins()
+
+    def _too_slow(self, app_id: str, key: LinkKey) -> bool:
+        service_graph, result = self.apps[app_id]
+        topo, svc = self.network_graph.compile(), service_graph.compile()
+        limit = svc.edge_latency[svc.edge_keys.index(key)]
+        paths = result.path_sets().get(key, [])
+        return any(topo.edge_latency[topo.path_edges(path)].sum() > limit for path, _ in paths)
+
+    def _repair_app(self, app_id: str, comps: Set[int], keys: Set[LinkKey], index,
+                    report: RepairReport) -> Optional[PlacementResult]:
+        service_graph, result = self.apps[app_id]
+        net, ledger = self.network_graph, self.ledger
+        topo, svc = net.compile(), service_graph.compile()
+        candidates = candidate_index(service_graph, net)
+        assign = np.array([topo.index[result.mapping[int(c)]] for c in svc.comp_ids], dtype=np.int64)
+        moving = sorted((svc.index[c] for c in comps), key=lambda c: (c not in candidates.pins, -svc.cpu[c], c))
+        moving_set = set(moving)
+        redo = [k for k, key in enumerate(svc.edge_keys)
+                if key in keys or svc.edge_src[k] in moving_set or svc.edge_dst[k] in moving_set]
+
+        adj: List[List[Tuple[int, int, bool]]] = [[] for _ in range(svc.n_components)]
+        for k in range(svc.n_edges):
+            a, b = int(svc.edge_src[k]), int(svc.edge_dst[k])
+            adj[a].append((k, b, True))
+            adj[b].append((k, a, False))
+
+        ledger.begin()
+        for c in moving:
+            ledger.release_on_host(int(assign[c]), svc.cpu[c], svc.ram[c])
+            assign[c] = -1
+        path_sets = result.path_sets()
+        for k in redo:
+            for path, share in path_sets.get(svc.edge_keys[k], []):
+                ledger.release_on_edges(topo.path_edges(path), svc.edge_bandwidth[k] if share is None else share)
+
+        for c in moving:
+            fits = candidates.mask(c) & ledger.fitting_hosts(svc.cpu[c], svc.ram[c])
+            near = np.zeros(topo.n_nodes)
+            for k, other, out in adj[c]:
+                hp = assign[other]
+                if hp < 0:
+                    continue
+                lat = index.distances_to(hp) if out else index.distances_from(hp)
+                fits &= lat <= svc.edge_latency[k]
+                near += lat
+            hosts = np.flatnonzero(fits)
+            if hosts.size == 0:
+                ledger.rollback()
+                return None
+            host = int(hosts[np.argmin(near[hosts])])
+            ledger.allocate_on_host(host, svc.cpu[c], svc.ram[c])
+            assign[c] = host
+
+        route_split = getattr(self.router, 'route_split', None)
+        routing = dict(result.meta.get('routing', {}))
+        flows = dict(result.flows)
+        for k in redo:
+            key = svc.edge_keys[k]
+            bw_req, lat_limit = svc.edge_bandwidth[k], svc.edge_latency[k]
+            src, dst = int(assign[svc.edge_src[k]]), int(assign[svc.edge_dst[k]])
+            info = {'bandwidth': int(bw_req), 'latency_limit': int(lat_limit) if np.isfinite(lat_limit) else 10**9}
+            flows.pop(key, None)
+            route = self.router.route(topo, index, src, dst, bw_req, lat_limit, ledger.bw_free)
+            if route is not None:
+                ledger.allocate_on_edges(route.edges, bw_req)
+                routing[key] = {'path': topo.to_ids(route.path), **info, 'latency': int(route.latency)}
+                continue
+            split = route_split(topo, index, src, dst, bw_req, lat_limit, ledger.bw_free) if route_split else None
+            if split is None:
+                ledger.rollback()
+                return None
+            for r, w in zip(split.routes, split.bandwidths):
+                ledger.allocate_on_edges(r.edges, w)
+            flows[key] = split_flows(topo, split)
+            routing[key] = {'path': flows[key][0]['path'], **info, 'latency': int(split.latency), 'split': len(split.routes)}
+        ledger.commit()
+
+        if moving:
+            report.moved[app_id] = [int(svc.comp_ids[c]) for c in moving]
+        if redo:
+            report.rerouted[app_id] = [svc.edge_keys[k] for k in redo]
+        mapping = {int(cid): int(topo.node_ids[assign[c]]) for c, cid in enumerate(svc.comp_ids)}
+        paths = {key: info['path'] for key, info in routing.items()}
+        meta = {**result.meta, 'routing': routing, 'repairs': result.meta.get('repairs', 0) + 1}
+        return PlacementResult(mapping=mapping, paths=paths, meta=meta, flows=flows)
+
+    def _replace_app(self, app_id: str) -> Optional[PlacementResult]:
+        service_graph, result = self.apps[app_id]
+        self.ledger.release(result, service_graph)
+        fresh = self.strategy.place(service_graph, self.network_graph, ledger=self.ledger)
+        if fresh.meta.get('status') == 'ok':
+            return fresh
+        self.untrack(app_id)
+        del self.apps[app_id]
+        return None
@@ -0,0 +1,290 @@
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+import numpy as np
+
+from src.compiled import CompiledTopology
+from src.pathIndex import PathIndex
+from src.profiling import NULL_PROFILER
+
+
+@dataclass
+class Route:
+    # node indices from source to destination host
+    path: List[int]
+    # CSR positions of the links along the path
+    edges: np.ndarray
+    # total latency of the path
+    latency: float
+    # value of the router's objective for this path
+    cost: float
+
+
+@dataclass
+class SplitRoute:
+    # paths the service link's bandwidth is spread over, largest share first
+    routes: List[Route]
+    # bandwidth carried by each route
+    bandwidths: List[float]
+
+    @property
+    def latency(self) -> float:
+        """Latency of the slowest path."""
+        return max(r.latency for r in self.routes)
+
+
+def split_flows(topo: CompiledTopology, split: SplitRoute) -> List[Dict[str, Any]]:
+    """`PlacementResult.flows` entry of a split service link (infra node ids)."""
+    return [{'path': topo.to_ids(r.path), 'bandwidth': int(w), 'latency': int(r.latency)}
+            for r, w in zip(split.routes, split.bandwidths)]
+
+
+class Router(Protocol):
+    def route(self, topo: CompiledTopology, index: PathIndex, src: int, dst: int,
+              bandwidth: float, latency_limit: float, residual: np.ndarray, profiler=NULL_PROFILER) -> Optional[Route]:
+        """Return a path from ``src`` to ``dst`` (node indices) whose links all have
+        ``residual`` bandwidth >= ``bandwidth`` and whose latency is <= ``latency_limit``,
+        or None when no such path exists. Counters go to ``profiler`` (see `src.profiling`)."""
+        ...
+
+
+def path_links(topo: CompiledTopology, path: List[int]) -> np.ndarray:
+    """CSR positions of the links along a path of node indices."""
+    return np.fromiter((topo.edge_pos[(path[k], path[k + 1])] for k in range(len(path) - 1)),
+                       dtype=np.int64, count=max(len(path) - 1, 0))
+
+
+class ShortestPathRouter:
+    """Only tries the latency-shortest path from the path index (the historical greedy behaviour)."""
+
+    def route(self, topo, index, src, dst, bandwidth, latency_limit, residual, profiler=NULL_PROFILER):
+        profiler.count('route.index_paths')
+        latency = index.distance(src, dst)
+        if not latency <= latency_limit:
+            profiler.count('route.rejected_latency')
+            return None
+        path = index.path(src, dst)
+        edges = path_links(topo, path)
+        if np.any(residual[edges] < bandwidth):
+            profiler.count('route.rejected_bandwidth')
+            return None
+        return Route(path=path, edges=edges, latency=latency, cost=latency)
+
+
+class ConstrainedRouter:
+    """Resource-constrained shortest path router.
+
+    Finds the cheapest path whose links all have enough residual bandwidth and
+    whose total latency stays within the limit:
+    - cost='latency' minimises total latency, cost='hops' minimises hop count
+      (i.e. bandwidth consumed across the infrastructure).
+    - The unconstrained latency from the PathIndex is used both to reject
+      impossible requests up front and as an admissible bound to prune labels
+      that can no longer meet the latency limit.
+    - If the index's latency-shortest path already fits it is returned directly.
+    - Otherwise a label-setting search with Pareto dominance over (cost, latency)
+      explores alternate paths, giving up after ``max_labels`` labels.
+    """
+
+    def __init__(self, cost: str = 'latency', max_labels: int = 100000):
+        if cost not in ('latency', 'hops'):
+            raise ValueError(f"Unknown routing cost: {cost}")
+        self.cost = cost
+        self.max_labels = max_labels
+
+    def route(self, topo, index, src, dst, bandwidth, latency_limit, residual, profiler=NULL_PROFILER):
+        if src == dst:
+            profiler.count('route.colocated')
+            return Route(path=[src], edges=np.empty(0, dtype=np.int64), latency=0.0, cost=0.0)
+        lower = index.distances_to(dst)
+        if not lower[src] <= latency_limit:
+            profiler.count('route.rejected_latency')
+            return None
+
+        if self.cost == 'latency':
+            profiler.count('route.index_paths')
+            path = index.path(src, dst)
+            edges = path_links(topo, path)
+            if np.all(residual[edges] >= bandwidth):
+                return Route(path=path, edges=edges, latency=float(lower[src]), cost=float(lower[src]))
+            profiler.count('route.rejected_bandwidth')
+        profiler.count('route.label_searches')
+        return self._search(topo, index, src, dst, bandwidth, latency_limit, residual, lower, profiler)
+
+    def _search(self, topo, index, src, dst, bandwidth, latency_limit, residual, lower,
+                profiler=NULL_PROFILER) -> Optional[Route]:
+        indptr, indices, link_latency = topo.indptr, topo.indices, index.latency
+        by_latency = self.cost == 'latency'
+
+        # labels[k] = (node, latency, parent label, link used to reach node)
+        labels: List[Tuple[int, float, int, int]] = [(src, 0.0, -1, -1)]
+        front: Dict[int, List[Tuple[float, float]]] = {src: [(0.0, 0.0)]}
+        # heap entries: (cost + lower bound on remaining cost, cost, label id)
+        heap = [(float(lower[src]) if by_latency else 0.0, 0.0, 0)]
+        full_links = 0
+
+        def done(route: Optional[Route]) -> Optional[Route]:
+            profiler.count('route.labels', len(labels))
+            profiler.count('route.full_links_skipped', full_links)
+            return route
+
+        while heap:
+            _, cost, k = heapq.heappop(heap)
+            node, lat, _, _ = labels[k]
+            if node == dst:
+                return done(self._build(labels, k, cost))
+            for e in range(indptr[node], indptr[node + 1]):
+                w = int(indices[e])
+                if w == node:
+                    continue
+                if residual[e] < bandwidth:
+                    full_links += 1
+                    continue
+                n_lat = lat + link_latency[e]
+                if not n_lat + lower[w] <= latency_limit:
+                    continue
+                n_cost = n_lat if by_latency else cost + 1.0
+                labs = front.setdefault(w, [])
+                if any(c <= n_cost and l <= n_lat for c, l in labs):
+                    continue
+                labs[:] = [(c, l) for c, l in labs if not (n_cost <= c and n_lat <= l)]
+                labs.append((n_cost, n_lat))
+                labels.append((w, n_lat, k, e))
+                if len(labels) > self.max_labels:
+                    profiler.count('route.label_limit_hit')
+                    return done(None)
+                heapq.heappush(heap, (n_cost + (float(lower[w]) if by_latency else 0.0), n_cost, len(labels) - 1))
+        return done(None)
+
+    @staticmethod
+    def _build(labels, k: int, cost: float) -> Route:
+        latency = labels[k][1]
+        path, edges = [], []
+        while k != -1:
+            node, _, parent, e = labels[k]
+            path.append(node)
+            if e != -1:
+                edges.append(e)
+            k = parent
+        path.reverse()
+        edges.reverse()
+        return Route(path=path, edges=np.asarray(edges, dtype=np.int64), latency=float(latency), cost=float(cost))
+
+
+class SplittableRouter:
+    """Routes a service link over one path when it can, otherwise splits it over several.
+
+    `route` is the wrapped single-path router (default `ConstrainedRouter`). Strategies
+    call `route_split` when it finds nothing; the bandwidth is then spread over at
+    most ``max_paths`` latency-feasible paths:
+    - Only links lying on some path within the latency limit are kept
+      (``dist(src, a) + latency(a, b) + dist(b, dst) <= limit``), with their
+      residual bandwidth as capacity.
+    - A min-cost flow (cost = link latency, networkx network simplex) sends the
+      bandwidth from ``src`` to ``dst`` and is decomposed into paths, largest first.
+    - A decomposed path can still exceed the limit (two feasible halves need not
+      make a feasible whole); its share is re-routed, like any share beyond
+      ``max_paths`` paths, by filling the bottleneck of the cheapest
+      latency-feasible path with spare capacity, repeatedly.
+
+    Bandwidth is split in whole units.
+    """
+
+    def __init__(self, base=None, max_paths: int = 4):
+        self.base = base if base is not None else ConstrainedRouter()
+        self.max_paths = max_paths
+        self._top_up = ConstrainedRouter()
+
+    def route(self, topo, index, src, dst, bandwidth, latency_limit, residual, profiler=NULL_PROFILER):
+        return self.base.route(topo, index, src, dst, bandwidth, latency_limit, residual, profiler=profiler)
+
+    def route_split(self, topo: CompiledTopology, index: PathIndex, src: int, dst: int, bandwidth: float,
+                    latency_limit: float, residual: np.ndarray, profiler=NULL_PROFILER) -> Optional[SplitRoute]:
+        """Paths and per-path bandwidth carrying ``bandwidth`` from ``src`` to ``dst``, or None."""
+        if src == dst or self.max_paths < 2:
+            return None
+        profiler.count('route.split_searches')
+        need = int(math.ceil(bandwidth))
+        latency = index.latency
+        a, b = topo.edge_src, topo.indices
+        usable = (residual >= 1) & (a != b) & (index.distances_from(src)[a] + latency + index.distances_to(dst)[b] <= latency_limit)
+        free = residual.copy()
+
+        found: Dict[Tuple[int, ...], List] = {}
+        decomposed = self._min_cost_flow(topo, np.flatnonzero(usable), free, src, dst, need, latency)
+        if decomposed is None:
+            return None
+        for path, amount in sorted(decomposed, key=lambda pa: -pa[1]):
+            edges = path_links(topo, path)
+            lat = float(latency[edges].sum())
+            if lat <= latency_limit and len(found) < self.max_paths:
+                found[tuple(path)] = [Route(path=path, edges=edges, latency=lat, cost=lat), amount]
+                free[edges] -= amount
+        remaining = need - sum(amount for _, amount in found.values())
+
+        while remaining > 0:
+            profiler.count('route.split_top_ups')
+            route = self._top_up.route(topo, index, src, dst, 1, latency_limit, free)
+            if route is None:
+                return None
+            amount = int(min(remaining, free[route.edges].min()))
+            entry = found.get(tuple(route.path))
+            if entry is None:
+                if len(found) == self.max_paths:
+                    return None
+                found[tuple(route.path)] = entry = [route, 0]
+            entry[1] += amount
+            free[route.edges] -= amount
+            remaining -= amount
+
+        parts = sorted(found.values(), key=lambda ra: -ra[1])
+        profiler.observe('route.split_paths', len(parts))
+        return SplitRoute(routes=[r for r, _ in parts], bandwidths=[float(w) for _, w in parts])
+
+    @staticmethod
+    def _min_cost_flow(topo, edges: np.ndarray, free: np.ndarray, src: int, dst: int, need: int,
+                       latency: np.ndarray) -> Optional[List[Tuple[List[int], int]]]:
+        """Min-latency flow of ``need`` units over ``edges``, decomposed into (path, amount)."""
+        # networkx is only needed here; network simplex wants integer weights and capacities
+        import networkx as nx
+
+        G = nx.DiGraph()
+        G.add_node(src, demand=-need)
+        G.add_node(dst, demand=need)
+        for e in edges:
+            attrs = {'weight': int(round(latency[e] * 1000))}
+            if np.isfinite(free[e]):
+                attrs['capacity'] = int(free[e])
+            G.add_edge(int(topo.edge_src[e]), int(topo.indices[e]), **attrs)
+        try:
+            _, flow = nx.network_simplex(G)
+        except (nx.NetworkXUnfeasible, nx.NetworkXUnbounded):
+            return None
+
+        out: List[Tuple[List[int], int]] = []
+        left = need
+        while left > 0:
+            path, seen = [src], {src: 0}
+            while path[-1] != dst:
+                node = path[-1]
+                nxt = next(w for w, f in flow[node].items() if f > 0)
+                if nxt in seen:
+                    # zero-cost cycle in the flow: cancel it and carry on from its start
+                    cycle = path[seen[nxt]:] + [nxt]
+                    amount = min(flow[x][y] for x, y in zip(cycle, cycle[1:]))
+                    for x, y in zip(cycle, cycle[1:]):
+                        flow[x][y] -= amount
+                    for x in path[seen[nxt] + 1:]:
+                        del seen[x]
+                    del path[seen[nxt] + 1:]
+                    continue
+                seen[nxt] = len(path)
+                path.append(nxt)
+            amount = min(flow[x][y] for x, y in zip(path, path[1:]))
+            for x, y in zip(path, path[1:]):
+                flow[x][y] -= amount
+            out.append((path, amount))
+            left -= amount
+        return out
@@ -0,0 +1,204 @@
+import asyncio
+import errno
+import json
+import os
+import stat
+import sys
+from typing import Dict, Any, Optional, Tuple
+
+from src.base import PlacementResult
+from src.batch import service_graph_from_entry
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.rebalance import Rebalancer
+from src.repair import IncrementalRepair
+from src.serviceGraph import ServiceGraph
+
+
+class PlacementService:
+    """Resident placement service over one NetworkGraph and its residual capacity.
+
+    Requests are JSON objects, one per line:
+      {"op": "place", "app_id": "a1", "app": {...}}            (or "properties": "path/to/app.properties")
+      {"op": "release", "app_id": "a1"}
+      {"op": "topology", "changes": [{"op": "remove_host", "host": 3}, ...]}
+      {"op": "rebalance", "objective": "active_hosts", "max_moves": 10, "max_ram": null, "dry_run": false}
+      {"op": "status"}
+    An optional "seq" field is echoed back so clients can match out-of-order replies.
+
+    Requests are answered as soon as each is done, but take effect in arrival
+    order: each one takes the lock before doing anything (parsing included, in a
+    worker thread), and the lock is granted first come, first served. A request
+    that fails, for any reason, gets an error reply without affecting the others.
+    Topology changes (`NetworkGraph.apply_changes`) go through `IncrementalRepair`,
+    which moves only the placed components and paths they break. Rebalancing
+    (`Rebalancer`) plans a budgeted migration sequence and executes it unless
+    ``dry_run`` is set.
+    """
+
+    def __init__(self, network_graph, strategy=None, base_dir: str = '.'):
+        self.network_graph = network_graph
+        self.strategy = strategy if strategy is not None else GreedyPlacement()
+        self.base_dir = base_dir
+        self.ledger = ResourceLedger.for_network(network_graph)
+        self.apps: Dict[str, Tuple[ServiceGraph, PlacementResult]] = {}
+        self.repair = IncrementalRepair(network_graph, self.ledger, self.apps, strategy=self.strategy)
+        self.rebalancer = Rebalancer(network_graph, self.ledger, self.apps)
+        self._lock = asyncio.Lock()
+        # build the cached snapshot and path index once, before serving
+        network_graph.compile()
+        if getattr(self.strategy, 'needs_path_index', True):
+            network_graph.path_index().build()
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get('op')
+        try:
+            if op == 'place':
+                call = self.place(str(request['app_id']), request)
+            elif op == 'release':
+                call = self.release(str(request['app_id']))
+            elif op == 'topology':
+                call = self.topology(request['changes'])
+            elif op == 'rebalance':
+                call = self.rebalance(request.get('objective', 'active_hosts'), request.get('max_moves'),
+                                      request.get('max_ram'), bool(request.get('dry_run', False)))
+            elif op == 'status':
+                call = self.status()
+            else:
+                call = None
+        except KeyError as e:
+            reply = {'ok': False, 'error': f'missing field: {e.args[0]}'}
+        else:
+            if call is None:
+                reply = {'ok': False, 'error': f'unknown op: {op}'}
+            else:
+                try:
+                    reply = await call
+                except Exception as e:
+                    # one bad request must not take the service, or the other replies, down with it
+                    reply = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+        if 'seq' in request:
+            reply['seq'] = request['seq']
+        return reply
+
+    async def place(self, app_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._lock:
+            # parsed under the lock, so a later request on the stream cannot overtake this one
+            svc = await asyncio.to_thread(self._build_service, entry)
+            if app_id in self.apps:
+                return {'ok': False, 'app_id': app_id, 'error': 'app already placed'}
+            result = await asyncio.to_thread(self.strategy.place, svc, self.network_graph, ledger=self.ledger)
+            ok = result.meta.get('status') == 'ok'
+            if ok:
+                self.apps[app_id] = (svc, result)
+                self.repair.track(app_id)
+        return {'ok': ok, 'app_id': app_id, 'result': result.to_dict()}
+
+    async def release(self, app_id: str) -> Dict[str, Any]:
+        async with self._lock:
+            if app_id not in self.apps:
+                return {'ok': False, 'app_id': app_id, 'error': 'unknown app'}
+            svc, result = self.apps.pop(app_id)
+            self.repair.untrack(app_id)
+            self.ledger.release(result, svc)
+        return {'ok': True, 'app_id': app_id}
+
+    async def topology(self, changes) -> Dict[str, Any]:
+        async with self._lock:
+            report = await asyncio.to_thread(self.repair.apply, changes)
+        return {'ok': True, 'report': report.to_dict()}
+
+    async def rebalance(self, objective: str, max_moves: Optional[int], max_ram: Optional[int],
+                        dry_run: bool) -> Dict[str, Any]:
+        async with self._lock:
+            plan = await asyncio.to_thread(self.rebalancer.plan, objective, max_moves, max_ram)
+            if not dry_run:
+                self.rebalancer.execute(plan)
+                for app_id in plan.results:
+                    self.repair.untrack(app_id)
+                    self.repair.track(app_id)
+        return {'ok': True, 'executed': not dry_run, 'plan': plan.to_dict()}
+
+    async def status(self) -> Dict[str, Any]:
+        async with self._lock:
+            return {
+                'ok': True,
+                'apps': sorted(self.apps),
+                'utilization': self.ledger.utilization(),
+            }
+
+    def _build_service(self, entry: Dict[str, Any]) -> ServiceGraph:
+        svc = service_graph_from_entry(entry, self.base_dir)
+        svc.compile()
+        return svc
+
+    # -------- transports ---------
+    async def _serve_stream(self, reader: asyncio.StreamReader, write) -> None:
+        pending = set()
+
+        async def answer(line: bytes):
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('request must be a JSON object')
+            except ValueError as e:
+                reply = {'ok': False, 'error': f'bad request: {e}'}
+            else:
+                reply = await self.handle(request)
+            await write((json.dumps(reply) + '\n').encode('utf-8'))
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.create_task(answer(line))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+
+    async def serve_unix(self, socket_path: str) -> None:
+        """Serve JSON lines on a local Unix socket until cancelled.
+
+        A stale socket left at ``socket_path`` is replaced; any other existing file
+        raises `FileExistsError` instead of being deleted.
+        """
+        if os.path.exists(socket_path):
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                raise FileExistsError(errno.EEXIST, 'Not a socket, refusing to replace it', socket_path)
+            os.unlink(socket_path)
+
+        async def on_client(reader, writer):
+            async def write(data: bytes):
+                writer.write(data)
+                await writer.drain()
+            try:
+                await self._serve_stream(reader, write)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_unix_server(on_client, path=socket_path)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_stdio(self) -> None:
+        """Serve JSON lines from stdin to stdout until EOF."""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        async def write(data: bytes):
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+
+        await self._serve_stream(reader, write)
+
+
+def run_service(network_graph, socket_path: Optional[str] = None, strategy=None) -> None:
+    service = PlacementService(network_graph, strategy=strategy, base_dir=os.getcwd())
+    if socket_path:
+        asyncio.run(service.serve_unix(socket_path))
+    else:
+        asyncio.run(service.serve_stdio())
@@ -3,6 +3,8 @@ from typing import Dict, Any, List, Optional
 
 import networkx as nx
 
+from src.compiled import CompiledService
+
 
 class ServiceGraph:
 	"""Directed service graph built from AppProperties dict.
@@ -22,6 +24,8 @@ class ServiceGraph:
 	def __init__(self):
 		self.G = nx.DiGraph()
 		self.metadata: Dict[str, Any] = {}
+		self._compiled: Optional[CompiledService] = None
+		self._candidates = None  # src.candidates.CandidateIndex of the last network placed on
 
 	@classmethod
 	def from_app_dict(cls, app: Dict[str, Any]):
@@ -55,6 +59,36 @@ class ServiceGraph:
 			)
 		return obj
 
+	def __getstate__(self):
+		# cached snapshots are derived data: rebuild them after copy/unpickle
+		state = self.__dict__.copy()
+		for key in ('_compiled', '_path_index', '_candidates'):
+			if key in state:
+				state[key] = None
+		return state
+
+	# -------- compiled snapshot ---------
+	def compile(self) -> CompiledService:
+		"""Return the cached array-backed snapshot; call `invalidate()` after editing `G` directly."""
+		if self._compiled is None:
+			self._compiled = CompiledService.from_graph(self.G)
+		return self._compiled
+
+	def invalidate(self):
+		self._compiled = None
+		self._candidates = None
+
+	def locality_pins(self) -> Dict[int, int]:
+		"""Return component -> infra host pins from `component.DZ`.
+
+		`component.DZ` lists `component.nbDZ` (component, host) pairs, e.g. `{0, 5}`
+		pins component 0 to host 5. A trailing unpaired value is ignored.
+		"""
+		dz = self.metadata.get('component.DZ') or []
+		nb = self.metadata.get('component.nbDZ')
+		pairs = len(dz) // 2 if nb is None else min(int(nb), len(dz) // 2)
+		return {int(dz[2 * k]): int(dz[2 * k + 1]) for k in range(pairs)}
+
 	# -------- info helpers ---------
 	def summary(self) -> Dict[str, Any]:
 		return {
@@ -110,20 +144,20 @@ class ServiceGraph:
 		layout: str = 'spring',
 		show_edge_labels: bool = True,
 		show_node_info_labels: bool = True,
+		path: Optional[str] = None,
+		cache=None,
 	):
+		"""Draw the graph and show it, or save it to ``path`` (format from the extension) without a display.
+
+		The layout is cached per graph structure (see `src.rendering.LayoutCache`).
+		"""
 		try:
 			import matplotlib.pyplot as plt
 		except Exception as e:
 			raise RuntimeError("matplotlib is required for drawing. Install it or disable draw().") from e
+		from src import rendering
 
-		if layout == 'spring':
-			pos = nx.spring_layout(self.G, seed=42)
-		elif layout == 'kamada_kawai':
-			pos = nx.kamada_kawai_layout(self.G)
-		elif layout == 'circular':
-			pos = nx.circular_layout(self.G)
-		else:
-			pos = nx.spring_layout(self.G, seed=42)
+		pos = (cache or rendering.LAYOUTS).positions(rendering.service_hash(self), self.G, layout)
 
 		# no self-links in service links by definition, but we filter just in case
 		edgelist = [(u, v) for u, v in self.G.edges() if u != v]
@@ -155,5 +189,9 @@ class ServiceGraph:
 			nx.draw_networkx_edge_labels(self.G, pos, edge_labels=labels, font_size=8)
 
 		plt.tight_layout()
-		plt.show()
+		if path is None:
+			plt.show()
+		else:
+			plt.savefig(path)
+			plt.close()
 
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from src.InfraProperties import InfraProperties, TUPLE_KEYS as INFRA_TUPLE_KEYS
+from src.appProperties import AppProperties, TUPLE_KEYS as APP_TUPLE_KEYS
+from src.compiled import CompiledTopology
+from src.networkGraph import NetworkGraph
+from src.propertiesReader import TupleTable
+from src.serviceGraph import ServiceGraph
+
+# Binary store layout (little endian):
+#   8 bytes  MAGIC
+#   8 bytes  header length (uint64)
+#   header   JSON: {"version", "kind", "meta", "arrays": {name: [dtype, shape, offset]}}
+#   arrays   raw C-order data, each starting at a multiple of ALIGN bytes
+MAGIC = b'EAECMAP1'
+FORMAT_VERSION = 1
+ALIGN = 64
+
+
+def _aligned(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_store(path: str, kind: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    """Write arrays and JSON metadata to ``path`` atomically (temporary file + rename)."""
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    specs, offset = {}, 0
+    for name, a in arrays.items():
+        specs[name] = [a.dtype.newbyteorder('<').str, list(a.shape), offset]
+        offset = _aligned(offset + a.nbytes)
+    header = json.dumps({'version': FORMAT_VERSION, 'kind': kind, 'meta': meta, 'arrays': specs}).encode('utf-8')
+    base = _aligned(16 + len(header))
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(np.uint64(len(header)).tobytes())
+            f.write(header)
+            for name, a in arrays.items():
+                f.seek(base + specs[name][2])
+                f.write(a.astype(specs[name][0], copy=False).tobytes())
+            f.truncate(base + offset)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def open_store(path: str, kind: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Map a store read-only; returns ``(meta, arrays)``.
+
+    Arrays are views on one shared ``mmap``: nothing is copied, and processes
+    opening the same file share its pages. Raises ``ValueError`` on a file that
+    is not a store of the expected kind/version.
+    """
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:8] != MAGIC:
+        raise ValueError(f"{path}: not a topology store")
+    header_len = int(np.frombuffer(mm, dtype='<u8', count=1, offset=8)[0])
+    header = json.loads(mm[16:16 + header_len].decode('utf-8'))
+    if header.get('version') != FORMAT_VERSION or (kind is not None and header.get('kind') != kind):
+        raise ValueError(f"{path}: unsupported store (version {header.get('version')}, kind {header.get('kind')})")
+    base = _aligned(16 + header_len)
+    arrays: Dict[str, np.ndarray] = {}
+    for name, (dtype, shape, offset) in header['arrays'].items():
+        count = int(np.prod(shape))
+        if count == 0:
+            a = np.empty(shape, dtype=dtype)
+            a.setflags(write=False)
+        else:
+            a = np.frombuffer(mm, dtype=dtype, count=count, offset=base + offset).reshape(shape)
+        arrays[name] = a
+    return header['meta'], arrays
+
+
+def content_hash(path: str) -> str:
+    """Hex digest of a file's bytes (the cache key of its store)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _table_arrays(prefix: str, table: TupleTable) -> Dict[str, np.ndarray]:
+    return {f'{prefix}/{name}': a for name, a in table.arrays().items()}
+
+
+def _tables(arrays: Dict[str, np.ndarray], tuple_keys, source: str) -> Dict[str, TupleTable]:
+    tables = {}
+    for key, (columns, widths) in tuple_keys.items():
+        cols = {name.split('/', 1)[1]: a for name, a in arrays.items() if name.startswith(key + '/')}
+        tables[key] = TupleTable.from_arrays(key, columns, widths, cols, source=source)
+    return tables
+
+
+# -------- infra ---------
+def save_infra(path: str, infra: InfraProperties, source: str = None):
+    """Store an infra's scalar properties, its parsed columns and, when it can be
+    derived without the graph, its compiled topology."""
+    arrays = _table_arrays('hosts.configuration', infra.host_table)
+    arrays.update(_table_arrays('network.topology', infra.link_table))
+    topo = CompiledTopology.from_tables(infra.host_table, infra.link_table)
+    if topo is not None:
+        arrays.update({f'topology/{name}': a for name, a in topo.to_arrays().items()})
+    write_store(path, 'infra', arrays, {'props': infra.props, 'source': source})
+
+
+def open_infra(path: str) -> Tuple[InfraProperties, Optional[CompiledTopology]]:
+    meta, arrays = open_store(path, 'infra')
+    infra = InfraProperties(meta['props'], _tables(arrays, INFRA_TUPLE_KEYS, meta.get('source') or path))
+    topo_arrays = {name.split('/', 1)[1]: a for name, a in arrays.items() if name.startswith('topology/')}
+    topo = CompiledTopology.from_arrays(topo_arrays) if topo_arrays else None
+    return infra, topo
+
+
+def open_network_graph(path: str) -> NetworkGraph:
+    """NetworkGraph over a mapped infra store; it pickles as the store path, so worker
+    processes re-map the same file instead of receiving a copy."""
+    infra, topo = open_infra(path)
+    net = NetworkGraph.from_infra_properties(infra, compiled=topo)
+    net._bundle = os.path.abspath(path)
+    return net
+
+
+# -------- app ---------
+def save_app(path: str, app: AppProperties, source: str = None):
+    arrays = _table_arrays('components.requirements', app.component_table)
+    arrays.update(_table_arrays('links.description', app.link_table))
+    write_store(path, 'app', arrays, {'props': app.props, 'source': source})
+
+
+def open_app(path: str) -> AppProperties:
+    meta, arrays = open_store(path, 'app')
+    return AppProperties(meta['props'], _tables(arrays, APP_TUPLE_KEYS, meta.get('source') or path))
+
+
+def default_cache_dir() -> str:
+    return os.environ.get('EAEC_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'eaec')
+
+
+class PropertiesCache:
+    """On-disk cache of parsed .properties files, keyed by the file's content hash.
+
+    The first load of a file parses it and writes a binary store named after the
+    hash of its bytes; later loads of the same content (from any path or process)
+    only hash the file and map the store. Unreadable or outdated stores are
+    rebuilt. ``cache_dir=None`` uses ``$EAEC_CACHE_DIR`` or ``~/.cache/eaec``.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir or default_cache_dir()
+
+    def store_path(self, source: str, kind: str) -> str:
+        return os.path.join(self.cache_dir, f'{content_hash(source)}.{kind}.v{FORMAT_VERSION}.bin')
+
+    def _load(self, source: str, kind: str, opener, parser, saver):
+        path = self.store_path(source, kind)
+        if os.path.exists(path):
+            try:
+                return opener(path)
+            except (ValueError, OSError, KeyError):
+                pass  # corrupt or from another layout: rebuild below
+        saver(path, parser(source), source=os.path.abspath(source))
+        return opener(path)
+
+    def infra(self, source: str) -> InfraProperties:
+        return self._load(source, 'infra', lambda p: open_infra(p)[0], InfraProperties.from_file, save_infra)
+
+    def network_graph(self, source: str) -> NetworkGraph:
+        return self._load(source, 'infra', open_network_graph, InfraProperties.from_file, save_infra)
+
+    def app(self, source: str) -> AppProperties:
+        return self._load(source, 'app', open_app, AppProperties.from_file, save_app)
+
+    def service_graph(self, source: str) -> ServiceGraph:
+        return ServiceGraph.from_app_dict(self.app(source).to_dict())
@@ -0,0 +1,301 @@
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.base import PlacementResult, _jsonable
+from src.compiled import CompiledTopology
+
+# Violation kinds, in the order they are checked
+KINDS = ('unknown_component', 'unmapped_component', 'unknown_host', 'unknown_service_link', 'unrouted',
+         'split_bandwidth', 'path_endpoint', 'unknown_node', 'missing_link', 'cycle', 'latency', 'cpu', 'ram', 'bandwidth')
+
+
+@dataclass
+class Violation:
+    """One broken constraint.
+
+    ``subject`` is what the constraint is about: a component id, an infra host id, a
+    service link ``(u, v)`` or an infra link ``(a, b)``. ``app`` is the position of the
+    application in the validated batch (None for a single placement). ``value`` and
+    ``limit`` are set for the capacity and latency checks.
+    """
+    kind: str
+    subject: Any
+    message: str
+    app: Optional[int] = None
+    value: Optional[float] = None
+    limit: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {'kind': self.kind, 'subject': _jsonable(self.subject), 'message': self.message}
+        for name in ('app', 'value', 'limit'):
+            if getattr(self, name) is not None:
+                out[name] = getattr(self, name)
+        return out
+
+
+@dataclass
+class ValidationReport:
+    """All violations of one validation run plus what was checked.
+
+    ``checked`` counts applications, components, service links and path hops;
+    ``usage`` holds the aggregated ``cpu``/``ram`` per host index and ``bandwidth``
+    per CSR link position, aligned with the network's `CompiledTopology`.
+    """
+    violations: List[Violation] = field(default_factory=list)
+    checked: Dict[str, int] = field(default_factory=dict)
+    usage: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.violations
+
+    def counts(self) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for v in self.violations:
+            out[v.kind] = out.get(v.kind, 0) + 1
+        return out
+
+    def to_dict(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """JSON-ready view; ``limit`` caps the number of listed violations (counts stay exact)."""
+        listed = self.violations if limit is None else self.violations[:limit]
+        return {
+            'ok': self.ok,
+            'checked': dict(self.checked),
+            'counts': self.counts(),
+            'violations': [v.to_dict() for v in listed],
+        }
+
+    def raise_for_violations(self, limit: int = 10):
+        """Raise an ``AssertionError`` listing the first ``limit`` violations (as `MappingUnitTest` would)."""
+        if self.violations:
+            shown = '\n'.join(v.message for v in self.violations[:limit])
+            more = len(self.violations) - limit
+            raise AssertionError(shown + (f"\n... and {more} more" if more > 0 else ''))
+
+
+class _NodeLookup:
+    """Vectorised infra/component id -> dense index translation (-1 when unknown)."""
+
+    def __init__(self, ids: np.ndarray):
+        self.order = np.argsort(ids, kind='stable')
+        self.sorted = ids[self.order]
+
+    def __call__(self, query: np.ndarray) -> np.ndarray:
+        if self.sorted.size == 0:
+            return np.full(query.shape, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.sorted, query), self.sorted.size - 1)
+        return np.where(self.sorted[pos] == query, self.order[pos], -1)
+
+
+def _link_positions(topo: CompiledTopology, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """CSR positions of links ``a[i] -> b[i]`` (node indices), -1 where there is no such link.
+
+    CSR order is sorted by (source, destination), so the positions are found with a
+    binary search on the source's row.
+    """
+    out = np.full(a.shape, -1, dtype=np.int64)
+    if a.size == 0 or topo.n_edges == 0:
+        return out
+    key = topo.edge_src * topo.n_nodes + topo.indices
+    q = a * topo.n_nodes + b
+    pos = np.minimum(np.searchsorted(key, q), key.size - 1)
+    hit = key[pos] == q
+    out[hit] = pos[hit]
+    return out
+
+
+class _Accumulator:
+    """Collects per-application usage and violations, then checks shared capacities once."""
+
+    def __init__(self, topo: CompiledTopology):
+        self.topo = topo
+        self.hosts = _NodeLookup(np.asarray(topo.node_ids))
+        self.violations: List[Violation] = []
+        self.checked = {'apps': 0, 'components': 0, 'service_links': 0, 'path_hops': 0}
+        self._host_idx: List[np.ndarray] = []
+        self._cpu: List[np.ndarray] = []
+        self._ram: List[np.ndarray] = []
+        self._edges: List[np.ndarray] = []
+        self._bw: List[np.ndarray] = []
+
+    def add(self, result: PlacementResult, service_graph, app: Optional[int] = None):
+        topo, svc = self.topo, service_graph.compile()
+        bad = self.violations.append
+        self.checked['apps'] += 1
+        self.checked['components'] += svc.n_components
+        self.checked['service_links'] += svc.n_edges
+
+        # components -> host indices
+        comps = _NodeLookup(np.asarray(svc.comp_ids))
+        mapped_comp = np.fromiter(result.mapping.keys(), dtype=np.int64, count=len(result.mapping))
+        mapped_host = np.fromiter(result.mapping.values(), dtype=np.int64, count=len(result.mapping))
+        c_idx, h_idx = comps(mapped_comp), self.hosts(mapped_host)
+        for i in np.flatnonzero(c_idx < 0):
+            bad(Violation('unknown_component', int(mapped_comp[i]),
+                          f"Invalid component {int(mapped_comp[i])} in placement mapping", app))
+        host_of = np.full(svc.n_components, -1, dtype=np.int64)
+        known = c_idx >= 0
+        host_of[c_idx[known]] = h_idx[known]
+        placed = np.zeros(svc.n_components, dtype=bool)
+        placed[c_idx[known]] = True
+        for c in np.flatnonzero(~placed):
+            comp = int(svc.comp_ids[c])
+            bad(Violation('unmapped_component', comp, f"Component {comp} is not placed", app))
+        for i in np.flatnonzero(known & (h_idx < 0)):
+            bad(Violation('unknown_host', int(mapped_host[i]),
+                          f"Component {int(mapped_comp[i])} placed on invalid host {int(mapped_host[i])}", app))
+        on_host = host_of >= 0
+        self._host_idx.append(host_of[on_host])
+        self._cpu.append(svc.cpu[on_host])
+        self._ram.append(svc.ram[on_host])
+
+        # paths -> service link index, flattened node indices and path boundaries; a split
+        # service link contributes one entry per path, with the bandwidth that path carries
+        link_of = {key: k for k, key in enumerate(svc.edge_keys)}
+        keys, paths, weights = [], [], []
+        for key, weighted in result.path_sets().items():
+            for path, bandwidth in weighted:
+                keys.append(key)
+                paths.append(path)
+                weights.append(np.nan if bandwidth is None else bandwidth)
+        k_idx = np.fromiter((link_of.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+        for key in dict.fromkeys(keys[i] for i in np.flatnonzero(k_idx < 0)):
+            u, v = key
+            bad(Violation('unknown_service_link', (u, v), f"No edge data for service edge {u}->{v}", app))
+        known_link = k_idx >= 0
+        path_bw = np.zeros(len(keys))
+        path_bw[known_link] = svc.edge_bandwidth[k_idx[known_link]]
+        weights = np.asarray(weights, dtype=np.float64)
+        split = ~np.isnan(weights)
+        path_bw[split] = weights[split]
+        for key in result.flows:
+            k = link_of.get(key)
+            share = np.asarray([f['bandwidth'] for f in result.flows[key]], dtype=np.float64)
+            if k is not None and (abs(share.sum() - svc.edge_bandwidth[k]) > 1e-6 or (share < 0).any()):
+                u, v = key
+                bad(Violation('split_bandwidth', (u, v),
+                              f"Split paths of edge {u}->{v} carry {share.sum():g} (shares {share.tolist()}), "
+                              f"expected {svc.edge_bandwidth[k]:g}", app,
+                              value=float(share.sum()), limit=float(svc.edge_bandwidth[k])))
+        routed = np.zeros(svc.n_edges, dtype=bool)
+        routed[k_idx[k_idx >= 0]] = True
+        src_host, dst_host = host_of[svc.edge_src], host_of[svc.edge_dst]
+        for k in np.flatnonzero(~routed & (src_host >= 0) & (dst_host >= 0) & (src_host != dst_host)):
+            u, v = svc.edge_keys[k]
+            bad(Violation('unrouted', (u, v), f"Service edge {u}->{v} has no path", app))
+
+        lengths = np.fromiter(map(len, paths), dtype=np.int64, count=len(paths))
+        flat_ids = np.fromiter(chain.from_iterable(paths), dtype=np.int64, count=int(lengths.sum()))
+        flat = self.hosts(flat_ids)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if lengths.size else lengths
+        ends = starts + lengths - 1
+        nonempty = lengths > 0
+        path_id = np.repeat(np.arange(len(paths)), lengths)
+
+        # endpoints (only for known service links between placed components)
+        check = np.flatnonzero((k_idx >= 0) & nonempty)
+        kk = k_idx[check]
+        for which, expect, at in (('start at source', src_host[kk], flat[starts[check]]),
+                                  ('end at destination', dst_host[kk], flat[ends[check]])):
+            for i in np.flatnonzero((expect >= 0) & (at != expect)):
+                u, v = keys[check[i]]
+                host = int(topo.node_ids[expect[i]])
+                bad(Violation('path_endpoint', (u, v), f"Path for edge {u}->{v} does not {which} host {host}", app))
+        for i in np.flatnonzero(~nonempty & (k_idx >= 0)):
+            u, v = keys[i]
+            bad(Violation('path_endpoint', (u, v), f"Path for edge {u}->{v} is empty", app))
+
+        for j in np.flatnonzero(flat < 0):
+            u, v = keys[path_id[j]]
+            bad(Violation('unknown_node', (u, v), f"Path for edge {u}->{v} visits unknown node {int(flat_ids[j])}", app))
+
+        # hops: consecutive nodes of the same path
+        hop = np.ones(flat.size, dtype=bool)
+        hop[ends[nonempty]] = False
+        hop = np.flatnonzero(hop)
+        a, b, hop_path = flat[hop], flat[hop + 1], path_id[hop]
+        valid = (a >= 0) & (b >= 0)
+        edges = np.full(hop.size, -1, dtype=np.int64)
+        edges[valid] = _link_positions(topo, a[valid], b[valid])
+        self.checked['path_hops'] += int(hop.size)
+        for i in np.flatnonzero(valid & (edges < 0)):
+            u, v = keys[hop_path[i]]
+            x, y = int(flat_ids[hop[i]]), int(flat_ids[hop[i] + 1])
+            bad(Violation('missing_link', (x, y), f"Path for edge {u}->{v} contains invalid edge {x}->{y}", app))
+
+        # a node visited twice by one path
+        order = np.lexsort((flat_ids, path_id))
+        dup = (path_id[order][1:] == path_id[order][:-1]) & (flat_ids[order][1:] == flat_ids[order][:-1])
+        for p in np.unique(path_id[order][1:][dup]):
+            u, v = keys[p]
+            bad(Violation('cycle', (u, v), f"Cycle detected in routing path for edge {u}->{v}", app))
+
+        # cumulative latency per path against the service link's limit
+        found = edges >= 0
+        latency = np.bincount(hop_path[found], weights=topo.edge_latency[edges[found]], minlength=len(paths))
+        limit = np.full(len(paths), np.inf)
+        limit[k_idx >= 0] = svc.edge_latency[k_idx[k_idx >= 0]]
+        for p in np.flatnonzero(latency > limit):
+            u, v = keys[p]
+            bad(Violation('latency', (u, v), f"Path for edge {u}->{v} exceeds latency limit: {latency[p]:g} > {limit[p]:g}",
+                          app, value=float(latency[p]), limit=float(limit[p])))
+
+        # bandwidth every hop reserves, checked against link capacity after all apps are in
+        known_hop = found & (k_idx[hop_path] >= 0)
+        self._edges.append(edges[known_hop])
+        self._bw.append(path_bw[hop_path[known_hop]])
+
+    def report(self) -> ValidationReport:
+        topo, bad = self.topo, self.violations.append
+        n, m = topo.n_nodes, topo.n_edges
+        host_idx = np.concatenate(self._host_idx) if self._host_idx else np.empty(0, dtype=np.int64)
+        cpu = np.bincount(host_idx, weights=np.concatenate(self._cpu) if self._cpu else None, minlength=n)
+        ram = np.bincount(host_idx, weights=np.concatenate(self._ram) if self._ram else None, minlength=n)
+        edges = np.concatenate(self._edges) if self._edges else np.empty(0, dtype=np.int64)
+        bw = np.bincount(edges, weights=np.concatenate(self._bw) if self._bw else None, minlength=m)
+
+        for kind, used, total in (('cpu', cpu, topo.host_cpu), ('ram', ram, topo.host_ram)):
+            for h in np.flatnonzero(used > total):
+                host = int(topo.node_ids[h])
+                bad(Violation(kind, host, f"Host {host} {kind.upper()} overcommit: {used[h]:g} > {total[h]}",
+                              value=float(used[h]), limit=float(total[h])))
+        for e in np.flatnonzero(bw > topo.edge_bandwidth):
+            x, y = int(topo.node_ids[topo.edge_src[e]]), int(topo.node_ids[topo.indices[e]])
+            bad(Violation('bandwidth', (x, y), f"Edge {x}->{y} carries {bw[e]:g} > capacity {topo.edge_bandwidth[e]:g}",
+                          value=float(bw[e]), limit=float(topo.edge_bandwidth[e])))
+
+        rank = {kind: i for i, kind in enumerate(KINDS)}
+        violations = sorted(self.violations, key=lambda v: rank[v.kind])
+        return ValidationReport(violations=violations, checked=dict(self.checked),
+                                usage={'cpu': cpu, 'ram': ram, 'bandwidth': bw})
+
+
+def validate_placement(network_graph, service_graph, result: PlacementResult) -> ValidationReport:
+    """Check one placement against the network's full capacity.
+
+    Same constraints as `MappingUnitTest` (valid hosts and components, path endpoints and
+    links, cumulative latency, host CPU/RAM, link bandwidth, no repeated node) plus unplaced
+    components, unrouted service links and split links whose path shares do not add up
+    to the link's bandwidth (every path of a split link is checked like a single path,
+    and uses its share of bandwidth), but every violation is collected instead of
+    stopping at the first. Usage is aggregated with ``bincount`` scatter-adds over the
+    compiled topology; the graphs are not copied.
+    """
+    acc = _Accumulator(network_graph.compile())
+    acc.add(result, service_graph)
+    return acc.report()
+
+
+def validate_placements(network_graph, placed: Iterable[Tuple[PlacementResult, Any]]) -> ValidationReport:
+    """Check several applications (``(result, service_graph)`` pairs) sharing one network.
+
+    Per-application checks report the application's position in ``placed``; host and
+    link capacity is checked once against the usage of all of them together.
+    """
+    acc = _Accumulator(network_graph.compile())
+    for app, (result, svc) in enumerate(placed):
+        acc.add(result, svc, app=app)
+    return acc.report()
@@ -0,0 +1,24 @@
+import pytest
+
+from src.InfraProperties import InfraProperties
+from src.appProperties import AppProperties
+from src.networkGraph import NetworkGraph
+from src.serviceGraph import ServiceGraph
+from tests.helpers import APP_PATH, INFRA_PATH
+
+
+@pytest.fixture
+def infra():
+    return InfraProperties.from_file(INFRA_PATH)
+
+
+@pytest.fixture
+def net(infra):
+    """The 8-node sample infrastructure, with its networkx graph."""
+    return NetworkGraph.from_infra_dict(infra.to_dict())
+
+
+@pytest.fixture
+def svc():
+    """The 4-component sample application (component 0 pinned to host 5)."""
+    return ServiceGraph.from_app_dict(AppProperties.from_file(APP_PATH).to_dict())
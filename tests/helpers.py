@@ -0,0 +1,52 @@
+"""Builders and checks shared by the test modules (``from tests.helpers import ...``)."""
+import os
+
+import numpy as np
+
+from src.ledger import ResourceLedger
+from src.validation import validate_placements
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INFRA_PATH = os.path.join(ROOT, 'properties', 'Infra_8nodes.properties')
+APP_PATH = os.path.join(ROOT, 'properties', 'Appli_4comps.properties')
+
+
+def make_infra(hosts, links, **extra):
+    """Infra dict from (cpu, ram) hosts and (src, dst, bandwidth, latency) links, both directions."""
+    out = {
+        'hosts.nb': len(hosts),
+        'hosts': [{'cpu': cpu, 'ram': ram} for cpu, ram in hosts],
+        'links': [],
+    }
+    for src, dst, bw, lat in links:
+        out['links'].append({'src': src, 'dst': dst, 'bandwidth': bw, 'latency': lat})
+        out['links'].append({'src': dst, 'dst': src, 'bandwidth': bw, 'latency': lat})
+    out.update(extra)
+    return out
+
+
+def make_app(components, links, pins=None):
+    """App dict from (cpu, ram) components and (src, dst, bandwidth, latency) links; ``pins`` maps component -> host."""
+    pins = pins or {}
+    return {
+        'application.nb': 1,
+        'application.components': len(components),
+        'components': [{'cpu': cpu, 'ram': ram, 'lambda': 10, 'mu': 100} for cpu, ram in components],
+        'links': [{'id': k, 'src': s, 'dst': d, 'bandwidth': bw, 'latency': lat} for k, (s, d, bw, lat) in enumerate(links)],
+        'links.nb': len(links),
+        'component.nbDZ': len(pins) if pins else None,
+        'component.DZ': [x for c, h in pins.items() for x in (c, h)],
+    }
+
+
+def assert_ledger_matches(net, ledger, placed, names=('cpu_used', 'ram_used', 'bw_used')):
+    """``ledger`` equals the ``(service graph, result)`` pairs in ``placed`` applied from scratch,
+    and the placements are valid together."""
+    placed = list(placed)
+    fresh = ResourceLedger(net.compile())
+    for svc, res in placed:
+        fresh.apply(res, svc)
+    for name in names:
+        np.testing.assert_allclose(getattr(ledger, name), getattr(fresh, name), err_msg=name)
+    report = validate_placements(net, [(res, svc) for svc, res in placed])
+    assert report.ok, report.to_dict(limit=5)
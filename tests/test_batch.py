@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.batch import ORDERS, BatchPlacer, load_apps_jsonl
+from src.cli import BATCH_ORDERS
+from src.ledger import ResourceLedger
+from src.networkGraph import NetworkGraph
+from src.serviceGraph import ServiceGraph
+from src.validation import validate_placements
+
+from tests.helpers import APP_PATH, make_app, make_infra
+
+
+def two_hosts():
+    return NetworkGraph.from_infra_dict(make_infra([(4, 100), (4, 100)], [(0, 1, 100, 10)]))
+
+
+def app(cpu, n=1):
+    return ServiceGraph.from_app_dict(make_app([(cpu, 1)] * n, [(k, k + 1, 10, 100) for k in range(n - 1)]))
+
+
+def test_apps_share_the_residual_capacity():
+    net = two_hosts()
+    apps = [('a', app(3)), ('b', app(3)), ('c', app(3)), ('d', app(1, n=2))]
+    ledger = ResourceLedger.for_network(net)
+    batch = BatchPlacer().place_all(apps, net, ledger=ledger)
+    status = {app_id: res.meta['status'] for app_id, res in batch.results}
+    assert status == {'a': 'ok', 'b': 'ok', 'c': 'failed', 'd': 'ok'}
+    assert batch.stats['accepted'] == 3 and batch.stats['rejected'] == 1
+    # the rejected app left nothing behind: usage is exactly the accepted apps
+    assert ledger.cpu_used.tolist() == [4, 4]
+    placed = [(res, svc) for (app_id, res), (_, svc) in zip(batch.results, apps) if res.meta['status'] == 'ok']
+    assert validate_placements(net, placed).ok
+
+
+def test_descending_order_places_large_apps_first():
+    apps = [('small', app(1)), ('large', app(4)), ('medium', app(2))]
+    assert [a for a, _ in BatchPlacer(order='cpu_desc').sorted_apps(apps)] == ['large', 'medium', 'small']
+    assert [a for a, _ in BatchPlacer(order='fifo').sorted_apps(apps)] == ['small', 'large', 'medium']
+    apps = [('one', app(1)), ('three', app(1, n=3))]
+    assert [a for a, _ in BatchPlacer(order='size_desc').sorted_apps(apps)] == ['three', 'one']
+
+
+def test_order_improves_packing():
+    # first fit in input order strands the 3-CPU apps; largest first fits everything
+    apps = [('s1', app(1)), ('s2', app(1)), ('l1', app(3)), ('l2', app(3))]
+    fifo = BatchPlacer(order='fifo').place_all(apps, two_hosts())
+    desc = BatchPlacer(order='cpu_desc').place_all(apps, two_hosts())
+    assert fifo.stats['accepted'] == 3
+    assert desc.stats['accepted'] == 4
+
+
+def test_unknown_order():
+    with pytest.raises(ValueError):
+        BatchPlacer(order='random')
+
+
+def test_cli_orders_match():
+    assert BATCH_ORDERS == tuple(ORDERS)
+
+
+def test_load_apps_jsonl(tmp_path):
+    path = tmp_path / 'apps.jsonl'
+    path.write_text('\n'.join([
+        json.dumps({'id': 'inline', **make_app([(1, 1), (1, 1)], [(0, 1, 10, 100)])}),
+        '',
+        json.dumps({'properties': str(APP_PATH)}),
+    ]))
+    apps = load_apps_jsonl(str(path))
+    assert [a for a, _ in apps] == ['inline', '3']
+    assert apps[1][1].G.number_of_nodes() == 4
+
+
+def test_load_apps_jsonl_reports_the_line(tmp_path):
+    path = tmp_path / 'apps.jsonl'
+    path.write_text('{"components": []}\n{not json\n')
+    with pytest.raises(ValueError, match=':2:'):
+        load_apps_jsonl(str(path))
+
+
+def test_batch_result_is_json(net, svc):
+    batch = BatchPlacer().place_all([('demo', svc)], net)
+    doc = json.loads(json.dumps(batch.to_dict()))
+    assert doc['results'][0]['id'] == 'demo'
+    assert np.isclose(doc['stats']['acceptance_ratio'], 1.0)
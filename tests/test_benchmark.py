@@ -0,0 +1,65 @@
+import csv
+import json
+
+import pytest
+
+from src.benchmark import Scenario, compare, load_results, main, run_scenario, write_csv, write_json
+
+
+def test_scenario_load_sets_the_number_of_apps():
+    infra, apps = Scenario(50, 4, 0.5).build()
+    capacity = sum(h['cpu'] for h in infra['hosts'])
+    assert infra['hosts.nb'] == 50
+    # ComponentSpec averages 5/3 CPU per component
+    assert len(apps) * 4 * 5 / 3 == pytest.approx(0.5 * capacity, abs=4 * 5 / 3)
+    assert len(Scenario(50, 4, 0.5, max_apps=3).build()[1]) == 3
+    assert Scenario(50, 4, 0.5).build() == (infra, apps)
+
+
+@pytest.mark.parametrize('strategy', ['greedy', 'consolidate'])
+def test_run_scenario_record(strategy):
+    rec = run_scenario(Scenario(40, 3, 0.3, max_apps=10), strategy)
+    assert rec['scenario'] == 'h40-c3-l0.3-dag-s0' and rec['strategy'] == strategy
+    assert rec['apps'] == 10
+    assert rec['validation_failures'] == 0
+    assert 0 < rec['acceptance_ratio'] <= 1
+    assert rec['accepted'] == round(rec['acceptance_ratio'] * rec['apps'])
+    assert rec['peak_mem_mb'] > 0
+    json.dumps(rec)
+
+
+def test_compare_flags_only_changes_beyond_both_tolerances():
+    base = [{'scenario': 's', 'strategy': 'g', 'place_s': 1.0, 'acceptance_ratio': 0.9, 'mean_path_latency': 100.0}]
+    same = [{'scenario': 's', 'strategy': 'g', 'place_s': 1.4, 'acceptance_ratio': 0.905, 'mean_path_latency': 101.0}]
+    assert compare(same, base) == []
+    worse = [{'scenario': 's', 'strategy': 'g', 'place_s': 2.0, 'acceptance_ratio': 0.8, 'mean_path_latency': 90.0}]
+    flagged = {r['metric']: r for r in compare(worse, base)}
+    assert set(flagged) == {'place_s', 'acceptance_ratio'}
+    assert flagged['place_s']['change'] == pytest.approx(1.0)
+    other = [{'scenario': 't', 'strategy': 'g', 'place_s': 100.0}]
+    assert compare(other, base) == []
+
+
+def test_results_files(tmp_path):
+    records = [{'scenario': 's', 'strategy': 'g', 'place_s': 1.0}, {'scenario': 's', 'strategy': 'h', 'extra': 2}]
+    write_json(records, str(tmp_path / 'r.json'))
+    assert load_results(str(tmp_path / 'r.json')) == records
+    assert 'numpy' in json.loads((tmp_path / 'r.json').read_text())['environment']
+    write_csv(records, str(tmp_path / 'r.csv'))
+    with open(tmp_path / 'r.csv') as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == ['scenario', 'strategy', 'place_s', 'extra']
+
+
+def test_main_returns_1_on_regression(tmp_path, capsys):
+    args = ['--hosts', '30', '--components', '3', '--loads', '0.2', '--strategies', 'greedy',
+            '--repeat', '1', '--no-memory', '--max-apps', '5']
+    out = str(tmp_path / 'now.json')
+    assert main(args + ['-o', out]) == 0
+    baseline = load_results(out)
+    baseline[0]['acceptance_ratio'] += 0.5
+    write_json(baseline, str(tmp_path / 'base.json'))
+    assert main(args + ['-o', out, '--baseline', str(tmp_path / 'base.json')]) == 1
+    assert 'REGRESSION' in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(['--strategies', 'nope'])
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from src.candidates import candidate_index
+from src.generator import LinkSpec, service_dag, tiered_infra
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.networkGraph import NetworkGraph
+from src.serviceGraph import ServiceGraph
+from src.validation import validate_placement
+
+from tests.helpers import make_app
+
+
+def reference_masks(net, svc):
+    """Static capacity, pins, then latency to every component left with a single host, to a fixed point."""
+    topo, comp, dist = net.compile(), svc.compile(), net.path_index().dist
+    masks = (topo.host_cpu[None, :] >= comp.cpu[:, None]) & (topo.host_ram[None, :] >= comp.ram[:, None])
+    for c, h in svc.locality_pins().items():
+        keep = masks[comp.index[c], topo.index[h]]
+        masks[comp.index[c]] = False
+        masks[comp.index[c], topo.index[h]] = keep
+    changed = True
+    while changed:
+        changed = False
+        for k in range(comp.n_edges):
+            a, b, limit = comp.edge_src[k], comp.edge_dst[k], comp.edge_latency[k]
+            for single, other, lat in ((a, b, lambda h: dist[h, :]), (b, a, lambda h: dist[:, h])):
+                if masks[single].sum() == 1:
+                    new = masks[other] & (lat(np.flatnonzero(masks[single])[0]) <= limit)
+                    changed |= bool((new != masks[other]).any())
+                    masks[other] = new
+    return masks
+
+
+def test_sample_candidates(net, svc):
+    index = candidate_index(svc, net)
+    np.testing.assert_array_equal(np.array([index.mask(c) for c in range(4)]), reference_masks(net, svc))
+    assert index.hosts(0).tolist() == [net.compile().index[5]]
+    assert index.restricted[0] and not index.invalid_pins
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_generated_candidates_and_pinned_placement(seed):
+    infra = tiered_infra(30, 5, 2, seed=seed)
+    edge = [h for h, tier in enumerate(infra['tiers']) if tier == 'edge']
+    net = NetworkGraph.from_infra_dict(infra)
+    # tight link latencies, so the two pins narrow their neighbours (seed 2 leaves a pinned component no host)
+    link = LinkSpec(bandwidth=(10, 20), latency=(30, 90))
+    svc = ServiceGraph.from_app_dict(service_dag(8, seed=seed, pin_hosts=edge, n_pins=2, link=link))
+    index = candidate_index(svc, net)
+    expected = reference_masks(net, svc)
+    if expected.any(axis=1).all():
+        np.testing.assert_array_equal(np.array([index.mask(c) for c in range(8)]), expected)
+    else:
+        # conflicting pins: which component ends up empty depends on the order links are filtered
+        assert index.infeasible().size
+    res = GreedyPlacement().place(svc, net)
+    assert res.meta['status'] == ('ok' if seed in (0, 5) else 'failed')
+    if index.infeasible().size:
+        assert res.meta['reason'] == f'no_host_for_component_{index.infeasible()[0]}'
+    if res.meta['status'] == 'ok':
+        assert validate_placement(net, svc, res).ok
+        for c, h in svc.locality_pins().items():
+            assert res.mapping[c] == h
+
+
+def test_invalid_pins_are_reported():
+    svc = ServiceGraph.from_app_dict(make_app([(1, 1), (1, 1)], [(0, 1, 1, 1000)], pins={0: 99, 7: 0}))
+    net = NetworkGraph.from_infra_dict({'hosts': [{'cpu': 4, 'ram': 4}], 'links': []})
+    index = candidate_index(svc, net)
+    assert sorted(index.invalid_pins) == [(0, 99), (7, 0)]
+    assert index.hosts(0).tolist() == [0]
+
+
+def test_shared_and_fitting(net, svc):
+    index = candidate_index(svc, net)
+    shared = index.shared([1, 2])
+    assert shared.tolist() == np.flatnonzero(index.mask(1) & index.mask(2)).tolist()
+    assert index.ordered(1, start=3).tolist() == sorted(index.hosts(1), key=lambda h: (h < 3, h))
+    ledger = ResourceLedger.for_network(net)
+    ledger.allocate_on_host(int(index.hosts(1)[0]), int(net.compile().host_cpu[index.hosts(1)[0]]), 0)
+    fits = index.fitting(1, ledger, int(svc.compile().cpu[1]), int(svc.compile().ram[1]))
+    assert index.hosts(1)[0] not in fits and set(fits) < set(index.hosts(1))
+
+
+def test_index_is_cached_per_topology_snapshot(net, svc):
+    first = candidate_index(svc, net)
+    assert candidate_index(svc, net) is first
+    net.set_link_latency(0, 2, 1)
+    rebuilt = candidate_index(svc, net)
+    assert rebuilt is not first
+    np.testing.assert_array_equal(np.array([rebuilt.mask(c) for c in range(4)]), reference_masks(net, svc))
@@ -0,0 +1,81 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from src.cli import STRATEGIES, build_strategy, main
+from src.generator import service_chain
+
+from tests.helpers import APP_PATH, INFRA_PATH, ROOT
+
+
+def run(capsys, *argv):
+    code = main(list(argv))
+    doc = json.loads(capsys.readouterr().out)
+    assert doc['exit_code'] == code
+    return code, doc
+
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+def test_place_then_validate(tmp_path, capsys, strategy):
+    out = str(tmp_path / 'placed.json')
+    code = main(['-o', out, 'place', '--infra', INFRA_PATH, '--app', APP_PATH, '--strategy', strategy,
+                 '--validate', '--cache-dir', str(tmp_path / 'cache')])
+    with open(out) as f:
+        doc = json.load(f)
+    assert code == doc['exit_code'] == 0 and doc['validation']['ok']
+    assert doc['result']['mapping']['0'] == 5
+    assert {'load_s', 'place_s', 'validate_s'} <= set(doc['timings'])
+    code, report = run(capsys, 'validate', '--infra', INFRA_PATH, '--app', APP_PATH, '--result', out, '--no-cache')
+    assert code == 0 and report['checked']['apps'] == 1
+
+
+def test_validate_fails_on_a_broken_result(tmp_path, capsys):
+    path = tmp_path / 'bad.json'
+    path.write_text(json.dumps({'mapping': {'0': 5, '1': 5, '2': 5, '3': 5}, 'paths': {}, 'meta': {'status': 'ok'}}))
+    code, report = run(capsys, 'validate', '--infra', INFRA_PATH, '--app', APP_PATH, '--result', str(path), '--no-cache')
+    assert code == 1 and report['counts']['cpu'] == 1
+
+
+def test_batch_place_and_validate(tmp_path, capsys):
+    apps = tmp_path / 'apps.jsonl'
+    apps.write_text(''.join(json.dumps({'id': f'a{i}', 'app': service_chain(3, seed=i)}) + '\n' for i in range(3)))
+    out = tmp_path / 'batch.json'
+    code, doc = run(capsys, 'place', '--infra', INFRA_PATH, '--batch', str(apps), '--order', 'cpu_desc', '--no-cache')
+    assert doc['apps'] == 3 and code == (0 if doc['accepted'] == 3 else 1)
+    out.write_text(json.dumps(doc))
+    code, report = run(capsys, 'validate', '--infra', INFRA_PATH, '--batch', str(apps), '--result', str(out), '--no-cache')
+    assert code == 0 and report['checked']['apps'] == doc['accepted']
+
+
+def test_inspect(capsys):
+    code, doc = run(capsys, 'inspect', '--infra', INFRA_PATH, '--app', APP_PATH, '--connectivity', '--no-cache')
+    net = doc['network']
+    assert code == 0
+    assert (net['nodes'], net['links'], net['self_loops']) == (8, 24, 8)
+    assert net['cpu']['total'] == 50
+    assert net['bandwidth']['unlimited'] == 0  # self-loops are left out of the link statistics
+    assert net['strongly_connected_components'] == 1
+    assert doc['apps'][0]['pins'] == 1
+
+
+def test_errors_are_reported_as_json(capsys):
+    code, doc = run(capsys, 'inspect', '--infra', 'no/such/file.properties', '--no-cache')
+    assert code == 2 and doc['error'].startswith('FileNotFoundError')
+    with pytest.raises(SystemExit):
+        main(['place', '--infra', INFRA_PATH, '--app', APP_PATH, '--bogus'])
+
+
+def test_build_strategy():
+    assert type(build_strategy('greedy', fit='best', multi_start=True)).__name__ == 'MultiStart'
+    with pytest.raises(ValueError):
+        build_strategy('annealing')
+
+
+def test_argument_parsing_imports_no_numpy():
+    code = ('import sys; from src.cli import build_parser; '
+            "build_parser().parse_args(['place', '--infra', 'x', '--app', 'y']); "
+            "print('numpy' in sys.modules)")
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == 'False'
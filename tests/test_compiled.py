@@ -0,0 +1,85 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from src.compiled import CompiledTopology
+from src.networkGraph import NetworkGraph
+from src.serviceGraph import ServiceGraph
+
+from tests.helpers import make_app, make_infra
+
+
+def test_topology_matches_graph(net):
+    topo = net.compile()
+    assert topo.n_nodes == net.G.number_of_nodes()
+    assert topo.n_edges == net.G.number_of_edges()
+    for u, v, d in net.G.edges(data=True):
+        e = topo.edge_id(u, v)
+        assert topo.edge_src[e] == topo.index[u] and topo.indices[e] == topo.index[v]
+        expected = np.inf if d['bandwidth'] < 0 else d['bandwidth']
+        assert topo.edge_bandwidth[e] == expected
+        assert topo.edge_latency[e] == d['latency']
+    for n, d in net.G.nodes(data=True):
+        assert topo.host_cpu[topo.index[n]] == d['cpu']
+        assert topo.host_ram[topo.index[n]] == d['ram']
+
+
+def test_csr_rows_hold_outgoing_links(net):
+    topo = net.compile()
+    for i in range(topo.n_nodes):
+        expected = sorted(topo.index[v] for v in net.G.successors(int(topo.node_ids[i])))
+        assert topo.neighbors(i).tolist() == expected
+    assert topo.edge_id(3, 5) is None
+
+
+def test_from_tables_equals_from_graph(infra, net):
+    from_tables = CompiledTopology.from_tables(infra.host_table, infra.link_table)
+    from_graph = net.compile()
+    for name in CompiledTopology.ARRAY_FIELDS:
+        np.testing.assert_array_equal(getattr(from_tables, name), getattr(from_graph, name))
+    assert from_tables.edge_pos == from_graph.edge_pos
+
+
+def test_snapshot_is_cached_and_read_only(net):
+    topo = net.compile()
+    assert net.compile() is topo
+    with pytest.raises(ValueError):
+        topo.host_cpu[0] = 0
+    net.invalidate()
+    assert net.compile() is not topo
+
+
+def test_path_edges(net):
+    topo = net.compile()
+    edges = topo.path_edges([5, 2, 0])
+    assert topo.edge_latency[edges].sum() == 120
+    assert topo.path_edges([5, 0]) is None
+
+
+def test_subgraph_keeps_node_ids(net):
+    topo = net.compile()
+    sub, edges = topo.subgraph(np.array([topo.index[2], topo.index[6], topo.index[7]]))
+    assert sub.node_ids.tolist() == [2, 6, 7]
+    assert sub.n_edges == 9  # 6 links and 3 self-loops
+    for k in range(sub.n_edges):
+        u, v = int(sub.node_ids[sub.edge_src[k]]), int(sub.node_ids[sub.indices[k]])
+        assert topo.edge_id(u, v) == edges[k]
+
+
+def test_service_snapshot():
+    svc = ServiceGraph.from_app_dict(make_app([(1, 2), (3, 4), (5, 6)], [(0, 1, 10, 50), (1, 2, 20, 0)]))
+    comp = svc.compile()
+    assert comp.cpu.tolist() == [1, 3, 5]
+    assert comp.ram.tolist() == [2, 4, 6]
+    assert comp.edge_keys == ((0, 1), (1, 2))
+    assert comp.edge_bandwidth.tolist() == [10, 20]
+
+
+def test_pickle_drops_snapshots():
+    net = NetworkGraph.from_infra_dict(make_infra([(4, 8), (4, 8)], [(0, 1, 100, 5)]))
+    net.compile()
+    net.path_index()
+    copy = pickle.loads(pickle.dumps(net))
+    assert copy._compiled is None and copy._path_index is None
+    assert copy.compile().n_edges == 2
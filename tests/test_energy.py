@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from src.InfraProperties import InfraProperties
+from src.base import PlacementResult
+from src.batch import BatchPlacer
+from src.consolidation import EnergyConsolidation
+from src.energy import EnergyModel, entry_throughput, total_power
+from src.generator import service_chain, tiered_infra
+from src.greedy import GreedyPlacement
+from src.networkGraph import NetworkGraph
+from src.serviceGraph import ServiceGraph
+from src.validation import validate_placement
+
+from tests.helpers import make_app
+
+
+def powered_infra():
+    # host: (cpu, ram, idle W, peak W); link energy in nJ/bit
+    hosts = [(8, 100, 50.0, 150.0), (4, 100, 20.0, 60.0), (4, 100, 20.0, 60.0)]
+    return NetworkGraph.from_infra_dict({
+        'hosts': [{'cpu': c, 'ram': r, 'power_idle': i, 'power_peak': p} for c, r, i, p in hosts],
+        'links': [{'src': a, 'dst': b, 'bandwidth': 1000, 'latency': 10, 'energy_per_bit': 5.0}
+                  for a, b in [(0, 1), (1, 0), (0, 2), (2, 0), (1, 2), (2, 1)]],
+    })
+
+
+def test_linear_host_power_and_transport():
+    net = powered_infra()
+    svc = ServiceGraph.from_app_dict(make_app([(2, 1), (2, 1)], [(0, 1, 100, 100)]))
+    result = PlacementResult(mapping={0: 0, 1: 1}, paths={(0, 1): [0, 1]},
+                             meta={'status': 'ok', 'routing': {(0, 1): {'path': [0, 1], 'bandwidth': 100}}})
+    report = EnergyModel().evaluate(result, svc, net)
+    # 50 + 100 * 2/8 on host 0, 20 + 40 * 2/4 on host 1, host 2 off
+    assert report['host_w'] == pytest.approx(75.0 + 40.0)
+    # 100 Mbit/s over one link at 5 nJ/bit
+    assert report['transport_w'] == pytest.approx(0.5)
+    assert report['active_hosts'] == 2
+    assert report['throughput'] == pytest.approx(10)  # lambda of the entry component
+    on = EnergyModel(idle_hosts_on=True).evaluate(result, svc, net)
+    assert on['host_w'] == pytest.approx(report['host_w'] + 20.0)
+
+
+def test_power_fields_are_parsed(tmp_path):
+    path = tmp_path / 'infra.properties'
+    path.write_text('hosts.nb = 2\n'
+                    'hosts.configuration = {4,8000,10.5,40}, \\\n{2,4000}\n'
+                    'network.topology = {0,1,100,5,2.5}, \\\n{1,0,100,5}\n')
+    infra = InfraProperties.from_file(str(path))
+    assert infra.hosts[0] == {'cpu': 4, 'ram': 8000, 'power_idle': 10.5, 'power_peak': 40.0}
+    assert infra.hosts[1] == {'cpu': 2, 'ram': 4000}
+    assert infra.links[0]['energy_per_bit'] == 2.5
+    topo = NetworkGraph.from_infra_properties(infra).compile()
+    assert topo.host_power_peak.tolist() == [40.0, 0.0]
+    assert topo.edge_energy_per_bit[topo.edge_id(0, 1)] == 2.5
+
+
+def test_consolidation_uses_fewer_hosts_and_less_power():
+    net = NetworkGraph.from_infra_dict(tiered_infra(12, 4, 1, seed=0))
+    svc = ServiceGraph.from_app_dict(service_chain(6, seed=0))
+    spread = GreedyPlacement().place(svc, net)
+    packed = EnergyConsolidation().place(svc, net)
+    assert packed.meta['status'] == 'ok'
+    assert validate_placement(net, svc, packed).ok
+    assert len(set(packed.mapping.values())) <= len(set(spread.mapping.values()))
+    assert packed.meta['energy']['total_w'] == pytest.approx(total_power(packed, svc, net))
+    # first fit opens the large cloud host; consolidation picks the one whose power fits the load
+    assert total_power(packed, svc, net) < total_power(spread, svc, net)
+
+
+def test_entry_throughput_sums_the_sources():
+    svc = ServiceGraph.from_app_dict(make_app([(1, 1)] * 3, [(0, 2, 1, 1), (1, 2, 1, 1)]))
+    assert entry_throughput(svc) == 20
+
+
+def test_evaluate_many_reads_the_ledger(net, svc):
+    batch = BatchPlacer().place_all([('a', svc)], net)
+    res = batch.results[0][1]
+    assert batch.stats['energy']['active_hosts'] == len(set(res.mapping.values()))
+    assert np.isfinite(batch.stats['energy']['total_w'])
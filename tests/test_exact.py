@@ -0,0 +1,94 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.exact import BranchAndBound
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.networkGraph import NetworkGraph
+from src.serviceGraph import ServiceGraph
+from src.validation import validate_placement
+
+from tests.helpers import make_app, make_infra
+
+
+def tiny_instance(seed):
+    """5 hosts on a ring with a chord, 4 components; bandwidth is ample so routing is shortest-latency."""
+    rng = np.random.default_rng(seed)
+    hosts = [(int(c), 100) for c in rng.integers(2, 6, size=5)]
+    ring = [(k, (k + 1) % 5, 10 ** 6, int(rng.integers(5, 50))) for k in range(5)] + [(0, 2, 10 ** 6, 40)]
+    comps = [(int(c), 10) for c in rng.integers(1, 4, size=4)]
+    links = [(0, 1, 10, 200), (1, 2, 10, 200), (1, 3, 10, 200), (3, 2, 10, 200)]
+    pins = {0: int(rng.integers(0, 5))}
+    net = NetworkGraph.from_infra_dict(make_infra(hosts, ring))
+    svc = ServiceGraph.from_app_dict(make_app(comps, links, pins=pins))
+    return net, svc
+
+
+def brute_force(net, svc, objective):
+    """Best cost over all assignments (ample bandwidth: every link takes its shortest path)."""
+    topo, comp, dist = net.compile(), svc.compile(), net.path_index().dist
+    pins = {comp.index[c]: topo.index[h] for c, h in svc.locality_pins().items()}
+    best = np.inf
+    for assign in itertools.product(range(topo.n_nodes), repeat=comp.n_components):
+        assign = np.array(assign)
+        if any(assign[c] != h for c, h in pins.items()):
+            continue
+        cpu = np.bincount(assign, weights=comp.cpu, minlength=topo.n_nodes)
+        ram = np.bincount(assign, weights=comp.ram, minlength=topo.n_nodes)
+        if np.any(cpu > topo.host_cpu) or np.any(ram > topo.host_ram):
+            continue
+        lat = dist[assign[comp.edge_src], assign[comp.edge_dst]]
+        if np.any(lat > comp.edge_latency):
+            continue
+        best = min(best, lat.sum() if objective == 'latency' else len(np.unique(assign)))
+    return best
+
+
+@pytest.mark.parametrize('seed', range(6))
+@pytest.mark.parametrize('objective', ['latency', 'active_hosts'])
+def test_finds_the_optimum_on_a_tiny_instance(seed, objective):
+    net, svc = tiny_instance(seed)
+    expected = brute_force(net, svc, objective)
+    for seeded in (True, False):
+        res = BranchAndBound(objective=objective, seed_with_greedy=seeded).place(svc, net)
+        stats = res.meta['exact']
+        assert stats['assignment_search_complete']
+        if not np.isfinite(expected):
+            assert res.meta['status'] == 'failed'
+            continue
+        assert res.meta['status'] == 'ok'
+        assert stats['cost'] == pytest.approx(expected)
+        assert validate_placement(net, svc, res).ok
+
+
+def test_never_worse_than_greedy(net, svc):
+    greedy = GreedyPlacement().place(svc, net)
+    exact = BranchAndBound().place(svc, net)
+    total = lambda res: sum(info['latency'] for info in res.meta['routing'].values())
+    assert exact.meta['status'] == 'ok'
+    assert total(exact) <= total(greedy)
+    assert exact.mapping[0] == 5  # pinned
+
+
+def test_shared_ledger_is_left_with_the_placement_only(net, svc):
+    ledger = ResourceLedger.for_network(net)
+    res = BranchAndBound().place(svc, net, ledger=ledger)
+    expected = ResourceLedger.for_network(net)
+    expected.apply(res, svc)
+    np.testing.assert_array_equal(ledger.cpu_used, expected.cpu_used)
+    np.testing.assert_array_equal(ledger.bw_used, expected.bw_used)
+    assert not ledger.in_transaction
+
+
+def test_time_budget_returns_the_incumbent(net, svc):
+    res = BranchAndBound(time_budget=0.0).place(svc, net)
+    assert res.meta['exact']['timed_out']
+    assert not res.meta['exact']['assignment_search_complete']
+    assert res.meta['status'] == 'ok'  # the greedy seed
+
+
+def test_unknown_objective():
+    with pytest.raises(ValueError):
+        BranchAndBound(objective='energy')
@@ -0,0 +1,94 @@
+import json
+
+import networkx as nx
+import pytest
+
+from src.InfraProperties import InfraProperties
+from src.appProperties import AppProperties
+from src.generator import (fat_tree_infra, hop_diameter, main, random_geometric_infra, service_chain, service_dag,
+                           tiered_infra, write_app_properties, write_infra_properties)
+from src.greedy import GreedyPlacement
+from src.networkGraph import NetworkGraph
+from src.serviceGraph import ServiceGraph
+
+
+def undirected(infra):
+    g = nx.Graph()
+    g.add_nodes_from(range(infra['hosts.nb']))
+    g.add_edges_from((l['src'], l['dst']) for l in infra['links'] if l['src'] != l['dst'])
+    return g
+
+
+def test_tiered_layout():
+    infra = tiered_infra(30, 6, 3, seed=1, edge_uplinks=2)
+    assert infra['tiers'] == ['cloud'] * 3 + ['fog'] * 6 + ['edge'] * 30
+    assert infra['hosts.nb'] == len(infra['hosts']) == 39
+    assert infra['edges.nb'] == len(infra['links'])
+    g = undirected(infra)
+    assert nx.is_connected(g)
+    assert infra['network.diameter'] == nx.diameter(g)
+    # every edge host has exactly its uplinks, all to fog hosts
+    for h in range(9, 39):
+        assert set(g[h]) <= set(range(3, 9)) and g.degree(h) == 2
+    # both directions with the same attributes, one self-loop per host
+    attrs = {(l['src'], l['dst']): (l['bandwidth'], l['latency']) for l in infra['links']}
+    assert all(attrs[v, u] == a for (u, v), a in attrs.items())
+    assert sum(l['src'] == l['dst'] for l in infra['links']) == 39
+
+
+def test_same_seed_same_output():
+    assert tiered_infra(10, 3, 2, seed=4) == tiered_infra(10, 3, 2, seed=4)
+    assert tiered_infra(10, 3, 2, seed=4) != tiered_infra(10, 3, 2, seed=5)
+    assert service_dag(12, seed=2) == service_dag(12, seed=2)
+
+
+def test_fat_tree():
+    infra = fat_tree_infra(4, self_loops=False)
+    assert infra['tiers'].count('core') == 4 and infra['tiers'].count('server') == 16
+    assert len(infra['links']) == 2 * (16 + 16 + 16)
+    assert infra['network.diameter'] == 6
+    with pytest.raises(ValueError):
+        fat_tree_infra(3)
+
+
+def test_geometric_is_always_connected():
+    infra = random_geometric_infra(200, seed=0, radius=0.05)
+    assert nx.is_connected(undirected(infra))
+    assert all(l['latency'] >= 1 for l in infra['links'] if l['src'] != l['dst'])
+
+
+def test_hop_diameter_sweeps_are_exact_on_trees():
+    infra = tiered_infra(200, 10, 2, seed=0, fog_degree=0)
+    exact = hop_diameter(infra['hosts.nb'], infra['links'])
+    assert hop_diameter(infra['hosts.nb'], infra['links'], exact_limit=0) == exact
+
+
+def test_workloads():
+    dag = service_dag(20, seed=0, pin_hosts=[7], n_pins=2)
+    g = nx.DiGraph((l['src'], l['dst']) for l in dag['links'])
+    assert nx.is_directed_acyclic_graph(g)
+    assert nx.descendants(g, 0) == set(range(1, 20))
+    assert dag['component.DZ'] == [0, 7, dag['component.DZ'][2], 7] and dag['component.nbDZ'] == 2
+    chain = service_chain(5, seed=0)
+    assert [(l['src'], l['dst']) for l in chain['links']] == [(k, k + 1) for k in range(4)]
+    assert all(0.3 <= c['lambda'] / c['mu'] <= 0.8 for c in chain['components'])
+
+
+def test_written_files_parse_and_place(tmp_path):
+    infra, app = tiered_infra(20, 4, 2, seed=0), service_chain(6, seed=0, pin_hosts=[10], n_pins=1)
+    write_infra_properties(infra, str(tmp_path / 'infra.properties'))
+    write_app_properties(app, str(tmp_path / 'app.properties'))
+    parsed = InfraProperties.from_file(str(tmp_path / 'infra.properties'))
+    assert parsed.hosts == infra['hosts'] and parsed.links == infra['links']
+    assert parsed.hosts_tier == infra['tiers']
+    assert AppProperties.from_file(str(tmp_path / 'app.properties')).to_dict() == app
+    res = GreedyPlacement().place(ServiceGraph.from_app_dict(app), NetworkGraph.from_infra_properties(parsed))
+    assert res.meta['status'] == 'ok' and res.mapping[0] == 10
+
+
+def test_cli_writes_jsonl_for_several_apps(tmp_path):
+    out = tmp_path / 'apps.jsonl'
+    main(['--seed', '3', 'dag', '-n', '5', '--count', '2', '-o', str(out)])
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r['id'] for r in rows] == ['dag-0', 'dag-1']
+    assert rows[1]['app'] == service_dag(5, seed=4)
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+from src.generator import LinkSpec, service_chain, service_dag, tiered_infra
+from src.hierarchy import HierarchicalPlacement, Regions, RegionSummary
+from src.ledger import ResourceLedger
+from src.networkGraph import NetworkGraph
+from src.serviceGraph import ServiceGraph
+
+from tests.helpers import assert_ledger_matches, make_app
+
+LINK = LinkSpec(bandwidth=(10, 20), latency=(200, 400))
+
+
+@pytest.fixture
+def big():
+    infra = tiered_infra(160, 16, 4, seed=0)
+    return infra, NetworkGraph.from_infra_dict(infra)
+
+
+def assert_summary_current(ledger, regions):
+    """The incrementally kept summary equals one built from the ledger now."""
+    kept, fresh = ledger.region_summary(regions), RegionSummary(ledger, regions)
+    for name in ('cpu_free', 'ram_free', 'bw_free'):
+        np.testing.assert_allclose(getattr(kept, name), getattr(fresh, name), err_msg=name)
+    np.testing.assert_array_equal(kept.largest_hosts(), fresh.largest_hosts())
+    np.testing.assert_allclose(kept.widest_links(), fresh.widest_links())
+
+
+def test_regions_by_tier(big):
+    infra, net = big
+    topo = net.compile()
+    regions = Regions.build(net, 'tier')
+    assert sorted(regions.names) == ['cloud', 'edge', 'fog']
+    for r, members in enumerate(regions.members):
+        assert {infra['tiers'][int(topo.node_ids[i])] for i in members} == {regions.names[r]}
+    assert sum(m.size for m in regions.members) == topo.n_nodes
+    # every cross-region link is in exactly the bundle of its two regions, with its fastest latency
+    for p, links in enumerate(regions.pair_links):
+        u, v = regions.pairs[p]
+        assert (regions.labels[topo.edge_src[links]] == u).all() and (regions.labels[topo.indices[links]] == v).all()
+        assert regions.pair_latency[p] == topo.edge_latency[links].min()
+    inside = regions.labels[topo.edge_src] == regions.labels[topo.indices]
+    assert (regions.pair_of[inside] == -1).all() and (regions.pair_of[~inside] >= 0).all()
+
+
+def test_cluster_regions_and_subgraphs(big):
+    _, net = big
+    topo = net.compile()
+    regions = Regions.build(net, 'cluster', size=32)
+    assert 1 < regions.n_regions <= -(-topo.n_nodes // 32)
+    path = regions.region_path(0, regions.n_regions - 1)
+    assert path[0] == 0 and path[-1] == regions.n_regions - 1
+    sub, hosts, edges = regions.subgraph([1, 0])
+    assert regions.subgraph([0, 1])[0] is sub
+    np.testing.assert_array_equal(hosts, np.sort(np.concatenate([regions.members[0], regions.members[1]])))
+    assert sub.compile().n_nodes == hosts.size
+    np.testing.assert_array_equal(sub.compile().node_ids, topo.node_ids[hosts])
+    np.testing.assert_array_equal(sub.compile().edge_bandwidth, topo.edge_bandwidth[edges])
+
+
+def test_summary_follows_allocations_and_rollback(big):
+    _, net = big
+    strategy = HierarchicalPlacement(region_size=32)
+    regions = strategy.regions_of(net)
+    ledger = ResourceLedger.for_network(net)
+    ledger.region_summary(regions)
+    for i in range(5):
+        svc = ServiceGraph.from_app_dict(service_chain(5, seed=i, link=LINK))
+        assert strategy.place(svc, net, ledger=ledger).meta['status'] == 'ok'
+        assert_summary_current(ledger, regions)
+    with ledger.what_if():
+        svc = ServiceGraph.from_app_dict(service_chain(5, seed=9, link=LINK))
+        assert strategy.place(svc, net, ledger=ledger).meta['status'] == 'ok'
+        assert_summary_current(ledger, regions)
+    assert_summary_current(ledger, regions)
+
+
+@pytest.mark.parametrize('by', ['cluster', 'tier'])
+def test_many_apps_on_a_shared_ledger_are_valid(big, by):
+    infra, net = big
+    edge = [h for h, tier in enumerate(infra['tiers']) if tier == 'edge']
+    ledger = ResourceLedger.for_network(net)
+    strategy = HierarchicalPlacement(regions=by, region_size=32, profile=True)
+    placed = []
+    rng = np.random.default_rng(0)
+    for i in range(20):
+        # pins and start hosts on separate edge hosts, so no app fills another's pinned host
+        app = service_dag(6, seed=i, link=LINK, pin_hosts=edge[:80], n_pins=1 if i % 2 else 0)
+        svc = ServiceGraph.from_app_dict(app)
+        res = strategy.place(svc, net, start_host=int(rng.choice(edge[80:])), ledger=ledger)
+        assert res.meta['status'] == 'ok', res.meta
+        assert set(res.meta['regions']) <= set(strategy.regions_of(net).names)
+        assert res.meta['profile']['host_level']
+        for c, h in svc.locality_pins().items():
+            assert res.mapping[c] == h
+        placed.append((svc, res))
+    assert_ledger_matches(net, ledger, placed)
+
+
+def test_region_sets_grow_from_the_start_region(big):
+    _, net = big
+    strategy = HierarchicalPlacement(region_size=32)
+    regions = strategy.regions_of(net)
+    topo = net.compile()
+    start = int(topo.node_ids[regions.members[2][0]])
+    res = strategy.place(ServiceGraph.from_app_dict(service_chain(2, seed=0, link=LINK)), net, start_host=start)
+    assert res.meta['status'] == 'ok'
+    assert regions.names[2] in res.meta['regions']
+    assert strategy.regions_of(net) is regions
+
+
+def test_regions_follow_topology_changes(big):
+    _, net = big
+    strategy = HierarchicalPlacement(region_size=32)
+    regions = strategy.regions_of(net)
+    net.apply_changes([{'op': 'remove_host', 'host': int(net.compile().node_ids[regions.members[0][0]])}])
+    rebound = strategy.regions_of(net)
+    assert rebound is not regions and rebound.topo is net.compile()
+    np.testing.assert_array_equal(rebound.labels, regions.labels)
+
+
+def test_failures():
+    net = NetworkGraph.from_infra_dict(tiered_infra(20, 2, 1, seed=0))
+    huge = ServiceGraph.from_app_dict(make_app([(10 ** 6, 1)], []))
+    assert HierarchicalPlacement(region_size=8).place(huge, net).meta['reason'] == 'no_region_fits'
+    pinned = ServiceGraph.from_app_dict(make_app([(1, 1)], [], pins={0: 999}))
+    assert HierarchicalPlacement(region_size=8).place(pinned, net).meta['reason'] == 'invalid_locality_0_999'
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from src.generator import LinkSpec, random_geometric_infra, service_chain
+from src.greedy import GreedyFirstFit, GreedyPlacement
+from src.hostSelector import FIT_POLICIES, _SortedKeys, pick
+from src.ledger import ResourceLedger
+from src.networkGraph import NetworkGraph
+from src.serviceGraph import ServiceGraph
+
+
+def brute(ledger, policy, cpu, ram, start=0):
+    free_cpu = ledger.cpu_total - ledger.cpu_used
+    fits = np.flatnonzero((free_cpu >= cpu) & (ledger.ram_total - ledger.ram_used >= ram))
+    if fits.size == 0:
+        return -1
+    if policy == 'first':
+        after = fits[fits >= start]
+        return int(after[0] if after.size else fits[0])
+    if policy == 'best':
+        return int(fits[np.lexsort((fits, free_cpu[fits]))[0]])
+    return int(fits[np.lexsort((-fits, -free_cpu[fits]))[0]])
+
+
+def test_sorted_keys_against_a_list():
+    rng = np.random.default_rng(0)
+    keys = sorted(rng.integers(0, 1000, size=50).tolist())
+    s = _SortedKeys(list(keys), load=4)
+    for _ in range(500):
+        if keys and rng.random() < 0.5:
+            k = keys.pop(int(rng.integers(0, len(keys))))
+            s.remove(k)
+        else:
+            k = int(rng.integers(0, 1000))
+            keys.append(k)
+            keys.sort()
+            s.add(k)
+        probe = int(rng.integers(0, 1000))
+        assert list(s.ascending_from(probe)) == [x for x in keys if x >= probe]
+        assert list(s.descending()) == keys[::-1]
+
+
+def test_queries_follow_the_ledger_through_updates_and_rollback():
+    net = NetworkGraph.from_infra_dict(random_geometric_infra(300, seed=1))
+    ledger = ResourceLedger.for_network(net)
+    selector = ledger.host_selector()
+    rng = np.random.default_rng(1)
+    n = net.compile().n_nodes
+    for step in range(400):
+        if step == 200:
+            ledger.begin()
+        cpu, ram = int(rng.integers(1, 17)), int(rng.integers(0, 20000))
+        start = int(rng.integers(0, n))
+        for policy in FIT_POLICIES:
+            assert selector.select(policy, cpu, ram, start) == brute(ledger, policy, cpu, ram, start), (step, policy)
+        host = brute(ledger, 'first', cpu, ram, start)
+        if host >= 0:
+            ledger.allocate_on_host(host, cpu, ram)
+        used = np.flatnonzero(ledger.cpu_used)
+        if used.size and rng.random() < 0.3:
+            h = int(rng.choice(used))
+            ledger.release_on_host(h, int(ledger.cpu_used[h]), int(ledger.ram_used[h]))
+    ledger.rollback()
+    for cpu in (1, 4, 8, 16):
+        for policy in FIT_POLICIES:
+            assert selector.select(policy, cpu, 1000) == brute(ledger, policy, cpu, 1000)
+
+
+@pytest.mark.parametrize('policy', FIT_POLICIES)
+def test_pick_matches_the_selector_on_all_hosts(net, policy):
+    ledger = ResourceLedger.for_network(net)
+    ledger.allocate_on_host(0, 10, 0)
+    ledger.allocate_on_host(2, 6, 0)
+    hosts = np.arange(net.compile().n_nodes)
+    for cpu in (1, 2, 4, 6, 9):
+        assert pick(policy, ledger, hosts, cpu, 1) == ledger.host_selector().select(policy, cpu, 1)
+    with pytest.raises(ValueError):
+        pick('random', ledger, hosts, 1, 1)
+
+
+@pytest.mark.parametrize('fit', FIT_POLICIES)
+def test_greedy_places_the_same_with_and_without_the_selector(fit):
+    net = NetworkGraph.from_infra_dict(random_geometric_infra(150, seed=2))
+    svc = ServiceGraph.from_app_dict(service_chain(20, seed=2, link=LinkSpec(bandwidth=(50, 100), latency=(100, 300))))
+    with_selector = GreedyPlacement(fit=fit, selector=True).place(svc, net)
+    scan = GreedyPlacement(fit=fit, selector=False).place(svc, net)
+    assert with_selector.meta['status'] == scan.meta['status'] == 'ok'
+    assert with_selector.mapping == scan.mapping
+
+
+def test_the_first_fit_name_is_kept():
+    assert GreedyFirstFit is GreedyPlacement
+    assert GreedyFirstFit(fit='best').fit == 'best'
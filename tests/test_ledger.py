@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from src.greedy import GreedyPlacement
+from src.hostSelector import HostSelector
+from src.ledger import ResourceLedger
+
+
+def arrays(ledger):
+    return {name: getattr(ledger, name).copy() for name in ('cpu_used', 'ram_used', 'bw_used', 'bw_free')}
+
+
+def assert_arrays_equal(ledger, before):
+    for name, values in before.items():
+        np.testing.assert_array_equal(getattr(ledger, name), values, err_msg=name)
+
+
+def busy_ledger(net):
+    ledger = ResourceLedger.for_network(net)
+    ledger.allocate_on_host(0, 4, 1000)
+    ledger.allocate_on_edges(np.array([0, 3]), 250)
+    return ledger
+
+
+def test_rollback_restores_the_arrays_exactly(net):
+    ledger = busy_ledger(net)
+    before = arrays(ledger)
+    assert ledger.begin() == 1
+    ledger.allocate_on_host(2, 3, 500)
+    ledger.release_on_host(0, 4, 1000)
+    ledger.allocate_on_edges(np.array([0, 1, 2]), 125.5)
+    ledger.rollback()
+    assert_arrays_equal(ledger, before)
+    assert not ledger.in_transaction
+
+
+def test_nested_rollback_keeps_the_outer_changes(net):
+    ledger = busy_ledger(net)
+    ledger.begin()
+    ledger.allocate_on_host(1, 2, 2)
+    middle = arrays(ledger)
+    assert ledger.begin() == 2
+    ledger.allocate_on_host(1, 2, 2)
+    ledger.allocate_on_edges(np.array([4]), 10)
+    ledger.rollback()
+    assert_arrays_equal(ledger, middle)
+    ledger.commit()
+    assert ledger.cpu_used[1] == 2
+    assert not ledger.in_transaction
+
+
+def test_inner_commit_is_undone_by_outer_rollback(net):
+    ledger = busy_ledger(net)
+    before = arrays(ledger)
+    ledger.begin()
+    ledger.begin()
+    ledger.allocate_on_host(3, 1, 1)
+    ledger.commit()
+    ledger.rollback()
+    assert_arrays_equal(ledger, before)
+
+
+def test_what_if_always_rolls_back(net, svc):
+    ledger = busy_ledger(net)
+    before = arrays(ledger)
+    with ledger.what_if():
+        result = GreedyPlacement().place(svc, net, ledger=ledger)
+        assert result.meta['status'] == 'ok'
+        assert ledger.cpu_used.sum() > before['cpu_used'].sum()
+    assert_arrays_equal(ledger, before)
+    with pytest.raises(RuntimeError):
+        with ledger.what_if():
+            ledger.allocate_on_host(1, 1, 1)
+            raise RuntimeError
+    assert_arrays_equal(ledger, before)
+
+
+def test_transaction_commits_or_rolls_back(net):
+    ledger = busy_ledger(net)
+    before = arrays(ledger)
+    with pytest.raises(RuntimeError):
+        with ledger.transaction():
+            ledger.allocate_on_host(1, 1, 1)
+            raise RuntimeError
+    assert_arrays_equal(ledger, before)
+    with ledger.transaction():
+        ledger.allocate_on_host(1, 1, 1)
+    assert ledger.cpu_used[1] == 1
+
+
+def test_rollback_keeps_the_host_selector_current(net):
+    ledger = busy_ledger(net)
+    selector = ledger.host_selector()
+    with ledger.what_if():
+        for host in range(net.compile().n_nodes):
+            ledger.allocate_on_host(host, 2, 2)
+    fresh = HostSelector(ledger)
+    for cpu in (1, 4, 8, 13):
+        assert selector.first_fit(cpu, 1) == fresh.first_fit(cpu, 1)
+        assert selector.best_fit(cpu, 1) == fresh.best_fit(cpu, 1)
+
+
+def test_apply_and_release_are_inverse(net, svc):
+    ledger = busy_ledger(net)
+    before = arrays(ledger)
+    with ledger.what_if():
+        result = GreedyPlacement().place(svc, net, ledger=ledger)
+        placed = arrays(ledger)
+    ledger.apply(result, svc)
+    assert_arrays_equal(ledger, placed)
+    ledger.release(result, svc)
+    assert_arrays_equal(ledger, before)
+
+
+def test_utilization(net):
+    ledger = ResourceLedger.for_network(net)
+    ledger.allocate_on_host(0, 16, 0)
+    util = ledger.utilization()
+    assert util['cpu'] == pytest.approx(16 / 50)
+    assert util['active_hosts'] == 1
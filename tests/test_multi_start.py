@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.multiStart import MultiStart
+from src.objectives import score
+
+
+def serial_best(svc, net, objective):
+    best = (np.inf, None)
+    for start in (int(n) for n in net.compile().node_ids):
+        res = GreedyPlacement().place(svc, net, start_host=start)
+        value = score(res, svc, net, objective)
+        if value < best[0]:
+            best = (value, start)
+    return best
+
+
+@pytest.mark.parametrize('objective', ['latency', 'active_hosts'])
+def test_keeps_the_best_start(net, svc, objective):
+    expected_score, expected_start = serial_best(svc, net, objective)
+    res = MultiStart(objective=objective, max_workers=2).place(svc, net)
+    stats = res.meta['multistart']
+    assert res.meta['status'] == 'ok'
+    assert stats['starts'] == 8 and len(stats['workers']) == 2
+    assert stats['best_score'] == pytest.approx(expected_score)
+    assert stats['best_start'] == expected_start
+
+
+def test_winner_is_applied_to_the_callers_ledger(net, svc):
+    ledger = ResourceLedger.for_network(net)
+    res = MultiStart(max_workers=2).place(svc, net, ledger=ledger)
+    expected = ResourceLedger.for_network(net)
+    expected.apply(res, svc)
+    np.testing.assert_array_equal(ledger.cpu_used, expected.cpu_used)
+    np.testing.assert_array_equal(ledger.bw_used, expected.bw_used)
+
+
+def test_sampled_starts_are_seeded(net):
+    a = MultiStart(sample=3, seed=1).start_hosts(net)
+    assert a == MultiStart(sample=3, seed=1).start_hosts(net)
+    assert len(a) == 3 and a == sorted(a)
+
+
+def test_no_feasible_start(net, svc):
+    full = ResourceLedger.for_network(net)
+    full.cpu_used[:] = full.cpu_total
+    res = MultiStart(max_workers=1).place(svc, net, ledger=full)
+    assert res.meta['reason'] == 'no_feasible_start'
+    assert res.meta['multistart']['best_score'] is None
+
+
+def test_unknown_objective():
+    with pytest.raises(ValueError):
+        MultiStart(objective='nope')
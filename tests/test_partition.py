@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from src.generator import ComponentSpec, LinkSpec, service_dag, tiered_infra
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.networkGraph import NetworkGraph
+from src.partition import cut_bandwidth, host_envelope, partition_components
+from src.serviceGraph import ServiceGraph
+from src.validation import validate_placement
+
+from tests.helpers import make_app, make_infra
+
+
+def assert_groups(svc, groups, cpu_cap, ram_cap, pins):
+    """Groups fit the envelope (unless a single oversized component), pinned components are alone, numbered in order."""
+    _, first = np.unique(groups, return_index=True)
+    assert groups[np.sort(first)].tolist() == list(range(first.size))
+    for g in range(first.size):
+        members = np.flatnonzero(groups == g)
+        if members.size > 1:
+            assert svc.cpu[members].sum() <= cpu_cap and svc.ram[members].sum() <= ram_cap, members
+        assert members.size == 1 or not set(members.tolist()) & set(pins), members
+
+
+def test_envelope_is_the_capacity_weighted_median():
+    net = NetworkGraph.from_infra_dict(make_infra([(16, 100), (8, 400), (8, 10), (4, 10), (4, 10), (2, 10)], []))
+    # CPU: 16 + 8 holds 24 of 42 (>= half); RAM: 400 alone holds 400 of 540
+    assert host_envelope(net.compile()) == (8, 400)
+    assert host_envelope(net.compile(), share=0.1) == (16, 400)
+    assert host_envelope(net.compile(), share=1.0) == (2, 10)
+
+
+def test_heavy_clusters_end_up_together():
+    # two triangles of heavy links joined by one light link; each triangle just fits the envelope
+    links = [(0, 1, 100, 1000), (1, 2, 100, 1000), (0, 2, 100, 1000),
+             (3, 4, 100, 1000), (4, 5, 100, 1000), (3, 5, 100, 1000), (2, 3, 1, 1000)]
+    svc = ServiceGraph.from_app_dict(make_app([(2, 10)] * 6, links)).compile()
+    groups = partition_components(svc, 6, 30)
+    assert groups.tolist() == [0, 0, 0, 1, 1, 1]
+    assert cut_bandwidth(svc, groups) == 1
+    # a smaller envelope can only cut more
+    small = partition_components(svc, 4, 30)
+    assert_groups(svc, small, 4, 30, {})
+    assert cut_bandwidth(svc, small) > 1
+
+
+def test_pinned_components_stay_alone():
+    links = [(0, 1, 100, 1000), (1, 2, 100, 1000), (2, 3, 100, 1000)]
+    svc = ServiceGraph.from_app_dict(make_app([(1, 1)] * 4, links)).compile()
+    assert len(set(partition_components(svc, 10, 10).tolist())) == 1
+    # pins, and the unpinned components that still go together
+    for pins, together in (({0: 3, 3: 5}, (1, 2)), ({0: 3, 3: 3}, (1, 2)), ({1: 0}, (2, 3))):
+        groups = partition_components(svc, 10, 10, pins=pins)
+        for c in pins:
+            assert np.count_nonzero(groups == groups[c]) == 1, pins
+        assert groups[together[0]] == groups[together[1]], pins
+
+
+def test_oversized_components_stay_alone():
+    svc = ServiceGraph.from_app_dict(make_app([(1, 1), (9, 1), (1, 1)], [(0, 1, 50, 1000), (1, 2, 50, 1000)])).compile()
+    groups = partition_components(svc, 4, 10)
+    assert np.count_nonzero(groups == groups[1]) == 1
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_random_graphs_stay_within_the_envelope(seed):
+    rng = np.random.default_rng(seed)
+    app = service_dag(40, seed=seed, extra_edge_prob=0.15, comp=ComponentSpec(profiles=((1, 500), (2, 1000), (4, 3000), (6, 2000))))
+    svc = ServiceGraph.from_app_dict(app).compile()
+    pinned = rng.choice(40, size=10, replace=False).tolist()
+    pins = {c: int(rng.integers(0, 3)) for c in pinned}
+    cpu_cap, ram_cap = int(rng.integers(4, 16)), int(rng.integers(2000, 12000))
+    groups = partition_components(svc, cpu_cap, ram_cap, pins=pins)
+    assert groups.shape == (40,)
+    assert_groups(svc, groups, cpu_cap, ram_cap, pins)
+    assert cut_bandwidth(svc, groups) <= svc.edge_bandwidth.sum()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_greedy_places_groups_validly(seed):
+    infra = tiered_infra(30, 5, 2, seed=seed)
+    edge = [h for h, tier in enumerate(infra['tiers']) if tier == 'edge']
+    net = NetworkGraph.from_infra_dict(infra)
+    link = LinkSpec(bandwidth=(10, 20), latency=(200, 400))
+    svc = ServiceGraph.from_app_dict(service_dag(12, seed=seed, pin_hosts=edge, n_pins=2, link=link))
+    res = GreedyPlacement(partition=True, profile=True).place(svc, net)
+    assert res.meta['status'] == 'ok' and res.meta['profile']['counters']['groups']
+    assert validate_placement(net, svc, res).ok
+    for c, h in svc.locality_pins().items():
+        assert res.mapping[c] == h
+    plain = GreedyPlacement().place(svc, net)
+    colocated = lambda r: sum(bw for (u, v), bw in zip(svc.compile().edge_keys, svc.compile().edge_bandwidth)
+                              if r.mapping[u] == r.mapping[v])
+    assert colocated(res) >= colocated(plain)
+
+
+@pytest.mark.parametrize('seed', range(2))
+def test_partitioning_accepts_as_many_pinned_apps(seed):
+    # apps pinned to the few fog hosts: grouping neighbours with a pinned component would fill them
+    infra = tiered_infra(60, 8, 2, seed=seed)
+    fog = [h for h, tier in enumerate(infra['tiers']) if tier == 'fog']
+    net = NetworkGraph.from_infra_dict(infra)
+    link = LinkSpec(bandwidth=(10, 20), latency=(200, 400))
+    apps = [ServiceGraph.from_app_dict(service_dag(8, seed=seed * 1000 + i, pin_hosts=fog, n_pins=2, link=link))
+            for i in range(80)]
+
+    def accepted(partition):
+        ledger = ResourceLedger.for_network(net)
+        strategy = GreedyPlacement(partition=partition)
+        return sum(strategy.place(svc, net, ledger=ledger).meta['status'] == 'ok' for svc in apps)
+
+    plain = accepted(False)
+    assert plain > 0 and accepted(True) >= plain
@@ -0,0 +1,111 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.generator import LinkSpec, random_geometric_infra, service_chain
+from src.greedy import GreedyPlacement
+from src.networkGraph import NetworkGraph
+from src.pathIndex import PathIndex
+from src.serviceGraph import ServiceGraph
+
+
+def assert_matches_networkx(net, index):
+    topo = net.compile()
+    lengths = dict(nx.all_pairs_dijkstra_path_length(net.G, weight='latency'))
+    for u in net.G.nodes():
+        for v in net.G.nodes():
+            expected = lengths[u].get(v, np.inf)
+            assert index.distance(topo.index[u], topo.index[v]) == pytest.approx(expected)
+            path = index.path_ids(u, v)
+            if np.isfinite(expected):
+                assert path[0] == u and path[-1] == v
+                assert sum(net.G.edges[a, b]['latency'] for a, b in zip(path, path[1:])) == pytest.approx(expected)
+            else:
+                assert path is None
+
+
+def test_index_matches_networkx(net):
+    assert_matches_networkx(net, net.path_index())
+
+
+def test_index_is_cached(net):
+    assert net.path_index() is net.path_index()
+
+
+def test_paths_follow_lowest_latency(net):
+    # 3 -> 7 goes up to 1 and 0, then down through 2 (20 + 100 + 100 + 20)
+    assert net.path_index().path_ids(3, 7) == [3, 1, 0, 2, 7]
+    assert net.path_index().path_ids(5, 5) == [5]
+
+
+@pytest.mark.parametrize('latency', [1, 500])
+def test_set_link_latency_updates_incrementally(net, latency):
+    index = net.path_index()
+    net.set_link_latency(2, 7, latency)
+    assert net.path_index() is index
+    assert_matches_networkx(net, index)
+    assert_matches_networkx(net, PathIndex(net.compile()))
+
+
+def test_update_latencies_on_a_larger_graph():
+    net = NetworkGraph.from_infra_dict(random_geometric_infra(60, seed=4))
+    index = net.path_index().build()
+    topo = net.compile()
+    rng = np.random.default_rng(0)
+    edges = rng.choice(topo.n_edges, size=20, replace=False)
+    latencies = rng.integers(1, 200, size=edges.size)
+    index.update_latencies(edges, latencies)
+    fresh = PathIndex(topo)
+    fresh.latency[edges] = latencies
+    fresh.dist, fresh.pred = fresh._solve(None)
+    np.testing.assert_allclose(index.dist, fresh.dist)
+
+
+def test_index_is_built_on_first_use(net):
+    index = PathIndex(net.compile())
+    assert index.dense and index._dist is None
+    assert index.distance(3, 7) == net.path_index().distance(3, 7)
+    assert index._dist is not None
+
+
+def test_rows_match_the_dense_index():
+    net = NetworkGraph.from_infra_dict(random_geometric_infra(60, seed=4))
+    topo = net.compile()
+    dense, rows = PathIndex(topo).build(), PathIndex(topo, dense=False, cache_rows=4)
+    for h in range(0, topo.n_nodes, 3):
+        np.testing.assert_array_equal(rows.distances_from(h), dense.dist[h])
+        np.testing.assert_array_equal(rows.distances_to(h), dense.dist[:, h])
+        assert rows.path(h, topo.n_nodes - 1) == dense.path(h, topo.n_nodes - 1)
+    src, dst = np.array([[0, 5], [5, 9]]), np.array([[1, 2], [3, 0]])
+    np.testing.assert_array_equal(rows.distances(src, dst), dense.dist[src, dst])
+    assert len(rows._from) <= 4 and len(rows._to) <= 4
+    assert rows._dist is None
+
+
+def test_rows_follow_latency_updates():
+    net = NetworkGraph.from_infra_dict(random_geometric_infra(60, seed=4))
+    topo = net.compile()
+    rows = PathIndex(topo, dense=False)
+    before = rows.distances_from(0).copy()
+    rng = np.random.default_rng(1)
+    edges = rng.choice(topo.n_edges, size=20, replace=False)
+    latencies = rng.integers(1, 200, size=edges.size)
+    rows.update_latencies(edges, latencies)
+    rows.update_latency(int(edges[0]), 1)
+    latencies[0] = 1
+    fresh = PathIndex(topo)
+    fresh.latency[edges] = latencies
+    np.testing.assert_array_equal(rows.distances_from(0), fresh.dist[0])
+    assert not np.array_equal(rows.distances_from(0), before)
+
+
+def test_large_topologies_place_without_the_dense_matrices(monkeypatch):
+    infra = random_geometric_infra(120, seed=3)
+    app = service_chain(12, seed=3, link=LinkSpec(bandwidth=(10, 20), latency=(100, 300)))
+    dense = GreedyPlacement().place(ServiceGraph.from_app_dict(app), NetworkGraph.from_infra_dict(infra))
+    monkeypatch.setattr(PathIndex, 'DENSE_MAX_NODES', 100)
+    net = NetworkGraph.from_infra_dict(infra)
+    res = GreedyPlacement().place(ServiceGraph.from_app_dict(app), net)
+    assert res.meta['status'] == dense.meta['status'] == 'ok'
+    assert res.mapping == dense.mapping and res.paths == dense.paths
+    assert not net.path_index().dense and net.path_index()._dist is None
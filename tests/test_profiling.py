@@ -0,0 +1,72 @@
+import io
+import pstats
+
+import pytest
+
+from src.batch import BatchPlacer
+from src.consolidation import EnergyConsolidation
+from src.greedy import GreedyPlacement
+from src.profiling import NULL_PROFILER, Profiler, capture, merge_reports
+
+
+def test_phases_counters_and_values():
+    prof = Profiler()
+    for _ in range(2):
+        with prof.phase('routing'):
+            pass
+    prof.count('route_calls')
+    prof.count('route_calls', 2)
+    for hops in (1, 4, 2, 3):
+        prof.observe('path_hops', hops)
+    rep = prof.report()
+    assert set(rep['phases_s']) == {'routing'} and rep['phases_s']['routing'] <= rep['total_s']
+    assert rep['counters'] == {'route_calls': 3}
+    assert rep['values']['path_hops'] == {'count': 4, 'total': 10, 'min': 1, 'max': 4, 'mean': 2.5}
+
+
+def test_null_profiler_records_nothing():
+    with NULL_PROFILER.phase('x'):
+        NULL_PROFILER.count('y')
+        NULL_PROFILER.observe('z', 1)
+    assert not NULL_PROFILER.enabled
+    assert NULL_PROFILER.report() == {}
+
+
+def test_merge_reports():
+    a, b = Profiler(), Profiler()
+    a.count('n', 2)
+    b.count('n', 3)
+    a.observe('v', 1)
+    b.observe('v', 5)
+    b.observe('v', 3)
+    merged = merge_reports([a.report(), {}, b.report()])
+    assert merged['placements'] == 2
+    assert merged['counters'] == {'n': 5}
+    assert merged['values']['v'] == {'count': 3, 'total': 9, 'min': 1, 'max': 5, 'mean': 3}
+
+
+@pytest.mark.parametrize('strategy', [GreedyPlacement, EnergyConsolidation])
+def test_strategies_report_only_when_asked(net, svc, strategy):
+    assert 'profile' not in strategy().place(svc, net).meta
+    res = strategy(profile=True).place(svc, net)
+    rep = res.meta['profile']
+    assert {'snapshot', 'candidates', 'routing'} <= set(rep['phases_s'])
+    assert rep['counters']['route_calls'] + rep['counters'].get('links_colocated', 0) == len(svc.compile().edge_src)
+    assert rep['values']['path_hops']['count'] == rep['counters']['route_calls']
+    assert res.mapping == strategy().place(svc, net).mapping
+
+
+def test_batch_merges_the_profiles(net, svc):
+    batch = BatchPlacer(strategy=GreedyPlacement(profile=True)).place_all([('a', svc), ('b', svc)], net)
+    assert batch.stats['profile']['placements'] == 2
+
+
+def test_capture_writes_cprofile_and_memory_summary(tmp_path):
+    out = io.StringIO()
+    path = str(tmp_path / 'place.prof')
+    with capture(path, trace_memory=True, top=3, stream=out):
+        sorted(range(10000), key=lambda x: -x)
+    text = out.getvalue()
+    assert f'cProfile stats written to {path}' in text
+    assert 'tracemalloc: current' in text
+    assert pstats.Stats(path).total_calls > 0
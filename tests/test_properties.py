@@ -0,0 +1,118 @@
+import json
+import os
+import re
+
+import javaproperties
+import pytest
+
+from src.InfraProperties import InfraProperties
+from src.appProperties import AppProperties
+from src.generator import service_dag, tiered_infra, write_app_properties, write_infra_properties
+from src.propertiesReader import TupleTable
+
+from tests.helpers import APP_PATH, INFRA_PATH, ROOT
+
+
+def braced(s):
+    return [[p.strip() for p in it.split(',') if p.strip() != ''] for it in re.findall(r"\{([^}]*)\}", s)]
+
+
+def old_infra_dict(path):
+    """to_dict() of the javaproperties + regex parser the streaming reader replaced."""
+    with open(path, 'rb') as f:
+        props = javaproperties.load(f)
+    hosts = []
+    for e in braced(props.get('hosts.configuration', '')):
+        host = {'cpu': int(e[0]), 'ram': int(e[1])}
+        if len(e) > 3:
+            host['power_idle'], host['power_peak'] = float(e[2]), float(e[3])
+        hosts.append(host)
+    links = []
+    for e in braced(props.get('network.topology', '')):
+        if len(e) >= 4:
+            link = dict(zip(('src', 'dst', 'bandwidth', 'latency'), map(int, e[:4])))
+            if len(e) > 4:
+                link['energy_per_bit'] = float(e[4])
+            links.append(link)
+    return {
+        'hosts.nb': int(props.get('hosts.nb', 0)),
+        'hosts': hosts,
+        'links': links,
+        'edges.nb': int(props.get('edges.nb', 0)),
+        'network.diameter': int(props['network.diameter']) if 'network.diameter' in props else None,
+    }
+
+
+def old_app_dict(path):
+    with open(path, 'rb') as f:
+        props = javaproperties.load(f)
+    comps = [dict(zip(('cpu', 'ram', 'lambda', 'mu'), map(int, e))) for e in braced(props.get('components.requirements', ''))]
+    links = [dict(zip(('id', 'src', 'dst', 'bandwidth', 'latency'), map(int, e)))
+             for e in braced(props.get('links.description', '')) if len(e) >= 5]
+    dz = braced(props.get('component.DZ', ''))
+    return {
+        'application.nb': int(props.get('application.nb', 0)),
+        'application.components': int(props.get('application.components', 0)),
+        'components': comps,
+        'links': links,
+        'links.nb': int(props.get('links.nb', len(links))),
+        'component.nbDZ': int(props['component.nbDZ']) if 'component.nbDZ' in props else None,
+        'component.DZ': [int(x) for x in dz[0]] if dz else [],
+    }
+
+
+def assert_same(new, old):
+    new = dict(new)
+    new.pop('hosts.tier', None)  # not known to the old parser
+    assert new == old
+    # plain Python numbers, not numpy scalars
+    assert json.dumps(new, sort_keys=True) == json.dumps(old, sort_keys=True)
+
+
+@pytest.mark.parametrize('path', [INFRA_PATH, os.path.join(ROOT, 'properties', 'infra_8nodes_test.properties')])
+def test_sample_infra_matches_the_old_parser(path):
+    assert_same(InfraProperties.from_file(path).to_dict(), old_infra_dict(path))
+
+
+def test_sample_app_matches_the_old_parser():
+    assert_same(AppProperties.from_file(APP_PATH).to_dict(), old_app_dict(APP_PATH))
+
+
+@pytest.mark.parametrize('chunk_rows', [TupleTable.CHUNK_ROWS, 3])
+def test_generated_files_match_the_old_parser(tmp_path, monkeypatch, chunk_rows):
+    monkeypatch.setattr(TupleTable, 'CHUNK_ROWS', chunk_rows)
+    infra_path, app_path = str(tmp_path / 'infra.properties'), str(tmp_path / 'app.properties')
+    write_infra_properties(tiered_infra(20, 5, 2, seed=3), infra_path)
+    write_app_properties(service_dag(15, seed=3), app_path)
+    infra = InfraProperties.from_file(infra_path)
+    assert_same(infra.to_dict(), old_infra_dict(infra_path))
+    assert len(infra.hosts_tier) == infra.hosts_nb
+    assert_same(AppProperties.from_file(app_path).to_dict(), old_app_dict(app_path))
+
+
+@pytest.mark.parametrize('chunk_rows', [TupleTable.CHUNK_ROWS, 2])
+def test_mixed_widths_and_layout(tmp_path, monkeypatch, chunk_rows):
+    monkeypatch.setattr(TupleTable, 'CHUNK_ROWS', chunk_rows)
+    path = tmp_path / 'infra.properties'
+    path.write_text('hosts.nb = 4\n'
+                    '! comment\n'
+                    'hosts.configuration = {4,8000,10.5,40}, \\\n'
+                    '    {2, 4000}, {8,\\\n'
+                    '16000} ,\\\n'
+                    '{1,1000,3,9}\n'
+                    'network.topology : {0,1,100,5,2.5}, {1,0,100,5}\n'
+                    'edges.nb = 2\n')
+    assert_same(InfraProperties.from_file(str(path)).to_dict(), old_infra_dict(str(path)))
+
+
+@pytest.mark.parametrize('value, line', [
+    ('{4,8000}, \\\n{2,x}', 3),
+    ('{4,8000}, \\\n{2,4000,7}', 3),
+    ('{4,8000} junk, {2,4000}', 2),
+    ('{4,8000}, \\\n{2,4000', 3),
+])
+def test_malformed_tuples_report_their_line(tmp_path, value, line):
+    path = tmp_path / 'infra.properties'
+    path.write_text('hosts.nb = 2\nhosts.configuration = ' + value + '\n')
+    with pytest.raises(ValueError, match=rf'infra\.properties:{line}: hosts\.configuration'):
+        InfraProperties.from_file(str(path))
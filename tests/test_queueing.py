@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.base import _jsonable
+from src.exact import BranchAndBound
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.networkGraph import NetworkGraph
+from src.queueing import QueueingEvaluator, end_to_end_latency
+from src.serviceGraph import ServiceGraph
+
+from tests.helpers import make_infra
+
+
+def line_net():
+    return NetworkGraph.from_infra_dict(make_infra([(4, 100), (4, 100)], [(0, 1, 1000, 5)]))
+
+
+def chain(rates):
+    """Chain of components with 2 CPUs each and the given (lambda, mu) rates."""
+    return ServiceGraph.from_app_dict({
+        'components': [{'cpu': 2, 'ram': 1, 'lambda': lam, 'mu': mu} for lam, mu in rates],
+        'links': [{'id': k, 'src': k, 'dst': k + 1, 'bandwidth': 10, 'latency': 100} for k in range(len(rates) - 1)],
+    })
+
+
+def test_sojourn_and_end_to_end_by_hand():
+    q = QueueingEvaluator(chain([(5, 10), (5, 20)]), line_net())
+    out = q.evaluate_assignments(np.array([0, 1]))
+    # rho 0.5 and 0.25, each alone on a host: T = 1 / (mu (1 - rho)) s
+    np.testing.assert_allclose(out['sojourn'][0], [1000 / (10 * 0.5), 1000 / (20 * 0.75)])
+    np.testing.assert_allclose(out['end_to_end'][0, 1], 200 + 5 + 1000 / 15)
+
+
+def test_co_located_components_share_the_host():
+    q = QueueingEvaluator(chain([(5, 10), (5, 20)]), line_net())
+    out = q.evaluate_assignments(np.array([[0, 0], [0, 1]]))
+    # together: (0.5 * 2 + 0.25 * 2) / 4 CPUs
+    assert out['host_rho'][0, 0] == pytest.approx(0.375)
+    assert out['contention'][0, 1] == pytest.approx(0.375)
+    assert out['contention'][1, 1] == pytest.approx(0.25)
+
+
+def test_saturated_component():
+    q = QueueingEvaluator(chain([(5, 10), (30, 20)]), line_net())
+    assert q.score(np.array([0, 1]))[0] == np.inf
+    assert q.evaluate_assignments(np.array([0, 1]))['saturated'][0].tolist() == [False, True]
+
+
+def test_evaluate_report_is_json_once_jsonable():
+    net = line_net()
+    svc = chain([(5, 10), (30, 20)])
+    result = GreedyPlacement().place(svc, net)
+    report = QueueingEvaluator(svc, net).evaluate(result)
+    assert 1 in report['saturated']
+    assert end_to_end_latency(result, svc, net) == np.inf
+    text = json.dumps(_jsonable(report), allow_nan=False)
+    assert json.loads(text)['max_end_to_end_ms'] is None
+
+
+def test_stable_hosts_with_limit_background_and_groups():
+    q = QueueingEvaluator(chain([(6, 10), (6, 10)]), line_net())
+    none = np.full(2, -1)
+    assert q.stable_hosts(0, none).tolist() == [True, True]
+    assert q.stable_hosts(0, none, limit=0.5).tolist() == [False, False]  # rho 0.6 on its own
+    # component 0 on host 0 (work 1.2 of 4 CPUs), plus 1 CPU busy with another app
+    placed = np.array([0, -1])
+    background = np.array([1.0, 0.0])
+    assert q.stable_hosts(1, placed, limit=0.7, background=background).tolist() == [False, True]
+    assert q.stable_hosts(1, placed, limit=0.9, background=background).tolist() == [True, True]
+    assert q.stable_hosts([0, 1], none, limit=0.7, background=background).tolist() == [False, True]
+
+
+@pytest.mark.parametrize('make', [
+    lambda mu: GreedyPlacement(max_utilisation=mu),
+    lambda mu: GreedyPlacement(max_utilisation=mu, partition=True),
+    lambda mu: BranchAndBound(max_utilisation=mu),
+])
+def test_strategies_keep_hosts_below_the_utilisation_cap(make):
+    net = NetworkGraph.from_infra_dict(make_infra([(8, 100), (8, 100)], [(0, 1, 1000, 5)]))
+    svc = chain([(6, 10), (6, 10)])
+
+    def busy():
+        # 3 of 8 CPUs on each host held by another application
+        ledger = ResourceLedger.for_network(net)
+        for host in (0, 1):
+            ledger.allocate_on_host(host, 3, 1)
+        return ledger
+
+    # rho is 0.6 per component; together they would make a host (3 + 2 * 1.2) / 8 = 0.675 busy
+    assert len(set(make(None).place(svc, net, ledger=busy()).mapping.values())) == 1
+    res = make(0.65).place(svc, net, ledger=busy())
+    assert res.meta['status'] == 'ok'
+    assert len(set(res.mapping.values())) == 2
+    assert make(0.5).place(svc, net, ledger=busy()).meta['status'] == 'failed'
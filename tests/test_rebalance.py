@@ -0,0 +1,134 @@
+import copy
+
+import numpy as np
+import pytest
+
+from src.generator import LinkSpec, service_chain, tiered_infra
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.networkGraph import NetworkGraph
+from src.rebalance import REBALANCE_OBJECTIVES, MigrationPlan, Rebalancer
+from src.serviceGraph import ServiceGraph
+
+from tests.helpers import assert_ledger_matches, make_app, make_infra
+
+
+def spread(n_apps=10, seed=0, bandwidth=(10, 20)):
+    """Chains placed from random start hosts, so they are scattered over many hosts."""
+    net = NetworkGraph.from_infra_dict(tiered_infra(30, 5, 2, seed=seed))
+    ledger = ResourceLedger.for_network(net)
+    apps = {}
+    link = LinkSpec(bandwidth=bandwidth, latency=(200, 400))
+    rng = np.random.default_rng(seed)
+    for i in range(n_apps):
+        svc = ServiceGraph.from_app_dict(service_chain(3, seed=seed * 100 + i, link=link))
+        res = GreedyPlacement().place(svc, net, start_host=int(rng.integers(0, 37)), ledger=ledger)
+        assert res.meta['status'] == 'ok'
+        apps[f'app-{i}'] = (svc, res)
+    return net, ledger, apps
+
+
+def placed(net, *apps):
+    """(app dict, start host) pairs placed in order on a shared ledger."""
+    ledger = ResourceLedger.for_network(net)
+    out = {}
+    for i, (app, start) in enumerate(apps):
+        svc = ServiceGraph.from_app_dict(app)
+        res = GreedyPlacement().place(svc, net, start_host=start, ledger=ledger)
+        assert res.meta['status'] == 'ok'
+        out[f'app-{i}'] = (svc, res)
+    return net, ledger, out
+
+
+def crowded():
+    """Two pinned apps share the fast half of a diamond; the slow half is empty."""
+    net = NetworkGraph.from_infra_dict(make_infra([(4, 100)] * 4, [(0, 1, 100, 10), (1, 3, 100, 10),
+                                                                     (0, 2, 100, 50), (2, 3, 100, 50)]))
+    app = make_app([(1, 1), (1, 1)], [(0, 1, 30, 1000)], pins={0: 0, 1: 3})
+    return placed(net, (app, 0), (app, 0))
+
+
+@pytest.mark.parametrize('objective, scenario', [('active_hosts', spread), ('latency', spread),
+                                                 ('link_utilization', crowded)])
+def test_execute_keeps_the_ledger_equal_to_a_fresh_apply(objective, scenario):
+    assert {'active_hosts', 'latency', 'link_utilization'} == set(REBALANCE_OBJECTIVES)
+    net, ledger, apps = scenario()
+    before = {name: getattr(ledger, name).copy() for name in ('cpu_used', 'ram_used', 'bw_used')}
+    rebalancer = Rebalancer(net, ledger, apps)
+    plan = rebalancer.plan(objective)
+    # planning leaves the ledger as it was
+    for name, used in before.items():
+        np.testing.assert_array_equal(getattr(ledger, name), used, err_msg=name)
+    assert plan.moves and plan.after[objective] <= plan.before[objective]
+    assert set(plan.results) == {step.app_id for step in plan.steps}
+    rebalancer.execute(plan)
+    assert_ledger_matches(net, ledger, apps.values())
+    for app_id, res in plan.results.items():
+        assert apps[app_id][1].mapping == res.mapping
+    # the metrics of a fresh plan start where the executed one ended
+    assert Rebalancer(net, ledger, apps).plan(objective, max_moves=0).before == pytest.approx(plan.after)
+
+
+def test_draining_reduces_active_hosts():
+    net, ledger, apps = spread()
+    plan = Rebalancer(net, ledger, apps).plan('active_hosts')
+    assert plan.moves and plan.after['active_hosts'] < plan.before['active_hosts']
+    assert all(step.kind == 'migrate' for step in plan.steps)
+    assert plan.migrated_ram == sum(step.ram for step in plan.steps) > 0
+
+
+def test_unloading_links_lowers_the_peak():
+    net, ledger, apps = crowded()
+    plan = Rebalancer(net, ledger, apps).plan('link_utilization')
+    assert plan.before['link_utilization'] == 0.6 and plan.after['link_utilization'] == 0.3
+    assert [step.kind for step in plan.steps] == ['reroute']
+
+
+def test_no_migrations_when_the_peak_cannot_drop():
+    # a pinned app fills the only link between hosts 0 and 1; the other app's link
+    # could spread over a wider but slower detour, which only helps the tie-break
+    net = NetworkGraph.from_infra_dict(make_infra([(4, 100)] * 5, [(0, 1, 10, 10), (1, 2, 100, 10), (2, 3, 100, 10),
+                                                                     (2, 4, 1000, 50), (4, 3, 1000, 50)]))
+    net, ledger, apps = placed(net, (make_app([(1, 1), (1, 1)], [(0, 1, 10, 1000)], pins={0: 0, 1: 1}), 0),
+                               (make_app([(3, 1), (3, 1)], [(0, 1, 50, 1000)]), 2))
+    plan = Rebalancer(net, ledger, apps).plan('link_utilization', max_moves=20)
+    assert plan.before['link_utilization'] == plan.after['link_utilization'] == 1.0
+    assert plan.moves == 0
+    assert plan.after['latency'] <= plan.before['latency']
+
+
+def test_every_prefix_is_feasible():
+    net, ledger, apps = spread(n_apps=6)
+    plan = Rebalancer(net, ledger, apps).plan('active_hosts')
+    assert plan.moves > 1
+    for n in range(1, plan.moves + 1):
+        ledger_n, apps_n = copy.deepcopy(ledger), dict(apps)
+        prefix = MigrationPlan(plan.objective, plan.before, plan.after, steps=plan.steps[:n])
+        Rebalancer(net, ledger_n, apps_n).execute(prefix)
+        assert_ledger_matches(net, ledger_n, apps_n.values())
+
+
+def test_budgets():
+    net, ledger, apps = spread()
+    assert Rebalancer(net, ledger, apps).plan('active_hosts', max_moves=0).moves == 0
+    assert Rebalancer(net, ledger, apps).plan('active_hosts', max_moves=2).moves <= 2
+    full = Rebalancer(net, ledger, apps).plan('active_hosts')
+    budget = full.steps[0].ram
+    assert Rebalancer(net, ledger, apps).plan('active_hosts', max_ram=budget).migrated_ram <= budget
+    with pytest.raises(ValueError):
+        Rebalancer(net, ledger, apps).plan('power')
+
+
+def test_stale_plans_are_rejected_untouched():
+    net, ledger, apps = spread()
+    plan = Rebalancer(net, ledger, apps).plan('active_hosts')
+    step = plan.steps[0]
+    svc, res = apps.pop(step.app_id)
+    ledger.release(res, svc)
+    used = ledger.cpu_used.copy()
+    kept = dict(apps)
+    with pytest.raises(ValueError, match='Stale migration plan'):
+        Rebalancer(net, ledger, apps).execute(plan)
+    np.testing.assert_array_equal(ledger.cpu_used, used)
+    assert apps == kept
+    assert_ledger_matches(net, ledger, apps.values())
@@ -0,0 +1,93 @@
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+
+from src import rendering
+from src.generator import tiered_infra
+from src.greedy import GreedyPlacement
+from src.networkGraph import NetworkGraph
+from src.rendering import LayoutCache, cpu_utilization, host_groups, network_hash, path_hops
+
+
+@pytest.fixture
+def layout_calls(monkeypatch):
+    calls = []
+    compute = rendering.compute_layout
+
+    def counted(G, layout='spring', seed=42):
+        calls.append(layout)
+        return compute(G, layout, seed)
+
+    monkeypatch.setattr(rendering, 'compute_layout', counted)
+    return calls
+
+
+def test_network_hash_follows_structure_only(infra):
+    a = NetworkGraph.from_infra_properties(infra)
+    b = NetworkGraph.from_infra_properties(infra)
+    key = network_hash(a)
+    b.set_link_latency(0, 1, 7)
+    assert network_hash(b) == key
+    b.G.remove_edge(6, 7)
+    b.invalidate()
+    assert network_hash(b) != key
+
+
+def test_positions_are_computed_once_and_persisted(tmp_path, net, layout_calls):
+    cache = LayoutCache(str(tmp_path))
+    first = cache.positions('k', net.G)
+    assert cache.positions('k', net.G).keys() == first.keys()
+    assert layout_calls == ['spring']
+    again = LayoutCache(str(tmp_path)).positions('k', net.G)
+    assert layout_calls == ['spring']
+    for node, xy in first.items():
+        np.testing.assert_array_equal(again[node], xy)
+    LayoutCache(str(tmp_path)).positions('k', net.G, layout='circular')
+    assert layout_calls == ['spring', 'circular']
+
+
+def test_memory_cache_drops_the_least_recently_used():
+    cache = LayoutCache(max_entries=2)
+    for key in 'abc':
+        cache.put(key, np.arange(1), np.zeros((1, 2)))
+    assert cache.get('a') is None and cache.get('b') is not None
+    cache.put('d', np.arange(1), np.zeros((1, 2)))
+    assert cache.get('c') is None and cache.get('b') is not None
+
+
+def test_utilization_and_path_hops(net, svc):
+    res = GreedyPlacement().place(svc, net)
+    util = cpu_utilization(net, placements=[(res, svc)])
+    topo = net.compile()
+    for c, h in res.mapping.items():
+        assert util[topo.index[h]] > 0
+    assert cpu_utilization(net) is None
+    a, b = path_hops(net, [res])
+    hops = sorted(zip(topo.node_ids[a].tolist(), topo.node_ids[b].tolist()))
+    assert hops == sorted((p[i], p[i + 1]) for p in res.paths.values() for i in range(len(p) - 1))
+
+
+def test_host_groups():
+    net = NetworkGraph.from_infra_dict(tiered_infra(20, 4, 2, seed=0))
+    labels, names = host_groups(net)
+    assert names == ['cloud', 'edge', 'fog']
+    assert np.bincount(labels).tolist() == [2, 20, 4]
+    labels, names = host_groups(net, 'cluster', max_groups=3)
+    assert len(names) == 3 and set(labels.tolist()) == {0, 1, 2}
+    with pytest.raises(ValueError):
+        host_groups(net, ['a'])
+    with pytest.raises(ValueError):
+        host_groups(net, 'region')
+
+
+def test_drawings_are_saved_without_a_display(tmp_path, net, svc):
+    res = GreedyPlacement().place(svc, net)
+    cache = LayoutCache(str(tmp_path / 'layouts'))
+    assert net.draw(path=str(tmp_path / 'net.png'), results=res, placements=[(res, svc)], cache=cache) is None
+    summary = net.draw(path=str(tmp_path / 'groups.png'), aggregate=True, groups='cluster', results=res, cache=cache)
+    assert (tmp_path / 'net.png').stat().st_size > 0 and (tmp_path / 'groups.png').stat().st_size > 0
+    assert sum(g['hosts'] for g in summary['groups']) == 8
+    assert summary['routed_hops'] <= sum(len(p) - 1 for p in res.paths.values())
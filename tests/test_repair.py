@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from src.generator import LinkSpec, service_chain, tiered_infra
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.networkGraph import NetworkGraph
+from src.pathIndex import PathIndex
+from src.repair import IncrementalRepair
+from src.serviceGraph import ServiceGraph
+
+from tests.helpers import assert_ledger_matches
+
+
+def loaded(n_apps=12, seed=0):
+    net = NetworkGraph.from_infra_dict(tiered_infra(40, 6, 2, seed=seed))
+    ledger = ResourceLedger.for_network(net)
+    apps = {}
+    link = LinkSpec(bandwidth=(10, 20), latency=(200, 400))
+    for i in range(n_apps):
+        svc = ServiceGraph.from_app_dict(service_chain(4, seed=seed * 100 + i, link=link))
+        res = GreedyPlacement().place(svc, net, start_host=int(np.random.default_rng(i).integers(0, 48)), ledger=ledger)
+        assert res.meta['status'] == 'ok'
+        apps[f'app-{i}'] = (svc, res)
+    return net, ledger, apps
+
+
+def assert_consistent(net, ledger, apps):
+    """The shared ledger equals the apps applied from scratch, every app is still valid, and so is the path index."""
+    assert_ledger_matches(net, ledger, apps.values(),
+                          ('cpu_used', 'ram_used', 'bw_used', 'cpu_total', 'ram_total', 'bw_total'))
+    np.testing.assert_array_equal(net.path_index().dist, PathIndex(net.compile()).dist)
+
+
+def busiest_host(apps):
+    counts = {}
+    for _, res in apps.values():
+        for h in res.mapping.values():
+            counts[h] = counts.get(h, 0) + 1
+    return max(counts, key=lambda h: (counts[h], h))
+
+
+def busiest_link(net, apps):
+    counts = {}
+    for _, res in apps.values():
+        for path in res.paths.values():
+            for key in zip(path, path[1:]):
+                counts[key] = counts.get(key, 0) + 1
+    return max(counts, key=lambda k: (counts[k], k))
+
+
+def test_changes_leave_a_valid_ledger_step_by_step():
+    net, ledger, apps = loaded()
+    net.path_index()
+    repair = IncrementalRepair(net, ledger, apps)
+    assert_consistent(net, ledger, apps)
+
+    host = busiest_host(apps)
+    report = repair.apply([{'op': 'remove_host', 'host': host}])
+    assert report.moved and not report.evicted
+    assert all(host not in res.mapping.values() for _, res in apps.values())
+    assert_consistent(net, ledger, apps)
+
+    shrink = busiest_host(apps)
+    repair.apply([{'op': 'host', 'host': shrink, 'cpu': 1}])
+    assert_consistent(net, ledger, apps)
+
+    u, v = busiest_link(net, apps)
+    report = repair.apply([{'op': 'remove_link', 'src': u, 'dst': v}, {'op': 'remove_link', 'src': v, 'dst': u}])
+    assert report.rerouted
+    assert all((u, v) not in zip(p, p[1:]) for _, res in apps.values() for p in res.paths.values())
+    assert_consistent(net, ledger, apps)
+
+    a, b = busiest_link(net, apps)
+    repair.apply([{'op': 'link', 'src': a, 'dst': b, 'latency': 10 ** 5, 'bandwidth': 15}])
+    assert_consistent(net, ledger, apps)
+
+    report = repair.apply([{'op': 'host', 'host': host}])
+    assert report.hosts_changed == 1 and not report.moved
+    assert_consistent(net, ledger, apps)
+
+
+def test_evicted_apps_are_released():
+    net, ledger, apps = loaded(n_apps=6)
+    repair = IncrementalRepair(net, ledger, apps)
+    topo = net.compile()
+    # leave a single edge host, far too small for everything
+    report = repair.apply([{'op': 'remove_host', 'host': int(h)} for h in topo.node_ids[:-1]])
+    assert report.evicted
+    assert set(report.evicted).isdisjoint(apps)
+    assert_consistent(net, ledger, apps)
+    assert ledger.cpu_used[:-1].sum() == 0
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_random_change_sequences(seed):
+    net, ledger, apps = loaded(seed=seed)
+    repair = IncrementalRepair(net, ledger, apps)
+    rng = np.random.default_rng(seed)
+    topo = net.compile()
+    links = [(int(topo.node_ids[a]), int(topo.node_ids[b])) for a, b in zip(topo.edge_src, topo.indices) if a != b]
+    removed = []
+    for _ in range(8):
+        kind = rng.integers(0, 4)
+        if kind == 0:
+            removed.append(int(rng.choice(topo.node_ids)))
+            changes = [{'op': 'remove_host', 'host': removed[-1]}]
+        elif kind == 1 and removed:
+            changes = [{'op': 'host', 'host': removed.pop(0)}]
+        elif kind == 2:
+            u, v = links[int(rng.integers(0, len(links)))]
+            changes = [{'op': 'link', 'src': u, 'dst': v, 'bandwidth': int(rng.integers(0, 30)),
+                        'latency': int(rng.integers(1, 300))}]
+        else:
+            h = int(rng.choice(topo.node_ids))
+            changes = [{'op': 'host', 'host': h, 'cpu': int(rng.integers(0, 8))}]
+        repair.apply(changes)
+        assert_consistent(net, ledger, apps)
+
+
+def test_a_returning_host_brings_back_its_links():
+    net = NetworkGraph.from_infra_dict(tiered_infra(6, 2, 1, seed=0))
+    topo = net.compile()
+    before_bw, before_lat = topo.edge_bandwidth.copy(), topo.edge_latency.copy()
+    fog = 1
+    neighbour = next(int(topo.node_ids[b]) for b in topo.indices[topo.indptr[fog]:topo.indptr[fog + 1]] if b != fog)
+    net.apply_changes([{'op': 'remove_host', 'host': fog}, {'op': 'remove_link', 'src': fog, 'dst': neighbour}])
+    assert np.isinf(net.compile().edge_latency[topo.edge_id(neighbour, fog)])
+    net.apply_changes([{'op': 'host', 'host': fog}])
+    after = net.compile()
+    down = topo.edge_id(fog, neighbour)
+    assert np.isinf(after.edge_latency[down]) and after.edge_bandwidth[down] == 0
+    keep = np.ones(topo.n_edges, dtype=bool)
+    keep[down] = False
+    np.testing.assert_array_equal(after.edge_bandwidth[keep], before_bw[keep])
+    np.testing.assert_array_equal(after.edge_latency[keep], before_lat[keep])
+    assert after.host_cpu[fog] == topo.host_cpu[fog]
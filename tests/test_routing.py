@@ -0,0 +1,89 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.generator import random_geometric_infra
+from src.networkGraph import NetworkGraph
+from src.routing import ConstrainedRouter, ShortestPathRouter
+
+
+def route_ids(net, router, u, v, bandwidth, limit, residual=None):
+    topo, index = net.compile(), net.path_index()
+    if residual is None:
+        residual = np.array(topo.edge_bandwidth)
+    r = router.route(topo, index, topo.index[u], topo.index[v], bandwidth, limit, residual)
+    return None if r is None else (topo.to_ids(r.path), r)
+
+
+def test_shortest_path_when_it_fits(net):
+    path, r = route_ids(net, ConstrainedRouter(), 5, 6, 100, 100)
+    assert path == [5, 2, 6]
+    assert r.latency == 40
+
+
+def test_latency_limit_below_shortest_path(net):
+    assert route_ids(net, ConstrainedRouter(), 5, 6, 100, 39) is None
+
+
+def test_falls_back_when_the_shortest_path_is_full(net):
+    topo = net.compile()
+    residual = np.array(topo.edge_bandwidth)
+    residual[topo.edge_id(2, 6)] = 50
+    assert route_ids(net, ShortestPathRouter(), 5, 6, 100, 100, residual) is None
+    path, r = route_ids(net, ConstrainedRouter(), 5, 6, 100, 100, residual)
+    assert path == [5, 2, 7, 6]
+    assert r.latency == 50
+    assert np.all(residual[r.edges] >= 100)
+    # the detour is too slow for a 45 ms limit
+    assert route_ids(net, ConstrainedRouter(), 5, 6, 100, 45, residual) is None
+
+
+def test_bandwidth_above_every_link(net):
+    assert route_ids(net, ConstrainedRouter(), 3, 7, 2000, 10 ** 6) is None
+
+
+def test_colocated_components_need_no_link(net):
+    path, r = route_ids(net, ConstrainedRouter(), 4, 4, 10 ** 9, 0)
+    assert path == [4] and r.edges.size == 0
+
+
+def test_hop_cost_prefers_fewer_links(net):
+    topo = net.compile()
+    residual = np.array(topo.edge_bandwidth)
+    path, _ = route_ids(net, ConstrainedRouter(cost='hops'), 6, 7, 100, 1000, residual)
+    assert path == [6, 7]
+
+
+def test_unknown_cost():
+    with pytest.raises(ValueError):
+        ConstrainedRouter(cost='energy')
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_optimal_against_enumeration(seed):
+    net = NetworkGraph.from_infra_dict(random_geometric_infra(10, seed=seed))
+    topo = net.compile()
+    rng = np.random.default_rng(seed)
+    residual = np.where(rng.random(topo.n_edges) < 0.3, 0.0, 1000.0)
+    bandwidth = 100
+    G = nx.DiGraph()
+    for e in range(topo.n_edges):
+        a, b = int(topo.edge_src[e]), int(topo.indices[e])
+        if a != b and residual[e] >= bandwidth:
+            G.add_edge(a, b, latency=topo.edge_latency[e])
+    for src, dst in [(0, 9), (3, 7), (5, 1)]:
+        limit = float(net.path_index().distance(src, dst)) * 1.5
+        feasible = []
+        if G.has_node(src) and G.has_node(dst):
+            for p in nx.all_simple_paths(G, src, dst):
+                lat = sum(G.edges[a, b]['latency'] for a, b in zip(p, p[1:]))
+                if lat <= limit:
+                    feasible.append(lat)
+        r = ConstrainedRouter().route(topo, net.path_index(), src, dst, bandwidth, limit, residual)
+        if not feasible:
+            assert r is None
+        else:
+            assert r is not None
+            assert r.latency == pytest.approx(min(feasible))
+            assert r.latency <= limit
+            assert np.all(residual[r.edges] >= bandwidth)
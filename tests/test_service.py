@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import socket
+
+import pytest
+
+from src.networkGraph import NetworkGraph
+from src.service import PlacementService
+
+from tests.helpers import make_app, make_infra
+
+
+def small_app(cpu=2):
+    return make_app([(cpu, 1), (cpu, 1)], [(0, 1, 10, 100)])
+
+
+def service():
+    net = NetworkGraph.from_infra_dict(make_infra([(4, 100), (4, 100)], [(0, 1, 100, 10)]))
+    return PlacementService(net)
+
+
+def test_place_release_status():
+    async def run():
+        srv = service()
+        placed = await srv.handle({'op': 'place', 'app_id': 'a', 'app': small_app(), 'seq': 7})
+        assert placed['ok'] and placed['seq'] == 7
+        assert (await srv.handle({'op': 'place', 'app_id': 'a', 'app': small_app()}))['error'] == 'app already placed'
+        status = await srv.handle({'op': 'status'})
+        assert status['apps'] == ['a']
+        assert srv.ledger.cpu_used.sum() == 4
+        assert (await srv.handle({'op': 'release', 'app_id': 'a'}))['ok']
+        assert srv.ledger.cpu_used.sum() == 0
+        assert not (await srv.handle({'op': 'release', 'app_id': 'a'}))['ok']
+
+    asyncio.run(run())
+
+
+def test_bad_requests_get_an_error_reply():
+    async def run():
+        srv = service()
+        assert (await srv.handle({'op': 'place'}))['error'] == 'missing field: app_id'
+        assert (await srv.handle({'op': 'place', 'app_id': 'x', 'app': {}}))['ok'] is False
+        assert (await srv.handle({'op': 'nope'}))['error'] == 'unknown op: nope'
+
+    asyncio.run(run())
+
+
+def test_concurrent_requests_never_overcommit():
+    async def run():
+        srv = service()
+        replies = await asyncio.gather(*(srv.handle({'op': 'place', 'app_id': str(k), 'app': small_app()})
+                                         for k in range(6)))
+        assert sum(r['ok'] for r in replies) == 2
+        assert (srv.ledger.cpu_used <= srv.ledger.cpu_total).all()
+        assert srv.ledger.cpu_used.sum() == 8
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    # Unix socket paths are limited to about 100 bytes; tmp_path can be longer
+    path = os.path.join('/tmp', f'eaec-test-{os.getpid()}.sock')
+    yield path
+    if os.path.lexists(path):
+        os.unlink(path)
+
+
+def test_unix_socket_round_trip(socket_path):
+    # a stale socket from an earlier run is replaced
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(socket_path)
+    stale.close()
+
+    async def run():
+        srv = service()
+        task = asyncio.create_task(srv.serve_unix(socket_path))
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            try:
+                reader, writer = await asyncio.open_unix_connection(socket_path)
+                break
+            except (ConnectionRefusedError, FileNotFoundError):
+                continue
+        writer.write((json.dumps({'op': 'place', 'app_id': 'a', 'app': small_app()}) + '\n').encode())
+        writer.write(b'not json\n')
+        await writer.drain()
+        replies = [json.loads(await reader.readline()) for _ in range(2)]
+        writer.close()
+        task.cancel()
+        return replies
+
+    replies = asyncio.run(run())
+    assert any(r.get('ok') and r['app_id'] == 'a' for r in replies)
+    assert any(r.get('error', '').startswith('bad request') for r in replies)
+
+
+def test_unix_socket_refuses_to_replace_a_file(socket_path):
+    with open(socket_path, 'w') as f:
+        f.write('keep')
+    with pytest.raises(FileExistsError):
+        asyncio.run(service().serve_unix(socket_path))
+    with open(socket_path) as f:
+        assert f.read() == 'keep'
+
+
+def stream(srv, *requests):
+    """Replies of `_serve_stream` to JSON lines sent on one stream, in the order they were written."""
+    async def run():
+        reader = asyncio.StreamReader()
+        for request in requests:
+            reader.feed_data((json.dumps(request) + '\n').encode())
+        reader.feed_eof()
+        out = []
+
+        async def write(data: bytes):
+            out.append(json.loads(data))
+
+        await srv._serve_stream(reader, write)
+        return out
+
+    return asyncio.run(run())
+
+
+def test_a_malformed_request_does_not_stop_the_stream():
+    srv = service()
+    replies = stream(srv, {'op': 'place', 'app_id': 'bad', 'app': {'components': 5}, 'seq': 1},
+                     {'op': 'place', 'app_id': 'a', 'app': small_app(), 'seq': 2})
+    by_seq = {r['seq']: r for r in replies}
+    assert not by_seq[1]['ok'] and by_seq[1]['error'].startswith('TypeError: ')
+    assert by_seq[2]['ok']
+    assert list(srv.apps) == ['a']
+
+
+def test_errors_from_handlers_are_not_missing_fields():
+    async def run():
+        srv = service()
+        reply = await srv.handle({'op': 'topology', 'changes': [{'op': 'remove_host', 'host': 42}]})
+        assert not reply['ok'] and not reply['error'].startswith('missing field')
+        assert (await srv.handle({'op': 'topology'}))['error'] == 'missing field: changes'
+
+    asyncio.run(run())
+
+
+def test_pipelined_requests_take_effect_in_order():
+    srv = service()
+    replies = stream(srv, {'op': 'place', 'app_id': 'a', 'app': small_app(), 'seq': 1},
+                     {'op': 'release', 'app_id': 'a', 'seq': 2},
+                     {'op': 'place', 'app_id': 'b', 'app': small_app(), 'seq': 3},
+                     {'op': 'topology', 'changes': [{'op': 'remove_host', 'host': 1}], 'seq': 4},
+                     {'op': 'status', 'seq': 5})
+    by_seq = {r['seq']: r for r in replies}
+    assert all(by_seq[k]['ok'] for k in range(1, 6)), by_seq
+    assert by_seq[5]['apps'] == ['b']
+    assert srv.ledger.cpu_used.sum() == 4
@@ -0,0 +1,71 @@
+import numpy as np
+
+from src.greedy import GreedyPlacement
+from src.ledger import ResourceLedger
+from src.networkGraph import NetworkGraph
+from src.routing import ConstrainedRouter, SplittableRouter
+from src.serviceGraph import ServiceGraph
+from src.validation import validate_placement
+
+from tests.helpers import make_app, make_infra
+
+
+def parallel_paths(capacities, latencies):
+    """Host 0 reaches the last host through one relay per entry: 0 -> k -> n-1."""
+    n = len(capacities) + 2
+    links = []
+    for k, (bw, lat) in enumerate(zip(capacities, latencies), start=1):
+        links += [(0, k, bw, lat), (k, n - 1, bw, lat)]
+    return NetworkGraph.from_infra_dict(make_infra([(4, 100)] * n, links))
+
+
+def split(net, bandwidth, limit, max_paths=4):
+    topo, index = net.compile(), net.path_index()
+    dst = topo.n_nodes - 1
+    return SplittableRouter(max_paths=max_paths).route_split(topo, index, 0, dst, bandwidth, limit,
+                                                             topo.edge_bandwidth.copy())
+
+
+def test_splits_a_link_that_fits_no_single_path():
+    net = parallel_paths([60, 60], [10, 20])
+    topo, index = net.compile(), net.path_index()
+    assert ConstrainedRouter().route(topo, index, 0, 3, 100, 100, topo.edge_bandwidth.copy()) is None
+    res = split(net, 100, 100)
+    assert [r.path for r in res.routes] == [[0, 1, 3], [0, 2, 3]]
+    # min-cost: the faster relay is filled first
+    assert res.bandwidths == [60, 40]
+    assert res.latency == 40
+
+
+def test_paths_over_the_latency_limit_are_not_used():
+    net = parallel_paths([60, 60, 60], [10, 20, 100])
+    res = split(net, 100, 50)
+    assert sum(res.bandwidths) == 100
+    assert all(r.latency <= 50 for r in res.routes)
+    assert split(net, 130, 50) is None
+    assert sum(split(net, 130, 500).bandwidths) == 130
+
+
+def test_path_count_and_capacity_limits():
+    net = parallel_paths([40, 40, 40], [10, 10, 10])
+    assert split(net, 100, 100, max_paths=2) is None
+    assert len(split(net, 100, 100, max_paths=3).routes) == 3
+    assert split(net, 121, 100) is None
+    assert split(net, 100, 100, max_paths=1) is None
+
+
+def test_greedy_records_flows_the_ledger_and_validator_agree_on():
+    net = parallel_paths([60, 60], [10, 20])
+    svc = ServiceGraph.from_app_dict(make_app([(1, 1), (1, 1)], [(0, 1, 100, 100)], pins={0: 0, 1: 3}))
+    assert GreedyPlacement().place(svc, net).meta['status'] == 'failed'
+    ledger = ResourceLedger.for_network(net)
+    res = GreedyPlacement(router=SplittableRouter()).place(svc, net, ledger=ledger)
+    assert res.meta['status'] == 'ok'
+    assert res.meta['routing'][(0, 1)]['split'] == 2
+    assert [(f['path'], f['bandwidth']) for f in res.flows[(0, 1)]] == [([0, 1, 3], 60), ([0, 2, 3], 40)]
+    assert res.paths[(0, 1)] == [0, 1, 3]
+    report = validate_placement(net, svc, res)
+    assert report.ok
+    np.testing.assert_array_equal(ledger.bw_used, report.usage['bandwidth'])
+    ledger.release(res, svc)
+    assert not ledger.bw_used.any()
@@ -0,0 +1,79 @@
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pytest
+
+from src.InfraProperties import InfraProperties
+from src.appProperties import AppProperties
+from src.compiled import CompiledTopology
+from src.greedy import GreedyPlacement
+from src.topologyStore import PropertiesCache, open_infra, open_network_graph, open_store, save_infra, write_store
+
+from tests.helpers import APP_PATH, INFRA_PATH
+
+
+def assert_same_topology(a, b):
+    for name in CompiledTopology.ARRAY_FIELDS:
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+    assert a.index == b.index
+    assert a.edge_pos == b.edge_pos
+
+
+def test_arrays_round_trip_aligned_and_read_only(tmp_path):
+    path = str(tmp_path / 'x.bin')
+    arrays = {'a': np.arange(5, dtype=np.int64), 'b': np.linspace(0, 1, 7), 'empty': np.zeros(0, dtype=np.uint8)}
+    write_store(path, 'test', arrays, {'answer': 42})
+    meta, mapped = open_store(path, 'test')
+    assert meta == {'answer': 42}
+    for name, a in arrays.items():
+        np.testing.assert_array_equal(mapped[name], a)
+        assert not mapped[name].flags.writeable
+    assert (mapped['b'].ctypes.data - mapped['a'].ctypes.data) % 64 == 0
+    with pytest.raises(ValueError):
+        open_store(path, 'infra')
+
+
+def test_infra_store_matches_the_parsed_file(tmp_path, infra, net):
+    path = str(tmp_path / 'infra.bin')
+    save_infra(path, infra)
+    stored, topo = open_infra(path)
+    assert stored.to_dict() == infra.to_dict()
+    assert_same_topology(topo, net.compile())
+
+
+def test_mapped_graph_places_and_pickles_as_its_path(tmp_path, net, svc):
+    path = str(tmp_path / 'infra.bin')
+    save_infra(path, InfraProperties.from_file(INFRA_PATH))
+    mapped = open_network_graph(path)
+    assert GreedyPlacement().place(svc, mapped).mapping == GreedyPlacement().place(svc, net).mapping
+    blob = pickle.dumps(mapped)
+    assert len(blob) < 200
+    assert_same_topology(pickle.loads(blob).compile(), net.compile())
+    # an edited graph no longer matches the file, so it pickles in full
+    mapped.set_link_latency(0, 1, 1)
+    copy = pickle.loads(pickle.dumps(mapped))
+    assert copy.G.edges[0, 1]['latency'] == 1
+
+
+def test_cache_is_keyed_by_content(tmp_path):
+    cache = PropertiesCache(str(tmp_path / 'cache'))
+    first = cache.infra(INFRA_PATH).to_dict()
+    assert len(os.listdir(cache.cache_dir)) == 1
+    renamed = str(tmp_path / 'renamed.properties')
+    shutil.copy(INFRA_PATH, renamed)
+    assert cache.store_path(renamed, 'infra') == cache.store_path(INFRA_PATH, 'infra')
+    assert cache.infra(renamed).to_dict() == first
+    assert len(os.listdir(cache.cache_dir)) == 1
+    assert cache.app(APP_PATH).to_dict() == AppProperties.from_file(APP_PATH).to_dict()
+    assert len(os.listdir(cache.cache_dir)) == 2
+
+
+def test_corrupt_store_is_rebuilt(tmp_path):
+    cache = PropertiesCache(str(tmp_path))
+    path = cache.store_path(INFRA_PATH, 'infra')
+    with open(path, 'wb') as f:
+        f.write(b'garbage')
+    assert cache.infra(INFRA_PATH).to_dict() == InfraProperties.from_file(INFRA_PATH).to_dict()
+    assert open_store(path, 'infra')[0]['source'] == os.path.abspath(INFRA_PATH)
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from mappingUnitTest import MappingUnitTest
+from src.base import PlacementResult
+from src.greedy import GreedyPlacement
+from src.networkGraph import NetworkGraph
+from src.serviceGraph import ServiceGraph
+from src.validation import KINDS, validate_placement, validate_placements
+
+from tests.helpers import make_app, make_infra
+
+
+def line():
+    """Hosts 0 - 1 - 2 with 4 CPUs each, 100 bandwidth and 10 ms per link; two components."""
+    net = NetworkGraph.from_infra_dict(make_infra([(4, 100)] * 3, [(0, 1, 100, 10), (1, 2, 100, 10)]))
+    svc = ServiceGraph.from_app_dict(make_app([(3, 10), (3, 10)], [(0, 1, 60, 25)]))
+    return net, svc
+
+
+def result(mapping, paths, flows=None):
+    return PlacementResult(mapping=mapping, paths=paths, meta={}, flows=flows or {})
+
+
+def kinds(report):
+    return [v.kind for v in report.violations]
+
+
+def test_valid_placement_agrees_with_mapping_unit_test(net, svc, capsys):
+    res = GreedyPlacement().place(svc, net)
+    report = validate_placement(net, svc, res)
+    assert report.ok
+    assert report.checked['components'] == len(res.mapping)
+    MappingUnitTest.run_tests(net, svc, res)
+    assert 'All Mapping Unit Tests Passed!' in capsys.readouterr().out
+    topo = net.compile()
+    cpu = dict.fromkeys(res.mapping.values(), 0)
+    for c, h in res.mapping.items():
+        cpu[h] += svc.G.nodes[c]['cpu']
+    assert {int(topo.node_ids[h]): u for h, u in enumerate(report.usage['cpu']) if u} == cpu
+
+
+@pytest.mark.parametrize('mapping, paths, expected', [
+    ({0: 0, 1: 2, 7: 1}, {(0, 1): [0, 1, 2]}, ['unknown_component']),
+    ({0: 0}, {}, ['unmapped_component']),
+    ({0: 0, 1: 9}, {(0, 1): [0, 1]}, ['unknown_host']),
+    ({0: 0, 1: 2}, {}, ['unrouted']),
+    ({0: 0, 1: 2}, {(0, 1): [0, 1, 2], (1, 0): [2, 1, 0]}, ['unknown_service_link']),
+    ({0: 0, 1: 2}, {(0, 1): [0, 2]}, ['missing_link']),
+    ({0: 0, 1: 2}, {(0, 1): [0, 1, 0, 1, 2]}, ['cycle', 'latency', 'bandwidth']),
+    ({0: 0, 1: 0}, {}, ['cpu']),
+])
+def test_each_broken_constraint_is_reported(mapping, paths, expected):
+    net, svc = line()
+    report = validate_placement(net, svc, result(mapping, paths))
+    assert kinds(report) == expected
+    assert kinds(report) == sorted(kinds(report), key=KINDS.index)
+    with pytest.raises(AssertionError):
+        report.raise_for_violations()
+
+
+def test_latency_and_capacity_carry_value_and_limit():
+    net, svc = line()
+    svc.G.edges[0, 1]['latency'] = 15
+    report = validate_placement(net, svc, result({0: 0, 1: 2}, {(0, 1): [0, 1, 2]}))
+    (v,) = report.violations
+    assert (v.kind, v.subject, v.value, v.limit) == ('latency', (0, 1), 20.0, 15.0)
+    assert report.to_dict()['violations'][0] == {'kind': 'latency', 'subject': [0, 1], 'message': v.message,
+                                                 'value': 20.0, 'limit': 15.0}
+
+
+def test_shared_capacity_is_checked_across_apps():
+    net, svc = line()
+    one = result({0: 0, 1: 1}, {(0, 1): [0, 1]})
+    assert validate_placements(net, [(one, svc)]).ok
+    report = validate_placements(net, [(one, svc), (result({0: 2, 1: 1}, {(0, 1): [2, 1]}), svc)])
+    # host 1 runs 6 of 4 CPUs; link 0->1 carries 60 of 100 only once
+    assert kinds(report) == ['cpu']
+    assert report.violations[0].app is None and report.violations[0].subject == 1
+    bad = validate_placements(net, [(one, svc), (result({0: 2}, {}), svc)])
+    assert [(v.kind, v.app) for v in bad.violations] == [('unmapped_component', 1)]
+
+
+def test_split_link_paths_use_their_share():
+    svc = line()[1]
+    net = NetworkGraph.from_infra_dict(make_infra([(4, 100)] * 3, [(0, 1, 40, 5), (0, 2, 40, 5), (2, 1, 40, 5)]))
+    flows = [{'path': [0, 1], 'bandwidth': 30, 'latency': 5}, {'path': [0, 2, 1], 'bandwidth': 30, 'latency': 10}]
+    ok = result({0: 0, 1: 1}, {(0, 1): [0, 1]}, {(0, 1): flows})
+    assert validate_placement(net, svc, ok).ok
+    flows[1]['bandwidth'] = 20
+    report = validate_placement(net, svc, ok)
+    assert kinds(report) == ['split_bandwidth']
+    assert report.violations[0].value == 50 and report.violations[0].limit == 60
+    np.testing.assert_array_equal(report.usage['bandwidth'][net.compile().edge_id(0, 1)], 30)